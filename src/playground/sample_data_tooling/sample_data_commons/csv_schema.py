@@ -0,0 +1,208 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+csv_schema.py gives the columns of a CSV file a type once (inferred from a sample, or given as a schema) and converts
+whole columns to that type at a time with NumPy, instead of evaluating every cell in Python. CSV data is then sent as
+numbers, booleans and unix time rather than strings, and CSV templates have their argument lists parsed a column at a time.
+
+Column types:
+    - "string": Values are kept as they are
+    - "integer", "float", "boolean": Numbers and true/false values
+    - "date": ISO 8601 dates, converted to unix time in milliseconds (naive dates are taken as UTC)
+    - "epoch_second", "epoch_millis": Unix time in seconds or milliseconds, converted to unix time in milliseconds
+    - "args": Field types with arguments in CSV templates (e.g. ["integer", 1, 5]), parsed into lists
+
+Functions:
+    - validate_schema(): Validates a schema dict
+    - infer_column_type(): Infers the type of a column from its values
+    - infer_csv_schema(): Infers the type of every column of a list of rows
+    - coerce_column(): Converts a column of strings to a type
+    - coerce_rows(): Converts the columns of a list of rows with a schema
+"""
+
+# Standard libraries
+from datetime import datetime, timezone
+from ast import literal_eval
+from json import loads
+import warnings
+import re
+
+import numpy as np
+
+
+COLUMN_TYPES = ("string", "integer", "float", "boolean", "date", "epoch_second", "epoch_millis", "args")
+
+# Integers with leading zeros (e.g. zip codes) are kept as strings
+INTEGER_PATTERN = re.compile(r"-?(0|[1-9][0-9]*)")
+FLOAT_PATTERN = re.compile(r"-?((0|[1-9][0-9]*)(\.[0-9]*)?|\.[0-9]+)([eE][-+]?[0-9]+)?")
+DATE_PATTERN = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}([T ][0-9]{2}:[0-9]{2}(:[0-9]{2}(\.[0-9]+)?)?(Z|[+-][0-9]{2}:?[0-9]{2})?)?")
+TRUE_VALUES = ("true", "t", "yes", "y")
+FALSE_VALUES = ("false", "f", "no", "n")
+
+
+def validate_schema(schema:dict):
+    """
+    Validates that a schema is a dict of column names to column types
+
+    Raises:
+        - TypeError: csv_schema should be a dict of column names to column types
+        - ValueError: column types should be one of COLUMN_TYPES
+    """
+    if type(schema) is not dict or any(type(field) is not str for field in schema):
+        raise TypeError("csv_schema should be a dict of column names to column types")
+    for column_type in schema.values():
+        if column_type not in COLUMN_TYPES:
+            raise ValueError("column types should be one of " + ", ".join(COLUMN_TYPES))
+
+
+def infer_column_type(values:list) -> str:
+    """
+    Infers the type of a column from its values (empty values are ignored): the narrowest of integer, float, boolean, and
+    date that every value matches, otherwise string
+
+    Arguments:
+        - values: A list of strings (or None for missing values)
+
+    Returns:
+        - One of COLUMN_TYPES (never "epoch_second", "epoch_millis" or "args", which only a given schema can ask for)
+    """
+    values = [value for value in values if value]
+    if not values:
+        return "string"
+    if all(INTEGER_PATTERN.fullmatch(value) for value in values):
+        return "integer"
+    if all(FLOAT_PATTERN.fullmatch(value) for value in values):
+        return "float"
+    if all(value.lower() in TRUE_VALUES + FALSE_VALUES for value in values):
+        return "boolean"
+    if all(DATE_PATTERN.fullmatch(value) for value in values):
+        return "date"
+    return "string"
+
+
+def infer_csv_schema(rows:list, sample_size:int = 1000) -> dict:
+    """
+    Infers the type of every column of a list of rows from its first sample_size rows
+
+    Arguments:
+        - rows: A list of dicts (e.g. from csv.DictReader)
+        - sample_size: How many rows the types are inferred from (default is 1000)
+
+    Returns:
+        - A schema dict of column name to column type
+    """
+    sample = rows[:sample_size]
+    fields = list(sample[0].keys()) if sample else []
+    return {field: infer_column_type([row.get(field) for row in sample]) for field in fields}
+
+
+def _parse_dates(values:np.ndarray) -> np.ndarray:
+    """
+    Converts an array of ISO 8601 strings to unix time in milliseconds, falling back to datetime for what NumPy cannot parse
+    """
+    try:
+        with warnings.catch_warnings():
+            # NumPy converts timezone offsets to UTC, but warns that datetime64 does not keep them
+            warnings.simplefilter("ignore")
+            return np.array(values, dtype = "datetime64[ms]").astype(np.int64)
+    except ValueError:
+        milliseconds = []
+        for value in values:
+            date = datetime.fromisoformat(str(value))
+            if date.tzinfo is None:
+                date = date.replace(tzinfo = timezone.utc)
+            milliseconds.append(int(date.timestamp() * 1000))
+        return np.array(milliseconds, dtype = np.int64)
+
+
+def _parse_args(values:list) -> list:
+    """
+    Parses a column of CSV template cells: every cell holding an argument list is parsed on its own with the JSON parser,
+    falling back to literal_eval for Python literals (e.g. single quotes, or a tuple such as "a", 1). Cells are never
+    parsed together, since a cell may hold more than one value.
+    """
+    parsed = []
+    for value in values:
+        if value and "," in value:
+            try:
+                value = loads(value)
+            except ValueError:
+                value = literal_eval(value)
+        parsed.append(value)
+    return parsed
+
+
+def coerce_column(values:list, column_type:str) -> list:
+    """
+    Converts a column of strings to a type, a whole column at a time
+
+    Arguments:
+        - values: A list of strings (empty strings and None are missing values and become None)
+        - column_type: One of COLUMN_TYPES
+
+    Returns:
+        - A list of Python values (ints, floats, bools, strings, lists, or None)
+
+    Raises:
+        - ValueError: column_type should be one of COLUMN_TYPES
+        - ValueError: A value cannot be converted to column_type
+    """
+    if column_type not in COLUMN_TYPES:
+        raise ValueError("column_type should be one of " + ", ".join(COLUMN_TYPES))
+    if column_type == "string":
+        return list(values)
+    if column_type == "args":
+        return _parse_args(values)
+
+    present = [i for i, value in enumerate(values) if value]
+    strings = np.array([values[i].strip() for i in present], dtype = str)
+    if column_type == "integer" or column_type == "epoch_millis":
+        converted = strings.astype(np.int64)
+    elif column_type == "epoch_second":
+        converted = strings.astype(np.float64) * 1000
+        converted = converted.astype(np.int64)
+    elif column_type == "float":
+        converted = strings.astype(np.float64)
+    elif column_type == "boolean":
+        lowered = np.char.lower(strings)
+        unknown = ~np.isin(lowered, TRUE_VALUES + FALSE_VALUES)
+        if unknown.any():
+            raise ValueError("%s is not a boolean value" % (strings[unknown][0]))
+        converted = np.isin(lowered, TRUE_VALUES)
+    else:
+        converted = _parse_dates(strings)
+
+    if len(present) == len(values):
+        return converted.tolist()
+    column = [None] * len(values)
+    for i, value in zip(present, converted.tolist()):
+        column[i] = value
+    return column
+
+
+def coerce_rows(rows:list, schema:dict) -> list:
+    """
+    Converts the columns of a list of rows with a schema; columns that are not in the schema are kept as they are
+
+    Arguments:
+        - rows: A list of dicts (e.g. from csv.DictReader)
+        - schema: A dict of column name to column type
+
+    Returns:
+        - A new list of dicts with converted values
+
+    Raises:
+        - ValueError: Column could not be converted to its type
+    """
+    if not rows:
+        return []
+    fields = list(rows[0].keys())
+    columns = {}
+    for field in fields:
+        column = [row.get(field) for row in rows]
+        try:
+            columns[field] = coerce_column(column, schema[field]) if field in schema else column
+        except ValueError as e:
+            raise ValueError("Column %s could not be converted to %s: %s" % (field, schema[field], e))
+    return [dict(zip(fields, values)) for values in zip(*columns.values())]
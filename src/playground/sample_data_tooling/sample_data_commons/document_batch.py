@@ -0,0 +1,199 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+document_batch.py contains the columnar representation of generated documents: one list per field instead of one
+dict (and one JSON string) per document. Rows are only materialized as dicts when they are read, e.g. when the bulk
+request body is built, so a day of documents never exists as a list of dicts in memory.
+
+Classes:
+    - DocumentBatch: A batch of documents stored as columns
+
+Functions:
+    - timestamp_column(): Returns a lazy column of unix timestamps (in milliseconds) spaced a number of minutes apart
+    - timestamp_sequence(): Returns an endless iterator of unix timestamps spaced a number of minutes apart
+"""
+
+from datetime import datetime
+from itertools import count
+from json import dumps
+
+# How many units of each supported unix time unit make one second
+TIMESTAMP_UNITS = {"ms": 1000, "s": 1}
+
+
+def _timestamp_start(current_date:datetime, minutes:int, unit:str) -> tuple:
+    """
+    Validates the arguments shared by timestamp_column() and timestamp_sequence() and returns the first timestamp and the step
+    """
+    if type(current_date) is not datetime:
+        raise TypeError("current_date should be a datetime object")
+    if type(minutes) is not int or minutes < 0:
+        raise ValueError("minutes should be a positive integer")
+    if unit not in TIMESTAMP_UNITS:
+        raise ValueError("unit should be \"ms\" or \"s\"")
+    return int(current_date.strftime("%s")) * TIMESTAMP_UNITS[unit], minutes * 60 * TIMESTAMP_UNITS[unit]
+
+
+def timestamp_column(current_date:datetime, number:int, minutes:int, unit:str = "ms") -> range:
+    """
+    Function that returns the timestamps of number documents starting at current_date, each minutes apart
+
+    Arguments:
+        - current_date: The date of the first document
+        - number: How many timestamps to return
+        - minutes: The time interval between two documents
+        - unit: The unit of the unix timestamps, "ms" (milliseconds) or "s" (seconds) (default is "ms")
+
+    Returns:
+        - A range of unix timestamps (a list if minutes is 0); a range computes values on access, so one column can be
+          shared by every batch of the same day
+
+    Raises:
+        - TypeError: current_date should be a datetime object
+        - ValueError: number should be a positive integer
+        - ValueError: minutes should be a positive integer
+        - ValueError: unit should be "ms" or "s"
+    """
+    if type(number) is not int or number < 0:
+        raise ValueError("number should be a positive integer")
+    start, step = _timestamp_start(current_date, minutes, unit)
+    if not minutes:
+        return [start] * number
+    return range(start, start + number * step, step)
+
+
+def timestamp_sequence(current_date:datetime, minutes:int, unit:str = "ms"):
+    """
+    Function that returns the timestamps of documents starting at current_date, each minutes apart, for as many documents
+    as there are (e.g. to number a stream whose length is not known in advance)
+
+    Arguments:
+        - The same as timestamp_column(), without number
+
+    Returns:
+        - An endless iterator of unix timestamps
+
+    Raises:
+        - TypeError: current_date should be a datetime object
+        - ValueError: minutes should be a positive integer
+        - ValueError: unit should be "ms" or "s"
+    """
+    start, step = _timestamp_start(current_date, minutes, unit)
+    return count(start, step)
+
+
+class DocumentBatch:
+    """
+    DocumentBatch class: a batch of documents stored as one column (a list or any other sequence, like a range) per field
+
+    Arguments:
+        - columns: A dict of field name to column; every column must have the same length
+        - length: The number of documents in the batch (default is the length of the columns, or 0 if there are none)
+
+    Raises:
+        - TypeError: columns should be a dict of field names to columns
+        - ValueError: length should be a positive integer
+        - ValueError: every column should have the same length as the batch
+    """
+
+    def __init__(self, columns:dict, length:int = None):
+        # Validate input
+        if type(columns) is not dict:
+            raise TypeError("columns should be a dict of field names to columns")
+        if length is None:
+            length = len(next(iter(columns.values()))) if columns else 0
+        if type(length) is not int or length < 0:
+            raise ValueError("length should be a positive integer")
+
+        self.length = length
+        self.columns = {}
+        for name, values in columns.items():
+            self.set_column(name, values)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index:int) -> dict:
+        """
+        Materializes one document
+
+        Arguments:
+            - index: The position of the document in the batch
+
+        Returns:
+            - The document as a dict, with fields in column order
+        """
+        if type(index) is not int:
+            raise TypeError("index should be an integer")
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            raise IndexError("DocumentBatch index out of range")
+        return {name: values[index] for name, values in self.columns.items()}
+
+    def __iter__(self):
+        return self.rows()
+
+    def column(self, name:str):
+        """
+        Returns the column of a field
+
+        Raises:
+            - KeyError: If the batch has no such field
+        """
+        return self.columns[name]
+
+    def set_column(self, name:str, values):
+        """
+        Adds or replaces the column of a field (a replaced column keeps its position in the documents)
+
+        Arguments:
+            - name: The field name
+            - values: The column, as a list or any other sequence of the batch's length
+
+        Raises:
+            - TypeError: name should be a string
+            - ValueError: every column should have the same length as the batch
+        """
+        if type(name) is not str:
+            raise TypeError("name should be a string")
+        if len(values) != self.length:
+            raise ValueError("every column should have the same length as the batch")
+        self.columns[name] = values
+
+    def rows(self, start:int = 0, stop:int = None):
+        """
+        Materializes documents one at a time
+
+        Arguments:
+            - start: The position of the first document (default is 0)
+            - stop: The position after the last document (default is the end of the batch)
+
+        Returns:
+            - A generator of documents as dicts
+        """
+        stop = self.length if stop is None else min(stop, self.length)
+        names = list(self.columns)
+        columns = list(self.columns.values())
+        for index in range(start, stop):
+            yield dict(zip(names, [values[index] for values in columns]))
+
+    def json_rows(self, start:int = 0, stop:int = None):
+        """
+        Serializes documents one at a time (see rows())
+
+        Returns:
+            - A generator of documents as JSON strings
+        """
+        for row in self.rows(start, stop):
+            yield dumps(row, default = str)
+
+    def to_list(self) -> list:
+        """
+        Materializes the whole batch
+
+        Returns:
+            - A list of documents as JSON strings, the same format ingest() returns for non-columnar batches
+        """
+        return list(self.json_rows())
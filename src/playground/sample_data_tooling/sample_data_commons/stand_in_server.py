@@ -0,0 +1,656 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+stand_in_server.py is a local HTTP stand-in for the parts of OpenSearch this tooling calls, so ingestion, the jobs and
+the ingest benchmarks can run end to end with no cluster and no network. It answers _bulk (index and create actions,
+with 409 conflicts for an _id an index already holds), the index APIs (create, exists, get, delete, _settings,
+_refresh, _forcemerge), _cat/indices, _count, _nodes/stats, the anomaly detection detector APIs that
+AnomalyDetection calls, and the index state management (ISM) policy APIs the retention engine calls. Indices only keep their settings, mappings, document count and document IDs (and, with
+keep_documents, the documents themselves), so memory stays small while millions of documents are sent.
+
+The stand-in can be made to behave like a loaded cluster: every request can wait latency seconds (plus
+latency_per_document for every document of a BULK call), whole BULK calls can be rejected with 429 at rejection_rate,
+and every document of a BULK call can be rejected with 429 es_rejected_execution_exception at item_rejection_rate or fail
+with 400 mapper_parsing_exception at item_failure_rate. Searches only answer a range query and terms aggregations,
+over the documents kept with keep_documents, and _count ignores queries. ISM
+policies are attached to indices (through their ism_template or _plugins/_ism/add) but only run when run_policies() is
+called; like OpenSearch, an ism_template only applies to indices whose creation_date is after its last_updated_time.
+
+Usage:
+    $ python3 stand_in_server.py -port 9200 -latency 0.005 -item_rejection_rate 0.01
+
+Classes:
+    - StandInServer: The stand-in server, run on a background thread
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+from argparse import ArgumentParser
+from json import dumps, loads
+from fnmatch import fnmatchcase
+from threading import Thread, RLock
+from time import sleep, time
+from uuid import uuid4
+import random
+import gzip
+
+
+# Arguments to configure how the stand-in behaves when it is run on its own
+parser = ArgumentParser(description = "Run a local stand-in for the OpenSearch APIs used by the sample data tooling")
+parser.add_argument("-host", help = "The address to listen on", default = "127.0.0.1")
+parser.add_argument("-port", help = "The port to listen on", type = int, default = 9200)
+parser.add_argument("-latency", help = "How many seconds every request waits", type = float, default = 0)
+parser.add_argument("-latency_per_document", help = "How many more seconds a BULK call waits per document", type = float, default = 0)
+parser.add_argument("-rejection_rate", help = "The share of BULK calls rejected with 429", type = float, default = 0)
+parser.add_argument("-item_rejection_rate", help = "The share of documents rejected with 429", type = float, default = 0)
+parser.add_argument("-item_failure_rate", help = "The share of documents that fail with 400", type = float, default = 0)
+parser.add_argument("-seed", help = "The seed of the rejections and failures", type = int, default = None)
+
+
+class _StandInError(Exception):
+    """
+    An error answered with an OpenSearch error body
+    """
+
+    def __init__(self, status:int, error_type:str, reason:str):
+        super().__init__(reason)
+        self.status = status
+        self.error_type = error_type
+        self.reason = reason
+
+    def body(self) -> dict:
+        error = {"type": self.error_type, "reason": self.reason}
+        return {"error": dict(error, root_cause = [error]), "status": self.status}
+
+
+def _parse_age(age:str) -> float:
+    """
+    Returns an ISM age (e.g. "3d", "12h") in milliseconds
+    """
+    units = {"d": 86400000, "h": 3600000, "m": 60000, "s": 1000, "ms": 1}
+    number = age.rstrip("dhms")
+    return float(number) * units[age[len(number):]]
+
+
+def _flatten_settings(settings:dict, prefix:str = "") -> dict:
+    """
+    Flattens nested settings into "index.*" keys with string values, the way OpenSearch stores them
+    """
+    flat = {}
+    for key, value in (settings or {}).items():
+        key = prefix + key
+        if isinstance(value, dict):
+            flat.update(_flatten_settings(value, key + "."))
+            continue
+        if not key.startswith("index."):
+            key = "index." + key
+        flat[key] = value if value is None or type(value) is str else dumps(value).strip('"')
+    return flat
+
+
+def _nest_settings(flat:dict) -> dict:
+    nested = {}
+    for key, value in flat.items():
+        parent = nested
+        parts = key.split(".")
+        for part in parts[:-1]:
+            parent = parent.setdefault(part, {})
+        parent[parts[-1]] = value
+    return nested
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """
+    Routes every request to the StandInServer the HTTP server belongs to
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        stand_in = self.server.stand_in
+        url = urlsplit(self.path)
+        segments = [unquote(segment) for segment in url.path.split("/") if segment]
+        params = {key: values[-1] for key, values in parse_qs(url.query, keep_blank_values = True).items()}
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if body and self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+
+        try:
+            status, response = stand_in.handle(self.command, segments, params, body)
+        except _StandInError as e:
+            status, response = e.status, e.body()
+        except ValueError as e:
+            status, response = 400, _StandInError(400, "parse_exception", str(e)).body()
+
+        if isinstance(response, str):
+            data, content_type = response.encode(), "text/plain; charset=UTF-8"
+        else:
+            data, content_type = dumps(response).encode(), "application/json; charset=UTF-8"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+
+    do_GET = do_PUT = do_POST = do_DELETE = do_HEAD = _handle
+
+
+class StandInServer:
+    """
+    StandInServer class: serves the stand-in on a background thread; use it as a context manager, or call start() and
+    stop(). Its state can be read directly: indices maps every index name to its "settings" (flat), "mappings", "count"
+    and "ids" (and "documents" with keep_documents), detectors maps every detector ID to its "detector" body and "state",
+    and stats counts "requests", "bulk_requests", "documents" (indexed), "bytes" (of BULK bodies, decompressed),
+    "rejected_requests", "rejected_items", "failed_items" and "conflicts".
+
+    Arguments:
+        - host: The address to listen on (default is "127.0.0.1")
+        - port: The port to listen on; 0 picks a free port (default is 0)
+        - latency: How many seconds every request waits before it is answered (default is 0)
+        - latency_per_document: How many more seconds a BULK call waits for every document it holds (default is 0)
+        - rejection_rate: The share of BULK calls rejected as a whole with 429 (default is 0)
+        - item_rejection_rate: The share of documents rejected with 429 es_rejected_execution_exception (default is 0)
+        - item_failure_rate: The share of documents that fail with 400 mapper_parsing_exception (default is 0)
+        - keep_documents: Whether the source of every document is kept, e.g. to check what a test sent (default is False)
+        - seed: The seed of the rejections and failures, to make them repeatable (default is None)
+
+    Raises:
+        - TypeError: host should be a string
+        - ValueError: port should be an integer between 0 and 65535
+        - ValueError: latency and latency_per_document should be non-negative numbers
+        - ValueError: rejection_rate, item_rejection_rate and item_failure_rate should be numbers between 0 and 1
+        - TypeError: keep_documents should be a boolean flag
+    """
+
+    def __init__(self,
+        host:str = "127.0.0.1",
+        port:int = 0,
+        latency:float = 0,
+        latency_per_document:float = 0,
+        rejection_rate:float = 0,
+        item_rejection_rate:float = 0,
+        item_failure_rate:float = 0,
+        keep_documents:bool = False,
+        seed:int = None
+    ):
+        # Validate input
+        if type(host) is not str:
+            raise TypeError("host should be a string")
+        if type(port) is not int or not 0 <= port <= 65535:
+            raise ValueError("port should be an integer between 0 and 65535")
+        if any(type(value) not in (int, float) or value < 0 for value in (latency, latency_per_document)):
+            raise ValueError("latency and latency_per_document should be non-negative numbers")
+        if any(type(value) not in (int, float) or not 0 <= value <= 1 for value in (rejection_rate, item_rejection_rate, item_failure_rate)):
+            raise ValueError("rejection_rate, item_rejection_rate and item_failure_rate should be numbers between 0 and 1")
+        if type(keep_documents) is not bool:
+            raise TypeError("keep_documents should be a boolean flag")
+
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.latency_per_document = latency_per_document
+        self.rejection_rate = rejection_rate
+        self.item_rejection_rate = item_rejection_rate
+        self.item_failure_rate = item_failure_rate
+        self.keep_documents = keep_documents
+        self.random = random.Random(seed)
+        self.lock = RLock()
+        self.indices = {}
+        self.detectors = {}
+        self.policies = {}
+        self.stats = {"requests": 0, "bulk_requests": 0, "documents": 0, "bytes": 0, "rejected_requests": 0, "rejected_items": 0, "failed_items": 0, "conflicts": 0}
+        self.httpd = None
+        self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        """
+        The base url of the stand-in (e.g. "http://127.0.0.1:54321"), which can be passed as the url of the jobs
+        """
+        return "http://%s:%d" % (self.host, self.port)
+
+    def start(self):
+        """
+        Starts listening on a background thread and returns the server
+
+        Raises:
+            - OSError: if the port cannot be listened on
+        """
+        if self.httpd is None:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), _StandInHandler)
+            self.httpd.daemon_threads = True
+            self.httpd.stand_in = self
+            self.port = self.httpd.server_address[1]
+            self.thread = Thread(target = self.httpd.serve_forever, daemon = True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stops listening and waits for the background thread
+        """
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.thread.join()
+            self.httpd = None
+            self.thread = None
+
+    def client(self, **kwargs) -> OpenSearch:
+        """
+        Returns an OpenSearch Python client object connected to the stand-in (with compressed request bodies, like the jobs'
+        clients); kwargs are passed on to OpenSearch
+        """
+        return OpenSearch(hosts = [{"host": self.host, "port": self.port}], http_compress = kwargs.pop("http_compress", True), **kwargs)
+
+    def async_client(self, **kwargs):
+        """
+        Returns an AsyncOpenSearch client object connected to the stand-in (requires aiohttp); kwargs are passed on to
+        AsyncOpenSearch
+        """
+        from opensearchpy import AsyncOpenSearch
+        return AsyncOpenSearch(hosts = [{"host": self.host, "port": self.port}], http_compress = kwargs.pop("http_compress", True), **kwargs)
+
+    def documents(self, index_name:str) -> list:
+        """
+        Returns the documents of an index, in the order they were indexed (requires keep_documents)
+
+        Raises:
+            - ValueError: documents are only kept with keep_documents
+        """
+        if not self.keep_documents:
+            raise ValueError("documents are only kept with keep_documents")
+        with self.lock:
+            return list(self.indices.get(index_name, {}).get("documents", {}).values())
+
+    def run_policies(self, now:float = None) -> list:
+        """
+        Runs one pass of the ISM policies: every index whose policy's first transition is due (by its min_index_age,
+        counted from the index's creation_date) moves to the next state, and is deleted if that state has a delete action
+
+        Arguments:
+            - now: The time of the pass, in seconds since the epoch (default is the current time)
+
+        Returns:
+            - The sorted names of the deleted indices
+        """
+        now = time() if now is None else now
+        deleted = []
+        with self.lock:
+            for index_name, index in list(self.indices.items()):
+                policy = self.policies.get(index.get("policy_id"), {}).get("policy")
+                if policy is None:
+                    continue
+                states = {state["name"]: state for state in policy["states"]}
+                for transition in states[policy["default_state"]].get("transitions", []):
+                    age = _parse_age(transition.get("conditions", {}).get("min_index_age", "0ms"))
+                    if now * 1000 - int(index["settings"]["index.creation_date"]) >= age:
+                        if any("delete" in action for action in states[transition["state_name"]].get("actions", [])):
+                            del self.indices[index_name]
+                            deleted.append(index_name)
+                        break
+        return sorted(deleted)
+
+    def handle(self, method:str, segments:list, params:dict, body:bytes) -> tuple:
+        """
+        Answers one request
+
+        Arguments:
+            - method: The HTTP method
+            - segments: The decoded segments of the path
+            - params: The query string parameters
+            - body: The request body, decompressed
+
+        Returns:
+            - A tuple of the HTTP status and the response (a dict or list sent as JSON, or a string sent as text)
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+        if self.latency:
+            sleep(self.latency)
+
+        first = segments[0] if segments else None
+        if not segments:
+            return 200, {"name": "stand-in", "cluster_name": "stand-in", "version": {"distribution": "opensearch", "number": "2.11.0"}, "tagline": "The OpenSearch Project: https://opensearch.org/"}
+        if segments[-1] == "_bulk" and len(segments) <= 2 and method in ("POST", "PUT"):
+            return self._bulk(body, segments[0] if len(segments) == 2 else None)
+        if first == "_cat" and segments[1:2] == ["indices"]:
+            return self._cat_indices(segments[2] if len(segments) > 2 else "*", params)
+        if first == "_nodes":
+            return self._nodes_stats()
+        if segments[:2] == ["_plugins", "_anomaly_detection"]:
+            return self._anomaly_detection(method, segments[2:], params, body)
+        if segments[:2] == ["_plugins", "_ism"]:
+            return self._index_state_management(method, segments[2:], params, body)
+        if segments[1:] == ["_search"]:
+            return self._search(segments[0], loads(body or b"{}"))
+        if first == "_count" or segments[1:] == ["_count"]:
+            return self._count(segments[0] if len(segments) == 2 else "*")
+        if first == "_refresh" or first == "_forcemerge" or segments[1:] in (["_refresh"], ["_forcemerge"]):
+            indices = self._resolve(segments[0] if len(segments) == 2 else "*")
+            return 200, {"_shards": {"total": len(indices), "successful": len(indices), "failed": 0}}
+        if segments[1:2] == ["_settings"] or first == "_settings":
+            pattern = segments[0] if segments[1:2] == ["_settings"] else "*"
+            names = segments[-1] if segments[-1] != "_settings" else None
+            if method == "PUT":
+                return self._put_settings(pattern, loads(body or b"{}"))
+            return self._get_settings(pattern, names, params)
+        if len(segments) == 1 and not first.startswith("_"):
+            return self._index(method, first, params, body)
+        raise _StandInError(404, "stand_in_exception", "no handler found for uri [/%s] and method [%s]" % ("/".join(segments), method))
+
+    def _resolve(self, pattern:str, must_exist:bool = True) -> list:
+        """
+        Returns the index names matching a comma-separated list of names and wildcard patterns
+
+        Raises:
+            - _StandInError: 404 index_not_found_exception for a name without wildcards that does not exist
+        """
+        names = []
+        with self.lock:
+            existing = list(self.indices)
+        for part in pattern.split(","):
+            if part in ("_all", "*"):
+                part = "*"
+            if "*" in part:
+                names += [name for name in existing if fnmatchcase(name, part) and name not in names]
+            elif part in existing:
+                if part not in names:
+                    names.append(part)
+            elif must_exist:
+                raise _StandInError(404, "index_not_found_exception", "no such index [%s]" % (part))
+        return names
+
+    def _create_index(self, index_name:str, body:dict) -> dict:
+        settings = {"index.number_of_shards": "1", "index.number_of_replicas": "1"}
+        settings.update(_flatten_settings(body.get("settings")))
+        # Like OpenSearch, a creation_date given at creation is kept
+        settings.setdefault("index.creation_date", str(int(time() * 1000)))
+        settings.update({"index.uuid": uuid4().hex, "index.provided_name": index_name})
+        index = {"settings": settings, "mappings": body.get("mappings", {}), "aliases": body.get("aliases", {}), "count": 0, "ids": set()}
+        if self.keep_documents:
+            index["documents"] = {}
+
+        # The policy with the highest priority whose ism_template matches the index is attached to it, if the index was
+        # created after the template was last updated
+        templates = [(template.get("priority", 0), policy_id) for policy_id, policy in self.policies.items()
+            for template in policy["policy"].get("ism_template") or []
+            if any(fnmatchcase(index_name, pattern) for pattern in template.get("index_patterns", []))
+            and int(settings["index.creation_date"]) > template["last_updated_time"]]
+        if templates:
+            index["policy_id"] = max(templates)[1]
+        self.indices[index_name] = index
+        return index
+
+    def _index(self, method:str, index_name:str, params:dict, body:bytes) -> tuple:
+        """
+        Answers the index APIs: HEAD (exists), PUT (create), GET (get) and DELETE (delete, of a comma-separated list of
+        names with ignore_unavailable)
+        """
+        if method == "PUT":
+            with self.lock:
+                if index_name in self.indices:
+                    raise _StandInError(400, "resource_already_exists_exception", "index [%s] already exists" % (index_name))
+                self._create_index(index_name, loads(body or b"{}"))
+            return 200, {"acknowledged": True, "shards_acknowledged": True, "index": index_name}
+
+        if method == "HEAD":
+            return (200 if self._resolve(index_name, must_exist = False) else 404), {}
+
+        names = self._resolve(index_name, must_exist = params.get("ignore_unavailable") != "true")
+        if method == "DELETE":
+            with self.lock:
+                for name in names:
+                    self.indices.pop(name, None)
+            return 200, {"acknowledged": True}
+        with self.lock:
+            return 200, {name: {
+                "aliases": self.indices[name]["aliases"],
+                "mappings": self.indices[name]["mappings"],
+                "settings": _nest_settings(self.indices[name]["settings"])
+            } for name in names if name in self.indices}
+
+    def _get_settings(self, pattern:str, names:str, params:dict) -> tuple:
+        wanted = names.split(",") if names else ["*"]
+        response = {}
+        with self.lock:
+            for index_name in self._resolve(pattern):
+                flat = {key: value for key, value in self.indices[index_name]["settings"].items() if any(fnmatchcase(key, name) for name in wanted)}
+                response[index_name] = {"settings": flat if params.get("flat_settings") == "true" else _nest_settings(flat)}
+        return 200, response
+
+    def _put_settings(self, pattern:str, body:dict) -> tuple:
+        # A null value resets a setting to its default, which the stand-in does by removing it
+        changes = _flatten_settings(body.get("settings", body))
+        with self.lock:
+            for index_name in self._resolve(pattern):
+                settings = self.indices[index_name]["settings"]
+                for key, value in changes.items():
+                    if value is None:
+                        settings.pop(key, None)
+                    else:
+                        settings[key] = value
+        return 200, {"acknowledged": True}
+
+    def _count(self, pattern:str) -> tuple:
+        with self.lock:
+            names = [name for name in self._resolve(pattern) if name in self.indices]
+            count = sum(self.indices[name]["count"] for name in names)
+        return 200, {"count": count, "_shards": {"total": len(names), "successful": len(names), "skipped": 0, "failed": 0}}
+
+    def _search(self, pattern:str, body:dict) -> tuple:
+        """
+        Answers a search with a range query (or none) and terms aggregations over the kept documents, returning no hits
+
+        Raises:
+            - _StandInError: 400 if documents are not kept, or the query or an aggregation is not supported
+        """
+        if not self.keep_documents:
+            raise _StandInError(400, "stand_in_exception", "searches need keep_documents")
+        query = body.get("query") or {"match_all": {}}
+        if set(query) - {"range", "match_all"}:
+            raise _StandInError(400, "stand_in_exception", "only range queries are supported")
+        with self.lock:
+            documents = [document for name in self._resolve(pattern) for document in self.indices[name]["documents"].values()]
+        try:
+            for field, bounds in query.get("range", {}).items():
+                documents = [document for document in documents if field in document
+                    and document[field] >= bounds.get("gte", document[field]) and document[field] <= bounds.get("lte", document[field])]
+        except TypeError as e:
+            raise _StandInError(400, "search_phase_execution_exception", str(e))
+
+        aggregations = {}
+        for name, aggregation in (body.get("aggs") or body.get("aggregations") or {}).items():
+            if set(aggregation) != {"terms"}:
+                raise _StandInError(400, "stand_in_exception", "only terms aggregations are supported")
+            counts = {}
+            for document in documents:
+                if aggregation["terms"]["field"] in document:
+                    value = document[aggregation["terms"]["field"]]
+                    counts[value] = counts.get(value, 0) + 1
+            buckets = sorted(counts.items(), key = lambda item: (-item[1], item[0]))[:aggregation["terms"].get("size", 10)]
+            aggregations[name] = {"buckets": [{"key": key, "doc_count": count} for key, count in buckets]}
+        return 200, {"took": 0, "timed_out": False, "hits": {"total": {"value": len(documents), "relation": "eq"}, "hits": []}, "aggregations": aggregations}
+
+    def _cat_indices(self, pattern:str, params:dict) -> tuple:
+        columns = params["h"].split(",") if params.get("h") else ["health", "status", "index", "uuid", "pri", "rep", "docs.count", "docs.deleted"]
+        rows = []
+        with self.lock:
+            for index_name in sorted(self._resolve(pattern)):
+                index = self.indices[index_name]
+                values = {
+                    "health": "green",
+                    "status": "open",
+                    "index": index_name,
+                    "uuid": index["settings"].get("index.uuid"),
+                    "pri": index["settings"].get("index.number_of_shards", "1"),
+                    "rep": index["settings"].get("index.number_of_replicas", "1"),
+                    "docs.count": str(index["count"]),
+                    "docs.deleted": "0"
+                }
+                rows.append({column: values.get(column) for column in columns})
+        if params.get("format") == "json":
+            return 200, rows
+        return 200, "".join(" ".join(str(row[column]) for column in columns) + "\n" for row in rows)
+
+    def _nodes_stats(self) -> tuple:
+        with self.lock:
+            write = {"threads": 1, "queue": 0, "active": 0, "rejected": self.stats["rejected_requests"] + self.stats["rejected_items"], "completed": self.stats["bulk_requests"]}
+        return 200, {"_nodes": {"total": 1, "successful": 1, "failed": 0}, "cluster_name": "stand-in", "nodes": {"stand-in": {"name": "stand-in", "thread_pool": {"write": write}}}}
+
+    def _bulk(self, body:bytes, default_index:str) -> tuple:
+        """
+        Answers a BULK call: every index or create action is indexed (creating its index if it is missing) unless it is
+        rejected or fails at the configured rates, and a create action for an _id the index holds conflicts with 409
+        """
+        lines = [line for line in body.split(b"\n") if line.strip()]
+        if len(lines) % 2:
+            raise _StandInError(400, "illegal_argument_exception", "The bulk request must be terminated by a newline [\\n]")
+        documents = len(lines) // 2
+        if self.latency_per_document:
+            sleep(self.latency_per_document * documents)
+
+        start = time()
+        with self.lock:
+            self.stats["bulk_requests"] += 1
+            if self.rejection_rate and self.random.random() < self.rejection_rate:
+                self.stats["rejected_requests"] += 1
+                raise _StandInError(429, "es_rejected_execution_exception", "rejected execution of coordinating operation")
+            self.stats["bytes"] += len(body)
+
+            items = []
+            for position in range(documents):
+                action = loads(lines[2 * position])
+                operation, meta = next(iter(action.items()))
+                if operation not in ("index", "create"):
+                    raise _StandInError(400, "illegal_argument_exception", "Unsupported action: [%s]" % (operation))
+                index_name = (meta or {}).get("_index", default_index)
+                if index_name is None:
+                    raise _StandInError(400, "action_request_validation_exception", "Validation Failed: 1: index is missing;")
+                items.append({operation: self._bulk_item(operation, index_name, (meta or {}).get("_id"), lines[2 * position + 1])})
+
+        errors = any("error" in result for item in items for result in item.values())
+        return 200, {"took": int((time() - start) * 1000), "errors": errors, "items": items}
+
+    def _bulk_item(self, operation:str, index_name:str, document_id:str, source:bytes) -> dict:
+        """
+        Indexes one document of a BULK call (with the lock held) and returns its item
+        """
+        index = self.indices.get(index_name) or self._create_index(index_name, {})
+        item = {"_index": index_name, "_id": document_id}
+        if self.item_rejection_rate and self.random.random() < self.item_rejection_rate:
+            self.stats["rejected_items"] += 1
+            error = {"type": "es_rejected_execution_exception", "reason": "rejected execution of primary operation"}
+            return dict(item, status = 429, error = error)
+        if self.item_failure_rate and self.random.random() < self.item_failure_rate:
+            self.stats["failed_items"] += 1
+            error = {"type": "mapper_parsing_exception", "reason": "failed to parse"}
+            return dict(item, status = 400, error = error)
+        if document_id is not None and document_id in index["ids"]:
+            if operation == "create":
+                self.stats["conflicts"] += 1
+                error = {"type": "version_conflict_engine_exception", "reason": "[%s]: version conflict, document already exists" % (document_id)}
+                return dict(item, status = 409, error = error)
+            index["count"] -= 1
+        if document_id is None:
+            document_id = uuid4().hex
+        index["ids"].add(document_id)
+        index["count"] += 1
+        self.stats["documents"] += 1
+        if self.keep_documents:
+            index["documents"][document_id] = loads(source)
+        return dict(item, _id = document_id, result = "created", status = 201, _version = 1)
+
+    def _anomaly_detection(self, method:str, segments:list, params:dict, body:bytes) -> tuple:
+        """
+        Answers the detector APIs AnomalyDetection calls: create, delete, _start and _stop
+        """
+        if segments[:1] != ["detectors"]:
+            raise _StandInError(404, "stand_in_exception", "unsupported anomaly detection API")
+        with self.lock:
+            if len(segments) == 1 and method == "POST":
+                detector = loads(body or b"{}")
+                if any(existing["detector"].get("name") == detector.get("name") for existing in self.detectors.values()):
+                    raise _StandInError(400, "illegal_argument_exception", "Cannot create anomaly detector with name [%s] as it's already used by detector %s" % (detector.get("name"), [key for key, value in self.detectors.items() if value["detector"].get("name") == detector.get("name")]))
+                detector_id = uuid4().hex[:20]
+                self.detectors[detector_id] = {"detector": detector, "state": "DISABLED"}
+                return 201, {"_id": detector_id, "_version": 1, "_seq_no": len(self.detectors), "_primary_term": 1, "anomaly_detector": detector}
+
+            detector_id = segments[1] if len(segments) > 1 else None
+            if detector_id not in self.detectors:
+                raise _StandInError(404, "status_exception", "AnomalyDetector is not found with id: %s" % (detector_id))
+            if len(segments) == 2 and method == "DELETE":
+                del self.detectors[detector_id]
+                return 200, {"_index": ".opendistro-anomaly-detectors", "_id": detector_id, "_version": 2, "result": "deleted"}
+            if len(segments) == 2 and method == "GET":
+                return 200, {"_id": detector_id, "_version": 1, "anomaly_detector": self.detectors[detector_id]["detector"]}
+            if len(segments) == 3 and segments[2] in ("_start", "_stop") and method == "POST":
+                historical = params.get("historical") == "true" or bool(body and loads(body).get("start_time"))
+                key = "historical_state" if historical else "state"
+                self.detectors[detector_id][key] = "RUNNING" if segments[2] == "_start" else "DISABLED"
+                return 200, {"_id": detector_id, "_version": 1, "_seq_no": 0, "_primary_term": 1}
+        raise _StandInError(404, "stand_in_exception", "unsupported anomaly detection API")
+
+    def _index_state_management(self, method:str, segments:list, params:dict, body:bytes) -> tuple:
+        """
+        Answers the ISM APIs the retention engine calls: get and put a policy (with if_seq_no and if_primary_term to
+        update one), add a policy to indices and change the policy of indices
+        """
+        with self.lock:
+            if segments[:1] == ["policies"] and len(segments) == 2:
+                policy_id = segments[1]
+                current = self.policies.get(policy_id)
+                if method == "GET":
+                    if current is None:
+                        raise _StandInError(404, "status_exception", "Policy not found")
+                    return 200, dict(current, _id = policy_id)
+                if method == "PUT":
+                    if current is not None and (params.get("if_seq_no") != str(current["_seq_no"]) or params.get("if_primary_term") != str(current["_primary_term"])):
+                        raise _StandInError(409, "version_conflict_engine_exception", "[%s]: version conflict" % (policy_id))
+                    seq_no = current["_seq_no"] + 1 if current is not None else 0
+                    policy = dict(loads(body)["policy"], policy_id = policy_id, last_updated_time = int(time() * 1000))
+                    policy["ism_template"] = [dict(template, last_updated_time = policy["last_updated_time"]) for template in policy.get("ism_template") or []]
+                    self.policies[policy_id] = {"_version": seq_no + 1, "_seq_no": seq_no, "_primary_term": 1, "policy": policy}
+                    return (200 if current is not None else 201), dict(self.policies[policy_id], _id = policy_id)
+            if segments[:1] in (["add"], ["change_policy"]) and len(segments) == 2 and method == "POST":
+                # add attaches the policy to indices without one, change_policy switches indices that have one
+                policy_id = loads(body or b"{}").get("policy_id")
+                if policy_id not in self.policies:
+                    raise _StandInError(404, "status_exception", "Policy not found")
+                updated = 0
+                for index_name in self._resolve(segments[1], must_exist = False):
+                    if (self.indices[index_name].get("policy_id") is None) == (segments[0] == "add"):
+                        self.indices[index_name]["policy_id"] = policy_id
+                        updated += 1
+                return 200, {"updated_indices": updated, "failures": False, "failed_indices": []}
+        raise _StandInError(404, "stand_in_exception", "unsupported index state management API")
+
+
+def main():
+    args = parser.parse_args()
+    server = StandInServer(args.host, args.port, args.latency, args.latency_per_document, args.rejection_rate, args.item_rejection_rate, args.item_failure_rate, seed = args.seed)
+    server.start()
+    print("Stand-in listening on %s" % (server.url))
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+# Runs the stand-in upon execution of script
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,10 @@ Functions:
     - unzip_file(): Function that unzips a filename if it was zipped.
     - validate_job_args(): Function that validates various arguments for the startup and refresh jobs
     - untar_file(): Function that extracts files from a tar.gz file
+    - read_bulk_load_profile(): Function that reads the bulk-load profile of a job config
+    - read_parallelism(): Function that reads how many day indices of a job config can be built at once
+    - read_retention(): Function that reads how the old day indices of a job config are deleted
+    - read_seed(): Function that reads the seed the documents of a job config are generated from
 """
 
 from opensearchpy import OpenSearch
@@ -129,3 +133,91 @@ def untar_file(filename:str, destination:str = None) -> list:
         filename_list = t_file.getnames()
 
     return filename_list
+
+
+def read_bulk_load_profile(config:dict, closed:bool = False) -> dict:
+    """
+    Utility function that reads the optional "bulk_load" key of a job config: true, or a dict of "replicas" (the number
+    of replicas while an index is loaded, default is 0) and "force_merge" (whether a loaded index is merged down to one
+    segment, default is False)
+
+    Arguments:
+        - config: The job config
+        - closed: Whether the index receives no more documents once it is loaded (e.g. a past day); only closed indices
+          are force-merged (default is False)
+
+    Returns:
+        - The keyword arguments of SampleDataIndex.bulk_load(), or None if the config has no bulk-load profile
+
+    Raises:
+        - TypeError: bulk_load should be true or a dict of replicas and force_merge
+    """
+    profile = config.get("bulk_load")
+    if profile is None or profile is False:
+        return None
+    if profile is True:
+        profile = {}
+    if type(profile) is not dict:
+        raise TypeError("bulk_load should be true or a dict of replicas and force_merge")
+    return {"replicas": profile.get("replicas", 0), "force_merge": profile.get("force_merge", False) and closed}
+
+
+def read_parallelism(config:dict, default:int) -> int:
+    """
+    Utility function that reads the optional "parallelism" key of a job config: how many of its days' indices can be
+    built at once
+
+    Arguments:
+        - config: The job config
+        - default: The parallelism of a config without the key (e.g. the job's own parallelism)
+
+    Returns:
+        - The parallelism of the config
+
+    Raises:
+        - ValueError: parallelism should be a positive integer
+    """
+    parallelism = config.get("parallelism", default)
+    if type(parallelism) is not int or parallelism < 1:
+        raise ValueError("parallelism should be a positive integer")
+    return parallelism
+
+
+def read_retention(config:dict) -> str:
+    """
+    Utility function that reads the optional "retention" key of a job config: whether its old days' indices are deleted
+    by the refresh job ("delete", the default) or by an ISM policy in the cluster ("ism")
+
+    Arguments:
+        - config: The job config
+
+    Returns:
+        - "delete" or "ism"
+
+    Raises:
+        - ValueError: retention should be "delete" or "ism"
+    """
+    retention = config.get("retention", "delete")
+    if retention not in ("delete", "ism"):
+        raise ValueError('retention should be "delete" or "ism"')
+    return retention
+
+
+def read_seed(config:dict) -> int:
+    """
+    Utility function that reads the optional "seed" key of a job config: the seed every day's documents are generated
+    from (each day with a seed of its own derived from it), so a job generates the same documents when it runs again
+
+    Arguments:
+        - config: The job config
+
+    Returns:
+        - The seed of the config, or None if it has none
+
+    Raises:
+        - ValueError: seed should be a non-negative integer
+    """
+    seed = config.get("seed")
+    if seed is not None and (type(seed) is not int or seed < 0):
+        raise ValueError("seed should be a non-negative integer")
+    return seed
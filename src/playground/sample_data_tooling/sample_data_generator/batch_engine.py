@@ -0,0 +1,254 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+batch_engine.py draws whole columns of values with NumPy for the numeric and date field types, so a TemplatePlan
+can generate N values of a field in one vectorized call instead of N calls into Faker. Field types (or arguments)
+that are not supported here return None from compile_column() and stay on Faker.
+
+Supported Faker attributes:
+    - random_int (custom types "integer"): min, max, step
+    - pyfloat (custom types "float", "double"): right_digits, min_value, max_value, positive (min_value and max_value are required)
+    - boolean (custom types "date detection string", "numeric detection string"): chance_of_getting_true
+    - unix_time: end_datetime, start_datetime (as epoch seconds)
+    - random_element: elements (a list, or a dict of weights)
+
+By default, floats are drawn uniformly between min_value and max_value and rounded to right_digits. With faker_compatible
+set, floats follow the same draw as Faker's pyfloat (a random integer part with a random number of decimals appended to it),
+so columns are statistically equivalent to the values Faker would have generated. The other types already draw from the same
+distributions as Faker in both modes.
+
+Functions:
+    - new_generator(): Returns a NumPy random Generator
+    - compile_column(): Resolves a Faker attribute and its arguments to a column generator
+"""
+
+import numpy as np
+
+# Standard libraries
+from time import time
+import sys
+
+
+# Parameter names of the supported Faker attributes, in positional order
+PARAMETERS = {
+    "random_int": ("min", "max", "step"),
+    "pyfloat": ("left_digits", "right_digits", "positive", "min_value", "max_value"),
+    "boolean": ("chance_of_getting_true",),
+    "unix_time": ("end_datetime", "start_datetime"),
+    "random_element": ("elements",),
+}
+
+
+def _bind_parameters(attribute:str, args) -> dict:
+    """
+    Maps template arguments (positional, or a single dict of key word arguments) to the attribute's parameter names
+
+    Returns:
+        - A dict of arguments, or None if the arguments do not fit the attribute
+    """
+    names = PARAMETERS[attribute]
+    if not args:
+        return {}
+    if type(args) is not list and type(args) is not tuple:
+        return None
+    if len(args) == 1 and type(args[0]) is dict:
+        if any(name not in names for name in args[0]):
+            return None
+        return dict(args[0])
+    if len(args) > len(names):
+        return None
+    return dict(zip(names, args))
+
+
+def _is_number(value) -> bool:
+    return type(value) is int or type(value) is float
+
+
+def _random_int_column(rng, parameters:dict):
+    minimum = parameters.get("min", 0)
+    maximum = parameters.get("max", 9999)
+    step = parameters.get("step", 1)
+    if type(minimum) is not int or type(maximum) is not int or type(step) is not int or step < 1 or minimum > maximum:
+        return None
+    choices = (maximum - minimum) // step + 1
+
+    def random_int_column(number:int) -> list:
+        return (minimum + step * rng.integers(0, choices, size = number)).tolist()
+    return random_int_column
+
+
+def _pyfloat_column(rng, parameters:dict, faker_compatible:bool):
+    right_digits = parameters.get("right_digits")
+    minimum = parameters.get("min_value")
+    maximum = parameters.get("max_value")
+    positive = parameters.get("positive")
+
+    # Faker validates these combinations (and raises); leaving them on Faker keeps its error handling
+    if parameters.get("left_digits") is not None or not _is_number(minimum) or not _is_number(maximum) or minimum >= maximum:
+        return None
+    if right_digits is not None and (type(right_digits) is not int or right_digits < 0):
+        return None
+    if positive and minimum <= 0:
+        return None
+
+    if not faker_compatible:
+        def pyfloat_column(number:int) -> list:
+            values = rng.uniform(minimum, maximum, size = number)
+            if right_digits is not None:
+                values = np.round(values, right_digits)
+            return values.tolist()
+        return pyfloat_column
+
+    # Faker draws the integer part between min_value and max_value - 1 (see _safe_random_int())
+    left_minimum = minimum + 1 if minimum < 0 else minimum
+    left_maximum = maximum + 1 if maximum < 0 else maximum
+    if positive:
+        left_minimum = max(left_minimum, 0)
+    if left_minimum == left_maximum:
+        return None
+    left_minimum = int(left_minimum)
+    left_maximum = int(left_maximum - 1)
+    if left_maximum < left_minimum:
+        left_maximum += 1
+    needed_left_digits = max(1, int(np.ceil(np.log10(max(abs(maximum or 1), abs(minimum or 1))))))
+    if right_digits is None and sys.float_info.dig - needed_left_digits < 1:
+        return None
+
+    def pyfloat_column(number:int) -> list:
+        left = rng.integers(left_minimum, left_maximum + 1, size = number)
+        digits = right_digits
+        if digits is None:
+            digits = rng.integers(1, sys.float_info.dig - needed_left_digits + 1, size = number)
+
+        # The decimals are a random number below 10 ** right_digits written after the decimal point, without zero padding
+        fraction = np.floor(rng.random(size = number) * np.power(10.0, digits))
+        fraction_length = np.where(fraction > 0, np.floor(np.log10(np.maximum(fraction, 1))) + 1, 1)
+        fraction = fraction / np.power(10.0, fraction_length)
+        values = np.where(left < 0, left - fraction, left + fraction)
+        if positive:
+            values = np.where(values == 0, np.power(10.0, -np.maximum(digits, 1)), values)
+
+        # Values that land outside of the range are moved back inside it by a random amount, like Faker does
+        spread = rng.uniform(0, maximum - minimum, size = number)
+        values = np.where(values > maximum, maximum - spread, values)
+        values = np.where(values < minimum, minimum + spread, values)
+        return values.tolist()
+    return pyfloat_column
+
+
+def _boolean_column(rng, parameters:dict):
+    chance = parameters.get("chance_of_getting_true", 50)
+    if not _is_number(chance):
+        return None
+
+    def boolean_column(number:int) -> list:
+        return (rng.integers(1, 101, size = number) <= chance).tolist()
+    return boolean_column
+
+
+def _unix_time_column(rng, parameters:dict):
+    end = parameters.get("end_datetime")
+    start = parameters.get("start_datetime", 0)
+    if start is None:
+        start = 0
+
+    # Only epoch seconds are drawn here; date strings like "-30d" are left to Faker's parser
+    if (end is not None and not _is_number(end)) or not _is_number(start):
+        return None
+    if end is not None and start > end:
+        return None
+
+    def unix_time_column(number:int) -> list:
+        # "now" is read at draw time so long-running processes keep generating current timestamps
+        return rng.uniform(start, time() if end is None else end, size = number).tolist()
+    return unix_time_column
+
+
+def _random_element_column(rng, parameters:dict):
+    elements = parameters.get("elements", ("a", "b", "c"))
+    weights = None
+    if type(elements) is dict:
+        weights = np.array(list(elements.values()), dtype = float)
+        if len(weights) == 0 or (weights < 0).any() or weights.sum() <= 0:
+            return None
+        weights = weights / weights.sum()
+        elements = list(elements)
+    elif type(elements) is str or type(elements) is tuple:
+        elements = list(elements)
+    elif type(elements) is not list:
+        return None
+    if not elements:
+        return None
+
+    def random_element_column(number:int) -> list:
+        if weights is None:
+            indices = rng.integers(0, len(elements), size = number)
+        else:
+            indices = rng.choice(len(elements), size = number, p = weights)
+        return [elements[index] for index in indices.tolist()]
+    return random_element_column
+
+
+def new_generator(seed:int = None):
+    """
+    Function that returns the NumPy random Generator columns are drawn from
+
+    Arguments:
+        - seed: The seed of the Generator (default is unseeded)
+
+    Returns:
+        - A NumPy random Generator
+    """
+    return np.random.default_rng(seed)
+
+
+def child_seed(seed:int, index:int):
+    """
+    Function that returns the seed of the index-th of several Generators derived from one seed (as
+    SeedSequence(seed).spawn() would), so Generators seeded alike do not draw the same values
+
+    Arguments:
+        - seed: The seed the Generators are derived from (None keeps them unseeded)
+        - index: The position of the Generator
+
+    Returns:
+        - A NumPy SeedSequence, or None if seed is None
+    """
+    if seed is None:
+        return None
+    return np.random.SeedSequence(seed, spawn_key = (index,))
+
+
+def compile_column(attribute:str, args = None, rng = None, faker_compatible:bool = False):
+    """
+    Function that resolves a Faker attribute and its template arguments to a column generator
+
+    Arguments:
+        - attribute: The Faker attribute (after custom field types are resolved, e.g. "integer" is "random_int")
+        - args: An array of arguments, as written in the data template
+        - rng: The NumPy random Generator to draw from (default is a new unseeded Generator)
+        - faker_compatible: Whether floats should follow Faker's pyfloat draw instead of a uniform draw (default is False)
+
+    Returns:
+        - A callable taking the number of values to draw and returning them as a list, or None if the attribute
+          or its arguments are not supported (the field should then be generated with Faker)
+    """
+    if type(attribute) is not str or attribute not in PARAMETERS:
+        return None
+    parameters = _bind_parameters(attribute, args)
+    if parameters is None:
+        return None
+    if rng is None:
+        rng = np.random.default_rng()
+
+    if attribute == "random_int":
+        return _random_int_column(rng, parameters)
+    elif attribute == "pyfloat":
+        return _pyfloat_column(rng, parameters, faker_compatible)
+    elif attribute == "boolean":
+        return _boolean_column(rng, parameters)
+    elif attribute == "unix_time":
+        return _unix_time_column(rng, parameters)
+    else:
+        return _random_element_column(rng, parameters)
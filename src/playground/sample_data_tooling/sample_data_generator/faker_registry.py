@@ -0,0 +1,160 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+faker_registry.py keeps one shared Faker instance per (locale, seed) for the whole process and loads
+Community Providers lazily, i.e. a provider's package is only imported and added to a Faker instance the
+first time a template names one of its attributes
+
+Classes:
+    - FakerRegistry: Thread-safe registry of Faker instances
+
+Functions:
+    - get_faker(): Returns the shared Faker instance for a locale and seed from the default registry
+    - get_field_type(): Returns a Faker attribute, loading its Community Provider first if necessary
+"""
+
+from faker import Faker
+
+# Standard libraries
+from importlib import import_module
+from threading import RLock
+import json
+import os
+
+
+# "community-providers.json" lists the Community Providers this tool ships with and the attributes each one adds
+#   To add another Community Provider, install it and add an entry to that file. To see more about Community Providers, visit:
+#   https://faker.readthedocs.io/en/master/communityproviders.html
+COMMUNITY_PROVIDERS_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "options/community-providers.json")
+
+
+class FakerRegistry:
+    """
+    FakerRegistry class: a thread-safe registry holding one Faker instance per (locale, seed)
+
+    Arguments:
+        - providers_path: The JSON file listing the Community Providers and their attributes (default is "options/community-providers.json")
+
+    Raises:
+        - TypeError: providers_path should be a filename string
+    """
+
+    def __init__(self, providers_path:str = COMMUNITY_PROVIDERS_PATH):
+        # Validate input
+        if type(providers_path) is not str:
+            raise TypeError("providers_path should be a filename string")
+
+        self.providers_path = providers_path
+        self.lock = RLock()
+        self.instances = {}
+        self.provider_classes = {}
+        self.provider_attributes = None
+
+    def get_faker(self, locale:str = None, seed:int = None) -> Faker:
+        """
+        Returns the Faker instance for a locale and seed, creating it the first time it is asked for
+
+        Arguments:
+            - locale: The Faker locale (default is Faker's default locale)
+            - seed: The seed of the instance; workers that need reproducible draws should each use their own seed (default is unseeded)
+
+        Returns:
+            - A Faker instance shared by every caller asking for the same locale and seed
+        """
+        key = (locale, seed)
+        fake = self.instances.get(key)
+        if fake is None:
+            with self.lock:
+                fake = self.instances.get(key)
+                if fake is None:
+                    fake = Faker(locale)
+                    if seed is not None:
+                        fake.seed_instance(seed)
+                    self.instances[key] = fake
+        return fake
+
+    def load_provider_attributes(self) -> dict:
+        """
+        Reads the Community Provider list once
+
+        Returns:
+            - A dict mapping each Community Provider attribute to its provider entry
+        """
+        if self.provider_attributes is None:
+            with self.lock:
+                if self.provider_attributes is None:
+                    with open(self.providers_path, "r") as f:
+                        providers = json.load(f)
+                    provider_attributes = {}
+                    for name in providers:
+                        if name.startswith("__"):
+                            continue
+                        for attribute in providers[name]["attributes"]:
+                            provider_attributes[attribute] = providers[name]
+                    self.provider_attributes = provider_attributes
+        return self.provider_attributes
+
+    def load_provider(self, fake:Faker, attribute:str) -> bool:
+        """
+        Adds the Community Provider of an attribute to a Faker instance, importing the provider's package on first use
+
+        Arguments:
+            - fake: The Faker instance that needs the attribute
+            - attribute: The Faker attribute a template named
+
+        Returns:
+            - True if the attribute belongs to a Community Provider, otherwise False
+        """
+        provider_attributes = self.load_provider_attributes()
+        if type(attribute) is not str or attribute not in provider_attributes:
+            return False
+
+        entry = provider_attributes[attribute]
+        with self.lock:
+            provider_key = (entry["module"], entry["provider"])
+            if provider_key not in self.provider_classes:
+                self.provider_classes[provider_key] = getattr(import_module(entry["module"]), entry["provider"])
+            provider_class = self.provider_classes[provider_key]
+
+            # Providers are only added once per Faker instance
+            for provider in fake.get_providers():
+                if isinstance(provider, provider_class):
+                    return True
+            fake.add_provider(provider_class)
+        return True
+
+    def get_field_type(self, fake:Faker, attribute:str):
+        """
+        Returns a Faker attribute, loading its Community Provider first if necessary
+
+        Arguments:
+            - fake: The Faker instance to get the attribute from
+            - attribute: The name of the Faker attribute
+
+        Returns:
+            - The bound Faker attribute
+
+        Raises:
+            - AttributeError: If neither Faker nor a Community Provider defines the attribute
+        """
+        self.load_provider(fake, attribute)
+        return getattr(fake, attribute)
+
+
+# Registry shared by the whole process
+REGISTRY = FakerRegistry()
+
+
+def get_faker(locale:str = None, seed:int = None) -> Faker:
+    """
+    Returns the shared Faker instance for a locale and seed (see FakerRegistry.get_faker())
+    """
+    return REGISTRY.get_faker(locale, seed)
+
+
+def get_field_type(fake:Faker, attribute:str):
+    """
+    Returns a Faker attribute from the shared registry, loading its Community Provider first if necessary (see FakerRegistry.get_field_type())
+    """
+    return REGISTRY.get_field_type(fake, attribute)
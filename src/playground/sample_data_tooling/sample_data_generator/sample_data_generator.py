@@ -3,89 +3,131 @@ Copyright OpenSearch Contributors
 SPDX-License-Identifier: Apache-2.0
 """
 
-from faker_airtravel import AirTravelProvider
-from faker_credit_score import CreditScore
-from faker_vehicle import VehicleProvider
-from mdgen import MarkdownPostProvider
-from faker_wifi_essid import WifiESSID
-from faker_music import MusicProvider
-from faker_web import WebProvider
-import faker_microservice
 from faker import Faker
 
 # Standard libraries
 from shutil import copyfileobj
-from ast import literal_eval
+from functools import partial
 import json
 import gzip
 import csv
+import sys
 import os
 
+# Adds parent directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_generator.faker_registry import get_faker, get_field_type
+from sample_data_tooling.sample_data_commons.document_batch import DocumentBatch
 
-def choose_field(kind, args = None):
+
+# "custom-field-types.json" defines what enumerated types return in Faker
+#   - E.g.: "integer" will correspond to Faker's "random_int" attribute
+CUSTOM_FIELD_TYPES_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "options/custom-field-types.json")
+
+# Loaded on first use and shared by every compiled template afterwards
+_custom_field_types = None
+
+
+def load_custom_field_types() -> dict:
     """
-    Function that generates fake values for given fields
-    This is based off of the Faker library
+    Function that loads "custom-field-types.json" once and caches it for the rest of the process
+
+    Returns:
+        - A dict mapping custom field types to Faker attributes
+    """
+    global _custom_field_types
+    if _custom_field_types is None:
+        with open(CUSTOM_FIELD_TYPES_PATH, "r") as f:
+            _custom_field_types = json.load(f)
+    return _custom_field_types
+
+
+def _null_field():
+    """
+    Field generator for "null" fields and fields that could not be compiled
+    """
+    return None
+
+
+def _constant_field(value):
+    """
+    Field generator for template values that are copied as-is into every document
+    """
+    def constant_field():
+        return value
+    return constant_field
+
+
+def _bind_arguments(field_type, args):
+    """
+    Binds the arguments of a field type once so that generating a value is a plain call
 
     Arguments:
-        - kind: The "type" of data being generated
+        - field_type: The Faker attribute to bind
         - args: An array of arguments to pass on to Faker
 
     Returns:
-        - A generated value from Faker (could be a string, integer, float, etc.)
+        - A callable that takes no arguments
+    """
+    if args:
+        # If the user specifies a map for key word arguments, the function unpacks them
+        if len(args) == 1 and type(args[0]) is dict:
+            return partial(field_type, **args[0])
 
-    Raises:
-        - TypeError : Array size is not configured correctly; check to make sure that args[1] is an integer or a string \"integer\"
+        # If args isn't a map, it will be unpacked as a list/tuple
+        return partial(field_type, *args)
+    return field_type
+
+
+def _guard_field(field_generator, message:str):
     """
-    fake = Faker()
-
-    # Adding Community Providers to Faker
-    fake.add_provider(AirTravelProvider)
-    fake.add_provider(CreditScore)
-    fake.add_provider(faker_microservice.Provider)
-    fake.add_provider(MarkdownPostProvider)
-    fake.add_provider(MusicProvider)
-    fake.add_provider(VehicleProvider)
-    fake.add_provider(WebProvider)
-    fake.add_provider(WifiESSID)
-
-    # This Faker class uses only the Standard Provider and some Community Providers.
-    # To see more about Community Providers, visit:
-    # https://faker.readthedocs.io/en/master/communityproviders.html
-    # and follow instructions there to install them on your environment
-    #
-    # Example code snippet using the Biology Provider:
-    #
-    # from faker_biology.physiology import CellType, Organ, Organelle
-    # fake.add_provider(CellType)
-    # fake.add_provider(Organ)
-    # fake.add_provider(Organelle)
-
-    # "custom-field-types.json" defines what enumerated types return in Faker
-    #   - E.g.: "integer" will correspond to Faker's "random_int" attribute
-    with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), "options/custom-field-types.json"), "r") as f:
-        existing_types = json.load(f)
+    Wraps a field generator so a failed draw prints the error and yields None (like choose_field() does)
+
+    Arguments:
+        - field_generator: The callable that generates a value
+        - message: The message to print if generating a value fails
+
+    Returns:
+        - A callable that takes no arguments
+    """
+    def guarded_field():
+        try:
+            return field_generator()
+        except Exception as e:
+            print(e)
+            print(message)
+            return None
+    return guarded_field
+
+
+def compile_field(fake:Faker, kind, args = None):
+    """
+    Function that resolves a field type and its arguments to a callable that generates a value
+    The resolution (attribute lookup, argument unpacking, array and keyword parsing) happens once here,
+    so calling the returned function only pays for the value generation itself
+
+    Arguments:
+        - fake: The Faker instance to bind the field to
+        - kind: The "type" of data being generated
+        - args: An array of arguments to pass on to Faker
+
+    Returns:
+        - A callable that takes no arguments and returns a generated value (or None if the field is invalid)
+    """
+    existing_types = load_custom_field_types()
 
     # Null: A null type returns nothing
     if kind == "null":
-        return None
+        return _null_field
 
     # If the user used a data type defined in "custom-field-types.json", it will be executed
     elif kind in existing_types:
         try:
-            field_types = getattr(fake, existing_types[kind])
-            if args:
-                # If the user specifies a map for key word arguments, the function unpacks them
-                if len(args) == 1 and type(args[0]) is dict:
-                    return field_types(**args[0])
-
-                # If args isn't a map, it will be unpacked as a list/tuple
-                return field_types(*args)
-            return field_types()
+            return _guard_field(_bind_arguments(get_field_type(fake, existing_types[kind]), args), "Invalid data type for a user defined data type; check arguments again")
         except Exception as e:
             print(e)
             print("Invalid data type for a user defined data type; check arguments again")
-            return None
+            return _null_field
 
     # Array: An array type returns an array of field values
     #   There are 2 types: {"type": ["array", <field type>, <int>, *args]}
@@ -93,95 +135,256 @@ def choose_field(kind, args = None):
     elif kind == "array" and args and len(args) >= 2:
         if type(args[1]) is not int and len(args) < 3:
             print("Invalid Array: if you want a random array length, specify a tuple of ranges")
-            return None
+            return _null_field
         try:
-            list = []
-            length = 0
-
             # User specifies a fixed array length
             if type(args[1]) is int:
-                for i in range(args[1]):
-                    val = choose_field(args[0], args[2:])
-                    if val:
-                        list.append(val)
-                return list
+                length = args[1]
+                element_field = compile_field(fake, args[0], args[2:])
+
+                def array_field():
+                    values = []
+                    for i in range(length):
+                        val = element_field()
+                        if val:
+                            values.append(val)
+                    return values
             # User specifies a range of possible array lengths
             elif args[1] == "integer":
                 # Length: a randomly generated integer used for the array length to generate
-                length = choose_field(args[1], tuple(args[2]))
-                for i in range(length):
-                    val = choose_field(args[0], args[3:])
-                    if val:
-                        list.append(val)
-                return list
+                length_field = compile_field(fake, args[1], tuple(args[2]))
+                element_field = compile_field(fake, args[0], args[3:])
+
+                def array_field():
+                    values = []
+                    for i in range(length_field()):
+                        val = element_field()
+                        if val:
+                            values.append(val)
+                    return values
             # Input error
             else:
                 raise TypeError("Array size is not configured correctly; check to make sure that args[1] is an integer or a string \"integer\"")
         except Exception as e:
             print(e)
             print("Invalid Array")
-            return None
+            return _null_field
+        return _guard_field(array_field, "Invalid Array")
 
     # Keyword: A keyword type returns a defined faker attribute (e.g. "zipcode" or "email") with or without arguments
     #   Usage: {"type": "keyword", <faker attribute>, *args}
     elif kind == "keyword":
         if not args:
             print("Invalid Keyword: attribute needs to be defined")
-            return None
+            return _null_field
         try:
-            return choose_field(args[0], args[1:])
+            return compile_field(fake, args[0], args[1:])
         except Exception as e:
             print(e)
             print("Invalid Keyword")
-            return None
+            return _null_field
 
     # Case not explicitly mentioned in OpenSearch field types is tried as a faker attribute
     else:
         try:
-            field_types = getattr(fake, kind)
-            if args:
-                # If the user specifies a map for key word arguments, the function unpacks them
-                if len(args) == 1 and type(args[0]) is dict:
-                    return field_types(**args[0])
-
-                # If args isn't a map, it will be unpacked as a list/tuple
-                return field_types(*args)
-            return field_types()
+            return _guard_field(_bind_arguments(get_field_type(fake, kind), args), "Invalid data type; check data type name or argument list")
         except Exception as e:
             print(e)
             print("Invalid data type; check data type name or argument list")
-            return None
+            return _null_field
 
 
-def generate_data(data_template, mappings = True):
+def choose_field(kind, args = None):
     """
-    Function to generate data
-    Returns a JSON object or a list of JSON objects if a JSON  or CSV file was provided
+    Function that generates fake values for given fields
+    This is based off of the Faker library
 
     Arguments:
-        - data_template: See below
-            - NDJSON File, zipped or unzipped
-            - CSV File, zipped or unzipped
-            - Index Mapping (as a JSON string or dict)
-                - Note: only explicit mapping is supported and the tool will not support fields within fields
-            - JSON "short-hand": {<Field name>: <Field type>}
-                - Ex: {"Zip_Code": "zipcode", "Address": "address"}
-            - Format for generating data:
-                - Paste in your mapping value {"properties": {<properties values>}}
-                - Alternatively, pass in a JSON string or string in the form:
-                    {<Field>: <Field Type>}
-                - If you provide arguments, the <Field Type> should be a list:
-                    {<Field>: [<Field Type>, *args]}
+        - kind: The "type" of data being generated
+        - args: An array of arguments to pass on to Faker
+
+    Returns:
+        - A generated value from Faker (could be a string, integer, float, etc.)
+
+    Raises:
+        - TypeError : Array size is not configured correctly; check to make sure that args[1] is an integer or a string \"integer\"
+    """
+    return compile_field(get_faker(), kind, args)()
+
+
+def _resolve_attribute(kind, args):
+    """
+    Resolves custom field types and keywords to the Faker attribute they generate with
+
+    Returns:
+        - A tuple containing the Faker attribute name and its arguments
+    """
+    existing_types = load_custom_field_types()
+    if type(kind) is not str:
+        return (None, None)
+    if kind in existing_types:
+        return (existing_types[kind], args)
+    if kind == "keyword" and args and (type(args) is list or type(args) is tuple):
+        return _resolve_attribute(args[0], args[1:])
+    return (kind, args)
+
+
+def _plan_seed(seed:int, index:int, vectorized:bool):
+    """
+    Returns the batch engine seed of the index-th plan of a NDJSON or CSV file: a child of seed, so the plans of a file
+    do not draw the same columns
+    """
+    if not vectorized or seed is None:
+        return seed
+    # NumPy is only imported when a vectorized template is compiled
+    from sample_data_tooling.sample_data_generator.batch_engine import child_seed
+    return child_seed(seed, index)
+
+
+def _compile_columns(field_specs:list, seed:int = None, faker_compatible:bool = False) -> dict:
+    """
+    Compiles the fields the NumPy batch engine supports to column generators
+
+    Arguments:
+        - field_specs: A list of (field name, field type, arguments) tuples
+        - seed: The seed of the batch engine (default is unseeded)
+        - faker_compatible: Whether floats should follow Faker's pyfloat draw (default is False)
+
+    Returns:
+        - A dict of field name to column generator
+    """
+    # NumPy is only imported when a vectorized template is compiled
+    from sample_data_tooling.sample_data_generator.batch_engine import compile_column, new_generator
+
+    rng = new_generator(seed)
+    columns = {}
+    for name, kind, args in field_specs:
+        attribute, attribute_args = _resolve_attribute(kind, args)
+        column = compile_column(attribute, attribute_args, rng, faker_compatible)
+        if column:
+            columns[name] = column
+    return columns
+
+
+class TemplatePlan:
+    """
+    TemplatePlan class: a data template that was resolved once into a list of field generators
+    Calling generate() or generate_many() only generates values; the template is never parsed again
+
+    Arguments:
+        - fields: A list of (field name, field generator) tuples, where a field generator is a callable taking no arguments
+        - columns: A dict of field name to column generator, where a column generator takes a number of values to draw and
+          returns them as a list; generate_many() uses it instead of the field generator (default is None)
+
+    Raises:
+        - TypeError: fields should be a list of (field name, field generator) tuples
+        - TypeError: columns should be a dict of field names to column generators
+    """
+
+    def __init__(self, fields:list, columns:dict = None):
+        # Validate input
+        if type(fields) is not list:
+            raise TypeError("fields should be a list of (field name, field generator) tuples")
+        if columns is not None and type(columns) is not dict:
+            raise TypeError("columns should be a dict of field names to column generators")
+
+        self.fields = fields
+        self.columns = columns or {}
+
+    def generate(self) -> dict:
+        """
+        Generates one document
+
+        Returns:
+            - A dict of one generated entry
+        """
+        return {name: field() for name, field in self.fields}
+
+    def generate_many(self, number:int) -> list:
+        """
+        Generates several documents
+
+        Arguments:
+            - number: How many documents to generate
+
+        Returns:
+            - A list of dicts, one per generated entry
+
+        Raises:
+            - ValueError: number should be a positive integer
+        """
+        if type(number) is not int or number < 0:
+            raise ValueError("number should be a positive integer")
+
+        fields = self.fields
+        if not self.columns or not fields:
+            return [{name: field() for name, field in fields} for i in range(number)]
+
+        # Vectorized fields are drawn a column at a time, the rest one value at a time, and the columns are then zipped into rows
+        batch = self.generate_batch(number)
+        return list(batch.rows())
+
+    def generate_batch(self, number:int) -> DocumentBatch:
+        """
+        Generates several documents as columns, without building a dict per document
+
+        Arguments:
+            - number: How many documents to generate
+
+        Returns:
+            - A DocumentBatch with one column per template field
+
+        Raises:
+            - ValueError: number should be a positive integer
+        """
+        if type(number) is not int or number < 0:
+            raise ValueError("number should be a positive integer")
+
+        columns = {}
+        for name, field in self.fields:
+            if name in self.columns:
+                columns[name] = self.columns[name](number)
+            else:
+                columns[name] = [field() for i in range(number)]
+        return DocumentBatch(columns, number)
+
+
+def compile_template(data_template,
+    mappings = True,
+    fake:Faker = None,
+    locale:str = None,
+    seed:int = None,
+    vectorized:bool = False,
+    faker_compatible:bool = False
+):
+    """
+    Function that compiles a data template once so documents can be generated without re-parsing it
+    Accepts the same data templates as generate_data()
+
+    Arguments:
+        - data_template: NDJSON file, CSV file, JSON mapping, or JSON short-hand template (see generate_data())
         - mappings: A boolean value representing whether the template is a mapping or a short-hand template
+        - fake: The Faker instance the fields are bound to (default is the shared instance for locale and seed)
+        - locale: The Faker locale to use if fake is not given (default is Faker's default locale)
+        - seed: The seed of the shared Faker instance to use if fake is not given, and of the batch engine (default is unseeded);
+          each plan of a NDJSON or CSV file gets its own batch engine seed derived from it
+        - vectorized: Whether generate_many() should draw numeric, boolean, epoch and choice-from-list fields as whole
+          columns with the NumPy batch engine (see batch_engine.py); other fields stay on Faker (default is False)
+        - faker_compatible: Whether vectorized floats should follow Faker's pyfloat draw, keeping columns statistically
+          equivalent to Faker's values, instead of a uniform draw (default is False)
 
     Returns:
-        - A JSON string of one generated entry
+        - A TemplatePlan (or a list of TemplatePlans if a NDJSON or CSV file was provided)
 
     Raises:
         - TypeError: Input is not a mapping
         - TypeError: File not supported or could not be found
     """
-    data_entry = {}
+    if fake is None:
+        fake = get_faker(locale, seed)
+
+    fields = []
+    field_specs = []
 
     if type(data_template) is str and "." in data_template:
         name = data_template.split(".gz")[0]
@@ -193,35 +396,32 @@ def generate_data(data_template, mappings = True):
 
         # If a JSON file was provided
         if name and ".json" in name:
-            JSON_list = []
+            plans = []
             with open(name, 'r') as f:
-                for line in f:
-                    JSON_list.append(generate_data(line, "properties" in line))
+                for index, line in enumerate(f):
+                    plans.append(compile_template(line, "properties" in line, fake, locale, _plan_seed(seed, index, vectorized), vectorized, faker_compatible))
 
             # Deletes unzipped file
             if name != data_template:
                 os.remove(name)
-            return JSON_list
+            return plans
 
         # If a CSV file was provided
         elif name and ".csv" in name:
-            CSV_list = []
+            plans = []
             with open(name, "r") as f:
-                reader = csv.reader(f)
-                fields = next(reader)
-                for row in reader:
-                    entry_dict = {}
-                    for i in range(len(fields)):
-                        entry_dict[fields[i]] = row[i]
-                        # Entries with arguments
-                        if "," in entry_dict[fields[i]]:
-                            entry_dict[fields[i]] = literal_eval(entry_dict[fields[i]])
-                    CSV_list.append(generate_data(entry_dict, False))
+                rows = list(csv.DictReader(f))
+            # Entries with arguments are parsed a column at a time (csv_schema imports NumPy, so only CSV templates load it)
+            if rows:
+                from sample_data_tooling.sample_data_commons.csv_schema import coerce_rows
+                rows = coerce_rows(rows, {field: "args" for field in rows[0]})
+            for index, entry_dict in enumerate(rows):
+                plans.append(compile_template(entry_dict, False, fake, locale, _plan_seed(seed, index, vectorized), vectorized, faker_compatible))
 
             # Deletes unzipped file
             if name != data_template:
                 os.remove(name)
-            return CSV_list
+            return plans
 
         else:
             raise TypeError("File not supported or could not be found")
@@ -235,13 +435,15 @@ def generate_data(data_template, mappings = True):
             for attribute in data_template["properties"]:
                 # Field with arguments
                 if type(data_template["properties"][attribute]) is dict and type(data_template["properties"][attribute]["type"]) is list:
-                    data_entry[attribute] = choose_field(data_template["properties"][attribute]["type"][0], data_template["properties"][attribute]["type"][1:])
+                    fields.append((attribute, compile_field(fake, data_template["properties"][attribute]["type"][0], data_template["properties"][attribute]["type"][1:])))
+                    field_specs.append((attribute, data_template["properties"][attribute]["type"][0], data_template["properties"][attribute]["type"][1:]))
                 # Field with default arguments
                 elif type(data_template["properties"][attribute]) is dict and type(data_template["properties"][attribute]["type"]) is not list:
-                    data_entry[attribute] = choose_field(data_template["properties"][attribute]["type"])
+                    fields.append((attribute, compile_field(fake, data_template["properties"][attribute]["type"])))
+                    field_specs.append((attribute, data_template["properties"][attribute]["type"], None))
                 else:
                     print("Invalid: dynamic not supported")
-                    data_entry[attribute] = data_template["properties"][attribute]
+                    fields.append((attribute, _constant_field(data_template["properties"][attribute])))
         else:
             print("Invalid: dynamic not supported")
             raise TypeError("Input is not a mapping")
@@ -254,14 +456,57 @@ def generate_data(data_template, mappings = True):
         for field in data_template:
             # Field with arguments
             if type(data_template[field]) is list:
-                data_entry[field] = choose_field(data_template[field][0], data_template[field][1:])
+                fields.append((field, compile_field(fake, data_template[field][0], data_template[field][1:])))
+                field_specs.append((field, data_template[field][0], data_template[field][1:]))
             # Field without arguments
             else:
-                data_entry[field] = choose_field(data_template[field])
+                fields.append((field, compile_field(fake, data_template[field])))
+                field_specs.append((field, data_template[field], None))
 
     # No arguments provided
     else:
         print("Invalid argument")
-        return json.dumps(data_entry)
 
-    return json.dumps(data_entry, default = str)
+    columns = None
+    if vectorized:
+        columns = _compile_columns(field_specs, seed, faker_compatible)
+
+    return TemplatePlan(fields, columns)
+
+
+def generate_data(data_template, mappings = True):
+    """
+    Function to generate data
+    Returns a JSON object or a list of JSON objects if a JSON  or CSV file was provided
+    To generate many documents from the same template, use compile_template() instead
+
+    Arguments:
+        - data_template: See below
+            - NDJSON File, zipped or unzipped
+            - CSV File, zipped or unzipped
+            - Index Mapping (as a JSON string or dict)
+                - Note: only explicit mapping is supported and the tool will not support fields within fields
+            - JSON "short-hand": {<Field name>: <Field type>}
+                - Ex: {"Zip_Code": "zipcode", "Address": "address"}
+            - Format for generating data:
+                - Paste in your mapping value {"properties": {<properties values>}}
+                - Alternatively, pass in a JSON string or string in the form:
+                    {<Field>: <Field Type>}
+                - If you provide arguments, the <Field Type> should be a list:
+                    {<Field>: [<Field Type>, *args]}
+        - mappings: A boolean value representing whether the template is a mapping or a short-hand template
+
+    Returns:
+        - A JSON string of one generated entry
+
+    Raises:
+        - TypeError: Input is not a mapping
+        - TypeError: File not supported or could not be found
+    """
+    plan = compile_template(data_template, mappings)
+
+    # NDJSON and CSV files compile to one plan per template
+    if type(plan) is list:
+        return [json.dumps(template_plan.generate(), default = str) for template_plan in plan]
+
+    return json.dumps(plan.generate(), default = str)
@@ -0,0 +1,71 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+async_cluster_state.py contains the asyncio counterpart of ClusterState (see cluster_state.py), for the async jobs: a
+name pattern is loaded with one _cat/indices call made with an AsyncOpenSearch client, after which every index matching
+it is answered from the cache.
+
+Classes:
+    - AsyncClusterState: A cache of the indices that exist, filled with one call per name pattern by an AsyncOpenSearch client
+"""
+
+from opensearchpy import AsyncOpenSearch
+
+# Standard libraries
+from threading import RLock
+from os import path
+import sys
+
+# Adds parent directory "/sample_data_tooling" to sys.path
+sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_indices.cluster_state import ClusterState
+
+
+class AsyncClusterState(ClusterState):
+    """
+    Async ClusterState class: the asyncio counterpart of ClusterState, whose load() and exists() are coroutines; created()
+    and deleted() are the same
+
+    Arguments:
+        - client: an AsyncOpenSearch Python client object
+
+    Raises:
+        - TypeError: client should be an AsyncOpenSearch Python client object
+    """
+
+    def __init__(self, client:AsyncOpenSearch):
+        # Validate input
+        if not isinstance(client, AsyncOpenSearch):
+            raise TypeError("client should be an AsyncOpenSearch Python client object")
+
+        self.client = client
+        self.lock = RLock()
+        self.patterns = []
+        self.known = {}
+        self.calls = 0
+
+    async def load(self, pattern:str) -> list:
+        """
+        Loads the indices matching a name pattern with one _cat/indices call, unless the pattern was loaded already (see
+        ClusterState.load())
+
+        Raises:
+            - TypeError: pattern should be a string
+        """
+        if type(pattern) is not str:
+            raise TypeError("pattern should be a string")
+        response = None
+        if pattern not in self.patterns:
+            response = await self.client.cat.indices(index = pattern, format = "json", h = "index")
+        return self._record(pattern, response)
+
+    async def exists(self, index_name:str) -> bool:
+        """
+        Returns whether an index exists, from the cache if its name matches a loaded pattern or was seen before, and with an
+        exists() call (whose answer is kept) otherwise
+        """
+        cached = self._cached(index_name)
+        if cached is not None:
+            return cached
+        return self._checked(index_name, bool(await self.client.indices.exists(index = index_name)))
@@ -0,0 +1,170 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import AsyncOpenSearch
+
+# Standard Libraries
+from contextlib import asynccontextmanager
+from os import path
+import asyncio
+import sys
+
+# Adds parent directory "/sample_data_tooling" to sys.path
+sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_ingestor.async_ingestor import async_ingest
+from sample_data_tooling.sample_data_indices.sample_data_indices import BULK_LOAD_SETTINGS, validate_bulk_load, parse_index_settings, bulk_load_settings
+from sample_data_tooling.sample_data_indices.async_cluster_state import AsyncClusterState
+
+
+class AsyncSampleDataIndex:
+    """
+    Async Index class: the asyncio counterpart of SampleDataIndex; this class can create, delete, and ingest more data into
+    a new or existing index with an AsyncOpenSearch client
+
+    Arguments:
+        - index_name: The index name to create/ingest/delete
+        - index_body: The body containing the configurations of the index (used for index creation)
+        - client: an AsyncOpenSearch Python client object
+        - semaphore: An asyncio Semaphore limiting requests across every index that shares it (default is no shared limit)
+        - cluster_state: An AsyncClusterState that whether the index exists is read from and its creation and deletion
+          are recorded in, instead of asking the cluster every time (default is None)
+
+    Raises:
+        - TypeError: Invalid index_name: index_name is a string representing the target index name
+        - TypeError: Invalid index_body: index_body should be a dict defined in the config JSON file
+        - TypeError: client should be an AsyncOpenSearch Python client object
+        - TypeError: cluster_state should be an AsyncClusterState
+    """
+
+    def __init__(self, index_name:str, index_body:dict, client:AsyncOpenSearch, semaphore:asyncio.Semaphore = None, cluster_state:AsyncClusterState = None):
+        # Validate input
+        if type(index_name) is not str:
+            raise TypeError("Invalid index_name: index_name is a string representing the target index name")
+        if type(index_body) is not dict:
+            raise TypeError("Invalid index_body: index_body should be a dict defined in the config JSON file")
+        if client and (not isinstance(client, AsyncOpenSearch)):
+            raise TypeError("client should be an AsyncOpenSearch Python client object")
+        if cluster_state is not None and not isinstance(cluster_state, AsyncClusterState):
+            raise TypeError("cluster_state should be an AsyncClusterState")
+
+        self.index_name = index_name
+        self.index_body = index_body
+        self.client = client
+        self.semaphore = semaphore
+        self.cluster_state = cluster_state
+
+    async def _request(self, request, **kwargs):
+        """
+        Makes one API call, waiting on the shared semaphore if there is one
+        """
+        if self.semaphore is None:
+            return await request(**kwargs)
+        async with self.semaphore:
+            return await request(**kwargs)
+
+    async def exists(self) -> bool:
+        """
+        Returns whether the index exists, from the cluster state if there is one
+        """
+        if self.cluster_state is not None:
+            return await self.cluster_state.exists(self.index_name)
+        return bool(await self._request(self.client.indices.exists, index = self.index_name))
+
+    async def create_index(self):
+        """
+        Checks if an index exists; if not, the index is created using the AsyncOpenSearch client
+
+        Raises:
+            - ConnectionError: Index failed to be created; check the client and/or index configurations
+        """
+        if not await self.exists():
+            try:
+                await self._request(self.client.indices.create, index = self.index_name, body = self.index_body)
+            except Exception as e:
+                print(e)
+                raise ConnectionError("Index failed to be created; check the client and/or index configurations")
+            if self.cluster_state is not None:
+                self.cluster_state.created(self.index_name)
+            print("The index %s was successfully created" % (self.index_name))
+        else:
+            print("The index %s exists already" % (self.index_name))
+
+    async def delete_index(self):
+        """
+        Checks if an index exists; if it does, the index is deleted using the AsyncOpenSearch client
+
+        Raises:
+            - ConnectionError: Index failed to be deleted; check the index name and/or client configurations
+        """
+        if await self.exists():
+            try:
+                await self._request(self.client.indices.delete, index = self.index_name)
+            except Exception as e:
+                print(e)
+                raise ConnectionError("Index failed to be deleted; check the index name and/or client configurations")
+            if self.cluster_state is not None:
+                self.cluster_state.deleted(self.index_name)
+            print("The index %s was successfully deleted" % (self.index_name))
+        else:
+            print("The index %s does not exist" % (self.index_name))
+
+    @asynccontextmanager
+    async def bulk_load(self, replicas:int = 0, force_merge:bool = False):
+        """
+        Async context manager that loads the index with refreshes turned off and replicas replicas, and restores the original
+        settings afterwards, even if loading failed (see SampleDataIndex.bulk_load())
+
+        Raises:
+            - ValueError: replicas should be a non-negative integer
+            - TypeError: force_merge should be a boolean flag
+            - ConnectionError: Index settings failed to be updated; check the client and/or index configurations
+        """
+        validate_bulk_load(replicas, force_merge)
+        try:
+            response = await self._request(self.client.indices.get_settings, index = self.index_name, name = ",".join(BULK_LOAD_SETTINGS), flat_settings = True)
+            original = parse_index_settings(response, self.index_name)
+            await self._request(self.client.indices.put_settings, index = self.index_name, body = bulk_load_settings(replicas))
+        except Exception as e:
+            print(e)
+            raise ConnectionError("Index settings failed to be updated; check the client and/or index configurations")
+        try:
+            yield
+            await self._request(self.client.indices.refresh, index = self.index_name)
+            if force_merge:
+                await self._request(self.client.indices.forcemerge, index = self.index_name, max_num_segments = 1)
+        except BaseException:
+            try:
+                await self._request(self.client.indices.put_settings, index = self.index_name, body = original)
+                print("The settings of %s were restored" % (self.index_name))
+            except Exception as e:
+                print(e)
+                print("The settings of %s failed to be restored" % (self.index_name))
+            raise
+        try:
+            await self._request(self.client.indices.put_settings, index = self.index_name, body = original)
+        except Exception as e:
+            print(e)
+            raise ConnectionError("Index settings failed to be updated; check the client and/or index configurations") from e
+        print("The settings of %s were restored" % (self.index_name))
+
+    async def ingest_more(self, **kwargs) -> dict:
+        """
+        Calls the async_ingest() function to ingest more data using provided key word arguments; arguments of ingest() that do
+        not apply to async_ingest() are ignored: columnar and streaming (documents are always streamed a column at a time) and
+        adaptive (requests are limited by the semaphore instead)
+
+        Returns:
+            - The summary dict returned by async_ingest()
+        """
+        kwargs.pop("columnar", None)
+        kwargs.pop("streaming", None)
+        kwargs.pop("queue_size", None)
+        kwargs.pop("adaptive", None)
+        try:
+            return await async_ingest(client = self.client, semaphore = self.semaphore, **kwargs)
+        except Exception as e:
+            print(e)
+            print("Check configurations again; additionally, the index should be created before it can be ingested")
+            raise
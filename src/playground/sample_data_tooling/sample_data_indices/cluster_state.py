@@ -0,0 +1,122 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+cluster_state.py caches which indices exist, so a job does not ask the cluster about every day's index on its own. A
+name pattern (e.g. "cpu-usage-logs*") is loaded with one _cat/indices call, after which every index matching it is
+answered from the cache; the cache is updated as indices are created and deleted through it (e.g. by SampleDataIndex).
+An index that matches no loaded pattern is still checked with an exists() call, and the answer is kept.
+
+Classes:
+    - ClusterState: A cache of the indices that exist, filled with one call per name pattern
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from fnmatch import fnmatchcase
+from threading import RLock
+
+
+class ClusterState:
+    """
+    ClusterState class: a cache of the indices that exist, shared by the steps of a job (it is safe to use from several
+    threads). It only knows about the indices created and deleted through it, so it is meant to live for one run of a job.
+
+    Arguments:
+        - client: an OpenSearch Python client object
+
+    Raises:
+        - TypeError: client should be an OpenSearch Python client object
+    """
+
+    def __init__(self, client:OpenSearch):
+        # Validate input
+        if not isinstance(client, OpenSearch):
+            raise TypeError("client should be an OpenSearch Python client object")
+
+        self.client = client
+        self.lock = RLock()
+        self.patterns = []
+        self.known = {}
+        self.calls = 0
+
+    def _covered(self, index_name:str) -> bool:
+        return any(fnmatchcase(index_name, pattern) for pattern in self.patterns)
+
+    def _record(self, pattern:str, response) -> list:
+        """
+        Records the indices of a _cat/indices response for pattern, unless the pattern was recorded already (indices
+        already known from creates and deletes are kept as they are), and returns the known indices matching it
+        """
+        with self.lock:
+            if pattern not in self.patterns:
+                self.calls += 1
+                for row in response or []:
+                    if row.get("index") is not None:
+                        self.known.setdefault(row["index"], True)
+                self.patterns.append(pattern)
+            return sorted(name for name, exists in self.known.items() if exists and fnmatchcase(name, pattern))
+
+    def _cached(self, index_name:str) -> bool:
+        """
+        Returns whether an index exists from the cache, or None if the cache does not know
+        """
+        with self.lock:
+            if index_name in self.known:
+                return self.known[index_name]
+            if self._covered(index_name):
+                return False
+        return None
+
+    def _checked(self, index_name:str, exists:bool) -> bool:
+        """
+        Keeps the answer of an exists() call, unless the index was created or deleted in the meantime
+        """
+        with self.lock:
+            self.calls += 1
+            return self.known.setdefault(index_name, exists)
+
+    def load(self, pattern:str) -> list:
+        """
+        Loads the indices matching a name pattern with one _cat/indices call, unless the pattern was loaded already
+
+        Arguments:
+            - pattern: An index name pattern, e.g. "cpu-usage-logs*"
+
+        Returns:
+            - The sorted names of the indices matching pattern
+
+        Raises:
+            - TypeError: pattern should be a string
+        """
+        if type(pattern) is not str:
+            raise TypeError("pattern should be a string")
+        with self.lock:
+            if pattern not in self.patterns:
+                return self._record(pattern, self.client.cat.indices(index = pattern, format = "json", h = "index"))
+        return self._record(pattern, None)
+
+    def exists(self, index_name:str) -> bool:
+        """
+        Returns whether an index exists, from the cache if its name matches a loaded pattern or was seen before, and with an
+        exists() call (whose answer is kept) otherwise
+        """
+        cached = self._cached(index_name)
+        if cached is not None:
+            return cached
+        return self._checked(index_name, bool(self.client.indices.exists(index = index_name)))
+
+    def created(self, index_name:str):
+        """
+        Records that an index was created
+        """
+        with self.lock:
+            self.known[index_name] = True
+
+    def deleted(self, index_name:str):
+        """
+        Records that an index was deleted
+        """
+        with self.lock:
+            self.known[index_name] = False
@@ -0,0 +1,353 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+index_reconciliation.py verifies that the indices of a config hold as many documents as the config asks for, and repairs
+the ones that fall short instead of taking an index's existence as proof that its day is complete. Document counts of
+every index of a config are read in one _cat/indices sweep. For an index that is short of documents, one terms aggregation
+on the timestamp field finds the timestamps that are missing documents, wherever they are (e.g. a BULK request in the
+middle of the day that failed), and only the documents of those timestamps are generated and sent. With the seed of its
+checkpoint (see checkpoint_journal.py), they are generated exactly as they were the first time; without one, new
+documents fill the gaps. Documents without timestamps cannot be located: with deterministic IDs, the whole day is sent
+again (the documents the index already holds are only 409 conflicts), and otherwise its tail is refilled. Indices are
+never deleted or rebuilt.
+
+Functions:
+    - parse_doc_counts(): Reads the document count of every index from a _cat/indices response
+    - fetch_doc_counts(): Refreshes the indices of a pattern and returns their document counts
+    - expected_doc_count(): How many documents one index of a config should hold
+    - plan_repairs(): Compares document counts with the expected count and lists the indices to repair
+    - slot_timestamps(): The timestamps the documents of one index are generated at
+    - slot_query(): The search body that counts the documents of an index at every timestamp
+    - parse_slot_counts(): Reads the number of documents at every timestamp from the response of slot_query()
+    - missing_positions(): The sequence numbers of the documents an index is missing, from its counts per timestamp
+    - repair_positions(): The sequence numbers of the documents to send to repair an index
+    - day_documents(): Generates the documents of an index again, in the order they were first sent
+    - repair_bodies(): Builds the BULK request bodies of the documents at some sequence numbers
+    - reconcile_indices(): Verifies the indices of a config and ingests what they are missing
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from datetime import datetime, timedelta
+from os import path
+import sys
+
+# Adds parent directory "/sample_data_tooling" to sys.path
+sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import ingest_from_user_data, assign_timestamps, generate_documents, generate_dataset, print_summary, _compile_plans, _build_trends
+from sample_data_tooling.sample_data_ingestor.bulk_body_builder import BulkBodyBuilder
+from sample_data_tooling.sample_data_ingestor.bulk_sender import BulkSender
+from sample_data_tooling.sample_data_ingestor.checkpoint_journal import CheckpointJournal
+from sample_data_tooling.sample_data_ingestor.user_data_reader import read_user_data
+from sample_data_tooling.sample_data_generator.sample_data_generator import compile_template, TemplatePlan
+from sample_data_tooling.sample_data_commons.document_batch import timestamp_column
+
+
+def parse_doc_counts(response) -> dict:
+    """
+    Reads the document count of every index from a _cat/indices response (format = "json")
+
+    Returns:
+        - A dict of index name to document count (empty if the response holds nothing)
+    """
+    counts = {}
+    for row in response or []:
+        if row.get("docs.count") is not None:
+            counts[row["index"]] = int(row["docs.count"])
+    return counts
+
+
+def fetch_doc_counts(client:OpenSearch, index_pattern:str) -> dict:
+    """
+    Refreshes every index matching index_pattern, so recently sent documents are counted, and reads their document counts
+    in a single _cat/indices call. The counts include nested documents, so indices with nested fields can only look
+    complete, never short.
+
+    Arguments:
+        - client: an OpenSearch Python client object
+        - index_pattern: The indices to count (e.g. "cpu-usage-logs*")
+
+    Returns:
+        - A dict of index name to document count
+    """
+    client.indices.refresh(index = index_pattern)
+    return parse_doc_counts(client.cat.indices(index = index_pattern, format = "json", h = "index,docs.count"))
+
+
+def expected_doc_count(ingest_args:dict) -> int:
+    """
+    Returns how many documents one index of a config should hold: every document of a user-provided file, otherwise
+    number documents (ceil(MINUTES_PER_DAY / minutes) once the jobs set it) per template
+
+    Arguments:
+        - ingest_args: The "ingest_args" of a config (with number set, and the data template compiled or not)
+    """
+    template = ingest_args["data_template"]
+    if ingest_args.get("file_provided"):
+        return sum(len(batch) for batch in read_user_data(template, csv_schema = ingest_args.get("csv_schema")))
+    if not isinstance(template, TemplatePlan) and type(template) is not list:
+        template = compile_template(template, ingest_args.get("mapping", True))
+    templates = len(template) if type(template) is list else 1
+    return ingest_args.get("number", 6) * templates
+
+
+def plan_repairs(counts:dict, indices:dict, expected:int, journal:CheckpointJournal = None) -> list:
+    """
+    Compares the document count of every index with the expected count and lists the indices that are short of documents,
+    with the seed of their checkpoint in the journal (if any), so their missing documents are generated exactly as they
+    would have been
+
+    Arguments:
+        - counts: A dict of index name to document count (see fetch_doc_counts()); indices that are not in it do not exist
+          and are left to the jobs to create
+        - indices: A dict of index name to the date its documents start at
+        - expected: How many documents every index should hold
+        - journal: The CheckpointJournal of the ingestion (default is None)
+
+    Returns:
+        - A list of repairs as dicts of "index", "current_date", "found", "expected", and "seed" (None when the missing
+          documents are new ones)
+    """
+    repairs = []
+    for index_name, current_date in indices.items():
+        found = counts.get(index_name)
+        if found is None:
+            continue
+        if found > expected:
+            print("Index %s holds %d documents, more than the %d expected; it is left as it is" % (index_name, found, expected))
+        if found >= expected:
+            continue
+
+        checkpoint = journal.get(index_name) if journal is not None else None
+        seed = checkpoint["seed"] if checkpoint is not None else None
+        repairs.append({"index": index_name, "current_date": current_date, "found": found, "expected": expected, "seed": seed})
+    return repairs
+
+
+def slot_timestamps(ingest_args:dict, current_date:datetime, expected:int) -> list:
+    """
+    Returns the timestamps the documents of one index are generated at (every template gets one document per timestamp),
+    as ingest() sets them, or None if the documents have no distinct timestamps
+
+    Arguments:
+        - ingest_args: The "ingest_args" of a config
+        - current_date: The date the documents of the index start at
+        - expected: How many documents the index should hold (see expected_doc_count())
+    """
+    timestamp = ingest_args.get("timestamp")
+    minutes = ingest_args.get("minutes", 2)
+    if not timestamp or not minutes:
+        return None
+    if ingest_args.get("file_provided"):
+        anchor = ingest_args.get("timestamp_anchor") or current_date - timedelta(days = 7)
+        return list(timestamp_column(anchor, expected, minutes, ingest_args.get("timestamp_unit", "ms")))
+    return list(timestamp_column(current_date, ingest_args.get("number", 6), minutes))
+
+
+def slot_query(timestamp:str, slots:list) -> dict:
+    """
+    Returns the search body that counts the documents of an index at every timestamp of slots, with one terms aggregation
+    """
+    return {
+        "size": 0,
+        "query": {"range": {timestamp: {"gte": slots[0], "lte": slots[-1]}}},
+        "aggs": {"slots": {"terms": {"field": timestamp, "size": len(slots)}}}
+    }
+
+
+def parse_slot_counts(response, unit:str = "ms") -> dict:
+    """
+    Reads the number of documents at every timestamp from the response of a slot_query() search. A date field reports
+    its values in milliseconds, so with unit "s", keys in milliseconds are read as seconds.
+
+    Returns:
+        - A dict of timestamp to document count
+    """
+    counts = {}
+    for bucket in ((response or {}).get("aggregations") or {}).get("slots", {}).get("buckets", []):
+        key = int(bucket["key"])
+        if unit == "s" and key >= 10 ** 11:
+            key //= 1000
+        counts[key] = counts.get(key, 0) + bucket["doc_count"]
+    return counts
+
+
+def missing_positions(expected:int, slots:list, slot_counts:dict) -> list:
+    """
+    Returns the sequence numbers (positions among the documents of the index, as ingest() sends them) of the documents an
+    index is missing, from how many documents it holds at each timestamp. With several templates, a timestamp that holds
+    some of its documents is missing the last ones, unless the gap started at an earlier timestamp (it is then missing the
+    first ones).
+
+    Arguments:
+        - expected: How many documents the index should hold
+        - slots: The timestamps of the documents (see slot_timestamps())
+        - slot_counts: A dict of timestamp to the number of documents the index holds (see parse_slot_counts())
+
+    Returns:
+        - A sorted list of sequence numbers
+    """
+    per_slot = max(expected // len(slots), 1)
+    positions = []
+    gap = False
+    for slot, value in enumerate(slots):
+        found = min(slot_counts.get(value, 0), per_slot)
+        first = slot * per_slot
+        if found < per_slot and gap:
+            positions.extend(range(first, first + per_slot - found))
+        elif found < per_slot:
+            positions.extend(range(first + found, first + per_slot))
+        gap = found < per_slot
+    return positions
+
+
+def repair_positions(repair:dict, ingest_args:dict, response = None) -> list:
+    """
+    Returns the sequence numbers of the documents to send to repair an index: the ones missing at their timestamps if the
+    response of its slot_query() search is given, otherwise (documents without timestamps) every document with
+    deterministic IDs, or else the missing tail
+
+    Arguments:
+        - repair: A repair (see plan_repairs())
+        - ingest_args: The "ingest_args" of the config
+        - response: The response of the slot_query() search of the index (default is None)
+    """
+    slots = slot_timestamps(ingest_args, repair["current_date"], repair["expected"])
+    if slots and response is not None:
+        return missing_positions(repair["expected"], slots, parse_slot_counts(response, ingest_args.get("timestamp_unit", "ms")))
+    if ingest_args.get("document_ids"):
+        return list(range(repair["expected"]))
+    return list(range(repair["found"], repair["expected"]))
+
+
+def day_documents(ingest_args:dict, current_date:datetime, seed:int = None, streaming:bool = False):
+    """
+    Generates the documents of one index again, in the order they were first sent: as ingest() generates them, or as
+    stream_ingest() and async_ingest() do with streaming (user-provided files are read again)
+
+    Arguments:
+        - ingest_args: The "ingest_args" of a config
+        - current_date: The date the documents of the index start at
+        - seed: The seed the documents were generated with (default is None: new documents)
+        - streaming: Whether the documents were generated a batch at a time (default is False)
+
+    Returns:
+        - An iterator of documents (dicts or JSON strings)
+    """
+    timestamp = ingest_args.get("timestamp")
+    minutes = ingest_args.get("minutes", 2)
+    if ingest_args.get("file_provided"):
+        documents = ingest_from_user_data(ingest_args["data_template"], csv_schema = ingest_args.get("csv_schema"))
+        if timestamp:
+            anchor = ingest_args.get("timestamp_anchor") or current_date - timedelta(days = 7)
+            assign_timestamps(documents, timestamp, minutes, anchor, ingest_args.get("timestamp_unit", "ms"))
+        return iter(documents)
+
+    number = ingest_args.get("number", 6)
+    plans = _compile_plans(ingest_args["data_template"], ingest_args.get("mapping", True), ingest_args.get("vectorized", False), ingest_args.get("faker_compatible", False), seed)
+    trends = _build_trends(ingest_args.get("anomaly_detection_trend"), timestamp, current_date, seed)
+    if streaming:
+        return generate_documents(plans, number, timestamp, minutes, current_date, trends, batch_size = max(ingest_args.get("chunk", 5), 1000))
+    dataset = generate_dataset(plans, number, timestamp, minutes, current_date, trends, ingest_args.get("columnar", False))
+    if ingest_args.get("columnar"):
+        return (document for batch in dataset for document in batch.rows())
+    return iter(dataset)
+
+
+def repair_bodies(documents, positions:list, index_name:str, ingest_args:dict):
+    """
+    Generator that groups the documents at the given sequence numbers into BULK request bodies; with deterministic IDs
+    (document_ids), every document gets the ID of its sequence number, as it would have the first time
+
+    Arguments:
+        - documents: The documents of the index (see day_documents())
+        - positions: The sorted sequence numbers of the documents to send
+        - index_name: The name of the index
+        - ingest_args: The "ingest_args" of the config (for chunk, max_bulk_size and document_ids)
+
+    Returns:
+        - A generator of (NDJSON request body as bytes, number of documents) tuples
+    """
+    builder = BulkBodyBuilder(index_name, max(ingest_args.get("chunk", 5), 1), max(ingest_args.get("max_bulk_size", 100000), 1), index_name if ingest_args.get("document_ids") else None)
+    wanted = iter(positions)
+    position = next(wanted, None)
+    for sequence, document in enumerate(documents):
+        if position is None:
+            break
+        if sequence != position:
+            continue
+        source = builder.encode(document)
+        if not builder.fits(source):
+            yield builder.take()
+        builder.sequence = sequence
+        builder.append(source)
+        position = next(wanted, None)
+    if builder.count:
+        yield builder.take()
+
+
+def reconcile_indices(client:OpenSearch,
+    index_pattern:str,
+    indices:dict,
+    ingest_args:dict,
+    journal:CheckpointJournal = None
+) -> list:
+    """
+    Verifies that every index of a config holds the documents the config asks for, and ingests only what the ones that
+    fall short are missing (see repair_positions())
+
+    Arguments:
+        - client: an OpenSearch Python client object
+        - index_pattern: The pattern matching every index of the config (e.g. "cpu-usage-logs*")
+        - indices: A dict of index name to the date its documents start at (datetime)
+        - ingest_args: The "ingest_args" of the config, as the jobs pass them to ingest()
+        - journal: The CheckpointJournal of the ingestion, whose seeds make repairs regenerate the same documents (default
+          is None, so missing documents are new ones)
+
+    Returns:
+        - The list of repairs that were made (see plan_repairs()), each with "missing", the number of documents sent
+
+    Raises:
+        - TypeError: client should be an OpenSearch Python client object
+        - TypeError: indices should be a dict of index names to datetime objects
+        - TypeError: journal should be a CheckpointJournal
+        - ConnectionError: Index failed to be ingested. Check the client configurations
+    """
+    # Validate input
+    if not isinstance(client, OpenSearch):
+        raise TypeError("client should be an OpenSearch Python client object")
+    if type(indices) is not dict or any(type(current_date) is not datetime for current_date in indices.values()):
+        raise TypeError("indices should be a dict of index names to datetime objects")
+    if journal is not None and not isinstance(journal, CheckpointJournal):
+        raise TypeError("journal should be a CheckpointJournal")
+
+    counts = fetch_doc_counts(client, index_pattern)
+    if not any(index_name in counts for index_name in indices):
+        return []
+
+    ingest_args = dict(ingest_args)
+    ingest_args.pop("index_name", None)
+    ingest_args.pop("checkpoint", None)
+    ingest_args.pop("current_date", None)
+    expected = expected_doc_count(ingest_args)
+
+    repairs = plan_repairs(counts, indices, expected, journal)
+    for repair in repairs:
+        slots = slot_timestamps(ingest_args, repair["current_date"], expected)
+        response = client.search(index = repair["index"], body = slot_query(ingest_args["timestamp"], slots)) if slots else None
+        positions = repair_positions(repair, ingest_args, response)
+        repair["missing"] = len(positions)
+        print("Index %s holds %d of %d documents; %s %d missing documents" % (repair["index"], repair["found"], expected, "regenerating" if repair["seed"] is not None else "refilling", len(positions)))
+
+        documents = day_documents(ingest_args, repair["current_date"], repair["seed"], ingest_args.get("streaming", False))
+        with BulkSender(client, ingest_args.get("workers", 1), max_retries = ingest_args.get("max_retries", 3), idempotent = bool(ingest_args.get("document_ids"))) as sender:
+            for body, count in repair_bodies(documents, positions, repair["index"], ingest_args):
+                sender.submit(body, count)
+        print_summary(sender.summary, repair["index"])
+
+        checkpoint = journal.get(repair["index"]) if journal is not None else None
+        if checkpoint is not None:
+            journal.record(repair["index"], checkpoint["seed"], expected, checkpoint["batches"], complete = True)
+    return repairs
@@ -6,12 +6,50 @@ SPDX-License-Identifier: Apache-2.0
 from opensearchpy import OpenSearch
 
 # Standard Libraries
+from contextlib import contextmanager
 from os import path
 import sys
 
 # Adds parent directory "/sample_data_tooling" to sys.path
 sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
 from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import ingest
+from sample_data_tooling.sample_data_indices.cluster_state import ClusterState
+
+# The settings the bulk-load profile changes while an index is loaded
+BULK_LOAD_SETTINGS = ("index.refresh_interval", "index.number_of_replicas")
+
+
+def validate_bulk_load(replicas:int, force_merge:bool):
+    """
+    Validates the arguments of the bulk-load profile
+
+    Raises:
+        - ValueError: replicas should be a non-negative integer
+        - TypeError: force_merge should be a boolean flag
+    """
+    if type(replicas) is not int or replicas < 0:
+        raise ValueError("replicas should be a non-negative integer")
+    if type(force_merge) is not bool:
+        raise TypeError("force_merge should be a boolean flag")
+
+
+def parse_index_settings(response, index_name:str) -> dict:
+    """
+    Reads the bulk-load settings of an index from a flat _settings response; settings the index does not set are None,
+    which restores them to their defaults
+
+    Returns:
+        - A dict of setting name to value
+    """
+    settings = ((response or {}).get(index_name) or {}).get("settings") or {}
+    return {name: settings.get(name) for name in BULK_LOAD_SETTINGS}
+
+
+def bulk_load_settings(replicas:int) -> dict:
+    """
+    Returns the settings an index is loaded with: no refreshes and replicas replicas
+    """
+    return {"index.refresh_interval": "-1", "index.number_of_replicas": replicas}
 
 
 class SampleDataIndex:
@@ -22,14 +60,17 @@ class SampleDataIndex:
         - index_name: The index name to create/ingest/delete
         - index_body: The body containing the configurations of the index (used for index creation)
         - client: an OpenSearch Python client object
+        - cluster_state: A ClusterState that whether the index exists is read from and its creation and deletion are
+          recorded in, instead of asking the cluster every time (default is None)
 
     Raises:
         - TypeError: Invalid index_name: index_name is a string representing the target index name
         - TypeError: Invalid index_body: index_body should be a dict defined in the config JSON file
         - TypeError: client should be an OpenSearch Python client object
+        - TypeError: cluster_state should be a ClusterState
     """
 
-    def __init__(self, index_name:str, index_body:dict, client:OpenSearch):
+    def __init__(self, index_name:str, index_body:dict, client:OpenSearch, cluster_state:ClusterState = None):
         # Validate input
         if type(index_name) is not str:
             raise TypeError("Invalid index_name: index_name is a string representing the target index name")
@@ -37,10 +78,21 @@ class SampleDataIndex:
             raise TypeError("Invalid index_body: index_body should be a dict defined in the config JSON file")
         if client and (not isinstance(client, OpenSearch)):
             raise TypeError("client should be an OpenSearch Python client object")
+        if cluster_state is not None and not isinstance(cluster_state, ClusterState):
+            raise TypeError("cluster_state should be a ClusterState")
 
         self.index_name = index_name
         self.index_body = index_body
         self.client = client
+        self.cluster_state = cluster_state
+
+    def exists(self) -> bool:
+        """
+        Returns whether the index exists, from the cluster state if there is one
+        """
+        if self.cluster_state is not None:
+            return self.cluster_state.exists(self.index_name)
+        return bool(self.client.indices.exists(index = self.index_name))
 
     def create_index(self):
         """
@@ -51,12 +103,14 @@ class SampleDataIndex:
             - ConnectionError: Index failed to be created; check the client and/or index configurations
         """
 
-        if not self.client.indices.exists(index = self.index_name):
+        if not self.exists():
             try:
                 self.client.indices.create(index = self.index_name, body=self.index_body)
             except Exception as e:
                 print(e)
                 raise ConnectionError("Index failed to be created; check the client and/or index configurations")
+            if self.cluster_state is not None:
+                self.cluster_state.created(self.index_name)
             print("The index %s was successfully created" % (self.index_name))
         else:
             print("The index %s exists already" % (self.index_name))
@@ -69,16 +123,65 @@ class SampleDataIndex:
         Raises:
             - ConnectionError: Index failed to be deleted; check the index name and/or client configurations
         """
-        if self.client.indices.exists(index = self.index_name):
+        if self.exists():
             try:
                 self.client.indices.delete(index = self.index_name)
             except Exception as e:
                 print(e)
                 raise ConnectionError("Index failed to be deleted; check the index name and/or client configurations")
+            if self.cluster_state is not None:
+                self.cluster_state.deleted(self.index_name)
             print("The index %s was successfully deleted" % (self.index_name))
         else:
             print("The index %s does not exist" % (self.index_name))
 
+    @contextmanager
+    def bulk_load(self, replicas:int = 0, force_merge:bool = False):
+        """
+        Context manager that loads the index with refreshes turned off and replicas replicas, so BULK requests do not pay
+        for refreshing and replicating every small batch, and restores the original settings afterwards, even if loading
+        failed. Once loading succeeded, the index is refreshed once and, with force_merge, merged down to one segment
+        (meant for indices that receive no more documents, e.g. past days), both before replicas are restored. When loading
+        failed, its error is raised even if the settings then fail to be restored.
+
+        Arguments:
+            - replicas: The number of replicas while the index is loaded (default is 0)
+            - force_merge: Whether the index is force-merged to one segment once it is loaded (default is False)
+
+        Raises:
+            - ValueError: replicas should be a non-negative integer
+            - TypeError: force_merge should be a boolean flag
+            - ConnectionError: Index settings failed to be updated; check the client and/or index configurations
+        """
+        validate_bulk_load(replicas, force_merge)
+        try:
+            original = parse_index_settings(self.client.indices.get_settings(index = self.index_name, name = ",".join(BULK_LOAD_SETTINGS), flat_settings = True), self.index_name)
+            self.client.indices.put_settings(index = self.index_name, body = bulk_load_settings(replicas))
+        except Exception as e:
+            print(e)
+            raise ConnectionError("Index settings failed to be updated; check the client and/or index configurations")
+        try:
+            yield
+            # Refreshed and merged while there are no replicas, so merged segments are not copied to them again
+            self.client.indices.refresh(index = self.index_name)
+            if force_merge:
+                self.client.indices.forcemerge(index = self.index_name, max_num_segments = 1)
+        except BaseException:
+            # The error of loading is the one raised; failing to restore the settings is only reported
+            try:
+                self.client.indices.put_settings(index = self.index_name, body = original)
+                print("The settings of %s were restored" % (self.index_name))
+            except Exception as e:
+                print(e)
+                print("The settings of %s failed to be restored" % (self.index_name))
+            raise
+        try:
+            self.client.indices.put_settings(index = self.index_name, body = original)
+        except Exception as e:
+            print(e)
+            raise ConnectionError("Index settings failed to be updated; check the client and/or index configurations") from e
+        print("The settings of %s were restored" % (self.index_name))
+
     def ingest_more(self, **kwargs):
         """
         Calls the ingest() function to ingest more data using provided key word arguments
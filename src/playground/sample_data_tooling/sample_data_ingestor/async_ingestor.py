@@ -0,0 +1,261 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+async_ingestor.py is the asyncio counterpart of ingest(): documents are generated and assembled into request bodies the same
+way as stream_ingest() does, but BULK calls are made with opensearch-py's AsyncOpenSearch client, so the ingestion of many
+indices can overlap on one event loop. Requests are limited by a semaphore that callers can share across ingestions.
+
+The async client requires aiohttp (see requirements.txt).
+
+Functions:
+    - async_ingest(): Ingests generated or user-provided documents with an AsyncOpenSearch client
+    - async_send_bodies(): Sends BULK request bodies with an AsyncOpenSearch client
+"""
+
+from opensearchpy import AsyncOpenSearch
+
+# Standard libraries
+from datetime import datetime, timedelta
+from itertools import islice
+from os import path
+import asyncio
+import sys
+
+# Adds parent directory "/sample_data_tooling" to sys.path
+sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import ingest_validation, generate_documents, build_bulk_bodies, stream_user_data, assign_timestamps, print_summary, _compile_plans, _build_trends, _start_tracker
+from sample_data_tooling.sample_data_ingestor.bulk_sender import is_retryable_error, backoff_delay, parse_bulk_response, split_conflicts
+from sample_data_tooling.sample_data_ingestor.checkpoint_journal import CheckpointJournal, CheckpointTracker
+from sample_data_tooling.sample_data_ingestor.bulk_file_sink import BulkFileSink
+
+
+async def async_ingest(client:AsyncOpenSearch,
+    data_template,
+    index_name:str,
+    file_provided:bool = False,
+    mapping:bool = True,
+    number:int = 6,
+    chunk:int = 5,
+    timestamp:str = None,
+    minutes:int = 2,
+    current_date:datetime = None,
+    max_bulk_size:int = 100000,
+    anomaly_detection_trend:list = None,
+    vectorized:bool = False,
+    faker_compatible:bool = False,
+    workers:int = 1,
+    max_retries:int = 3,
+    parse_processes:int = None,
+    parse_ordered:bool = True,
+    csv_schema:dict = None,
+    timestamp_unit:str = "ms",
+    timestamp_anchor:datetime = None,
+    checkpoint:CheckpointJournal = None,
+    document_ids:bool = False,
+    sequence:int = 0,
+    seed:int = None,
+    sink:BulkFileSink = None,
+    semaphore:asyncio.Semaphore = None
+) -> dict:
+    """
+    Function that ingests user-provided data or generated data with an AsyncOpenSearch client
+
+    Request bodies are generated in a worker thread (see generate_documents() and build_bulk_bodies()) so the event loop keeps
+    serving other ingestions meanwhile, and at most workers BULK calls of this ingestion are in flight at once. Rejected
+    documents are resent with backoff like BulkSender does, without holding the shared semaphore while waiting.
+
+    With a sink, request bodies are written to part files on the worker thread instead (see bulk_file_sink.py).
+
+    Arguments:
+        - client: an AsyncOpenSearch Python client object (None with a sink)
+        - The same arguments as stream_ingest(), except queue_size (at most workers request bodies are held at once), adaptive and max_workers
+        - semaphore: An asyncio Semaphore limiting requests across every ingestion that shares it (default is no shared limit)
+
+    Returns:
+        - The same summary dict as stream_ingest()
+
+    Raises:
+        - TypeError: client should be an AsyncOpenSearch Python client object
+        - ConnectionError: Index failed to be ingested. Check the client configurations
+    """
+    # Validates that inputs are correct
+    if sink is None and not isinstance(client, AsyncOpenSearch):
+        raise TypeError("client should be an AsyncOpenSearch Python client object")
+    ingest_validation(data_template = data_template,
+        index_name = index_name,
+        file_provided = file_provided,
+        mapping = mapping,
+        number = number,
+        chunk = chunk,
+        timestamp = timestamp,
+        minutes = minutes,
+        current_date = current_date,
+        max_bulk_size = max_bulk_size,
+        anomaly_detection_trend = anomaly_detection_trend,
+        vectorized = vectorized,
+        faker_compatible = faker_compatible,
+        workers = workers,
+        max_retries = max_retries,
+        parse_processes = parse_processes,
+        parse_ordered = parse_ordered,
+        csv_schema = csv_schema,
+        timestamp_unit = timestamp_unit,
+        timestamp_anchor = timestamp_anchor,
+        checkpoint = checkpoint,
+        document_ids = document_ids,
+        sequence = sequence,
+        seed = seed,
+        sink = sink
+    )
+    if current_date is None:
+        current_date = datetime.now()
+
+    tracker = _start_tracker(checkpoint, index_name)
+
+    # If the user provides their own data, it is read from the file as it is sent
+    reader = None
+    if file_provided:
+        documents, reader = stream_user_data(data_template, chunk, parse_processes, parse_ordered, csv_schema, encoded = not timestamp)
+        if timestamp:
+            anchor = timestamp_anchor or current_date - timedelta(days = 7)
+            documents = assign_timestamps(documents, timestamp, minutes, anchor, timestamp_unit)
+    else:
+        seed = tracker.seed if tracker else seed
+        plans = _compile_plans(data_template, mapping, vectorized, faker_compatible, seed)
+        trends = _build_trends(anomaly_detection_trend, timestamp, current_date, seed)
+        documents = generate_documents(plans, number, timestamp, minutes, current_date, trends, batch_size = max(chunk, 1000))
+
+    # Documents the checkpoint already covers are skipped; with document IDs, their sequence numbers are too
+    skip = tracker.offset if tracker is not None else 0
+    if skip:
+        documents = islice(documents, skip, None)
+    bodies = build_bulk_bodies(documents, index_name, chunk, max_bulk_size, id_prefix = index_name if document_ids else None, sequence = sequence + skip)
+
+    # With a sink, bodies are generated and written to part files off the event loop
+    if sink is not None:
+        summary = await asyncio.to_thread(_write_bodies, bodies, sink.writer(index_name))
+        print_summary(summary, index_name)
+        if reader is not None:
+            reader.report()
+        return summary
+
+    summary = await async_send_bodies(client, bodies, workers, max_retries, document_ids, semaphore, tracker)
+    if tracker is not None:
+        tracker.finish()
+
+    print_summary(summary, index_name)
+    if reader is not None:
+        reader.report()
+    return summary
+
+
+async def async_send_bodies(client:AsyncOpenSearch,
+    bodies,
+    workers:int = 1,
+    max_retries:int = 3,
+    idempotent:bool = False,
+    semaphore:asyncio.Semaphore = None,
+    tracker:CheckpointTracker = None
+) -> dict:
+    """
+    Function that sends BULK request bodies with an AsyncOpenSearch client, at most workers at once, resending rejected
+    documents with backoff like BulkSender does; the bodies are generated in a worker thread as they are needed
+
+    Arguments:
+        - client: an AsyncOpenSearch Python client object
+        - bodies: An iterator of (NDJSON request body as bytes, number of documents) tuples (e.g. from build_bulk_bodies())
+        - workers: How many requests can be in flight at once (default is 1)
+        - max_retries: How many times rejected documents are sent again before they are reported as failed (default is 3)
+        - idempotent: Whether 409 conflicts count as already indexed, for documents sent with deterministic IDs (default is False)
+        - semaphore: An asyncio Semaphore limiting requests across every ingestion that shares it (default is no shared limit)
+        - tracker: A CheckpointTracker that acknowledged requests are reported to (default is None)
+
+    Returns:
+        - The same summary dict as BulkSender.close()
+
+    Raises:
+        - ConnectionError: Index failed to be ingested. Check the client configurations
+    """
+    summary = {"documents": 0, "requests": 0, "bytes": 0, "errors": 0, "retries": 0, "conflicts": 0, "failures": []}
+
+    async def bulk(body):
+        if semaphore is None:
+            return await client.bulk(body = body)
+        async with semaphore:
+            return await client.bulk(body = body)
+
+    async def send(body, count:int, ticket):
+        summary["documents"] += count
+        attempt = 0
+        while True:
+            try:
+                response = await bulk(body)
+            except Exception as e:
+                if attempt < max_retries and is_retryable_error(e):
+                    await asyncio.sleep(backoff_delay(attempt, 0.5, 30))
+                    attempt += 1
+                    continue
+                print(e)
+                raise ConnectionError("Index failed to be ingested. Check the client configurations")
+
+            retry_body, retry_count, failures = parse_bulk_response(body, response, retry = attempt < max_retries)
+            if idempotent:
+                failures, conflicts = split_conflicts(failures)
+                summary["conflicts"] += conflicts
+            summary["requests"] += 1
+            summary["bytes"] += len(body)
+            summary["errors"] += len(failures)
+            summary["retries"] += retry_count
+            summary["failures"] += failures
+            if not retry_count:
+                if ticket is not None:
+                    # The journal is synced to disk, so it is written off the event loop
+                    await asyncio.to_thread(tracker.acknowledge, ticket)
+                return
+
+            await asyncio.sleep(backoff_delay(attempt, 0.5, 30))
+            attempt += 1
+            body = retry_body
+
+    loop = asyncio.get_running_loop()
+    tasks = []
+    try:
+        while True:
+            # The requests in flight are the tasks not done yet: counting them instead of holding a semaphore slot for each
+            # leaves no slot to leak when something fails before a task exists (e.g. tracker.submit()), and the next body
+            # is only generated once fewer than workers are in flight
+            if len(tasks) >= workers:
+                await asyncio.wait(tasks, return_when = asyncio.FIRST_COMPLETED)
+            else:
+                item = await loop.run_in_executor(None, next, bodies, None)
+                if item is None:
+                    break
+                body, count = item
+                ticket = tracker.submit(count) if tracker is not None else None
+                tasks.append(asyncio.ensure_future(send(body, count, ticket)))
+
+            # Failed requests stop the ingestion as soon as they are noticed
+            for task in tasks:
+                if task.done() and not task.cancelled() and task.exception():
+                    raise task.exception()
+            tasks = [task for task in tasks if not task.done()]
+        for task in asyncio.as_completed(tasks):
+            await task
+    except BaseException:
+        # The requests still in flight are cancelled and waited for, so their own errors cannot hide the first failure
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions = True)
+        raise
+    return summary
+
+
+def _write_bodies(bodies, writer) -> dict:
+    """
+    Writes every request body to a BulkFileWriter and returns its summary
+    """
+    with writer:
+        for body in bodies:
+            writer.submit(*body)
+    return writer.summary
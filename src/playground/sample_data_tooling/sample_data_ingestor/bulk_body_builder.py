@@ -0,0 +1,138 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+bulk_body_builder.py encodes BULK request bodies incrementally: every action and source line is written once into a
+single bytearray, so the size of a body is known exactly (in bytes, as sent on the wire) at every step and the finished
+body can be handed to the client as-is, without the client serializing the documents again.
+
+With an id_prefix, every document is sent with a "create" action and a deterministic _id made of the prefix and the
+document's sequence number (its position among the documents of the index), so a document that is sent again (a retried
+request, a resumed ingestion) conflicts with the copy the index already holds instead of being duplicated.
+
+Classes:
+    - BulkBodyBuilder: Incremental NDJSON encoder for BULK request bodies
+"""
+
+from json import dumps
+
+
+class BulkBodyBuilder:
+    """
+    BulkBodyBuilder class: builds one BULK request body at a time, cutting it at a document count and a byte size
+
+    Arguments:
+        - index_name: The name of the index the documents are ingested into
+        - chunk: The maximum number of documents per body
+        - max_bulk_size: The maximum size of a body in bytes; a document larger than this on its own still gets a body of its own
+        - id_prefix: The prefix of the _id of every document, which are then sent with "create" actions; None sends "index"
+          actions and lets the cluster generate IDs (default is None)
+        - sequence: The sequence number of the first document added, e.g. the number of documents a resumed ingestion
+          skips (default is 0)
+
+    Raises:
+        - TypeError: index_name should be a string
+        - ValueError: chunk should be a positive integer
+        - ValueError: max_bulk_size should be a positive integer
+        - TypeError: id_prefix should be a string
+        - ValueError: sequence should be a non-negative integer
+    """
+
+    def __init__(self, index_name:str, chunk:int, max_bulk_size:int, id_prefix:str = None, sequence:int = 0):
+        # Validate input
+        if type(index_name) is not str:
+            raise TypeError("index_name should be a string")
+        if type(chunk) is not int or chunk < 1:
+            raise ValueError("chunk should be a positive integer")
+        if type(max_bulk_size) is not int or max_bulk_size < 1:
+            raise ValueError("max_bulk_size should be a positive integer")
+        if id_prefix is not None and type(id_prefix) is not str:
+            raise TypeError("id_prefix should be a string")
+        if type(sequence) is not int or sequence < 0:
+            raise ValueError("sequence should be a non-negative integer")
+
+        self.index_name = index_name
+        self.chunk = chunk
+        self.max_bulk_size = max_bulk_size
+        self.id_prefix = id_prefix
+        self.sequence = sequence
+        self.action = (dumps({"index": {"_index": index_name}}) + "\n").encode()
+        self.buffer = bytearray()
+        self.count = 0
+
+    def next_action(self) -> bytes:
+        """
+        Returns the action line of the next document added: the shared "index" action, or a "create" action with the
+        document's _id when there is an id_prefix
+        """
+        if self.id_prefix is None:
+            return self.action
+        return (dumps({"create": {"_index": self.index_name, "_id": "%s-%d" % (self.id_prefix, self.sequence)}}) + "\n").encode()
+
+    def encode(self, document) -> bytes:
+        """
+        Encodes the source line of a document
+
+        Arguments:
+            - document: A dict, or a JSON string (or bytes) that is used as-is
+
+        Returns:
+            - The source line as UTF-8 bytes, ending with a newline
+        """
+        if type(document) is bytes:
+            return document.rstrip(b"\n") + b"\n"
+        if type(document) is not str:
+            document = dumps(document, default = str)
+        return (document.rstrip("\n") + "\n").encode()
+
+    def fits(self, source:bytes) -> bool:
+        """
+        Returns whether an encoded source line can be added without going over chunk or max_bulk_size (an empty body always
+        takes the line)
+        """
+        if not self.count:
+            return True
+        return self.count < self.chunk and len(self.buffer) + len(self.next_action()) + len(source) <= self.max_bulk_size
+
+    def append(self, source:bytes):
+        """
+        Writes the action line and an encoded source line to the body, whether or not they fit
+        """
+        self.buffer += self.next_action()
+        self.buffer += source
+        self.count += 1
+        self.sequence += 1
+
+    def add(self, document) -> bool:
+        """
+        Adds a document to the body if it fits
+
+        Arguments:
+            - document: A dict, or a JSON string (or bytes)
+
+        Returns:
+            - True if the document was added, False if the body is full and should be sent first
+        """
+        source = self.encode(document)
+        if not self.fits(source):
+            return False
+        self.append(source)
+        return True
+
+    def size(self) -> int:
+        """
+        Returns the size of the body in bytes
+        """
+        return len(self.buffer)
+
+    def take(self) -> tuple:
+        """
+        Returns the finished body and starts a new one
+
+        Returns:
+            - A tuple of the NDJSON body (as bytes, which the client sends without serializing again) and its number of documents
+        """
+        body = (bytes(self.buffer), self.count)
+        self.buffer = bytearray()
+        self.count = 0
+        return body
@@ -0,0 +1,193 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+bulk_controller.py tunes the size of BULK requests and how many are in flight while documents are ingested, instead of
+relying on the chunk and max_bulk_size picked in a config file. Sizes and concurrency grow additively while requests come
+back within a target latency, and are cut in half as soon as the cluster rejects documents or latency spikes
+(additive-increase/multiplicative-decrease, the same scheme TCP uses to find the capacity of a link). Sending also pauses
+while the write thread pool of a node has a backlog.
+
+Classes:
+    - AdaptiveBulkController: Tunes chunk, max_bulk_size and workers from the outcome of each BULK request
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from threading import Lock
+from time import monotonic, sleep
+
+
+# Constants
+MAX_WORKERS = 8
+
+
+class AdaptiveBulkController:
+    """
+    AdaptiveBulkController class: holds the current chunk, max_bulk_size and workers of an ingestion and adjusts them from
+    the latency and rejections of every BULK request (see record()). The initial values are only hints; they never drop
+    below 1 document, 1 worker and the initial max_bulk_size divided by 16.
+
+    Arguments:
+        - chunk: The initial maximum number of documents per BULK request
+        - max_bulk_size: The initial maximum size of a BULK request in bytes
+        - workers: The initial number of BULK requests in flight at once (default is 1)
+        - target_latency: The latency in seconds under which requests are allowed to grow (default is 1.0)
+        - max_chunk: The largest chunk the controller grows to (default is 10000)
+        - max_bulk_size_limit: The largest max_bulk_size the controller grows to, in bytes (default is 10 MB)
+        - max_workers: The largest number of requests in flight the controller grows to (default is 8)
+        - queue_threshold: How many tasks can wait in the write thread pool of a node before sending pauses (default is 100)
+        - poll_interval: How often in seconds the thread pool stats of the nodes are read (default is 5)
+
+    Raises:
+        - ValueError: chunk, max_bulk_size, workers, max_chunk, max_bulk_size_limit, and max_workers should be positive integers
+        - ValueError: target_latency and poll_interval should be positive numbers
+        - ValueError: queue_threshold should be a non-negative integer
+    """
+
+    def __init__(self,
+        chunk:int,
+        max_bulk_size:int,
+        workers:int = 1,
+        target_latency:float = 1.0,
+        max_chunk:int = 10000,
+        max_bulk_size_limit:int = 10000000,
+        max_workers:int = MAX_WORKERS,
+        queue_threshold:int = 100,
+        poll_interval:float = 5
+    ):
+        # Validate input
+        for value in (chunk, max_bulk_size, workers, max_chunk, max_bulk_size_limit, max_workers):
+            if type(value) is not int or value < 1:
+                raise ValueError("chunk, max_bulk_size, workers, max_chunk, max_bulk_size_limit, and max_workers should be positive integers")
+        for value in (target_latency, poll_interval):
+            if type(value) not in (int, float) or value <= 0:
+                raise ValueError("target_latency and poll_interval should be positive numbers")
+        if type(queue_threshold) is not int or queue_threshold < 0:
+            raise ValueError("queue_threshold should be a non-negative integer")
+
+        # The limits never make the initial hints smaller
+        self.max_chunk = max(max_chunk, chunk)
+        self.max_bulk_size_limit = max(max_bulk_size_limit, max_bulk_size)
+        self.max_workers = max(max_workers, workers)
+        self.chunk_step = chunk
+        self.bulk_size_step = max_bulk_size
+        self.min_bulk_size = max(max_bulk_size // 16, 1)
+
+        self.chunk = chunk
+        self.max_bulk_size = max_bulk_size
+        self.workers = workers
+        self.target_latency = target_latency
+        self.queue_threshold = queue_threshold
+        self.poll_interval = poll_interval
+
+        self.lock = Lock()
+        self.successes = 0
+        self.increases = 0
+        self.decreases = 0
+        self.pauses = 0
+        self.last_poll = None
+        self.last_rejected = None
+
+    def increase(self):
+        """
+        Grows chunk and max_bulk_size by their initial values, and workers by one once every request in flight succeeded
+        """
+        with self.lock:
+            self.chunk = min(self.chunk + self.chunk_step, self.max_chunk)
+            self.max_bulk_size = min(self.max_bulk_size + self.bulk_size_step, self.max_bulk_size_limit)
+            self.successes += 1
+            if self.successes >= self.workers:
+                self.workers = min(self.workers + 1, self.max_workers)
+                self.successes = 0
+            self.increases += 1
+
+    def decrease(self):
+        """
+        Halves chunk, max_bulk_size and workers
+        """
+        with self.lock:
+            self.chunk = max(self.chunk // 2, 1)
+            self.max_bulk_size = max(self.max_bulk_size // 2, self.min_bulk_size)
+            self.workers = max(self.workers // 2, 1)
+            self.successes = 0
+            self.decreases += 1
+
+    def record(self, latency:float, count:int, rejected:int = 0):
+        """
+        Adjusts the controller from the outcome of one BULK request: any rejection, or a latency over twice the target,
+        halves everything; a latency within the target grows it; anything in between leaves it as it is
+
+        Arguments:
+            - latency: How long the request took in seconds
+            - count: How many documents the request held
+            - rejected: How many of its documents the cluster rejected because it was overloaded (e.g. with 429)
+        """
+        if rejected or latency > 2 * self.target_latency:
+            self.decrease()
+        elif latency <= self.target_latency and count >= self.chunk // 2:
+            # Small requests (e.g. the last one of an ingestion) say nothing about how large requests can get
+            self.increase()
+
+    def queue_pressure(self, client:OpenSearch) -> bool:
+        """
+        Reads the write thread pool of every node (from _nodes/stats) and returns whether any node has more than
+        queue_threshold tasks waiting, or rejected tasks since the last read
+        """
+        try:
+            stats = client.nodes.stats(metric = "thread_pool")
+        except Exception as e:
+            print(e)
+            return False
+        if not stats:
+            return False
+
+        queued = 0
+        rejected = 0
+        for node in stats.get("nodes", {}).values():
+            write_pool = node.get("thread_pool", {}).get("write", {})
+            queued = max(queued, write_pool.get("queue", 0))
+            rejected += write_pool.get("rejected", 0)
+        newly_rejected = self.last_rejected is not None and rejected > self.last_rejected
+        self.last_rejected = rejected
+        return queued > self.queue_threshold or newly_rejected
+
+    def wait_for_cluster(self, client:OpenSearch, pause:float = 1.0, max_pause:float = 30.0):
+        """
+        Pauses while the cluster's write queues are under pressure (read at most once every poll_interval seconds), halving
+        the controller once per pause
+
+        Arguments:
+            - client: an OpenSearch Python client object
+            - pause: How long in seconds to wait before reading the stats again (default is 1.0)
+            - max_pause: The longest in seconds to wait in total before sending anyway (default is 30.0)
+        """
+        now = monotonic()
+        if self.last_poll is not None and now - self.last_poll < self.poll_interval:
+            return
+        self.last_poll = now
+
+        waited = 0
+        if self.queue_pressure(client):
+            self.decrease()
+            self.pauses += 1
+            while waited < max_pause:
+                sleep(pause)
+                waited += pause
+                if not self.queue_pressure(client):
+                    break
+        self.last_poll = monotonic()
+
+    def report(self) -> dict:
+        """
+        Returns the values the controller settled on, to use as the initial hints of the next ingestion
+        """
+        return {
+            "chunk": self.chunk,
+            "max_bulk_size": self.max_bulk_size,
+            "workers": self.workers,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "pauses": self.pauses
+        }
@@ -0,0 +1,222 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+bulk_file_sink.py separates generating documents from loading them: instead of sending BULK request bodies to a cluster,
+ingest() can hand them to a BulkFileSink, which writes them as ready-to-send _bulk NDJSON into part files, one directory
+per index (the jobs name indices after their config and day). A part file is cut once it holds part_bytes of NDJSON, and
+finished parts are compressed and written by a pool of threads while the next part fills up, so writing overlaps with
+generation. The files can then be loaded at network speed by bulk_replay.py, from another machine or much later.
+
+Without a directory, bodies are only counted and dropped, which measures how fast documents are generated and encoded
+with no cluster and no disk involved.
+
+Classes:
+    - BulkFileSink: Hands out one BulkFileWriter per index and collects their summaries
+    - BulkFileWriter: Writes the request bodies of one index into rotating part files
+"""
+
+# Standard libraries
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import gzip
+import os
+
+
+class BulkFileWriter:
+    """
+    BulkFileWriter class: writes the request bodies of one index into part files named part-00000.ndjson (or
+    part-00000.ndjson.gz) in directory. It has the same submit() and close() methods as BulkSender, so ingest() sends its
+    bodies to either one.
+
+    Arguments:
+        - directory: The directory the part files are written to (created if it does not exist); None drops the bodies
+        - part_bytes: How many bytes of NDJSON a part file holds before the next one is started; a body is never split
+          across files (default is 64 MB)
+        - compress: Whether part files are gzipped (default is True)
+        - executor: The ThreadPoolExecutor finished parts are compressed and written on (default is to write them on the
+          calling thread)
+        - first_part: The number of the first part file (default is 0)
+
+    Raises:
+        - ValueError: part_bytes should be a positive integer
+        - TypeError: compress should be a boolean flag
+    """
+
+    def __init__(self, directory:str, part_bytes:int = 64 * 1024 * 1024, compress:bool = True, executor:ThreadPoolExecutor = None, first_part:int = 0):
+        # Validate input
+        if type(part_bytes) is not int or part_bytes < 1:
+            raise ValueError("part_bytes should be a positive integer")
+        if type(compress) is not bool:
+            raise TypeError("compress should be a boolean flag")
+
+        self.directory = directory
+        self.part_bytes = part_bytes
+        self.compress = compress
+        self.executor = executor
+        self.buffer = bytearray()
+        self.parts = first_part
+        self.futures = []
+        self.sink = None
+        self.summary = {"documents": 0, "requests": 0, "bytes": 0, "errors": 0, "retries": 0, "conflicts": 0, "failures": [], "files": []}
+        if directory is not None:
+            os.makedirs(directory, exist_ok = True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _write_part(self, filename:str, data:bytes):
+        """
+        Writes one part file, under a temporary name until it is complete so a crash never leaves a truncated part behind
+        """
+        temporary = filename + ".tmp"
+        if self.compress:
+            with gzip.open(temporary, "wb", compresslevel = 6) as f:
+                f.write(data)
+        else:
+            with open(temporary, "wb") as f:
+                f.write(data)
+        os.replace(temporary, filename)
+
+    def _flush(self):
+        """
+        Hands the part that is filling up to the executor and starts the next one
+        """
+        if not self.buffer:
+            return
+        data, self.buffer = bytes(self.buffer), bytearray()
+        if self.directory is None:
+            return
+        filename = os.path.join(self.directory, "part-%05d.ndjson%s" % (self.parts, ".gz" if self.compress else ""))
+        self.parts += 1
+        self.summary["files"].append(filename)
+        if self.executor is None:
+            self._write_part(filename, data)
+            return
+
+        # At most two parts wait to be written, so memory stays bounded when compression is slower than generation
+        while len(self.futures) >= 2:
+            self.futures.pop(0).result()
+        self.futures.append(self.executor.submit(self._write_part, filename, data))
+
+    def submit(self, body:bytes, count:int):
+        """
+        Adds a request body to the part file that is filling up
+
+        Arguments:
+            - body: The NDJSON request body (e.g. from BulkBodyBuilder.take())
+            - count: The number of documents in the body
+        """
+        if self.buffer and len(self.buffer) + len(body) > self.part_bytes:
+            self._flush()
+        self.buffer += body
+        self.summary["documents"] += count
+        self.summary["requests"] += 1
+        self.summary["bytes"] += len(body)
+
+    def close(self) -> dict:
+        """
+        Writes the last part and waits until every part is on disk
+
+        Returns:
+            - The same summary dict as BulkSender.close(), plus "files" (the part files written, in order)
+
+        Raises:
+            - OSError: if a part file could not be written
+        """
+        self._flush()
+        futures, self.futures = self.futures, []
+        for future in futures:
+            future.result()
+        if self.sink is not None:
+            self.sink.record(self)
+            self.sink = None
+        return self.summary
+
+
+class BulkFileSink:
+    """
+    BulkFileSink class: the target ingest() writes request bodies to instead of a cluster. Every index gets a
+    BulkFileWriter of its own (in directory/<index name>), and the writers of every index share one pool of threads, so
+    the parts of indices ingested at the same time (e.g. by the async jobs) are compressed and written in parallel.
+
+    Arguments:
+        - directory: The directory the indices' part files are written to; None drops the bodies (to benchmark generation)
+        - part_bytes: How many bytes of NDJSON a part file holds (default is 64 MB)
+        - compress: Whether part files are gzipped (default is True)
+        - workers: How many part files are compressed and written at once (default is the number of CPUs)
+
+    Raises:
+        - TypeError: directory should be a string
+        - ValueError: part_bytes should be a positive integer
+        - TypeError: compress should be a boolean flag
+        - ValueError: workers should be a positive integer
+    """
+
+    def __init__(self, directory:str, part_bytes:int = 64 * 1024 * 1024, compress:bool = True, workers:int = None):
+        # Validate input
+        if directory is not None and type(directory) is not str:
+            raise TypeError("directory should be a string")
+        if type(part_bytes) is not int or part_bytes < 1:
+            raise ValueError("part_bytes should be a positive integer")
+        if type(compress) is not bool:
+            raise TypeError("compress should be a boolean flag")
+        if workers is not None and (type(workers) is not int or workers < 1):
+            raise ValueError("workers should be a positive integer")
+
+        self.directory = directory
+        self.part_bytes = part_bytes
+        self.compress = compress
+        self.executor = ThreadPoolExecutor(max_workers = workers or os.cpu_count() or 1)
+        self.lock = Lock()
+        self.summaries = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def writer(self, index_name:str) -> BulkFileWriter:
+        """
+        Returns a new BulkFileWriter for an index. The first writer of an index removes the part files an earlier run left
+        in its directory, so the files always hold one copy of the index; later writers continue its part numbering.
+        """
+        directory = os.path.join(self.directory, index_name) if self.directory is not None else None
+        with self.lock:
+            if index_name not in self.summaries:
+                self.summaries[index_name] = {"documents": 0, "bytes": 0, "files": []}
+                if directory is not None and os.path.isdir(directory):
+                    for name in os.listdir(directory):
+                        if name.startswith("part-"):
+                            os.remove(os.path.join(directory, name))
+            writer = BulkFileWriter(directory, self.part_bytes, self.compress, self.executor, self.summaries[index_name].get("parts", 0))
+            self.summaries[index_name]["parts"] = writer.parts
+            writer.index_name = index_name
+            writer.sink = self
+        return writer
+
+    def record(self, writer:BulkFileWriter):
+        """
+        Adds the summary of a closed writer to the summary of its index
+        """
+        with self.lock:
+            total = self.summaries[writer.index_name]
+            total["documents"] += writer.summary["documents"]
+            total["bytes"] += writer.summary["bytes"]
+            total["files"] += writer.summary["files"]
+            total["parts"] = writer.parts
+
+    def close(self) -> dict:
+        """
+        Stops the pool of threads once every part file is written
+
+        Returns:
+            - A dict of index name to a summary of "documents", "bytes" (uncompressed NDJSON), "files", and "parts" (how many
+              part files were written)
+        """
+        self.executor.shutdown(wait = True)
+        return self.summaries
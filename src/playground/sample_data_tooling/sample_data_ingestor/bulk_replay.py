@@ -0,0 +1,223 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+bulk_replay.py loads the NDJSON part files written by a BulkFileSink (see bulk_file_sink.py) into a cluster. Part files
+are streamed line by line (gzipped or not) on a producer thread and repacked into request bodies of at most chunk
+documents and max_bulk_size bytes, which BulkSender sends with workers requests in flight, resending rejected documents
+with backoff. Since the documents are already generated and encoded, loading runs at the speed of the network and the
+cluster.
+
+Usage:
+    $ python3 bulk_replay.py -path bulk-files/ -workers 8
+
+Functions:
+    - find_part_files(): Lists the part files under a directory, in the order they were written
+    - read_bulk_lines(): Streams the action and source lines of a part file
+    - pack_bodies(): Packs action and source lines into size-capped request bodies
+    - replay(): Loads part files into a cluster
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from argparse import ArgumentParser
+from threading import Thread, Event
+from queue import Queue
+from os import path, walk
+import gzip
+import sys
+
+# Adds parent directory "/sample_data_tooling" to sys.path
+sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.constants import HOST, SAMPLE_DATA_PASSWORD, SAMPLE_DATA_USERNAME, PORT
+from sample_data_tooling.sample_data_ingestor.bulk_sender import BulkSender
+from sample_data_tooling.sample_data_ingestor.bulk_controller import AdaptiveBulkController, MAX_WORKERS
+from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import print_summary, _produce_bodies
+
+
+# Arguments to configure what to replay and what credentials to use for OS
+parser = ArgumentParser(description = "Load NDJSON part files written by a BulkFileSink into OS")
+parser.add_argument("-path", help = "A part file, or a directory of part files (e.g. the directory of a BulkFileSink)", required = True)
+parser.add_argument("-host", help = "The hostname (without the scheme)", default = HOST)
+parser.add_argument("-username", help = "The username of OS with CRUD permissions", default = SAMPLE_DATA_USERNAME)
+parser.add_argument("-password", help = "The password of OS with CRUD permissions", default = SAMPLE_DATA_PASSWORD)
+parser.add_argument("-port", help = "The port number in which OS will listen to", type = int, default = PORT)
+parser.add_argument("-chunk", help = "The maximum number of documents per BULK call", type = int, default = 5000)
+parser.add_argument("-max_bulk_size", help = "The maximum size in bytes of a BULK call", type = int, default = 10 * 1024 * 1024)
+parser.add_argument("-workers", help = "How many BULK calls can be in flight at once", type = int, default = 4)
+parser.add_argument("-max_retries", help = "How many times rejected documents are sent again", type = int, default = 3)
+parser.add_argument("-adaptive", help = "Tune chunk, max_bulk_size and workers from the latency and rejections of each call", action = "store_true")
+parser.add_argument("-max_workers", help = "With -adaptive, the most BULK calls in flight at once", type = int, default = MAX_WORKERS)
+
+
+def find_part_files(location:str) -> list:
+    """
+    Lists the part files under a directory (or the part file location itself), sorted by directory and part number,
+    i.e. by index and in the order they were written
+
+    Raises:
+        - ValueError: location should be a part file or a directory of part files
+    """
+    if path.isfile(location):
+        return [location]
+    if not path.isdir(location):
+        raise ValueError("location should be a part file or a directory of part files")
+    files = []
+    for directory, directories, names in walk(location):
+        directories.sort()
+        files += [path.join(directory, name) for name in sorted(names) if name.startswith("part-") and (name.endswith(".ndjson") or name.endswith(".ndjson.gz"))]
+    return files
+
+
+def read_bulk_lines(filename:str):
+    """
+    Generator of the (action line, source line) pairs of a part file, as bytes ending with a newline; the file is read
+    as a stream, so memory does not grow with its size
+
+    Raises:
+        - ValueError: if the file ends with an action line that has no source line
+    """
+    opener = gzip.open if filename.endswith(".gz") else open
+    with opener(filename, "rb") as f:
+        action = None
+        for line in f:
+            if not line.strip():
+                continue
+            if not line.endswith(b"\n"):
+                line += b"\n"
+            if action is None:
+                action = line
+            else:
+                yield action, line
+                action = None
+        if action is not None:
+            raise ValueError("%s ends with an action line that has no source line" % (filename))
+
+
+def pack_bodies(pairs, chunk:int, max_bulk_size:int, controller:AdaptiveBulkController = None):
+    """
+    Generator that packs action and source line pairs into request bodies of at most chunk documents and max_bulk_size
+    bytes (a pair larger than max_bulk_size on its own still gets a body of its own)
+
+    Arguments:
+        - pairs: An iterable of (action line, source line) pairs (see read_bulk_lines())
+        - chunk: How many documents can be sent per BULK call
+        - max_bulk_size: The max amount in bytes of a BULK call
+        - controller: An AdaptiveBulkController whose current chunk and max_bulk_size replace chunk and max_bulk_size
+          for every new body (default is None)
+
+    Returns:
+        - A generator of (NDJSON request body as bytes, number of documents) tuples
+    """
+    buffer = bytearray()
+    count = 0
+    for action, source in pairs:
+        if count and (count >= chunk or len(buffer) + len(action) + len(source) > max_bulk_size):
+            yield bytes(buffer), count
+            buffer = bytearray()
+            count = 0
+            if controller is not None:
+                chunk, max_bulk_size = controller.chunk, controller.max_bulk_size
+        buffer += action
+        buffer += source
+        count += 1
+    if count:
+        yield bytes(buffer), count
+
+
+def _read_files(files:list):
+    for filename in files:
+        yield from read_bulk_lines(filename)
+
+
+def replay(client:OpenSearch,
+    location:str,
+    chunk:int = 5000,
+    max_bulk_size:int = 10 * 1024 * 1024,
+    workers:int = 4,
+    max_retries:int = 3,
+    adaptive:bool = False,
+    queue_size:int = 4,
+    max_workers:int = MAX_WORKERS
+) -> dict:
+    """
+    Loads the part files under location into a cluster: files are read and repacked into request bodies on a producer
+    thread while BulkSender sends them, with at most queue_size bodies waiting in between. Documents go to the indices
+    their action lines name, which must exist or be created automatically. Documents sent with deterministic IDs (see
+    ingest()) that the index already holds are counted as "conflicts", so a replay can be run again safely.
+
+    Arguments:
+        - client: an OpenSearch Python client object
+        - location: A part file, or a directory of part files (e.g. the directory of a BulkFileSink)
+        - chunk: How many documents can be sent per BULK call (default is 5000)
+        - max_bulk_size: The max amount in bytes of a BULK call (default is 10 MB)
+        - workers: How many BULK calls can be in flight at once (default is 4)
+        - max_retries: How many times rejected documents are sent again (default is 3)
+        - adaptive: Whether chunk, max_bulk_size and workers are tuned while documents are sent (see AdaptiveBulkController)
+          (default is False)
+        - queue_size: How many request bodies can wait to be sent (default is 4)
+        - max_workers: With adaptive, the most BULK calls the controller lets be in flight at once, growing from workers
+          (default is 8)
+
+    Returns:
+        - The summary dict of BulkSender.close(), plus "files" (how many part files were read)
+
+    Raises:
+        - TypeError: client should be an OpenSearch Python client object
+        - ValueError: chunk and max_bulk_size should be positive integers
+        - ValueError: location should be a part file or a directory of part files
+        - ConnectionError: Index failed to be ingested. Check the client configurations
+    """
+    # Validate input
+    if not isinstance(client, OpenSearch):
+        raise TypeError("client should be an OpenSearch Python client object")
+    if type(chunk) is not int or type(max_bulk_size) is not int or chunk < 1 or max_bulk_size < 1:
+        raise ValueError("chunk and max_bulk_size should be positive integers")
+
+    files = find_part_files(location)
+    controller = None
+    if adaptive:
+        controller = AdaptiveBulkController(chunk, max_bulk_size, workers, max_workers = max_workers)
+
+    queue = Queue(maxsize = queue_size)
+    stop = Event()
+    producer = Thread(target = _produce_bodies, args = (pack_bodies(_read_files(files), chunk, max_bulk_size, controller), queue, stop), daemon = True)
+    producer.start()
+    try:
+        # Part files written with document IDs hold "create" actions, whose 409 conflicts mean the document is already indexed
+        with BulkSender(client, workers, max_retries = max_retries, controller = controller, idempotent = True) as sender:
+            while True:
+                item = queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                sender.submit(*item)
+        summary = sender.summary
+    finally:
+        stop.set()
+        producer.join()
+
+    summary["files"] = len(files)
+    print_summary(summary, location)
+    return summary
+
+
+def main():
+    args = parser.parse_args()
+    client = OpenSearch(
+        hosts = [{'host': args.host, 'port': args.port}],
+        http_compress = True,
+        http_auth = (args.username, args.password),
+        use_ssl = True,
+        verify_certs = False,
+        ssl_assert_hostname = False,
+        ssl_show_warn = False
+    )
+    replay(client, args.path, args.chunk, args.max_bulk_size, args.workers, args.max_retries, args.adaptive, max_workers = args.max_workers)
+
+
+# Replays the part files upon execution of script
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+bulk_sender.py sends BULK request bodies with a bounded number of requests in flight, so ingestion is limited by how fast
+the cluster indexes rather than by the round-trip latency of one request at a time. Documents the cluster rejects for a
+transient reason (e.g. 429 es_rejected_execution_exception when its write queue is full) are resent on their own with
+jittered exponential backoff, and the documents that still fail are reported rather than dropped.
+
+Functions:
+    - is_retryable_error(): Whether a failed BULK call is worth making again
+    - backoff_delay(): The jittered delay before a retry
+    - parse_bulk_response(): Splits a BULK response into the documents to resend and the documents that failed for good
+    - split_conflicts(): Separates the documents a "create" action found already indexed from the ones that failed
+
+Classes:
+    - BulkSender: Sends BULK request bodies from a pool of worker threads and aggregates their results
+"""
+
+from opensearchpy import OpenSearch
+from opensearchpy.exceptions import TransportError, ConnectionError as TransportConnectionError, SSLError
+
+# Standard libraries
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Lock
+from time import monotonic, sleep
+from os import path
+import random
+import sys
+
+# Adds parent directory "/sample_data_tooling" to sys.path
+sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_ingestor.bulk_controller import AdaptiveBulkController
+from sample_data_tooling.sample_data_ingestor.checkpoint_journal import CheckpointTracker
+
+# Item statuses (and HTTP statuses) that mean the cluster could not take the documents yet, rather than that they are invalid
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+def is_retryable_error(error:Exception) -> bool:
+    """
+    Returns whether a BULK call that raised error may succeed if made again: the connection failed or timed out, or the
+    cluster answered with one of RETRY_STATUSES
+    """
+    if isinstance(error, SSLError):
+        return False
+    if isinstance(error, TransportConnectionError):
+        return True
+    return isinstance(error, TransportError) and error.status_code in RETRY_STATUSES
+
+
+def backoff_delay(attempt:int, initial_backoff:float, max_backoff:float) -> float:
+    """
+    Returns how many seconds to wait before retry number attempt (starting at 0): a random delay between 0 and
+    initial_backoff * 2 ** attempt, capped at max_backoff ("full jitter", so that retries from many workers do not hit the
+    cluster at the same moment)
+    """
+    return random.uniform(0, min(max_backoff, initial_backoff * (2 ** attempt)))
+
+
+def parse_bulk_response(body:bytes, response, retry:bool = True) -> tuple:
+    """
+    Matches the items of a BULK response with the documents of its request body
+
+    Arguments:
+        - body: The NDJSON request body that was sent (action and source line pairs)
+        - response: The BULK response (a dict, or None when the client returns nothing)
+        - retry: Whether documents rejected with a status in RETRY_STATUSES are kept to resend; if False (e.g. once the retry
+          budget is spent), they are reported as failed like the others (default is True)
+
+    Returns:
+        - A tuple of the request body holding only the documents to resend (empty bytes if there are none), the number of
+          documents in it, and a list of the documents that failed for good, as dicts of "status", "error" and "document"
+          (the source line)
+    """
+    if not response or not response.get("errors"):
+        return b"", 0, []
+
+    lines = body.split(b"\n")
+    retry_lines = []
+    failures = []
+    for position, response_item in enumerate(response.get("items", [])):
+        for result in response_item.values():
+            if "error" not in result:
+                continue
+            action = lines[2 * position:2 * position + 2]
+            if retry and result.get("status") in RETRY_STATUSES:
+                retry_lines.extend(action)
+            else:
+                failures.append({
+                    "status": result.get("status"),
+                    "error": result["error"],
+                    "document": action[1].decode() if len(action) > 1 else None
+                })
+    retry_body = b"\n".join(retry_lines) + b"\n" if retry_lines else b""
+    return retry_body, len(retry_lines) // 2, failures
+
+
+def split_conflicts(failures:list) -> tuple:
+    """
+    Separates the failures of a BULK request sent with "create" actions (see BulkBodyBuilder) into documents the index
+    already holds under the same _id (status 409), which count as indexed, and documents that failed for good
+
+    Returns:
+        - A tuple of the list of failures left and the number of conflicts
+    """
+    left = [failure for failure in failures if failure["status"] != 409]
+    return left, len(failures) - len(left)
+
+
+class BulkSender:
+    """
+    BulkSender class: sends BULK request bodies with at most workers requests in flight. With one worker (the default),
+    requests are sent synchronously and in order, which keeps the order of documents within an index; with more workers,
+    requests to the same index may complete in any order.
+
+    Documents rejected with a status in RETRY_STATUSES, and whole requests that fail for a transient reason, are sent again
+    up to max_retries times, waiting backoff_delay() seconds in between; the worker that sent the request does the waiting.
+
+    With a controller, the number of requests in flight follows controller.workers (starting from workers, up to
+    controller.max_workers) instead of workers, every response is recorded on the controller, and submit() pauses while
+    the cluster's write queues are under pressure.
+
+    With a tracker, every request is registered on it when it is submitted and acknowledged once the cluster answered
+    for all of its documents (documents that failed for good included), so the checkpoint never covers a request that
+    was lost.
+
+    With idempotent, documents are expected to be sent with "create" actions and deterministic IDs: the ones the index
+    already holds (409 conflicts, e.g. from a request that was resent after it timed out) are counted in "conflicts" as
+    already indexed instead of as failures.
+
+    Arguments:
+        - client: an OpenSearch Python client object
+        - workers: How many BULK requests can be in flight at once (default is 1)
+        - verbose: Whether the outcome of each request is printed (default is False)
+        - max_retries: How many times rejected documents are sent again before they are reported as failed (default is 3)
+        - initial_backoff: The upper bound in seconds of the delay before the first retry; it doubles with every retry (default is 0.5)
+        - max_backoff: The largest delay in seconds before a retry (default is 30)
+        - controller: An AdaptiveBulkController that tunes how many requests are in flight (default is None)
+        - tracker: A CheckpointTracker that acknowledged requests are reported to (default is None)
+        - idempotent: Whether 409 conflicts count as already indexed (default is False)
+
+    Raises:
+        - TypeError: client should be an OpenSearch Python client object
+        - ValueError: workers should be a positive integer
+        - ValueError: max_retries should be a non-negative integer
+        - ValueError: initial_backoff and max_backoff should be non-negative numbers
+        - TypeError: controller should be an AdaptiveBulkController
+        - TypeError: tracker should be a CheckpointTracker
+        - TypeError: idempotent should be a boolean flag
+    """
+
+    def __init__(self, client:OpenSearch, workers:int = 1, verbose:bool = False, max_retries:int = 3, initial_backoff:float = 0.5, max_backoff:float = 30, controller:AdaptiveBulkController = None, tracker:CheckpointTracker = None, idempotent:bool = False):
+        # Validate input
+        if not isinstance(client, OpenSearch):
+            raise TypeError("client should be an OpenSearch Python client object")
+        if type(workers) is not int or workers < 1:
+            raise ValueError("workers should be a positive integer")
+        if type(max_retries) is not int or max_retries < 0:
+            raise ValueError("max_retries should be a non-negative integer")
+        if type(initial_backoff) not in (int, float) or type(max_backoff) not in (int, float) or initial_backoff < 0 or max_backoff < 0:
+            raise ValueError("initial_backoff and max_backoff should be non-negative numbers")
+        if controller is not None and not isinstance(controller, AdaptiveBulkController):
+            raise TypeError("controller should be an AdaptiveBulkController")
+        if tracker is not None and not isinstance(tracker, CheckpointTracker):
+            raise TypeError("tracker should be a CheckpointTracker")
+        if type(idempotent) is not bool:
+            raise TypeError("idempotent should be a boolean flag")
+
+        self.client = client
+        self.workers = workers
+        self.verbose = verbose
+        self.max_retries = max_retries
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.controller = controller
+        self.tracker = tracker
+        self.idempotent = idempotent
+        self.summary = {"documents": 0, "requests": 0, "bytes": 0, "errors": 0, "retries": 0, "conflicts": 0, "failures": []}
+        self.lock = Lock()
+        self.error = None
+        self.executor = None
+        self.in_flight = 0
+        self.slots = Condition()
+        if controller is not None:
+            self.executor = ThreadPoolExecutor(max_workers = controller.max_workers)
+        elif workers > 1:
+            self.executor = ThreadPoolExecutor(max_workers = workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(raise_error = exc_type is None)
+
+    def _send(self, body, count:int, ticket:int = None):
+        """
+        Sends one request body, resending the documents that were rejected, and adds its results to the summary; ticket is
+        acknowledged on the tracker once every document was answered for
+        """
+        with self.lock:
+            self.summary["documents"] += count
+        attempt = 0
+        while True:
+            start = monotonic()
+            try:
+                response = self.client.bulk(body = body)
+            except Exception as e:
+                if self.controller is not None and is_retryable_error(e):
+                    self.controller.decrease()
+                if attempt < self.max_retries and is_retryable_error(e):
+                    sleep(backoff_delay(attempt, self.initial_backoff, self.max_backoff))
+                    attempt += 1
+                    continue
+                print(e)
+                with self.lock:
+                    if self.error is None:
+                        self.error = e
+                return
+
+            retry_body, retry_count, failures = parse_bulk_response(body, response, retry = attempt < self.max_retries)
+            conflicts = 0
+            if self.idempotent:
+                failures, conflicts = split_conflicts(failures)
+            if self.controller is not None:
+                rejected = retry_count + len([failure for failure in failures if failure["status"] in RETRY_STATUSES])
+                self.controller.record(monotonic() - start, count, rejected)
+            if self.verbose:
+                print("\nAdding documents: %d indexed, %d already indexed, %d to retry, %d failed" % (count - retry_count - len(failures) - conflicts, conflicts, retry_count, len(failures)))
+            with self.lock:
+                self.summary["requests"] += 1
+                self.summary["bytes"] += len(body)
+                self.summary["errors"] += len(failures)
+                self.summary["retries"] += retry_count
+                self.summary["conflicts"] += conflicts
+                self.summary["failures"] += failures
+            if not retry_count:
+                if ticket is not None:
+                    self.tracker.acknowledge(ticket)
+                return
+
+            sleep(backoff_delay(attempt, self.initial_backoff, self.max_backoff))
+            attempt += 1
+            body, count = retry_body, retry_count
+
+    def _limit(self) -> int:
+        """
+        Returns how many requests can be in flight right now
+        """
+        if self.controller is not None:
+            return self.controller.workers
+        return self.workers
+
+    def _release(self, future):
+        with self.slots:
+            self.in_flight -= 1
+            self.slots.notify_all()
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise ConnectionError("Index failed to be ingested. Check the client configurations")
+
+    def submit(self, body, count:int):
+        """
+        Sends a request body, waiting for a worker if workers requests are already in flight
+
+        Arguments:
+            - body: The NDJSON request body (e.g. from BulkBodyBuilder.take())
+            - count: The number of documents in the body
+
+        Raises:
+            - ConnectionError: Index failed to be ingested. Check the client configurations (if this or an earlier request failed)
+        """
+        self._raise_error()
+        if self.controller is not None:
+            self.controller.wait_for_cluster(self.client)
+        ticket = self.tracker.submit(count) if self.tracker is not None else None
+        if self.executor is None:
+            self._send(body, count, ticket)
+        else:
+            with self.slots:
+                while self.in_flight >= self._limit():
+                    self.slots.wait()
+                self.in_flight += 1
+            future = self.executor.submit(self._send, body, count, ticket)
+            future.add_done_callback(self._release)
+        self._raise_error()
+
+    def close(self, raise_error:bool = True) -> dict:
+        """
+        Waits for the requests in flight and stops the workers
+
+        Arguments:
+            - raise_error: Whether a failed request raises an error (default is True)
+
+        Returns:
+            - A summary dict: "documents" (documents submitted), "requests" (BULK calls made, retries included), "bytes" (size
+              of the request bodies), "errors" (documents that failed for good), "retries" (documents sent again), "conflicts"
+              (documents already indexed, with idempotent), and "failures" (the documents that failed for good, see parse_bulk_response()), plus "tuned" (see
+              AdaptiveBulkController.report()) with a controller
+
+        Raises:
+            - ConnectionError: Index failed to be ingested. Check the client configurations
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait = True)
+            self.executor = None
+        if self.controller is not None:
+            self.summary["tuned"] = self.controller.report()
+        if raise_error:
+            self._raise_error()
+        return self.summary
@@ -0,0 +1,207 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+checkpoint_journal.py keeps a durable checkpoint per target index while documents are ingested, so an ingestion that dies
+partway through (e.g. a startup job loading weeks of indices) can resume from the last acknowledged BULK request instead
+of dropping the index and starting over. Checkpoints are appended to a local journal file, one JSON line per update, and
+synced to disk before the next request is acknowledged.
+
+A checkpoint holds:
+    - "index": The index name
+    - "seed": The seed generated documents are drawn with, so a resumed ingestion generates the same documents again
+    - "offset": How many documents, in the order they are sent, the cluster acknowledged without a gap
+    - "batches": How many BULK requests those documents were sent in
+    - "complete": Whether every document was acknowledged
+
+Classes:
+    - CheckpointJournal: Reads and appends checkpoints to a journal file
+    - CheckpointTracker: Advances the checkpoint of one ingestion as its BULK requests are acknowledged
+"""
+
+# Standard libraries
+from threading import Lock
+from json import loads, dumps
+import random
+import os
+
+
+class CheckpointJournal:
+    """
+    CheckpointJournal class: a journal file of checkpoints, where the last line written for an index is its checkpoint.
+    The journal is compacted to one line per index when it is opened; a line cut short by a crash is ignored.
+
+    Arguments:
+        - filename: The path of the journal file (created if it does not exist)
+
+    Raises:
+        - TypeError: filename should be a string
+    """
+
+    def __init__(self, filename:str):
+        # Validate input
+        if type(filename) is not str:
+            raise TypeError("filename should be a string")
+
+        self.filename = filename
+        self.lock = Lock()
+        self.checkpoints = {}
+        if os.path.exists(filename):
+            with open(filename, "r") as f:
+                for line in f:
+                    try:
+                        checkpoint = loads(line)
+                    except ValueError:
+                        continue
+                    if checkpoint.get("discarded"):
+                        self.checkpoints.pop(checkpoint["index"], None)
+                    else:
+                        self.checkpoints[checkpoint["index"]] = checkpoint
+        self._compact()
+
+    def _compact(self):
+        """
+        Rewrites the journal with one line per index, replacing the old file only once the new one is on disk
+        """
+        temporary = self.filename + ".tmp"
+        with open(temporary, "w") as f:
+            for checkpoint in self.checkpoints.values():
+                f.write(dumps(checkpoint) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.filename)
+
+    def _append(self, entry:dict):
+        """
+        Appends one line to the journal and syncs it to disk
+        """
+        with open(self.filename, "a") as f:
+            f.write(dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def get(self, index_name:str) -> dict:
+        """
+        Returns the checkpoint of an index (a copy), or None if the journal has none
+        """
+        with self.lock:
+            checkpoint = self.checkpoints.get(index_name)
+            return dict(checkpoint) if checkpoint is not None else None
+
+    def start(self, index_name:str, seed:int = None) -> dict:
+        """
+        Starts a new checkpoint for an index at offset 0, replacing any earlier one
+
+        Arguments:
+            - index_name: The index name
+            - seed: The seed generated documents are drawn with (default is a random seed)
+
+        Returns:
+            - The new checkpoint
+        """
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        return self.record(index_name, seed, 0, 0)
+
+    def resume(self, index_name:str) -> dict:
+        """
+        Returns the checkpoint to continue an ingestion of an index from: its checkpoint if it is incomplete, otherwise a
+        new one (see start())
+        """
+        checkpoint = self.get(index_name)
+        if checkpoint is None or checkpoint["complete"]:
+            return self.start(index_name)
+        return checkpoint
+
+    def record(self, index_name:str, seed:int, offset:int, batches:int, complete:bool = False) -> dict:
+        """
+        Writes the checkpoint of an index to the journal
+
+        Returns:
+            - The checkpoint written
+        """
+        checkpoint = {"index": index_name, "seed": seed, "offset": offset, "batches": batches, "complete": complete}
+        with self.lock:
+            self._append(checkpoint)
+            self.checkpoints[index_name] = checkpoint
+        return dict(checkpoint)
+
+    def is_incomplete(self, index_name:str) -> bool:
+        """
+        Returns whether an ingestion of an index was started and not every document was acknowledged
+        """
+        checkpoint = self.get(index_name)
+        return checkpoint is not None and not checkpoint["complete"]
+
+    def discard(self, index_name:str):
+        """
+        Removes the checkpoint of an index (e.g. once the index is deleted)
+        """
+        with self.lock:
+            if self.checkpoints.pop(index_name, None) is not None:
+                self._append({"index": index_name, "discarded": True})
+
+
+class CheckpointTracker:
+    """
+    CheckpointTracker class: numbers the BULK requests of one ingestion in the order they are submitted and moves the
+    checkpoint forward as they are acknowledged. Requests in flight on several workers can be acknowledged in any order,
+    so the offset only covers requests with no unacknowledged request before them.
+
+    Arguments:
+        - journal: The CheckpointJournal to write to
+        - checkpoint: The checkpoint the ingestion starts from (see CheckpointJournal.resume())
+
+    Raises:
+        - TypeError: journal should be a CheckpointJournal
+    """
+
+    def __init__(self, journal:CheckpointJournal, checkpoint:dict):
+        # Validate input
+        if not isinstance(journal, CheckpointJournal):
+            raise TypeError("journal should be a CheckpointJournal")
+
+        self.journal = journal
+        self.index_name = checkpoint["index"]
+        self.seed = checkpoint["seed"]
+        self.offset = checkpoint["offset"]
+        self.batches = checkpoint["batches"]
+        self.lock = Lock()
+        self.submitted = 0
+        self.next_ticket = 0
+        self.counts = {}
+
+    def submit(self, count:int) -> int:
+        """
+        Registers a request of count documents and returns its ticket (to pass to acknowledge())
+        """
+        with self.lock:
+            ticket = self.submitted
+            self.submitted += 1
+            self.counts[ticket] = [count, False]
+            return ticket
+
+    def acknowledge(self, ticket:int):
+        """
+        Marks a request as acknowledged by the cluster and writes the checkpoint if the offset moved forward
+        """
+        with self.lock:
+            self.counts[ticket][1] = True
+            moved = False
+            while self.next_ticket in self.counts and self.counts[self.next_ticket][1]:
+                self.offset += self.counts.pop(self.next_ticket)[0]
+                self.batches += 1
+                self.next_ticket += 1
+                moved = True
+            if moved:
+                self.journal.record(self.index_name, self.seed, self.offset, self.batches)
+
+    def finish(self) -> dict:
+        """
+        Marks the checkpoint complete once every request was acknowledged
+
+        Returns:
+            - The final checkpoint
+        """
+        with self.lock:
+            return self.journal.record(self.index_name, self.seed, self.offset, self.batches, complete = not self.counts)
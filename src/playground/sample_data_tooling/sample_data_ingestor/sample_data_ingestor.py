@@ -4,29 +4,39 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 from opensearchpy import OpenSearch
+from faker import Faker
 
 # Standard libraries
 from datetime import datetime, timedelta
-from shutil import copyfileobj
-from json import loads, dumps
-from os import remove, path
-import gzip
+from threading import Thread, Event
+from queue import Queue, Full
+from itertools import islice
+from random import Random
+from json import dumps
+from os import path
 import sys
-import csv
 
 # Adds parent directory "/sample_data_tooling" to sys.path
 sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
-from sample_data_tooling.sample_data_generator.sample_data_generator import generate_data
+from sample_data_tooling.sample_data_generator.sample_data_generator import compile_template, TemplatePlan
 from sample_data_tooling.sample_data_plugins.ad_plugin_data_config.average_trend_class import AverageTrend
-from sample_data_tooling.sample_data_commons.utils import validate_filename
+from sample_data_tooling.sample_data_commons.document_batch import DocumentBatch, timestamp_column, timestamp_sequence, TIMESTAMP_UNITS
+from sample_data_tooling.sample_data_ingestor.bulk_body_builder import BulkBodyBuilder
+from sample_data_tooling.sample_data_ingestor.bulk_sender import BulkSender
+from sample_data_tooling.sample_data_ingestor.bulk_controller import AdaptiveBulkController, MAX_WORKERS
+from sample_data_tooling.sample_data_ingestor.bulk_file_sink import BulkFileSink
+from sample_data_tooling.sample_data_ingestor.checkpoint_journal import CheckpointJournal, CheckpointTracker
+from sample_data_tooling.sample_data_ingestor.user_data_reader import read_user_data, iter_user_data, ParallelUserDataReader
+from sample_data_tooling.sample_data_commons.csv_schema import validate_schema
 
 
-def ingest_from_user_data(filename:str) -> list:
+def ingest_from_user_data(filename:str, csv_schema:dict = None) -> list:
     """
-    Utility function that loads user provided data to a list
+    Utility function that loads user provided data to a list (see read_user_data() to read a file lazily instead)
 
     Arguments:
         - filename: The name of the user provided data file as a .json or .csv file (zipped or unzipped)
+        - csv_schema: A dict of CSV column name to column type; the types of other columns are inferred (default is None)
 
     Returns:
         - A list of data loaded from the file
@@ -34,40 +44,44 @@ def ingest_from_user_data(filename:str) -> list:
     Raises:
         - ValueError: .json, .ndjson, and .csv files are only supported
     """
+    return [document for batch in read_user_data(filename, csv_schema = csv_schema) for document in batch]
 
-    # Input validation
-    validate_filename(filename)
-    name = filename.split(".gz")[0]
-    dataset = []
 
-    # Unzips file
-    if ".gz" in name:
-        with gzip.open(name, 'rt') as fin:
-                with open(name.split(".gz")[0], 'wb') as fout:
-                    copyfileobj(fin, fout)
-    # Reads from CSV
-    if ".csv" in name:
-        with open(name, "r") as f:
-            reader = csv.reader(f)
-            fields = next(reader)
-            for row in reader:
-                entry = {}
-                for i in range(len(fields)):
-                    entry[fields[i]] = row[i]
-                dataset.append(entry)
-    # Reads from JSON
-    elif ".json" in name or ".ndjson" in name:
-        with open(name, "r") as f:
-            for line in f:
-                dataset.append(loads(line))
-    else:
-        raise ValueError(".json, .ndjson, and .csv files are only supported")
+def assign_timestamps(documents, timestamp:str, minutes:int, anchor:datetime, unit:str = "ms"):
+    """
+    Sets the timestamp field of user-provided documents to one arithmetic sequence starting at anchor, each minutes apart; the
+    sequence is computed once for the whole input (not per BULK request), so timestamps keep increasing across requests
+
+    Arguments:
+        - documents: A list of document dicts (updated in place), or any iterable of document dicts (read lazily)
+        - timestamp: The field name that contains timestamps
+        - minutes: The time interval between documents
+        - anchor: The timestamp of the first document
+        - unit: "ms" for unix time in milliseconds or "s" for unix time in seconds (default is "ms")
 
-    # Removes unzipped file
-    if filename != name:
-        remove(name)
+    Returns:
+        - The same list, or a generator of the documents with their timestamps set
 
-    return dataset
+    Raises:
+        - TypeError: current_date should be a datetime object
+        - ValueError: minutes should be a positive integer
+        - ValueError: unit should be "ms" or "s"
+    """
+    if type(documents) is list:
+        for document, offset in zip(documents, timestamp_column(anchor, len(documents), minutes, unit)):
+            document[timestamp] = offset
+        return documents
+    timestamps = timestamp_sequence(anchor, minutes, unit)
+    return _assign_lazily(documents, timestamp, timestamps)
+
+
+def _assign_lazily(documents, timestamp:str, timestamps):
+    """
+    Generator half of assign_timestamps(), so its arguments are still validated when it is called
+    """
+    for document, offset in zip(documents, timestamps):
+        document[timestamp] = offset
+        yield document
 
 
 def ingest_validation(client:OpenSearch = None,
@@ -81,14 +95,32 @@ def ingest_validation(client:OpenSearch = None,
     minutes:int = None,
     current_date:datetime = None,
     max_bulk_size:int = None,
-    anomaly_detection_trend:list = None
+    anomaly_detection_trend:list = None,
+    vectorized:bool = None,
+    faker_compatible:bool = None,
+    columnar:bool = None,
+    streaming:bool = None,
+    workers:int = None,
+    max_retries:int = None,
+    adaptive:bool = None,
+    max_workers:int = None,
+    parse_processes:int = None,
+    parse_ordered:bool = None,
+    csv_schema:dict = None,
+    timestamp_unit:str = None,
+    timestamp_anchor:datetime = None,
+    checkpoint:CheckpointJournal = None,
+    document_ids:bool = None,
+    sequence:int = None,
+    seed:int = None,
+    sink:BulkFileSink = None
 ):
     """
     Function that raises errors for improper arguments
 
     Arguments (all optional):
         - client: an OpenSearch Python client object
-        - data_template: JSON file, CSV file, JSON mapping, or JSON short-hand template
+        - data_template: JSON file, CSV file, JSON mapping, JSON short-hand template, or a compiled TemplatePlan
         - index_name: The name of the index to ingest data
         - mapping: Whether or not the input is a mapping
         - file_provided: Boolean flag as to whether or not a file was provided
@@ -98,10 +130,29 @@ def ingest_validation(client:OpenSearch = None,
         - minutes: The time interval for each data point (e.g. if minutes = 2, this tool will generate entries with timestamps that are 2 minutes apart from one another)
         - current_date: The date at which entries are generated
         - max_bulk_size: The max amount in bytes of a bulk call
+        - anomaly_detection_trend: list of configurations dicts to use for generating data trends
+        - vectorized: Whether numeric and date fields are drawn as columns by the NumPy batch engine
+        - faker_compatible: Whether vectorized floats follow Faker's pyfloat draw
+        - columnar: Whether generated documents are kept as DocumentBatch columns
+        - streaming: Whether documents are generated and sent as a pipeline instead of being kept in memory
+        - workers: How many BULK requests can be in flight at once
+        - max_retries: How many times rejected documents are sent again
+        - adaptive: Whether chunk, max_bulk_size and workers are tuned while documents are sent
+        - max_workers: With adaptive, the most BULK requests that can be in flight at once
+        - parse_processes: How many processes parse a user-provided file
+        - parse_ordered: Whether documents parsed by several processes keep the order of the file
+        - csv_schema: A dict of CSV column name to column type
+        - timestamp_unit: The unit of the timestamps set on user-provided documents
+        - timestamp_anchor: The timestamp of the first user-provided document
+        - checkpoint: The CheckpointJournal an ingestion resumes from
+        - document_ids: Whether documents are sent with deterministic IDs and "create" actions
+        - sequence: The sequence number of the first document
+        - seed: The seed documents are generated with
+        - sink: The BulkFileSink request bodies are written to instead of a cluster
 
     Raises:
         - TypeError: client should be an OpenSearch Python client object
-        - TypeError: data_template should be a filename string, a JSON string, or dict
+        - TypeError: data_template should be a filename string, a JSON string, a dict, or a compiled TemplatePlan
         - TypeError: index_name should be a string
         - TypeError: file_provided should be a boolean flag
         - TypeError: mapping should be a boolean flag, not a data template
@@ -112,11 +163,33 @@ def ingest_validation(client:OpenSearch = None,
         - ValueError: current_date should be a datetime object
         - ValueError: max_bulk_size should be a positive integer
         - TypeError: anomaly_detection_trend should be a list of config dicts
+        - TypeError: vectorized should be a boolean flag
+        - TypeError: faker_compatible should be a boolean flag
+        - TypeError: columnar should be a boolean flag
+        - TypeError: streaming should be a boolean flag
+        - ValueError: workers should be a positive integer
+        - ValueError: max_retries should be a non-negative integer
+        - TypeError: adaptive should be a boolean flag
+        - ValueError: max_workers should be a positive integer
+        - ValueError: parse_processes should be a positive integer
+        - TypeError: parse_ordered should be a boolean flag
+        - TypeError: csv_schema should be a dict of column names to column types
+        - ValueError: column types should be one of COLUMN_TYPES
+        - ValueError: timestamp_unit should be "ms" or "s"
+        - ValueError: timestamp_anchor should be a datetime object
+        - TypeError: checkpoint should be a CheckpointJournal
+        - ValueError: parse_ordered should be True to resume from a checkpoint
+        - TypeError: document_ids should be a boolean flag
+        - ValueError: sequence should be a non-negative integer
+        - ValueError: seed should be a non-negative integer
+        - ValueError: parse_ordered should be True for document IDs to be deterministic
+        - TypeError: sink should be a BulkFileSink
+        - ValueError: checkpoint cannot be used with a sink
     """
     if client and (not isinstance(client, OpenSearch)):
         raise TypeError("client should be an OpenSearch Python client object")
-    if data_template and type(data_template) is not str and type(data_template) is not dict:
-        raise TypeError("data_template should be a filename string, a JSON string, or dict")
+    if data_template and type(data_template) is not str and type(data_template) is not dict and not isinstance(data_template, TemplatePlan) and type(data_template) is not list:
+        raise TypeError("data_template should be a filename string, a JSON string, a dict, or a compiled TemplatePlan")
     if index_name and type(index_name) is not str:
         raise TypeError("index_name should be a string")
     if file_provided and type(file_provided) is not bool:
@@ -137,6 +210,48 @@ def ingest_validation(client:OpenSearch = None,
         raise ValueError("max_bulk_size should be a positive integer")
     if anomaly_detection_trend and type(anomaly_detection_trend) is not list:
         raise TypeError("anomaly_detection_trend should be a list of config dicts")
+    if vectorized and type(vectorized) is not bool:
+        raise TypeError("vectorized should be a boolean flag")
+    if faker_compatible and type(faker_compatible) is not bool:
+        raise TypeError("faker_compatible should be a boolean flag")
+    if columnar and type(columnar) is not bool:
+        raise TypeError("columnar should be a boolean flag")
+    if streaming and type(streaming) is not bool:
+        raise TypeError("streaming should be a boolean flag")
+    if workers is not None and (type(workers) is not int or workers < 1):
+        raise ValueError("workers should be a positive integer")
+    if max_retries is not None and (type(max_retries) is not int or max_retries < 0):
+        raise ValueError("max_retries should be a non-negative integer")
+    if adaptive and type(adaptive) is not bool:
+        raise TypeError("adaptive should be a boolean flag")
+    if max_workers is not None and (type(max_workers) is not int or max_workers < 1):
+        raise ValueError("max_workers should be a positive integer")
+    if parse_processes is not None and (type(parse_processes) is not int or parse_processes < 1):
+        raise ValueError("parse_processes should be a positive integer")
+    if parse_ordered is not None and type(parse_ordered) is not bool:
+        raise TypeError("parse_ordered should be a boolean flag")
+    if csv_schema is not None:
+        validate_schema(csv_schema)
+    if timestamp_unit is not None and timestamp_unit not in TIMESTAMP_UNITS:
+        raise ValueError("timestamp_unit should be \"ms\" or \"s\"")
+    if timestamp_anchor is not None and type(timestamp_anchor) is not datetime:
+        raise ValueError("timestamp_anchor should be a datetime object")
+    if checkpoint is not None and not isinstance(checkpoint, CheckpointJournal):
+        raise TypeError("checkpoint should be a CheckpointJournal")
+    if checkpoint is not None and parse_ordered is False:
+        raise ValueError("parse_ordered should be True to resume from a checkpoint")
+    if document_ids is not None and type(document_ids) is not bool:
+        raise TypeError("document_ids should be a boolean flag")
+    if document_ids and parse_ordered is False:
+        raise ValueError("parse_ordered should be True for document IDs to be deterministic")
+    if sequence is not None and (type(sequence) is not int or sequence < 0):
+        raise ValueError("sequence should be a non-negative integer")
+    if seed is not None and (type(seed) is not int or seed < 0):
+        raise ValueError("seed should be a non-negative integer")
+    if sink is not None and not isinstance(sink, BulkFileSink):
+        raise TypeError("sink should be a BulkFileSink")
+    if sink is not None and checkpoint is not None:
+        raise ValueError("checkpoint cannot be used with a sink")
 
 
 def build_request_body(index_name:str,
@@ -146,28 +261,33 @@ def build_request_body(index_name:str,
     chunk:int,
     current_index:int,
     dataset:list,
-    max_bulk_size:int
+    max_bulk_size:int,
+    builder:BulkBodyBuilder = None
 ) -> tuple:
     """
-    Function that constructs the request body for BULK API call
+    Function that encodes the next documents of dataset into the request body of a BULK API call
 
     Arguments:
         - index_name: The name of the index to ingest data
         - file_provided: Boolean flag as to whether or not a file was provided
         - chunk: How many documents can be ingested per BULK call
-        - timestamp: The field name that contains timestamps
+        - timestamp: The field name that contains timestamps (only validated; timestamps of user-provided data are set
+          for the whole dataset before it is batched, see assign_timestamps())
         - minutes: The time interval for each data point (e.g. if minutes = 2, this tool will generate entries with timestamps that are 2 minutes apart from one another)
-        - current_date: The date at which entries are generated
-        - dataset: The list containing the data to ingest
+        - dataset: The list (or DocumentBatch) containing the data to ingest
         - max_bulk_size: The max amount in bytes of a bulk call
         - current_index: The index representing the current document in dataset to look at
+        - builder: The BulkBodyBuilder the request body is encoded into; once this returns, builder.take() gives the body
+          ready to send (default is a new BulkBodyBuilder)
 
     Returns:
-        - A tuple containing the request body and the current index to look at
+        - A tuple containing the builder (whose take() gives the encoded body) and the current index to look at; the body
+          holds at least one document (if any are left) and its encoded size stays under max_bulk_size unless that one
+          document is larger on its own
 
     Raises:
         - ValueError: current_index should be a positive index position
-        - TypeError: dataset is a list of documents to ingest
+        - TypeError: dataset is a list of documents or a DocumentBatch to ingest
     """
 
     # First validates input
@@ -181,41 +301,468 @@ def build_request_body(index_name:str,
     # Validates function specific input
     if type(current_index) is not int or (type(current_index) is int and current_index < 0):
         raise ValueError("current_index should be a positive index position")
-    if type(dataset) is not list:
-        raise TypeError("dataset should be a list of documents to ingest, not a dict")
+    if type(dataset) is not list and not isinstance(dataset, DocumentBatch):
+        raise TypeError("dataset should be a list of documents or a DocumentBatch to ingest, not a dict")
+
+    if builder is None:
+        builder = BulkBodyBuilder(index_name, max(chunk, 1), max(max_bulk_size, 1))
 
     start_index = current_index
-    one_week_ago = datetime.now() - timedelta(days = 7)
-    add_to_request = []
-    request_body = []
-    current_body_size = sys.getsizeof(request_body)
     while current_index < min(start_index + chunk, len(dataset)):
-        # Adds the index name
-        index_name_body = {"index": {"_index": index_name}}
-
-        # If timestamps were a field type for user provided data, modify time
-        if file_provided and timestamp:
-            one_week_ago += timedelta(minutes = minutes)
-            offset = one_week_ago.strftime("%s")
-            dataset[current_index][timestamp] = int(offset)
-
-        # Adds the action to take
-        index_action = dataset[current_index]
-
-        # Adds both index name body and index action body to the test request body
-        add_to_request.append(index_name_body)
-        add_to_request.append(index_action)
-        current_body_size = sys.getsizeof(add_to_request)
-
-        # Adds to request only if the body size is < the max bulk size (user defined)
-        if current_body_size < max_bulk_size:
-            request_body.append(index_name_body)
-            request_body.append(index_action)
-        else:
+        # Adds the document (with its action line) only if the encoded body stays within the max bulk size (user defined);
+        # the builder tracks the exact byte count as documents are encoded, so nothing is measured twice (rows of a
+        # DocumentBatch are materialized here, one request at a time)
+        if not builder.add(dataset[current_index]):
             break
         current_index+= 1
 
-    return (request_body, current_index)
+    return (builder, current_index)
+
+
+def _compile_plans(data_template, mapping:bool, vectorized:bool, faker_compatible:bool, seed:int = None) -> list:
+    """
+    Compiles a data template once (unless a compiled plan was passed in) so each document only pays for value generation;
+    with a seed, the template is bound to a Faker instance of its own so the same documents can be generated again
+
+    Returns:
+        - A list of TemplatePlans
+    """
+    plans = data_template
+    if not isinstance(plans, TemplatePlan) and type(plans) is not list:
+        fake = None
+        if seed is not None:
+            fake = Faker()
+            fake.seed_instance(seed)
+        plans = compile_template(data_template, mapping, fake, seed = seed, vectorized = vectorized, faker_compatible = faker_compatible)
+    if type(plans) is not list:
+        plans = [plans]
+    return plans
+
+
+def _start_tracker(checkpoint:CheckpointJournal, index_name:str) -> CheckpointTracker:
+    """
+    Resumes the checkpoint of an index from the journal, or starts a new one
+
+    Returns:
+        - A CheckpointTracker (or None without a journal)
+    """
+    if checkpoint is None:
+        return None
+    tracker = CheckpointTracker(checkpoint, checkpoint.resume(index_name))
+    if tracker.offset:
+        print("Resuming the ingestion of %s after %d documents (%d requests)" % (index_name, tracker.offset, tracker.batches))
+    return tracker
+
+
+def _build_trends(anomaly_detection_trend:list, timestamp:str, current_date:datetime, seed:int = None) -> list:
+    """
+    Builds each trend once so it can then be applied to every document; with a seed, the trends draw their anomalies from
+    one Random instance seeded with it, so the same documents get the same anomalies again
+
+    Returns:
+        - A list of DataTrend objects
+    """
+    rng = Random(seed) if seed is not None else None
+    trends = []
+    for desired_trend in anomaly_detection_trend or []:
+        if desired_trend["data_trend"] == "AverageTrend":
+            trends.append(AverageTrend(
+                timestamp = timestamp,
+                feature_trend = desired_trend,
+                current_date = current_date,
+                rng = rng
+            ))
+    return trends
+
+
+def generate_documents(plans:list,
+    number:int,
+    timestamp:str = None,
+    minutes:int = 2,
+    current_date:datetime = None,
+    trends:list = None,
+    batch_size:int = 1000
+):
+    """
+    Generator that produces documents a batch at a time, so only batch_size documents per template exist in memory at once
+
+    Arguments:
+        - plans: The list of TemplatePlans to generate documents from
+        - number: How many documents to generate per template
+        - timestamp: The field name that contains timestamps (default is None)
+        - minutes: The time interval for each data point (default is 2)
+        - current_date: The date of the first document (default is now)
+        - trends: The DataTrend objects to apply, a column at a time, to every batch (default is None)
+        - batch_size: How many documents per template are generated at once (default is 1000)
+
+    Returns:
+        - A generator of documents as dicts, in the same order ingest() generates them (one document per template for each timestamp)
+
+    Raises:
+        - ValueError: batch_size should be a positive integer
+    """
+    if type(batch_size) is not int or batch_size < 1:
+        raise ValueError("batch_size should be a positive integer")
+    if current_date is None:
+        current_date = datetime.now()
+
+    generated = 0
+    while generated < number:
+        size = min(batch_size, number - generated)
+        batch_date = current_date + timedelta(minutes = minutes * generated)
+        timestamps = None
+        if timestamp:
+            timestamps = timestamp_column(batch_date, size, minutes)
+
+        batches = []
+        for plan in plans:
+            batch = plan.generate_batch(size)
+            if timestamps is not None:
+                batch.set_column(timestamp, timestamps)
+            for trend in trends or []:
+                trend.generate_column_trend(batch)
+            batches.append(batch)
+
+        rows = [batch.rows() for batch in batches]
+        for i in range(size):
+            for batch_rows in rows:
+                yield next(batch_rows)
+        generated += size
+
+
+def generate_dataset(plans:list,
+    number:int,
+    timestamp:str = None,
+    minutes:int = 2,
+    current_date:datetime = None,
+    trends:list = None,
+    columnar:bool = False
+) -> list:
+    """
+    Function that generates every document of an index at once, the way ingest() does without streaming
+
+    Arguments:
+        - plans: The list of TemplatePlans to generate documents from
+        - number, timestamp, minutes, current_date, columnar: The same as for ingest()
+        - trends: The DataTrend objects to apply to every document (default is None)
+
+    Returns:
+        - A list of documents as JSON strings (one document per template for each timestamp), or one DocumentBatch per
+          template if columnar is set
+    """
+    if current_date is None:
+        current_date = datetime.now()
+    trends = trends or []
+    dataset = []
+
+    if columnar:
+        # One timestamp column is shared by the batches of every template
+        timestamps = None
+        if timestamp:
+            timestamps = timestamp_column(current_date, number, minutes)
+        for plan in plans:
+            batch = plan.generate_batch(number)
+            if timestamps is not None:
+                batch.set_column(timestamp, timestamps)
+            for trend in trends:
+                trend.generate_column_trend(batch)
+            dataset.append(batch)
+
+    # If anomalies wanted to be generated
+    elif trends:
+        generated = [plan.generate_many(number) for plan in plans]
+        for current_document_index in range(number):
+            for documents in generated:
+                entry = documents[current_document_index]
+
+                # For each feature needing a trend, modify that specific field value to fit a trend
+                for trend in trends:
+                    entry = trend.generate_data_trend(entry, current_date)
+                if type(entry) is not str:
+                    entry = dumps(entry, default = str)
+                dataset.append(entry)
+            # Increment current date
+            current_date += timedelta(minutes = minutes)
+    else:
+        # Generates the specified number of documents
+        generated = [plan.generate_many(number) for plan in plans]
+        for current_document_index in range(number):
+            for documents in generated:
+                entry = documents[current_document_index]
+                if timestamp:
+                    entry[timestamp] = int(current_date.strftime("%s")) * 1000
+                dataset.append(dumps(entry, default = str))
+            current_date += timedelta(minutes = minutes)
+    return dataset
+
+
+def build_bulk_bodies(documents, index_name:str, chunk:int, max_bulk_size:int, controller:AdaptiveBulkController = None, id_prefix:str = None, sequence:int = 0):
+    """
+    Generator that groups documents into BULK request bodies as they arrive (see BulkBodyBuilder)
+
+    Arguments:
+        - documents: An iterable of documents (dicts or JSON strings)
+        - index_name: The name of the index to ingest data
+        - chunk: How many documents can be ingested per BULK call
+        - max_bulk_size: The max amount in bytes of a bulk call; a document larger than this is sent on its own
+        - controller: An AdaptiveBulkController whose current chunk and max_bulk_size replace chunk and max_bulk_size
+          for every new body (default is None)
+        - id_prefix: The prefix of deterministic document IDs, sent with "create" actions (see BulkBodyBuilder) (default is None)
+        - sequence: The sequence number of the first document, e.g. the number of documents a checkpoint skips (default is 0)
+
+    Returns:
+        - A generator of (NDJSON request body as bytes, number of documents) tuples
+    """
+    builder = BulkBodyBuilder(index_name, max(chunk, 1), max(max_bulk_size, 1), id_prefix, sequence)
+    if controller is not None:
+        builder.chunk, builder.max_bulk_size = controller.chunk, controller.max_bulk_size
+    for document in documents:
+        source = builder.encode(document)
+        if not builder.fits(source):
+            yield builder.take()
+            if controller is not None:
+                builder.chunk, builder.max_bulk_size = controller.chunk, controller.max_bulk_size
+        builder.append(source)
+    if builder.count:
+        yield builder.take()
+
+
+def _put(queue:Queue, item, stop:Event) -> bool:
+    """
+    Puts an item on a bounded queue, giving up if the consumer stopped
+
+    Returns:
+        - True if the item was queued, otherwise False
+    """
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout = 0.1)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _produce_bodies(bodies, queue:Queue, stop:Event):
+    """
+    Producer thread of stream_ingest(): generates request bodies until they run out or the consumer stops, then queues None
+    (or the exception that stopped generation) to signal the end
+    """
+    try:
+        for body in bodies:
+            if not _put(queue, body, stop):
+                return
+        _put(queue, None, stop)
+    except Exception as e:
+        _put(queue, e, stop)
+
+
+def stream_user_data(filename:str,
+    chunk:int,
+    parse_processes:int = None,
+    parse_ordered:bool = True,
+    csv_schema:dict = None,
+    encoded:bool = True
+) -> tuple:
+    """
+    Opens a user-provided file as a stream of documents, read serially or parsed by a pool of processes
+
+    Arguments:
+        - filename: The name of the user provided data file
+        - chunk: How many documents can be ingested per BULK call (documents are read at least this many at a time)
+        - parse_processes: How many processes parse the file (see ParallelUserDataReader); None reads it serially (default is None)
+        - parse_ordered: Whether documents parsed by several processes keep the order of the file (default is True)
+        - csv_schema: A dict of CSV column name to column type ("string", "integer", "float", "boolean", "date",
+          "epoch_second", or "epoch_millis") for a user-provided CSV file; the types of other columns are inferred from the
+          first rows, so numbers, booleans and dates are sent typed instead of as strings (default is None)
+        - encoded: Whether documents parsed by processes come back as JSON source lines instead of dicts; leave it off when
+          documents are modified before they are sent (default is True)
+
+    Returns:
+        - A tuple of a generator of documents (dicts, or JSON source lines as bytes when parsed by processes) and the
+          ParallelUserDataReader (or None), whose report() prints the parse rate of each process once documents are read
+    """
+    if parse_processes is None:
+        return iter_user_data(filename = filename, batch_size = max(chunk, 1000), csv_schema = csv_schema), None
+    reader = ParallelUserDataReader(filename, parse_processes, parse_ordered, encoded = encoded, csv_schema = csv_schema)
+    return (document for batch in reader for document in batch), reader
+
+
+def print_summary(summary:dict, index_name:str):
+    """
+    Prints what an ingestion sent and the first few documents that failed for good
+
+    Arguments:
+        - summary: The summary dict returned by BulkSender.close()
+        - index_name: The name of the index the documents were ingested into
+    """
+    print("\nAdded %d documents to %s in %d requests (%d bytes, %d retried, %d errors)" % (summary["documents"], index_name, summary["requests"], summary["bytes"], summary["retries"], summary["errors"]))
+    if summary.get("conflicts"):
+        print("%d documents were already indexed" % (summary["conflicts"]))
+    for failure in summary["failures"][:10]:
+        print("Failed (status %s): %s" % (failure["status"], failure["error"]))
+    if len(summary["failures"]) > 10:
+        print("... and %d more failed documents" % (len(summary["failures"]) - 10))
+    if "tuned" in summary:
+        print("Tuned to chunk = %d, max_bulk_size = %d, workers = %d (%d increases, %d decreases, %d pauses)" % tuple(summary["tuned"].values()))
+
+
+def stream_ingest(client:OpenSearch,
+    data_template,
+    index_name:str,
+    file_provided:bool = False,
+    mapping:bool = True,
+    number:int = 6,
+    chunk:int = 5,
+    timestamp:str = None,
+    minutes:int = 2,
+    current_date:datetime = None,
+    max_bulk_size:int = 100000,
+    anomaly_detection_trend:list = None,
+    vectorized:bool = False,
+    faker_compatible:bool = False,
+    queue_size:int = 4,
+    workers:int = 1,
+    max_retries:int = 3,
+    adaptive:bool = False,
+    max_workers:int = MAX_WORKERS,
+    parse_processes:int = None,
+    parse_ordered:bool = True,
+    csv_schema:dict = None,
+    timestamp_unit:str = "ms",
+    timestamp_anchor:datetime = None,
+    checkpoint:CheckpointJournal = None,
+    document_ids:bool = False,
+    sequence:int = 0,
+    seed:int = None,
+    sink:BulkFileSink = None
+) -> dict:
+    """
+    Function that ingests documents as a pipeline: a producer thread generates documents and assembles them into request bodies
+    while the calling thread sends them (see BulkSender), with at most queue_size bodies waiting in between. Memory stays constant no matter how
+    many documents are ingested, and generation overlaps with network I/O.
+
+    Arguments:
+        - The same arguments as ingest() (except columnar, since documents are always generated a column at a time)
+        - queue_size: How many request bodies can wait to be sent (default is 4)
+        - workers: How many BULK requests can be in flight at once (default is 1)
+        - max_retries: How many times documents the cluster rejects (e.g. with 429 when its write queue is full) are sent again,
+          with jittered exponential backoff, before they are reported as failed (default is 3)
+        - adaptive: Whether chunk, max_bulk_size and workers are only initial values that an AdaptiveBulkController tunes
+          from the latency and rejections of each request (default is False)
+        - max_workers: With adaptive, the most BULK requests the controller lets be in flight at once (default is 8)
+        - parse_processes: How many processes parse a user-provided file; None reads it on the producer thread (default is None)
+        - parse_ordered: Whether documents parsed by several processes are sent in the order of the file (default is True)
+        - csv_schema: A dict of CSV column name to column type (see csv_schema.py) for a user-provided CSV file; the types
+          of other columns are inferred from the first rows (default is None)
+        - timestamp_unit: The unit of the timestamps set on user-provided documents (see ingest()) (default is "ms")
+        - timestamp_anchor: The timestamp of the first user-provided document (default is 7 days before current_date)
+        - checkpoint: A CheckpointJournal to resume from and record acknowledged requests to (see ingest()) (default is None)
+        - document_ids: Whether documents are sent with deterministic IDs and "create" actions (see ingest()) (default is False)
+        - sequence: With document_ids, the sequence number of the first document (see ingest()) (default is 0)
+        - seed: The seed documents are generated with when there is no checkpoint to take it from (see ingest()) (default is None)
+        - sink: A BulkFileSink request bodies are written to instead of client (see ingest()) (default is None)
+
+    Returns:
+        - A summary dict: "documents" (documents sent), "requests" (BULK calls made, retries included), "bytes" (size of the
+          request bodies), "errors" (documents that failed for good), "retries" (documents sent again), "conflicts" (documents
+          the index already held, with document_ids), and "failures" (the
+          documents that failed for good, as dicts of "status", "error" and "document"); with adaptive, "tuned" holds the
+          values the controller settled on (see AdaptiveBulkController.report())
+
+    Raises:
+        - ValueError: queue_size should be a positive integer
+        - ConnectionError: Index failed to be ingested. Check the client configurations
+    """
+    # Validates that inputs are correct
+    ingest_validation(client = client,
+        data_template = data_template,
+        index_name = index_name,
+        file_provided = file_provided,
+        mapping = mapping,
+        number = number,
+        chunk = chunk,
+        timestamp = timestamp,
+        minutes = minutes,
+        current_date = current_date,
+        max_bulk_size = max_bulk_size,
+        anomaly_detection_trend = anomaly_detection_trend,
+        vectorized = vectorized,
+        faker_compatible = faker_compatible,
+        workers = workers,
+        max_retries = max_retries,
+        adaptive = adaptive,
+        max_workers = max_workers,
+        parse_processes = parse_processes,
+        parse_ordered = parse_ordered,
+        csv_schema = csv_schema,
+        timestamp_unit = timestamp_unit,
+        timestamp_anchor = timestamp_anchor,
+        checkpoint = checkpoint,
+        document_ids = document_ids,
+        sequence = sequence,
+        seed = seed,
+        sink = sink
+    )
+    if type(queue_size) is not int or queue_size < 1:
+        raise ValueError("queue_size should be a positive integer")
+    if current_date is None:
+        current_date = datetime.now()
+
+    tracker = _start_tracker(checkpoint, index_name)
+
+    # If the user provides their own data, it is read from the file as it is sent
+    reader = None
+    if file_provided:
+        documents, reader = stream_user_data(data_template, chunk, parse_processes, parse_ordered, csv_schema, encoded = not timestamp)
+        if timestamp:
+            anchor = timestamp_anchor or current_date - timedelta(days = 7)
+            documents = assign_timestamps(documents, timestamp, minutes, anchor, timestamp_unit)
+    else:
+        # A checkpoint's seed is the one its documents were first generated with
+        seed = tracker.seed if tracker else seed
+        plans = _compile_plans(data_template, mapping, vectorized, faker_compatible, seed)
+        trends = _build_trends(anomaly_detection_trend, timestamp, current_date, seed)
+        documents = generate_documents(plans, number, timestamp, minutes, current_date, trends, batch_size = max(chunk, 1000))
+
+    # Documents the checkpoint already covers are skipped
+    if tracker is not None and tracker.offset:
+        documents = islice(documents, tracker.offset, None)
+
+    controller = None
+    if adaptive:
+        controller = AdaptiveBulkController(max(chunk, 1), max(max_bulk_size, 1), workers, max_workers = max_workers)
+
+    # With document IDs, the sequence number of a document is its position in the index, skipped documents included
+    id_prefix = index_name if document_ids else None
+    first = sequence + (tracker.offset if tracker is not None else 0)
+    bodies = build_bulk_bodies(documents, index_name, chunk, max_bulk_size, controller, id_prefix, first)
+
+    queue = Queue(maxsize = queue_size)
+    stop = Event()
+    producer = Thread(target = _produce_bodies, args = (bodies, queue, stop), daemon = True)
+    producer.start()
+    try:
+        sender = sink.writer(index_name) if sink is not None else BulkSender(client, workers, max_retries = max_retries, controller = controller, tracker = tracker, idempotent = document_ids)
+        with sender:
+            while True:
+                item = queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                sender.submit(*item)
+        summary = sender.summary
+        if tracker is not None:
+            tracker.finish()
+    finally:
+        stop.set()
+        producer.join()
+
+    print_summary(summary, index_name)
+    if reader is not None:
+        reader.report()
+    return summary
 
 
 def ingest(client:OpenSearch,
@@ -229,14 +776,33 @@ def ingest(client:OpenSearch,
     minutes:int = 2,
     current_date:datetime = datetime.now(),
     max_bulk_size:int = 100000,
-    anomaly_detection_trend:dict = None
+    anomaly_detection_trend:dict = None,
+    vectorized:bool = False,
+    faker_compatible:bool = False,
+    columnar:bool = False,
+    streaming:bool = False,
+    workers:int = 1,
+    max_retries:int = 3,
+    adaptive:bool = False,
+    max_workers:int = MAX_WORKERS,
+    parse_processes:int = None,
+    parse_ordered:bool = True,
+    csv_schema:dict = None,
+    timestamp_unit:str = "ms",
+    timestamp_anchor:datetime = None,
+    checkpoint:CheckpointJournal = None,
+    document_ids:bool = False,
+    sequence:int = 0,
+    seed:int = None,
+    sink:BulkFileSink = None
 ) -> list:
     """
     Function that ingests user-provided data or generated data
 
     Arguments:
         - client: an OpenSearch Python client object
-        - data_template: JSON file, CSV file, JSON mapping, or JSON short-hand template
+        - data_template: JSON file, CSV file, JSON mapping, JSON short-hand template, or a TemplatePlan (or list of
+          TemplatePlans) returned by compile_template()
         - index_name: The name of the index to ingest data
         - file_provided: Boolean flag as to whether or not a file was provided (default is False)
         - mapping: Whether or not the input is a mapping (default is True)
@@ -247,9 +813,51 @@ def ingest(client:OpenSearch,
         - current_date: The date at which entries are generated (default is today's datetime)
         - max_bulk_size: The max amount in bytes of a bulk call (default is 100000)
         - anomaly_detection_trend: list of configurations dicts to use for generating data trends (default is None)
+        - vectorized: Whether numeric, boolean, epoch and choice-from-list fields are drawn as whole columns by the NumPy
+          batch engine instead of one value at a time by Faker; only used when the template is compiled here (default is False)
+        - faker_compatible: Whether vectorized floats follow Faker's pyfloat draw so values stay statistically equivalent to
+          Faker's (default is False)
+        - columnar: Whether generated documents are kept as DocumentBatch columns (one list per field) until the request body is
+          built, instead of as a list of JSON strings; timestamps and trends are then applied a column at a time (default is False)
+        - streaming: Whether documents are generated, batched and sent as a pipeline with bounded memory (see stream_ingest()) instead
+          of being generated all at once (default is False)
+        - workers: How many BULK requests can be in flight at once; with more than one, requests are sent from a pool of threads
+          and may complete out of order, so leave it at 1 where the order of documents matters (default is 1)
+        - max_retries: How many times documents the cluster rejects (e.g. with 429 when its write queue is full) are sent again,
+          with jittered exponential backoff, before they are reported as failed (default is 3)
+        - adaptive: Whether chunk, max_bulk_size and workers are only initial values: requests grow while they come back
+          within a target latency and shrink on rejections, latency spikes, or write queue pressure in _nodes/stats (see
+          AdaptiveBulkController); the tuned values are printed at the end (default is False)
+        - max_workers: With adaptive, the most BULK requests the controller lets be in flight at once, growing from workers
+          (default is 8)
+        - parse_processes: How many processes parse a user-provided file, each a newline-aligned byte range of the
+          memory-mapped file (see ParallelUserDataReader); None parses it on one core (default is None)
+        - parse_ordered: Whether documents parsed by several processes keep the order of the file (default is True)
+        - csv_schema: A dict of CSV column name to column type ("string", "integer", "float", "boolean", "date",
+          "epoch_second", or "epoch_millis") for a user-provided CSV file; the types of other columns are inferred from the
+          first rows, so numbers, booleans and dates are sent typed instead of as strings (default is None)
+        - timestamp_unit: With file_provided and timestamp, the timestamp field of every document is set to one sequence
+          of unix times, minutes apart, in "ms" (milliseconds) or "s" (seconds) (default is "ms")
+        - timestamp_anchor: The timestamp of the first user-provided document (default is 7 days before current_date)
+        - checkpoint: A CheckpointJournal that keeps the checkpoint of index_name (see checkpoint_journal.py): an incomplete
+          checkpoint is resumed, i.e. documents are generated again with its seed (or read again from the file) and the
+          ones it already covers are skipped; the checkpoint moves forward as requests are acknowledged (default is None)
+        - document_ids: Whether every document is sent with a "create" action and the _id "<index_name>-<sequence number>",
+          its position among the documents of the index; a document sent again (a retried request, a resumed or repeated
+          ingestion) then conflicts with the copy the index holds and is counted as already indexed instead of being
+          duplicated (default is False)
+        - sequence: With document_ids, the sequence number of the first document, for an ingestion that continues an index
+          (e.g. a batch of the documents that come after the ones it holds) (default is 0)
+        - seed: The seed documents are generated with when there is no checkpoint to take it from (e.g. the seed of a day, see
+          day_seed() in job_steps.py): the anomalies of anomaly_detection_trend are drawn from it, and so is a data template
+          that was not compiled yet, so the same documents are generated again (default is None: new documents)
+        - sink: A BulkFileSink (see bulk_file_sink.py) that request bodies are written to as ready-to-send NDJSON part files
+          instead of being sent, e.g. to load them later with bulk_replay.py; client can then be None and adaptive has no
+          effect (default is None)
 
     Returns:
-        - A list of the data that was ingested
+        - A list of the data that was ingested (JSON strings, or one DocumentBatch per template if columnar was set), or a summary
+          dict of what was sent if streaming was set
 
     Raises:
         - TypeError: Request body is not a list
@@ -269,77 +877,106 @@ def ingest(client:OpenSearch,
         minutes = minutes,
         current_date = current_date,
         max_bulk_size = max_bulk_size,
-        anomaly_detection_trend = anomaly_detection_trend
+        anomaly_detection_trend = anomaly_detection_trend,
+        vectorized = vectorized,
+        faker_compatible = faker_compatible,
+        columnar = columnar,
+        streaming = streaming,
+        workers = workers,
+        max_retries = max_retries,
+        adaptive = adaptive,
+        max_workers = max_workers,
+        parse_processes = parse_processes,
+        parse_ordered = parse_ordered,
+        csv_schema = csv_schema,
+        timestamp_unit = timestamp_unit,
+        timestamp_anchor = timestamp_anchor,
+        checkpoint = checkpoint,
+        document_ids = document_ids,
+        sequence = sequence,
+        seed = seed,
+        sink = sink
     )
 
+    if streaming:
+        return stream_ingest(client, data_template, index_name,
+            file_provided = file_provided,
+            mapping = mapping,
+            number = number,
+            chunk = chunk,
+            timestamp = timestamp,
+            minutes = minutes,
+            current_date = current_date,
+            max_bulk_size = max_bulk_size,
+            anomaly_detection_trend = anomaly_detection_trend,
+            vectorized = vectorized,
+            faker_compatible = faker_compatible,
+            workers = workers,
+            max_retries = max_retries,
+            adaptive = adaptive,
+            max_workers = max_workers,
+            parse_processes = parse_processes,
+            parse_ordered = parse_ordered,
+            csv_schema = csv_schema,
+            timestamp_unit = timestamp_unit,
+            timestamp_anchor = timestamp_anchor,
+            checkpoint = checkpoint,
+            document_ids = document_ids,
+            sequence = sequence,
+            seed = seed,
+            sink = sink
+        )
+
+    tracker = _start_tracker(checkpoint, index_name)
     dataset = []
 
     # If the user provides their own data
-    if file_provided:
-        dataset = ingest_from_user_data(filename = data_template)
+    if file_provided and parse_processes is not None:
+        reader = ParallelUserDataReader(data_template, parse_processes, parse_ordered, encoded = False, csv_schema = csv_schema)
+        dataset = [document for batch in reader for document in batch]
+        reader.report()
+    elif file_provided:
+        dataset = ingest_from_user_data(filename = data_template, csv_schema = csv_schema)
 
-    # If anomalies wanted to be generated
-    elif anomaly_detection_trend:
-        for current_document_index in range(number):
-            # Generate random data
-            entry = generate_data(data_template, mapping)
-
-            # For each feature needing a trend, modify that specific field value to fit a trend
-            for desired_trend in anomaly_detection_trend:
-                if desired_trend["data_trend"] == "AverageTrend":
-                    changed_entry = AverageTrend(
-                        timestamp = timestamp,
-                        entry = entry,
-                        feature_trend = desired_trend,
-                        current_date = current_date
-                    )
-                    entry = changed_entry.generate_data_trend()
-            dataset.append(entry)
-            # Increment current date
-            current_date += timedelta(minutes = minutes)
     else:
-         # Generates the specified number of documents
-        for current_document_index in range(number):
-            entry = generate_data(data_template, mapping)
-            if type(entry) is list:
-                for element in entry:
-                    if type(element) is str:
-                        element = loads(element)
-                    if timestamp:
-                        element[timestamp] = current_date
-                    element = dumps(element)
-                    dataset.append(element)
-            else:
-                entry = generate_data(data_template, mapping)
-                if type(entry) is str:
-                    entry = loads(entry)
-                if timestamp:
-                    entry[timestamp] = current_date
-                entry = dumps(entry)
-                dataset.append(entry)
-            current_date += timedelta(minutes = minutes)
-
-    # Calls BULK API to ingest documents of size "chunk"
-    current_document_index = 0
-    while current_document_index < len(dataset):
-
-        # Build request body
-        request_building = build_request_body(index_name, file_provided, timestamp, minutes, chunk, current_index = current_document_index, dataset = dataset, max_bulk_size = max_bulk_size)
-        request_body = request_building[0]
-        current_document_index = request_building[1]
-
-        # Validates that request_body is both a list and that it is of even length
-        if type(request_body) is not list:
-            raise TypeError("Request body is not a list")
-        if len(request_body) % 2 != 0:
-            raise ValueError("Request body does not come in index, action pairs; an index name does not have an action or vice versa")
-
-        try:
-            response = client.bulk(body = request_body)
-            print("\nAdding documents:")
-            print(response)
-        except Exception as e:
-            print(e)
-            raise ConnectionError("Index failed to be ingested. Check the client configurations")
+        # A checkpoint's seed is the one its documents were first generated with
+        seed = tracker.seed if tracker else seed
+        plans = _compile_plans(data_template, mapping, vectorized, faker_compatible, seed)
+        trends = _build_trends(anomaly_detection_trend, timestamp, current_date, seed)
+        dataset = generate_dataset(plans, number, timestamp, minutes, current_date, trends, columnar)
+
+    # Timestamps of user-provided data are set once for the whole dataset, so they keep increasing across requests
+    if file_provided and timestamp:
+        anchor = timestamp_anchor or current_date - timedelta(days = 7)
+        assign_timestamps(dataset, timestamp, minutes, anchor, timestamp_unit)
+
+    # Calls BULK API to ingest documents of size "chunk" (batch by batch for columnar documents); with document IDs, the
+    # sequence number of a document is its position in the index, skipped documents included
+    skip = tracker.offset if tracker is not None else 0
+    builder = BulkBodyBuilder(index_name, max(chunk, 1), max(max_bulk_size, 1), index_name if document_ids else None, sequence + skip)
+    controller = None
+    if adaptive:
+        controller = AdaptiveBulkController(max(chunk, 1), max(max_bulk_size, 1), workers, max_workers = max_workers)
+    sender = sink.writer(index_name) if sink is not None else BulkSender(client, workers, verbose = True, max_retries = max_retries, controller = controller, tracker = tracker, idempotent = document_ids)
+    with sender:
+        for documents in (dataset if columnar and not file_provided else [dataset]):
+            # Documents the checkpoint already covers are skipped
+            current_document_index = min(skip, len(documents))
+            skip -= current_document_index
+            while current_document_index < len(documents):
+
+                # The controller sets the size of each request body as it tunes
+                if controller is not None:
+                    chunk, max_bulk_size = controller.chunk, controller.max_bulk_size
+                    builder.chunk, builder.max_bulk_size = chunk, max_bulk_size
+
+                # Build request body
+                current_document_index = build_request_body(index_name, file_provided, timestamp, minutes, chunk, current_index = current_document_index, dataset = documents, max_bulk_size = max_bulk_size, builder = builder)[1]
+
+                # The body was already encoded by the builder, so the client sends the bytes as they are
+                sender.submit(*builder.take())
+    if tracker is not None:
+        tracker.finish()
+    print_summary(sender.summary, index_name)
 
     return dataset
@@ -0,0 +1,344 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+user_data_reader.py reads user-provided data files lazily: gzipped files are decompressed as a stream while they are read
+(nothing is written to disk), and documents are yielded in batches, so only one batch is held in memory no matter how
+large the file is. Uncompressed files can also be parsed by a pool of processes, each parsing a newline-aligned byte range
+of the memory-mapped file. The columns of CSV files are given a type once (see csv_schema.py) and converted a batch at a time.
+
+Functions:
+    - open_user_data(): Opens a plain or gzipped user data file as a text stream
+    - read_user_data(): Returns a generator of the documents of a user data file in batches
+    - iter_user_data(): Returns a generator of the documents of a user data file one at a time
+    - split_byte_ranges(): Splits an uncompressed user data file into newline-aligned byte ranges
+
+Classes:
+    - ParallelUserDataReader: Parses the byte ranges of an uncompressed user data file in a process pool
+"""
+
+# Standard libraries
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from collections import deque
+from itertools import islice
+from time import perf_counter
+from json import loads, dumps
+from os import path, getpid, cpu_count
+import mmap
+import gzip
+import sys
+import csv
+import io
+
+# Adds parent directory "/sample_data_tooling" to sys.path
+sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_commons.utils import validate_filename
+from sample_data_tooling.sample_data_commons.csv_schema import validate_schema, infer_csv_schema, coerce_rows
+
+
+def open_user_data(filename:str):
+    """
+    Opens a user data file for reading as text, decompressing it on the fly if it is gzipped
+
+    Arguments:
+        - filename: The name of a .json, .ndjson, or .csv file (optionally ending in .gz)
+
+    Returns:
+        - A text file object; newlines are left untranslated so the csv module can handle quoted line breaks
+    """
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rt", encoding = "utf-8", newline = "")
+    return open(filename, "r", encoding = "utf-8", newline = "")
+
+
+def _parse_documents(f, name:str):
+    """
+    Yields the documents of an open user data file, one at a time
+
+    Raises:
+        - ValueError: .json, .ndjson, and .csv files are only supported
+    """
+    # Each CSV row becomes a dict keyed by the header row
+    if ".csv" in name:
+        yield from csv.DictReader(f)
+    # Each line of a JSON file is a document (blank lines are skipped)
+    elif ".json" in name or ".ndjson" in name:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+    else:
+        raise ValueError(".json, .ndjson, and .csv files are only supported")
+
+
+def _csv_schema(rows:list, csv_schema:dict, infer_types:bool) -> dict:
+    """
+    Returns the schema of a CSV file: the types inferred from its first rows (if infer_types), overridden by csv_schema
+    """
+    schema = infer_csv_schema(rows) if infer_types else {}
+    schema.update(csv_schema or {})
+    return schema
+
+
+def _read_batches(filename:str, name:str, batch_size:int, csv_schema:dict, infer_types:bool):
+    """
+    Yields the documents of a user data file in lists of at most batch_size documents, converting the columns of CSV files
+    with a schema settled on the first batch
+    """
+    schema = None
+    with open_user_data(filename) as f:
+        documents = _parse_documents(f, name)
+        while True:
+            batch = list(islice(documents, batch_size))
+            if not batch:
+                return
+            if ".csv" in name:
+                if schema is None:
+                    schema = _csv_schema(batch, csv_schema, infer_types)
+                batch = coerce_rows(batch, schema)
+            yield batch
+
+
+def read_user_data(filename:str, batch_size:int = 1000, csv_schema:dict = None, infer_types:bool = True):
+    """
+    Reads a user data file lazily and returns a generator of its documents in batches; the arguments are validated right
+    away, while the file is only opened once the first batch is asked for
+
+    Arguments:
+        - filename: The name of the user provided data file as a .json, .ndjson or .csv file (gzipped or not)
+        - batch_size: How many documents are yielded at once (default is 1000)
+        - csv_schema: A dict of CSV column name to column type (see csv_schema.py) for the columns whose types are not
+          inferred (default is None)
+        - infer_types: Whether the types of the other CSV columns are inferred from the first batch; otherwise they are
+          kept as strings (default is True)
+
+    Returns:
+        - A generator of lists of at most batch_size documents (dicts)
+
+    Raises:
+        - TypeError: filename should be a string
+        - ValueError: filename must be a .json, .ndjson, or .csv file
+        - ValueError: batch_size should be a positive integer
+        - TypeError: csv_schema should be a dict of column names to column types
+        - TypeError: infer_types should be a boolean flag
+    """
+    # Input validation
+    validate_filename(filename)
+    if type(batch_size) is not int or batch_size < 1:
+        raise ValueError("batch_size should be a positive integer")
+    if csv_schema is not None:
+        validate_schema(csv_schema)
+    if type(infer_types) is not bool:
+        raise TypeError("infer_types should be a boolean flag")
+    name = filename[:-len(".gz")] if filename.endswith(".gz") else filename
+    return _read_batches(filename, name, batch_size, csv_schema, infer_types)
+
+
+def iter_user_data(filename:str, batch_size:int = 1000, csv_schema:dict = None, infer_types:bool = True):
+    """
+    Reads a user data file lazily (see read_user_data()) and returns a generator of its documents one at a time
+
+    Arguments:
+        - The same arguments as read_user_data()
+
+    Returns:
+        - A generator of documents (dicts)
+    """
+    return (document for batch in read_user_data(filename, batch_size, csv_schema, infer_types) for document in batch)
+
+
+def _header_end(mm) -> int:
+    """
+    Returns the position right after the first line of a memory-mapped file
+    """
+    end = mm.find(b"\n")
+    return len(mm) if end == -1 else end + 1
+
+
+def split_byte_ranges(filename:str, range_bytes:int = 8 * 1024 * 1024) -> list:
+    """
+    Splits an uncompressed user data file into byte ranges of about range_bytes that each end right after a newline, so
+    every line (document) falls in exactly one range; the header row of a CSV file is left out of the ranges
+
+    Arguments:
+        - filename: The name of an uncompressed .json, .ndjson or .csv file
+        - range_bytes: The approximate size of a range in bytes (default is 8 MB)
+
+    Returns:
+        - A list of (start, end) byte offsets
+
+    Raises:
+        - ValueError: range_bytes should be a positive integer
+    """
+    if type(range_bytes) is not int or range_bytes < 1:
+        raise ValueError("range_bytes should be a positive integer")
+
+    with open(filename, "rb") as f:
+        if path.getsize(filename) == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            start = _header_end(mm) if ".csv" in filename else 0
+            ranges = []
+            while start < size:
+                end = mm.find(b"\n", min(start + range_bytes, size) - 1)
+                end = size if end == -1 else end + 1
+                ranges.append((start, end))
+                start = end
+    return ranges
+
+
+def _parse_range(filename:str, start:int, end:int, fields:list, schema:dict, encoded:bool) -> tuple:
+    """
+    Worker of ParallelUserDataReader: parses the documents of one byte range of a memory-mapped file
+
+    Returns:
+        - A tuple of the documents (dicts, or JSON source lines as bytes if encoded), the process id, the number of bytes
+          parsed, and the seconds it took
+    """
+    began = perf_counter()
+    with open(filename, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as mm:
+            data = mm[start:end]
+    if fields is not None:
+        documents = list(csv.DictReader(io.StringIO(data.decode("utf-8"), newline = ""), fieldnames = fields))
+        documents = coerce_rows(documents, schema)
+        if encoded:
+            documents = [dumps(document).encode() for document in documents]
+    elif encoded:
+        # Every line is parsed so invalid documents fail here, but the line itself is what gets sent
+        documents = []
+        for line in data.split(b"\n"):
+            line = line.strip()
+            if line:
+                loads(line)
+                documents.append(line)
+    else:
+        documents = [loads(line) for line in data.split(b"\n") if line.strip()]
+    return documents, getpid(), end - start, perf_counter() - began
+
+
+class ParallelUserDataReader:
+    """
+    ParallelUserDataReader class: parses an uncompressed user data file with a pool of processes. The file is split into
+    newline-aligned byte ranges (see split_byte_ranges()) that the processes read from a memory map, and iterating over the
+    reader yields one batch of documents per range. At most two ranges per process are parsed ahead of the consumer, so
+    memory stays bounded. Gzipped files cannot be split, so they are read serially (see read_user_data()).
+
+    Handing dicts back from the processes costs about as much as parsing them, so by default the processes only validate
+    each document and hand back its JSON source line as bytes, which BulkBodyBuilder sends as it is.
+
+    CSV files are split on newlines, so quoted fields must not contain line breaks.
+
+    Arguments:
+        - filename: The name of the user provided data file as a .json, .ndjson or .csv file
+        - processes: How many processes parse the file (default is the number of CPUs)
+        - ordered: Whether batches are yielded in the order of the file, or as soon as they are parsed (default is True)
+        - range_bytes: The approximate size in bytes of the range each batch is parsed from (default is 8 MB)
+        - encoded: Whether documents are yielded as JSON source lines (bytes) instead of dicts (default is True)
+        - csv_schema, infer_types: The same as read_user_data(); the types of CSV columns are inferred from the first 1000
+          rows before the file is split
+
+    Raises:
+        - TypeError: filename should be a string
+        - ValueError: filename must be a .json, .ndjson, or .csv file
+        - ValueError: processes should be a positive integer
+        - TypeError: ordered should be a boolean flag
+        - ValueError: range_bytes should be a positive integer
+        - TypeError: encoded should be a boolean flag
+    """
+
+    def __init__(self, filename:str, processes:int = None, ordered:bool = True, range_bytes:int = 8 * 1024 * 1024, encoded:bool = True, csv_schema:dict = None, infer_types:bool = True):
+        # Validate input
+        validate_filename(filename)
+        if processes is None:
+            processes = cpu_count() or 1
+        if type(processes) is not int or processes < 1:
+            raise ValueError("processes should be a positive integer")
+        if type(ordered) is not bool:
+            raise TypeError("ordered should be a boolean flag")
+        if type(range_bytes) is not int or range_bytes < 1:
+            raise ValueError("range_bytes should be a positive integer")
+        if type(encoded) is not bool:
+            raise TypeError("encoded should be a boolean flag")
+        if csv_schema is not None:
+            validate_schema(csv_schema)
+        if type(infer_types) is not bool:
+            raise TypeError("infer_types should be a boolean flag")
+
+        self.filename = filename
+        self.processes = processes
+        self.ordered = ordered
+        self.range_bytes = range_bytes
+        self.encoded = encoded
+        self.csv_schema = csv_schema
+        self.infer_types = infer_types
+        self.worker_stats = {}
+
+    def _record(self, pid:int, documents:int, size:int, seconds:float):
+        """
+        Adds the parse of one range to the stats of the process that parsed it
+        """
+        stats = self.worker_stats.setdefault(pid, {"ranges": 0, "documents": 0, "bytes": 0, "seconds": 0.0})
+        stats["ranges"] += 1
+        stats["documents"] += documents
+        stats["bytes"] += size
+        stats["seconds"] += seconds
+
+    def __iter__(self):
+        if self.filename.endswith(".gz"):
+            yield from read_user_data(self.filename, csv_schema = self.csv_schema, infer_types = self.infer_types)
+            return
+
+        fields = None
+        schema = None
+        if ".csv" in self.filename:
+            with open_user_data(self.filename) as f:
+                reader = csv.DictReader(f)
+                sample = list(islice(reader, 1000))
+                fields = reader.fieldnames
+            schema = _csv_schema(sample, self.csv_schema, self.infer_types)
+        ranges = deque(split_byte_ranges(self.filename, self.range_bytes))
+
+        with ProcessPoolExecutor(max_workers = self.processes) as executor:
+            pending = deque()
+            try:
+                while ranges or pending:
+                    # Keeps every process busy without parsing too far ahead of the consumer
+                    while ranges and len(pending) < 2 * self.processes:
+                        start, end = ranges.popleft()
+                        pending.append(executor.submit(_parse_range, self.filename, start, end, fields, schema, self.encoded))
+
+                    if self.ordered:
+                        future = pending.popleft()
+                    else:
+                        done = wait(pending, return_when = FIRST_COMPLETED).done
+                        future = next(future for future in pending if future in done)
+                        pending.remove(future)
+                    documents, pid, size, seconds = future.result()
+                    self._record(pid, len(documents), size, seconds)
+                    if documents:
+                        yield documents
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def rates(self) -> dict:
+        """
+        Returns the parse rate of every process so far
+
+        Returns:
+            - A dict of process id to a dict of "ranges", "documents", "bytes", "seconds" (spent parsing), "documents_per_second",
+              and "mb_per_second"
+        """
+        rates = {}
+        for pid, stats in self.worker_stats.items():
+            seconds = stats["seconds"] or float("inf")
+            rates[pid] = dict(stats, documents_per_second = stats["documents"] / seconds, mb_per_second = stats["bytes"] / seconds / 1e6)
+        return rates
+
+    def report(self):
+        """
+        Prints the parse rate of every process
+        """
+        for pid, rate in sorted(self.rates().items()):
+            print("Parser %d: %d documents in %d ranges (%.0f documents/s, %.1f MB/s)" % (pid, rate["documents"], rate["ranges"], rate["documents_per_second"], rate["mb_per_second"]))
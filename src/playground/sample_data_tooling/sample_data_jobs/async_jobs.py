@@ -0,0 +1,500 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+async_jobs.py contains the asyncio counterparts of the startup and refresh jobs. Index existence checks, index creation,
+deletion, and BULK loads for every day of every config run as tasks on one event loop, with at most max_in_flight requests
+to OpenSearch at once. run_startup_job() and run_refresh_job() wrap them for synchronous callers; startup_job.py and
+refresh_job.py call them when run with the "-use_async" argument. They share the steps of the synchronous jobs (see
+job_steps.py and retention.py): a config's "parallelism", "retention" and "seed" keys apply the same way, every day's
+template is compiled with its own seed, and which indices exist is read once per config into an AsyncClusterState.
+
+The async client requires aiohttp (see requirements.txt).
+
+Functions:
+    - build_async_client(): Returns an AsyncOpenSearch client configured like the jobs' OpenSearch client
+    - async_startup_job(): Creates and ingests indices, then starts plugins, on one event loop
+    - async_refresh_job(): Deletes old indices and creates and ingests new ones, on one event loop
+    - run_startup_job(): Runs async_startup_job() from synchronous code
+    - run_refresh_job(): Runs async_refresh_job() from synchronous code
+"""
+
+from opensearchpy import AsyncOpenSearch
+
+# Standard libraries
+from datetime import date, timedelta, datetime
+from os import remove, listdir, path
+from json import load
+import asyncio
+import sys
+
+# Adds parent directory "/sample_data_tooling" to sys.path
+sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_authentication.sample_data_authentication import Authentication
+from sample_data_tooling.sample_data_commons.utils import unzip_file, validate_job_args, untar_file, read_bulk_load_profile, read_parallelism, read_retention, read_seed
+from sample_data_tooling.sample_data_indices.async_sample_data_indices import AsyncSampleDataIndex
+from sample_data_tooling.sample_data_indices.async_cluster_state import AsyncClusterState
+from sample_data_tooling.sample_data_ingestor.checkpoint_journal import CheckpointJournal
+from sample_data_tooling.sample_data_indices.index_reconciliation import parse_doc_counts, expected_doc_count, plan_repairs, slot_timestamps, slot_query, repair_positions, day_documents, repair_bodies
+from sample_data_tooling.sample_data_ingestor.async_ingestor import async_send_bodies
+from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import print_summary
+from sample_data_tooling.sample_data_plugins.ad_plugin_class import AnomalyDetection
+from sample_data_tooling.sample_data_jobs.job_steps import prepare_ingest_args, needs_compiling, compile_ingest_args, day_seed, dated_index_name
+from sample_data_tooling.sample_data_jobs.retention import expired_indices, delete_batches, retention_index_body, async_install_retention_policy, async_attach_retention_policy
+
+
+def build_async_client(host:str, port:int, username:str, password:str) -> AsyncOpenSearch:
+    """
+    Function that returns an AsyncOpenSearch client with the same connection settings as the jobs' OpenSearch client
+
+    Arguments:
+        - host: The hostname (without the scheme)
+        - port: The port number in which OpenSearch listens to
+        - username: The username of OpenSearch role with CRUD permissions
+        - password: The password of OpenSearch role with CRUD permissions
+
+    Returns:
+        - An AsyncOpenSearch client (it should be closed with "await client.close()" once the jobs are done)
+    """
+    return AsyncOpenSearch(
+        hosts = [{'host': host, 'port': port}],
+        http_compress = True,
+        http_auth = (username, password),
+        use_ssl = True,
+        verify_certs = False,
+        ssl_assert_hostname = False,
+        ssl_show_warn = False
+    )
+
+
+def _validate_async_job_args(config_path:str, client:AsyncOpenSearch, max_in_flight:int):
+    """
+    Validates the arguments the async jobs add to validate_job_args()
+
+    Raises:
+        - TypeError: client should be an AsyncOpenSearch Python client object
+        - ValueError: max_in_flight should be a positive integer
+    """
+    validate_job_args(config_path = config_path)
+    if not isinstance(client, AsyncOpenSearch):
+        raise TypeError("client should be an AsyncOpenSearch Python client object")
+    if type(max_in_flight) is not int or max_in_flight < 1:
+        raise ValueError("max_in_flight should be a positive integer")
+
+
+def _read_configs(config_path:str) -> tuple:
+    """
+    Reads every plugin config in config_path, extracting tar files and unzipping configs like the synchronous jobs do
+
+    Returns:
+        - A tuple of the list of plugin configs and the list of extracted files to remove once the job is done
+    """
+    file_removal_array = []
+    for file in listdir(config_path):
+        file_removal_array.extend(untar_file(path.join(config_path, file), config_path))
+
+    configs = []
+    for file in listdir(config_path):
+        filename = unzip_file(file)
+        if filename:
+            if file != filename:
+                file_removal_array.append(filename)
+            with open(path.join(config_path, filename), 'r') as f:
+                config = load(f)
+            if "plugin" in config:
+                configs.append(config)
+    return (configs, file_removal_array)
+
+
+def _day_ingest_args(ingest_args:dict, current_date:datetime, seed:int, checkpoint:CheckpointJournal = None) -> dict:
+    """
+    Returns the ingest_args of one day, with the data template compiled into field generators of its own (see
+    compile_ingest_args()) so the days ingested at once never share random state; with checkpoints, every index compiles
+    it with the seed of its own checkpoint instead
+    """
+    day_args = dict(ingest_args, current_date = current_date)
+    if checkpoint is None and needs_compiling(ingest_args):
+        compile_ingest_args(day_args, day_seed(seed, current_date))
+    return day_args
+
+
+async def _create_and_ingest(index:AsyncSampleDataIndex,
+    limit:asyncio.Semaphore,
+    ingest_args:dict,
+    error_message:str,
+    checkpoint:CheckpointJournal = None,
+    profile:dict = None,
+    seed:int = None,
+    retention_of:str = None
+):
+    """
+    Creates an index and ingests data into it, unless the index already exists (it is then assumed to be ingested already,
+    unless checkpoint holds an incomplete checkpoint for it, which is then resumed), holding a slot of limit (the config's
+    "parallelism") while it does; with a bulk-load profile (see read_bulk_load_profile()), the index is loaded without
+    refreshes or replicas, and with retention_of, the index is added to the ISM policy of that config once it is created
+    (see build_day_index())
+
+    Raises:
+        - ConnectionError: error_message, if the index could not be created or ingested
+    """
+    async with limit:
+        exists = await index.exists()
+        if exists and (checkpoint is None or not checkpoint.is_incomplete(index.index_name)):
+            return
+        ingest_args = dict(ingest_args, seed = seed)
+        try:
+            if checkpoint is not None:
+                # A new index starts a new checkpoint before it is created, so an ingestion that dies at any point is resumed
+                if not exists:
+                    checkpoint.start(index.index_name, seed)
+                ingest_args = dict(ingest_args, checkpoint = checkpoint)
+            await index.create_index()
+            if retention_of is not None:
+                await index._request(async_attach_retention_policy, client = index.client, index_name = retention_of, day_index_name = index.index_name)
+            if profile is None:
+                await index.ingest_more(index_name = index.index_name, **ingest_args)
+            else:
+                async with index.bulk_load(**profile):
+                    await index.ingest_more(index_name = index.index_name, **ingest_args)
+        except Exception as e:
+            print(e)
+            raise ConnectionError(error_message)
+
+
+async def _install_retention(client:AsyncOpenSearch, semaphore:asyncio.Semaphore, index_name:str, days_before:int, error_message:str) -> str:
+    """
+    Installs the ISM policy that deletes the old days of a config, unless it is installed already (see
+    install_retention())
+
+    Raises:
+        - ConnectionError: error_message, if the policy could not be installed
+    """
+    try:
+        async with semaphore:
+            return await async_install_retention_policy(client, index_name, days_before)
+    except Exception as e:
+        print(e)
+        raise ConnectionError(error_message)
+
+
+async def _delete_old_indices(client:AsyncOpenSearch, semaphore:asyncio.Semaphore, index_name:str, days_before:int, cluster_state:AsyncClusterState, error_message:str) -> list:
+    """
+    Deletes the indices of a config whose day is more than days_before days before today with one delete request,
+    finding them in the cluster state and recording their deletion in it (see delete_old_indices())
+
+    Raises:
+        - ConnectionError: error_message, if the indices could not be deleted
+    """
+    expired = expired_indices(index_name, await cluster_state.load(index_name + "*"), days_before)
+    try:
+        for batch in delete_batches(expired):
+            async with semaphore:
+                await client.indices.delete(index = batch, ignore_unavailable = True)
+    except Exception as e:
+        print(e)
+        raise ConnectionError(error_message)
+    for index_to_delete in expired:
+        print("Deleted index %s" % (index_to_delete))
+        cluster_state.deleted(index_to_delete)
+    return expired
+
+
+async def _reconcile_config(client:AsyncOpenSearch,
+    semaphore:asyncio.Semaphore,
+    index_name:str,
+    indices:dict,
+    ingest_args:dict,
+    error_message:str,
+    checkpoint:CheckpointJournal = None
+):
+    """
+    Verifies the document count of every index of a config in one _cat/indices sweep and ingests only what the indices
+    that fall short are missing, concurrently (see index_reconciliation.py)
+
+    Raises:
+        - ConnectionError: error_message, if the indices could not be verified or repaired
+    """
+    try:
+        async with semaphore:
+            await client.indices.refresh(index = index_name + "*")
+            response = await client.cat.indices(index = index_name + "*", format = "json", h = "index,docs.count")
+        counts = parse_doc_counts(response)
+        if not any(index in counts for index in indices):
+            return
+        # Counting the documents of a user-provided file reads it, so it runs off the event loop
+        expected = await asyncio.to_thread(expected_doc_count, ingest_args)
+        repairs = plan_repairs(counts, indices, expected, checkpoint)
+        await asyncio.gather(*[_repair_index(client, semaphore, repair, ingest_args, checkpoint) for repair in repairs])
+    except Exception as e:
+        print(e)
+        raise ConnectionError(error_message)
+
+
+async def _repair_index(client:AsyncOpenSearch, semaphore:asyncio.Semaphore, repair:dict, ingest_args:dict, checkpoint:CheckpointJournal = None):
+    """
+    Finds the documents one index is missing at its timestamps and sends only those (see repair_positions()), generated
+    as async_ingest() generated them
+    """
+    slots = slot_timestamps(ingest_args, repair["current_date"], repair["expected"])
+    response = None
+    if slots:
+        async with semaphore:
+            response = await client.search(index = repair["index"], body = slot_query(ingest_args["timestamp"], slots))
+    positions = repair_positions(repair, ingest_args, response)
+    repair["missing"] = len(positions)
+    print("Index %s holds %d of %d documents; %s %d missing documents" % (repair["index"], repair["found"], repair["expected"], "regenerating" if repair["seed"] is not None else "refilling", len(positions)))
+
+    documents = day_documents(ingest_args, repair["current_date"], repair["seed"], streaming = True)
+    bodies = repair_bodies(documents, positions, repair["index"], ingest_args)
+    summary = await async_send_bodies(client, bodies, ingest_args.get("workers", 1), ingest_args.get("max_retries", 3), bool(ingest_args.get("document_ids")), semaphore)
+    print_summary(summary, repair["index"])
+    stored = checkpoint.get(repair["index"]) if checkpoint is not None else None
+    if stored is not None:
+        checkpoint.record(repair["index"], stored["seed"], repair["expected"], stored["batches"], complete = True)
+
+
+async def _load_state(cluster_state:AsyncClusterState, semaphore:asyncio.Semaphore, index_name:str) -> list:
+    """
+    Loads the indices of a config into the cluster state with one call, instead of one exists() call per day
+    """
+    async with semaphore:
+        return await cluster_state.load(index_name + "*")
+
+
+async def _startup_config(config:dict,
+    url:str,
+    header:Authentication,
+    client:AsyncOpenSearch,
+    semaphore:asyncio.Semaphore,
+    cluster_state:AsyncClusterState,
+    max_in_flight:int,
+    checkpoint:CheckpointJournal = None
+):
+    """
+    Creates and ingests every day's index of one plugin config concurrently (at most the config's "parallelism" at once,
+    once the config's indices are loaded into the cluster state and, with "ism" retention, the policy that deletes its old
+    days is installed), then starts the plugin
+
+    Raises:
+        - KeyError: One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after, create_payload, plugin
+        - ValueError: parallelism should be a positive integer
+        - ValueError: retention should be "delete" or "ism"
+        - ValueError: seed should be a non-negative integer
+    """
+    try:
+        index_name = config["ingest_args"]["index_name"]
+        ingest_args = prepare_ingest_args(config["ingest_args"])
+        index_body = config["index_body"]
+        days_before = int(config["days_before"])
+        days_after = int(config["days_after"])
+        create_payload = config["create_payload"]
+        plugin = config["plugin"]
+    except:
+        raise KeyError("One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after, create_payload, plugin")
+    limit = asyncio.Semaphore(read_parallelism(config, max_in_flight))
+    retention = read_retention(config) if days_after or days_before else "delete"
+    seed = read_seed(config)
+
+    # One call finds which of the config's indices exist and, with ISM retention, the policy is installed before the days
+    # are built, each of which is added to it once it is created (see retention.py)
+    prerequisites = [_load_state(cluster_state, semaphore, index_name)]
+    if retention == "ism":
+        prerequisites.append(_install_retention(client, semaphore, index_name, days_before, "Startup retention policy failed to install; check the config file or connection settings"))
+    await asyncio.gather(*prerequisites)
+
+    # Generate date range of indices (or just 1 if days_after and days_before is 0)
+    tasks = []
+    day_indices = {}
+    for day in range(days_after + days_before + 1):
+        index_name_to_create = index_name
+        current_date = datetime.now()
+        if days_after or days_before:
+            calculated_date = date.today() - timedelta(days = (days_before - day))
+            current_date = datetime(calculated_date.year, calculated_date.month, calculated_date.day)
+            index_name_to_create = dated_index_name(index_name, current_date)
+        day_indices[index_name_to_create] = current_date
+
+        # With ISM retention, every day is created with its own date as its creation date, which ISM counts its age from
+        day_body = retention_index_body(index_body, current_date) if retention == "ism" else index_body
+        new_index = AsyncSampleDataIndex(index_name_to_create, day_body, client, semaphore, cluster_state)
+        profile = read_bulk_load_profile(config, closed = current_date.date() < date.today())
+        day_args = _day_ingest_args(ingest_args, current_date, seed, checkpoint)
+        tasks.append(_create_and_ingest(new_index, limit, day_args, "Startup index ingestion failed to start; check the config file or connection settings", checkpoint, profile, day_seed(seed, current_date), index_name if retention == "ism" else None))
+    await asyncio.gather(*tasks)
+
+    # An existing index is not proof that its day is complete, so every day is verified and only what is missing is ingested
+    await _reconcile_config(client, semaphore, index_name, day_indices, ingest_args, "Startup index verification failed; check the config file or connection settings", checkpoint)
+
+    # Sleep is needed here for the indices to be added and ingested
+    # If it isn't added, then the anomaly detector cannot be created
+    await asyncio.sleep(1)
+
+    # If the desired plugin was anomaly detection, the plugin is created and jobs ran (the plugin API calls are synchronous,
+    # so they run in a thread to keep the other configs going)
+    if plugin == "anomaly_detection":
+        new_detector = AnomalyDetection(index_name = index_name + "*", target_index = "opensearch-ad-plugin-result-index", payload = create_payload, base_url = url, days_ago = days_before, auth = header)
+
+        def start_detector():
+            new_detector.create_detector()
+            new_detector.start_detector()
+            new_detector.start_detector(True)
+        try:
+            await asyncio.to_thread(start_detector)
+        except Exception as e:
+            print(e)
+            raise ConnectionError("Startup anomaly detector failed; Check host, username, and password, and/or any connection settings")
+
+
+async def async_startup_job(config_path:str, url:str, header:Authentication, client:AsyncOpenSearch, max_in_flight:int = 8, journal:str = None):
+    """
+    Given various arguments, create indices, ingest data into them, and initialize/startup plugins, with every config and
+    every day's index running concurrently on one event loop
+
+    Arguments:
+        - config_path: The directory path in which the plugin config json files are located
+        - url: The base url in which the API can be called
+        - header: The Authentication object used to create and return request headers
+        - client: The AsyncOpenSearch Python client object used to create and ingest indices
+        - max_in_flight: How many requests can be made to OpenSearch at once, across every index, and how many days of a
+          config without a "parallelism" key are built at once (default is 8)
+        - journal: The path of a checkpoint journal (see checkpoint_journal.py); indices whose ingestion was cut short are
+          resumed from it instead of being skipped (default is no journal)
+
+    Raises:
+        - TypeError: client should be an AsyncOpenSearch Python client object
+        - ValueError: max_in_flight should be a positive integer
+        - TypeError: filename should be a string
+        - KeyError: One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after, create_payload, plugin
+        - ConnectionError: Startup retention policy failed to install; check the config file or connection settings
+        - ConnectionError: Startup index ingestion failed to start; check the config file or connection settings
+        - ConnectionError: Startup index verification failed; check the config file or connection settings
+        - ConnectionError: Startup anomaly detector failed; Check host, username, and password, and/or any connection settings
+    """
+    # First validate input
+    validate_job_args(url = url, header = header)
+    _validate_async_job_args(config_path, client, max_in_flight)
+
+    checkpoint = CheckpointJournal(journal) if journal is not None else None
+
+    configs, file_removal_array = _read_configs(config_path)
+    semaphore = asyncio.Semaphore(max_in_flight)
+    cluster_state = AsyncClusterState(client)
+    try:
+        await asyncio.gather(*[_startup_config(config, url, header, client, semaphore, cluster_state, max_in_flight, checkpoint) for config in configs])
+    finally:
+        # Deletes all unzipped config files at the end
+        for file in file_removal_array:
+            remove(file)
+
+
+async def _refresh_config(config:dict, client:AsyncOpenSearch, semaphore:asyncio.Semaphore, cluster_state:AsyncClusterState, max_in_flight:int):
+    """
+    Deletes the old indices of one plugin config (or, with "ism" retention, installs the policy that deletes them) and
+    creates and ingests its new ones (at most the config's "parallelism" at once), concurrently
+
+    Raises:
+        - KeyError: One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after
+        - ValueError: parallelism should be a positive integer
+        - ValueError: retention should be "delete" or "ism"
+        - ValueError: seed should be a non-negative integer
+    """
+    try:
+        index_name = config["ingest_args"]["index_name"]
+        ingest_args = prepare_ingest_args(config["ingest_args"])
+        index_body = config["index_body"]
+        days_before = int(config["days_before"])
+        days_after = int(config["days_after"])
+    except:
+        raise KeyError("One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after")
+    limit = asyncio.Semaphore(read_parallelism(config, max_in_flight))
+    retention = read_retention(config)
+    seed = read_seed(config)
+
+    # Only configs with a date range are refreshed
+    if not days_after and not days_before:
+        return
+
+    # One call finds which of the config's indices exist, for both the deletions and the new days
+    await _load_state(cluster_state, semaphore, index_name)
+
+    # With ISM retention, the cluster deletes old days by itself once the policy is installed (the new days are added to
+    # it once they are created, so they are built after it); otherwise the expired days are deleted with one request
+    tasks = []
+    if retention == "ism":
+        await _install_retention(client, semaphore, index_name, days_before, "Refresh job failed to install the retention policy: check client configurations or config file configurations")
+    else:
+        tasks.append(_delete_old_indices(client, semaphore, index_name, days_before, cluster_state, "Refresh job failed to delete indices: check client configurations or config file configurations"))
+
+    # Creates and ingests data for each day after today until days_after variable
+    for day in range(days_after + 1):
+        new_index_date = datetime.now() + timedelta(days = day)
+        new_index_date = datetime(new_index_date.year, new_index_date.month, new_index_date.day)
+        day_body = retention_index_body(index_body, new_index_date) if retention == "ism" else index_body
+        new_index = AsyncSampleDataIndex(dated_index_name(index_name, new_index_date), day_body, client, semaphore, cluster_state)
+        profile = read_bulk_load_profile(config)
+        day_args = _day_ingest_args(ingest_args, new_index_date, seed)
+        tasks.append(_create_and_ingest(new_index, limit, day_args, "Refresh job failed to ingest indices: check client configurations or config file configurations", profile = profile, seed = day_seed(seed, new_index_date), retention_of = index_name if retention == "ism" else None))
+    await asyncio.gather(*tasks)
+
+    # Verifies the document count of every day that is kept, and ingests only what an index is missing
+    day_indices = {}
+    for day in range(-days_before, days_after + 1):
+        index_date = date.today() + timedelta(days = day)
+        index_date = datetime(index_date.year, index_date.month, index_date.day)
+        day_indices[dated_index_name(index_name, index_date)] = index_date
+    await _reconcile_config(client, semaphore, index_name, day_indices, ingest_args, "Refresh job failed to verify indices: check client configurations or config file configurations")
+
+
+async def async_refresh_job(config_path:str, client:AsyncOpenSearch, max_in_flight:int = 8):
+    """
+    Given various arguments, delete old indices, and create and ingest new indices, with every config and every index
+    running concurrently on one event loop
+
+    Arguments:
+        - config_path: The directory path in which the plugin config json files are located
+        - client: The AsyncOpenSearch Python client object used to create and ingest indices
+        - max_in_flight: How many requests can be made to OpenSearch at once, across every index, and how many days of a
+          config without a "parallelism" key are built at once (default is 8)
+
+    Raises:
+        - TypeError: client should be an AsyncOpenSearch Python client object
+        - ValueError: max_in_flight should be a positive integer
+        - KeyError: One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after
+        - ConnectionError: Refresh job failed to delete indices: check client configurations or config file configurations
+        - ConnectionError: Refresh job failed to install the retention policy: check client configurations or config file configurations
+        - ConnectionError: Refresh job failed to ingest indices: check client configurations or config file configurations
+        - ConnectionError: Refresh job failed to verify indices: check client configurations or config file configurations
+    """
+    # First validate input
+    _validate_async_job_args(config_path, client, max_in_flight)
+
+    configs, file_removal_array = _read_configs(config_path)
+    semaphore = asyncio.Semaphore(max_in_flight)
+    cluster_state = AsyncClusterState(client)
+    try:
+        await asyncio.gather(*[_refresh_config(config, client, semaphore, cluster_state, max_in_flight) for config in configs])
+    finally:
+        # Deletes all unzipped config files at the end
+        for file in file_removal_array:
+            remove(file)
+
+
+async def _run_and_close(job, client:AsyncOpenSearch, **kwargs):
+    try:
+        await job(client = client, **kwargs)
+    finally:
+        await client.close()
+
+
+def run_startup_job(config_path:str, url:str, header:Authentication, client:AsyncOpenSearch, max_in_flight:int = 8, journal:str = None):
+    """
+    Runs async_startup_job() to completion from synchronous code, closing the client afterwards (see async_startup_job())
+    """
+    asyncio.run(_run_and_close(async_startup_job, client, config_path = config_path, url = url, header = header, max_in_flight = max_in_flight, journal = journal))
+
+
+def run_refresh_job(config_path:str, client:AsyncOpenSearch, max_in_flight:int = 8):
+    """
+    Runs async_refresh_job() to completion from synchronous code, closing the client afterwards (see async_refresh_job())
+    """
+    asyncio.run(_run_and_close(async_refresh_job, client, config_path = config_path, max_in_flight = max_in_flight))
@@ -0,0 +1,383 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+daemon_job.py keeps the sample data fresh from one long-running process instead of a cron that starts the refresh job
+again and again. The configs are read and their data templates compiled once, and one OpenSearch client (with its
+connection pool) and one ClusterState are kept for as long as the daemon runs. Every config's documents are sent when
+their time comes, at the config's "minutes" cadence: a document timestamped 10:04 is sent at 10:04, in a small BULK
+request with the other documents that are due. Today's index never holds documents from the future, and a real-time
+anomaly detector sees data arrive as it would from a live source.
+
+When it starts, the daemon builds the past days of every config that are missing (like the startup job, without the
+plugins) and catches today up to now. It picks up where the documents of a day's index end, so it can be restarted, or
+started after the startup job, without sending a document twice. When a day starts, the days older than days_before are
+deleted (or left to the ISM policy, see retention.py), and the day's index is created with its first document.
+
+Configs that cannot be sent a document at a time (without a timestamp field or "minutes", or with a user-provided file)
+have their days built whole when the day starts, like the refresh job does.
+
+Usage:
+    $ python3 daemon_job.py -interval 60
+
+Classes:
+    - ConfigFeed: Sends the documents of one config as they come due
+    - DaemonJob: Runs the feeds of every config until it is stopped
+
+Functions:
+    - read_configs(): Reads the job configs of a directory
+    - daemon_job(): Runs the daemon on the configs of a directory until it is stopped
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from datetime import datetime, timedelta
+from threading import Event, current_thread, main_thread
+from os import listdir, path, remove
+from argparse import ArgumentParser
+from json import load
+import signal
+import sys
+
+# Adds parent directory "/sample_data_tooling" to sys.path
+sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.constants import HOST, SAMPLE_DATA_PASSWORD, SAMPLE_DATA_USERNAME, PORT, DIR_PATH
+from sample_data_tooling.sample_data_commons.utils import unzip_file, validate_job_args, untar_file, read_bulk_load_profile, read_retention
+from sample_data_tooling.sample_data_indices.cluster_state import ClusterState
+from sample_data_tooling.sample_data_indices.sample_data_indices import SampleDataIndex
+from sample_data_tooling.sample_data_indices.index_reconciliation import fetch_doc_counts, expected_doc_count
+from sample_data_tooling.sample_data_jobs.job_steps import prepare_ingest_args, needs_compiling, compile_ingest_args, dated_index_name, build_day_index, verify_day_indices, install_retention, delete_old_indices
+from sample_data_tooling.sample_data_jobs.retention import retention_index_body, attach_retention_policy
+
+
+# Various arguments to configure where config files are and what credentials to use for OS
+parser = ArgumentParser(description= "Configure credentials for OS connection")
+parser.add_argument("-host", help = "The hostname (without the scheme)", default = HOST)
+parser.add_argument("-username", help = "The username of OS with CRUD permissions", default = SAMPLE_DATA_USERNAME)
+parser.add_argument("-password", help = "The password of OS with CRUD permissions", default = SAMPLE_DATA_PASSWORD)
+parser.add_argument("-port", help = "The port number in which OS will listen to", type = int, default = PORT)
+parser.add_argument("-config_path", help = "The directory where plugin configurations are found", default = DIR_PATH)
+parser.add_argument("-interval", help = "The longest the daemon sleeps between two rounds, in seconds", type = float, default = 60)
+args = parser.parse_args()
+
+
+# Establish connection with OS; the daemon keeps this client, and its connection pool, for as long as it runs
+CLIENT = OpenSearch(
+    hosts = [{'host': args.host, 'port': args.port}],
+    http_compress = True,
+    http_auth = (args.username, args.password),
+    use_ssl = True,
+    verify_certs = False,
+    ssl_assert_hostname = False,
+    ssl_show_warn = False
+)
+
+# Error message of every step of the daemon
+ERROR_MESSAGE = "Daemon job failed to update indices: check client configurations or config file configurations"
+
+
+def _start_of_day(moment:datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+
+class ConfigFeed:
+    """
+    ConfigFeed class: sends the documents of one config as they come due. The data template is compiled once, when the
+    feed is created.
+
+    Arguments:
+        - config: The job config (a config with a date range, i.e. days_before or days_after)
+        - client: an OpenSearch Python client object
+        - cluster_state: The ClusterState the daemon shares between its feeds
+
+    Raises:
+        - KeyError: One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after
+        - ValueError: retention should be "delete" or "ism"
+    """
+
+    def __init__(self, config:dict, client:OpenSearch, cluster_state:ClusterState):
+        try:
+            self.index_name = config["ingest_args"]["index_name"]
+            self.ingest_args = prepare_ingest_args(config["ingest_args"])
+            self.index_body = config["index_body"]
+            self.days_before = int(config["days_before"])
+            self.days_after = int(config["days_after"])
+        except:
+            raise KeyError("One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after")
+
+        self.config = config
+        self.client = client
+        self.cluster_state = cluster_state
+        self.retention = read_retention(config)
+        self.trickle = bool(self.ingest_args.get("timestamp")) and "minutes" in self.ingest_args and not self.ingest_args.get("file_provided")
+        self.started = False
+        self.day = None
+        self.cursor = None
+        if needs_compiling(self.ingest_args):
+            compile_ingest_args(self.ingest_args)
+
+        # A timestamp holds one document per template
+        self.per_timestamp = expected_doc_count(self.ingest_args) // self.ingest_args["number"] if self.trickle else None
+
+    def _day_body(self, day:datetime) -> dict:
+        # With ISM retention, every day is created with its own date as its creation date (see retention.py)
+        return retention_index_body(self.index_body, day) if self.retention == "ism" else self.index_body
+
+    def _retention_of(self) -> str:
+        # With ISM retention, every day is added to the config's policy once it is created (see retention.py)
+        return self.index_name if self.retention == "ism" else None
+
+    def _resume(self, day:datetime) -> datetime:
+        """
+        Returns the time of the next document of a day: the start of the day for a new index, otherwise the timestamp after
+        the documents its index already holds (with one refresh and one _cat/indices call)
+        """
+        index_name = dated_index_name(self.index_name, day)
+        if not self.cluster_state.exists(index_name):
+            return day
+        count = fetch_doc_counts(self.client, self.index_name + "*").get(index_name, 0)
+        return day + timedelta(minutes = self.ingest_args["minutes"] * (count // self.per_timestamp))
+
+    def start(self, now:datetime):
+        """
+        Installs the retention policy (with ISM retention), builds the past days that are missing, verifies them, and finds
+        where the documents of today end
+
+        Raises:
+            - ConnectionError: Daemon job failed to update indices: check client configurations or config file configurations
+        """
+        today = _start_of_day(now)
+        self.cluster_state.load(self.index_name + "*")
+        if self.retention == "ism":
+            install_retention(self.client, self.index_name, self.days_before, ERROR_MESSAGE)
+
+        past_days = {}
+        for days_ago in range(self.days_before, 0, -1):
+            current_date = today - timedelta(days = days_ago)
+            index_name = dated_index_name(self.index_name, current_date)
+            past_days[index_name] = current_date
+            build_day_index(self.client, index_name, self._day_body(current_date), self.ingest_args, current_date, ERROR_MESSAGE, read_bulk_load_profile(self.config, closed = True), cluster_state = self.cluster_state, retention_of = self._retention_of())
+        if past_days:
+            verify_day_indices(self.client, self.index_name, past_days, self.ingest_args, ERROR_MESSAGE)
+
+        self.day = None
+        self.cursor = self._resume(today) if self.trickle else None
+        self.started = True
+
+    def _start_day(self, today:datetime):
+        """
+        Deletes the days that are too old (unless ISM does), and without trickling, builds today's and the next days'
+        indices whole
+        """
+        if self.retention == "delete":
+            delete_old_indices(self.client, self.index_name, self.days_before, self.cluster_state, ERROR_MESSAGE, today.date())
+        if not self.trickle:
+            for day in range(self.days_after + 1):
+                current_date = today + timedelta(days = day)
+                build_day_index(self.client, dated_index_name(self.index_name, current_date), self._day_body(current_date), self.ingest_args, current_date, ERROR_MESSAGE, read_bulk_load_profile(self.config), cluster_state = self.cluster_state, retention_of = self._retention_of())
+        self.day = today
+
+    def tick(self, now:datetime) -> int:
+        """
+        Sends every document due by now (whose timestamp is now or earlier), one BULK load per day it covers, and starts the
+        day if it is new
+
+        Returns:
+            - How many documents were sent
+
+        Raises:
+            - ConnectionError: Daemon job failed to update indices: check client configurations or config file configurations
+        """
+        if _start_of_day(now) != self.day:
+            self._start_day(_start_of_day(now))
+        if not self.trickle:
+            return 0
+
+        sent = 0
+        step = timedelta(minutes = self.ingest_args["minutes"])
+        while self.cursor <= now:
+            # Every day starts again at midnight, so only the timestamps of the cursor's day are sent at once
+            day = _start_of_day(self.cursor)
+            next_day = day + timedelta(days = 1)
+            due = min((now - self.cursor) // step + 1, -((self.cursor - next_day) // step))
+            index_name = dated_index_name(self.index_name, day)
+            index = SampleDataIndex(index_name, self._day_body(day), self.client, self.cluster_state)
+            try:
+                if not index.exists():
+                    index.create_index()
+                    if self.retention == "ism":
+                        attach_retention_policy(self.client, self.index_name, index_name)
+
+                # A batch numbers its documents from their position in the day (timestamp-major), so a tick replayed after a
+                # restart that read a stale count conflicts with the documents already sent instead of duplicating them
+                sequence = ((self.cursor - day) // step) * self.per_timestamp
+                index.ingest_more(**dict(self.ingest_args, index_name = index_name, current_date = self.cursor, number = due, document_ids = True, sequence = sequence))
+            except Exception as e:
+                print(e)
+                raise ConnectionError(ERROR_MESSAGE)
+            sent += due * self.per_timestamp
+            self.cursor += due * step
+            if self.cursor >= next_day:
+                self.cursor = self._resume(next_day)
+        return sent
+
+    def next_due(self, now:datetime) -> datetime:
+        """
+        Returns when the feed has something to do next: its next document, or the start of the next day
+        """
+        next_day = _start_of_day(now) + timedelta(days = 1)
+        return min(self.cursor, next_day) if self.trickle else next_day
+
+
+class DaemonJob:
+    """
+    DaemonJob class: runs the feeds of every config in rounds, sleeping until the next document is due (or at most
+    interval seconds) between two rounds, until stop() is called. A feed that fails is started again in the next round
+    (its days are checked again and its documents resumed from their counts), and the other feeds keep running.
+
+    Arguments:
+        - configs: The job configs; configs without a date range are left alone
+        - client: an OpenSearch Python client object, kept for as long as the daemon runs
+        - interval: The longest the daemon sleeps between two rounds, in seconds (default is 60)
+        - clock: The function that returns the current time (default is datetime.now)
+
+    Raises:
+        - TypeError: client should be a OpenSearch Python client object
+        - ValueError: interval should be a positive number
+        - KeyError: One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after
+    """
+
+    def __init__(self, configs:list, client:OpenSearch, interval:float = 60, clock = datetime.now):
+        # Validate input
+        validate_job_args(client = client)
+        if type(interval) not in (int, float) or interval <= 0:
+            raise ValueError("interval should be a positive number")
+
+        self.client = client
+        self.interval = interval
+        self.clock = clock
+        self.cluster_state = ClusterState(client)
+        self.feeds = [ConfigFeed(config, client, self.cluster_state) for config in configs if config.get("days_before") or config.get("days_after")]
+        self.stopped = Event()
+
+    def tick(self) -> dict:
+        """
+        Runs one round: starts the feeds that are not started, then sends the documents that are due
+
+        Returns:
+            - A dict of the index_name of every config to how many documents were sent, or to the error of its feed
+        """
+        now = self.clock()
+        sent = {}
+        for feed in self.feeds:
+            try:
+                if not feed.started:
+                    feed.start(now)
+                sent[feed.index_name] = feed.tick(now)
+            except Exception as e:
+                print(e)
+                feed.started = False
+                sent[feed.index_name] = e
+        return sent
+
+    def next_wait(self) -> float:
+        """
+        Returns how many seconds to sleep until the next document is due, at most interval (and interval for a feed that
+        failed, before it is started again)
+        """
+        now = self.clock()
+        wake = min([feed.next_due(now) for feed in self.feeds if feed.started] or [now + timedelta(seconds = self.interval)])
+        if any(not feed.started for feed in self.feeds):
+            wake = min(wake, now + timedelta(seconds = self.interval))
+        return min(max((wake - now).total_seconds(), 0), self.interval)
+
+    def run(self, rounds:int = None):
+        """
+        Runs rounds until stop() is called (or rounds rounds ran)
+        """
+        done = 0
+        while not self.stopped.is_set():
+            self.tick()
+            done += 1
+            if rounds is not None and done >= rounds:
+                break
+            self.stopped.wait(self.next_wait())
+
+    def stop(self):
+        """
+        Stops the daemon once its current round is done
+        """
+        self.stopped.set()
+
+
+def read_configs(config_path:str) -> tuple:
+    """
+    Reads the job configs of a directory (extracting tar and zip files)
+
+    Returns:
+        - A tuple of the list of configs and the list of the extracted files, to remove once they are no longer needed
+    """
+    file_removal_array = []
+    for file in listdir(config_path):
+        # Extracts any tar files (and adds the filenames to a filename removal array)
+        file_removal_array.extend(untar_file(path.join(config_path, file), config_path))
+
+    configs = []
+    for file in listdir(config_path):
+        filename = unzip_file(file)
+        if filename:
+            if filename != file:
+                file_removal_array.append(filename)
+            with open(path.join(config_path, filename), 'r') as f:
+                config = load(f)
+
+            # If the config file is indeed a config file and not a datafile, continue
+            if "plugin" in config:
+                configs.append(config)
+    return configs, file_removal_array
+
+
+def daemon_job(config_path:str = args.config_path, client:OpenSearch = CLIENT, interval:float = args.interval, rounds:int = None) -> DaemonJob:
+    """
+    Runs the daemon on the configs of a directory until it gets SIGINT or SIGTERM (or rounds rounds ran). The configs and
+    data templates are read once, so the daemon is restarted to pick up config changes.
+
+    Arguments:
+        - config_path: The directory path in which the plugin config json files are located
+        - client: The OpenSearch Python client object used to create and ingest indices
+        - interval: The longest the daemon sleeps between two rounds, in seconds (default is the "-interval" argument)
+        - rounds: How many rounds to run (default is until stopped)
+
+    Returns:
+        - The DaemonJob, once it stopped
+
+    Raises:
+        - TypeError: config_path should be a string
+        - TypeError: client should be a OpenSearch Python client object
+        - ValueError: interval should be a positive number
+    """
+    validate_job_args(config_path = config_path, client = client)
+    configs, file_removal_array = read_configs(config_path)
+    handlers = {}
+    try:
+        daemon = DaemonJob(configs, client, interval)
+
+        # Signals can only be handled on the main thread; the caller's handlers are put back once the daemon stops
+        if current_thread() is main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                handlers[signum] = signal.signal(signum, lambda signum, frame: daemon.stop())
+        daemon.run(rounds)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+
+        # Deletes all unzipped config files at the end
+        for file in file_removal_array:
+            remove(file)
+    return daemon
+
+
+# Starts the daemon upon execution of script
+if __name__ == "__main__":
+    daemon_job()
@@ -0,0 +1,195 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+job_graph.py runs the steps of a job as a dependency graph instead of one config after another: every step names the
+steps it runs after and the resources it holds while it runs (e.g. "cluster" for index writes, "plugin" for plugin API
+calls, "cpu" for compiling templates), and a step starts as soon as its dependencies are done and every one of its
+resources has a free slot. Independent configs, and independent steps of one config, overlap.
+
+Every run is timed: the report of JobGraph.run() holds when every step started and ended, how long it waited for its
+resources, how long every resource was busy, and the critical path, i.e. the chain of steps that decided how long the run
+took (starting from the step that ended last, each step's latest-ending dependency).
+
+Classes:
+    - JobGraph: A dependency graph of job steps, run on a pool of threads with a limit per resource
+
+Functions:
+    - critical_path(): Returns the chain of steps that decided how long a run took
+    - format_report(): Formats the report of a run as a timing table
+"""
+
+# Standard libraries
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from time import monotonic
+
+
+class JobGraph:
+    """
+    JobGraph class: a dependency graph of steps. Steps are added after the steps they depend on, so the graph has no
+    cycles, and among the steps that are ready, the ones added first start first.
+
+    Arguments:
+        - limits: A dict of resource name to how many steps holding it can run at once; resources without a limit are
+          not limited (default is no limits)
+        - workers: How many steps can run at once in total (default is 8)
+
+    Raises:
+        - ValueError: limits should map resource names to positive integers
+        - ValueError: workers should be a positive integer
+    """
+
+    def __init__(self, limits:dict = None, workers:int = 8):
+        # Validate input
+        if type(workers) is not int or workers < 1:
+            raise ValueError("workers should be a positive integer")
+
+        self.limits = {}
+        self.workers = workers
+        self.steps = {}
+        for resource, limit in (limits or {}).items():
+            self.limit(resource, limit)
+
+    def limit(self, resource:str, limit:int):
+        """
+        Sets how many steps holding resource can run at once
+
+        Raises:
+            - ValueError: limits should map resource names to positive integers
+        """
+        if type(resource) is not str or type(limit) is not int or limit < 1:
+            raise ValueError("limits should map resource names to positive integers")
+        self.limits[resource] = limit
+
+    def add(self, name:str, function, resources = (), after = ()) -> str:
+        """
+        Adds a step to the graph
+
+        Arguments:
+            - name: The unique name of the step
+            - function: The function the step calls (with no arguments)
+            - resources: The names of the resources the step holds while it runs (default is none)
+            - after: The names of the steps that must be done before the step starts (default is none)
+
+        Returns:
+            - The name of the step, to use in the after of later steps
+
+        Raises:
+            - TypeError: name should be a string
+            - ValueError: step names should be unique
+            - ValueError: a step can only run after steps that were added before it
+        """
+        if type(name) is not str:
+            raise TypeError("name should be a string")
+        if name in self.steps:
+            raise ValueError("step names should be unique: %s was already added" % (name))
+        if any(dependency not in self.steps for dependency in after):
+            raise ValueError("a step can only run after steps that were added before it")
+        self.steps[name] = {"function": function, "resources": tuple(resources), "after": tuple(after)}
+        return name
+
+    def _available(self, step:dict, busy:dict) -> bool:
+        return all(busy.get(resource, 0) < self.limits[resource] for resource in step["resources"] if resource in self.limits)
+
+    def run(self) -> dict:
+        """
+        Runs every step once its dependencies are done and its resources are free. A step whose function raises is
+        "failed", and the steps that depend on it (directly or not) are "skipped"; the other steps still run.
+
+        Returns:
+            - A report dict: "elapsed" (seconds the run took), "steps" (step name to a dict of "status" ("done", "failed" or
+              "skipped"), "result", "error", "resources", "after", "start", "end" and "waited" (seconds between its
+              dependencies being done and its start), in seconds since the run started), "busy" (resource name to the
+              seconds steps held it), and "critical_path" (see critical_path())
+        """
+        start = monotonic()
+        report = {name: {"status": None, "result": None, "error": None, "resources": step["resources"], "after": step["after"], "start": None, "end": None, "waited": 0.0} for name, step in self.steps.items()}
+        ready_since = {}
+        waiting = list(self.steps)
+        busy = {}
+        pending = {}
+
+        def settle():
+            # Steps whose dependencies are all finished become ready, or are skipped if one of them did not succeed
+            for name in list(waiting):
+                statuses = [report[dependency]["status"] for dependency in self.steps[name]["after"]]
+                if any(status in ("failed", "skipped") for status in statuses):
+                    report[name]["status"] = "skipped"
+                    waiting.remove(name)
+                elif all(status == "done" for status in statuses) and name not in ready_since:
+                    ready_since[name] = max([report[dependency]["end"] for dependency in self.steps[name]["after"]] or [0.0])
+
+        with ThreadPoolExecutor(max_workers = self.workers) as executor:
+            while True:
+                settle()
+                for name in [name for name in waiting if name in ready_since]:
+                    step = self.steps[name]
+                    if len(pending) >= self.workers or not self._available(step, busy):
+                        continue
+                    waiting.remove(name)
+                    for resource in step["resources"]:
+                        busy[resource] = busy.get(resource, 0) + 1
+                    report[name]["start"] = monotonic() - start
+                    report[name]["waited"] = report[name]["start"] - ready_since[name]
+                    pending[executor.submit(step["function"])] = name
+                if not pending:
+                    break
+
+                done, not_done = wait(pending, return_when = FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    report[name]["end"] = monotonic() - start
+                    for resource in self.steps[name]["resources"]:
+                        busy[resource] -= 1
+                    if future.exception() is not None:
+                        report[name]["status"] = "failed"
+                        report[name]["error"] = future.exception()
+                    else:
+                        report[name]["status"] = "done"
+                        report[name]["result"] = future.result()
+
+        busy_time = {}
+        for step in report.values():
+            if step["start"] is not None:
+                for resource in step["resources"]:
+                    busy_time[resource] = busy_time.get(resource, 0.0) + step["end"] - step["start"]
+        return {"elapsed": monotonic() - start, "steps": report, "busy": busy_time, "critical_path": critical_path(report)}
+
+
+def critical_path(steps:dict) -> list:
+    """
+    Returns the critical path of a run: starting from the step that ended last, the chain of each step's latest-ending
+    dependency, in the order the steps ran
+
+    Arguments:
+        - steps: The "steps" of a JobGraph.run() report
+
+    Returns:
+        - A list of step names
+    """
+    ran = {name: step for name, step in steps.items() if step["end"] is not None}
+    if not ran:
+        return []
+    name = max(ran, key = lambda name: ran[name]["end"])
+    path = [name]
+    while ran[name]["after"]:
+        name = max(ran[name]["after"], key = lambda dependency: ran[dependency]["end"])
+        path.append(name)
+    return path[::-1]
+
+
+def format_report(report:dict) -> str:
+    """
+    Formats the report of JobGraph.run(): the steps of the critical path with when they started, how long they took, and
+    how long they waited for a resource, followed by how long every resource was busy and the steps that did not succeed
+    """
+    lines = ["Critical path (%.2fs run):" % (report["elapsed"])]
+    for name in report["critical_path"]:
+        step = report["steps"][name]
+        lines.append("  %8.2fs  %8.2fs  (waited %.2fs)  %s" % (step["start"], step["end"] - step["start"], step["waited"], name))
+    for resource, seconds in sorted(report["busy"].items()):
+        lines.append("Resource %s busy for %.2fs" % (resource, seconds))
+    for name, step in report["steps"].items():
+        if step["status"] != "done":
+            lines.append("Step %s %s%s" % (name, step["status"], ": %s" % (step["error"]) if step["error"] is not None else ""))
+    return "\n".join(lines)
@@ -0,0 +1,213 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+job_steps.py contains the steps the startup and refresh jobs share, written to run as steps of a JobGraph (see
+job_graph.py): each one works on a single index or config, and raises the job's error message when it fails.
+
+Functions:
+    - prepare_ingest_args(): Copies the ingest_args of a config for its days to share
+    - needs_compiling(): Whether ingest_args hold a data template to compile
+    - day_seed(): Returns the seed of one day's documents, derived from the seed of its config
+    - compile_ingest_args(): Compiles the data template of one day's ingest_args in place
+    - dated_index_name(): Returns the name of a day's index
+    - build_day_index(): Creates one day's index and ingests data into it
+    - verify_day_indices(): Verifies the document count of a config's indices and repairs the ones that fall short
+    - install_retention(): Installs the ISM policy that deletes the old days of a config
+    - delete_old_indices(): Deletes the days of a config that are more than days_before days old, with one request
+"""
+
+from opensearchpy import OpenSearch
+from faker import Faker
+
+# Standard libraries
+from datetime import date, datetime
+from math import ceil
+from os import path
+import sys
+
+# Adds parent directory "/sample_data_tooling" to sys.path
+sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.constants import MINUTES_PER_DAY
+from sample_data_tooling.sample_data_indices.sample_data_indices import SampleDataIndex
+from sample_data_tooling.sample_data_indices.cluster_state import ClusterState
+from sample_data_tooling.sample_data_generator.sample_data_generator import compile_template
+from sample_data_tooling.sample_data_generator.batch_engine import child_seed
+from sample_data_tooling.sample_data_ingestor.checkpoint_journal import CheckpointJournal
+from sample_data_tooling.sample_data_indices.index_reconciliation import reconcile_indices
+from sample_data_tooling.sample_data_jobs.retention import install_retention_policy, attach_retention_policy, expired_indices, delete_indices
+
+
+def prepare_ingest_args(ingest_args:dict) -> dict:
+    """
+    Returns a copy of the "ingest_args" of a config without index_name, with the number of documents per day set if minute
+    intervals are given; the days of the config share it, and add their own index_name and current_date
+    """
+    ingest_args = dict(ingest_args)
+    ingest_args.pop("index_name", None)
+    if "minutes" in ingest_args:
+        ingest_args["number"] = ceil(MINUTES_PER_DAY/ingest_args["minutes"])
+    return ingest_args
+
+
+def needs_compiling(ingest_args:dict) -> bool:
+    """
+    Returns whether ingest_args hold a data template that compile_ingest_args() compiles
+    """
+    return "data_template" in ingest_args and not ingest_args.get("file_provided")
+
+
+def day_seed(seed:int, current_date:datetime) -> int:
+    """
+    Returns the seed of one day's documents, derived from the seed of its config and the day, so that every day draws
+    different documents and draws the same ones again in the next run; None if the config has no seed
+    """
+    if seed is None:
+        return None
+    return int(child_seed(seed, current_date.toordinal()).generate_state(1)[0])
+
+
+def compile_ingest_args(ingest_args:dict, seed:int = None):
+    """
+    Compiles the data template of one day's ingest_args in place, bound to a Faker instance (and with vectorized, a batch
+    engine) of its own: days built at once in several threads never share random state, and with a seed (see
+    day_seed()), the day's documents are the same in every run
+    """
+    fake = Faker()
+    if seed is not None:
+        fake.seed_instance(seed)
+    ingest_args["data_template"] = compile_template(ingest_args["data_template"],
+        ingest_args.get("mapping", True),
+        fake,
+        seed = seed,
+        vectorized = ingest_args.get("vectorized", False),
+        faker_compatible = ingest_args.get("faker_compatible", False)
+    )
+
+
+def dated_index_name(index_name:str, index_date:datetime) -> str:
+    """
+    Returns the name of one day's index of the config index_name (e.g. "cpu_usage_6_8_2022" of "cpu_usage" for 6/8/2022),
+    which index_date() in retention.py reads the date back from
+    """
+    return index_name + "_" + str(index_date.month) + "_" + str(index_date.day) + "_" + str(index_date.year)
+
+
+def build_day_index(client:OpenSearch,
+    index_name:str,
+    index_body:dict,
+    ingest_args:dict,
+    current_date:datetime,
+    error_message:str,
+    profile:dict = None,
+    checkpoint:CheckpointJournal = None,
+    cluster_state:ClusterState = None,
+    seed:int = None,
+    retention_of:str = None
+) -> str:
+    """
+    Creates one day's index and ingests data into it, unless it exists (it is then assumed to be ingested already, unless
+    checkpoint holds an incomplete checkpoint for it, which is then resumed). ingest_args are read when the step runs, so
+    a template compiled by an earlier step is used; they should be the day's own (see compile_ingest_args()).
+
+    Arguments:
+        - client: an OpenSearch Python client object
+        - index_name: The name of the day's index
+        - index_body: The body the index is created with
+        - ingest_args: The ingest_args of the day (see prepare_ingest_args() and compile_ingest_args())
+        - current_date: The date of the day's documents
+        - error_message: The message of the ConnectionError raised if the index could not be created or ingested
+        - profile: A bulk-load profile (see read_bulk_load_profile()), to load the index without refreshes or replicas
+          (default is None)
+        - checkpoint: A CheckpointJournal the ingestion is recorded in (default is None)
+        - cluster_state: A ClusterState whether the index exists is read from, and its creation recorded in (default is
+          to ask the cluster)
+        - seed: The seed of the day (see day_seed()): a new checkpoint of the index is started with it, and without a
+          checkpoint, the trend anomalies are drawn from it (default is a random seed)
+        - retention_of: With ISM retention, the index_name of the config whose policy the index is added to once it is
+          created (see attach_retention_policy()) (default is None)
+
+    Returns:
+        - "ingested", or "skipped" if the index already existed
+
+    Raises:
+        - ConnectionError: error_message
+    """
+    new_index = SampleDataIndex(index_name, index_body, client, cluster_state)
+    exists = new_index.exists()
+    if exists and (checkpoint is None or not checkpoint.is_incomplete(index_name)):
+        return "skipped"
+    ingest_args = dict(ingest_args, index_name = index_name, current_date = current_date, seed = seed)
+    try:
+        if checkpoint is not None:
+            # A new index starts a new checkpoint before it is created, so an ingestion that dies at any point is resumed
+            if not exists:
+                checkpoint.start(index_name, seed)
+            ingest_args["checkpoint"] = checkpoint
+        new_index.create_index()
+        if retention_of is not None:
+            attach_retention_policy(client, retention_of, index_name)
+        if profile is None:
+            new_index.ingest_more(**ingest_args)
+        else:
+            with new_index.bulk_load(**profile):
+                new_index.ingest_more(**ingest_args)
+    except Exception as e:
+        print(e)
+        raise ConnectionError(error_message)
+    return "ingested"
+
+
+def verify_day_indices(client:OpenSearch, index_name:str, day_indices:dict, ingest_args:dict, error_message:str, checkpoint:CheckpointJournal = None):
+    """
+    Verifies the document count of every day of a config with one _cat/indices call, and ingests only what the indices
+    that fall short are missing (see reconcile_indices())
+
+    Raises:
+        - ConnectionError: error_message, if the indices could not be verified or repaired
+    """
+    try:
+        reconcile_indices(client, index_name + "*", day_indices, ingest_args, checkpoint)
+    except Exception as e:
+        print(e)
+        raise ConnectionError(error_message)
+
+
+def install_retention(client:OpenSearch, index_name:str, days_before:int, error_message:str) -> str:
+    """
+    Installs the ISM policy that deletes the days of a config once they are more than days_before days old, unless it is
+    installed already (see install_retention_policy())
+
+    Raises:
+        - ConnectionError: error_message, if the policy could not be installed
+    """
+    try:
+        return install_retention_policy(client, index_name, days_before)
+    except Exception as e:
+        print(e)
+        raise ConnectionError(error_message)
+
+
+def delete_old_indices(client:OpenSearch, index_name:str, days_before:int, cluster_state:ClusterState, error_message:str, today:date = None) -> list:
+    """
+    Deletes the indices of a config whose day is more than days_before days before today with one delete request,
+    finding them in the cluster state (which loads the config's indices with one call, unless they were loaded already)
+    and recording their deletion in it
+
+    Returns:
+        - The names of the deleted indices
+
+    Raises:
+        - ConnectionError: error_message, if the indices could not be deleted
+    """
+    # Deletes indices > the amount of days before
+    expired = expired_indices(index_name, cluster_state.load(index_name + "*"), days_before, today)
+    try:
+        deleted = delete_indices(client, expired)
+    except Exception as e:
+        print(e)
+        raise ConnectionError(error_message)
+    for index_to_delete in deleted:
+        print("Deleted index %s" % (index_to_delete))
+        cluster_state.deleted(index_to_delete)
+    return deleted
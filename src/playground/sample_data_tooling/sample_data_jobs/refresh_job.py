@@ -6,18 +6,21 @@ SPDX-License-Identifier: Apache-2.0
 from opensearchpy import OpenSearch
 
 # Standard libraries
-from datetime import timedelta, datetime
-from os import listdir, path, remove
+from datetime import date, timedelta, datetime
+from os import listdir, path, remove, cpu_count
 from argparse import ArgumentParser
-from math import ceil
+from functools import partial
 from json import load
 import sys
 
 # Adds parent directory "/sample_data_tooling" to sys.path
 sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
-from sample_data_tooling.constants import MINUTES_PER_DAY, HOST, SAMPLE_DATA_PASSWORD, SAMPLE_DATA_USERNAME, PORT, DIR_PATH
-from sample_data_tooling.sample_data_commons.utils import unzip_file, validate_job_args, untar_file
-from sample_data_tooling.sample_data_indices.sample_data_indices import SampleDataIndex
+from sample_data_tooling.constants import HOST, SAMPLE_DATA_PASSWORD, SAMPLE_DATA_USERNAME, PORT, DIR_PATH
+from sample_data_tooling.sample_data_commons.utils import unzip_file, validate_job_args, untar_file, read_bulk_load_profile, read_parallelism, read_retention, read_seed
+from sample_data_tooling.sample_data_indices.cluster_state import ClusterState
+from sample_data_tooling.sample_data_jobs.job_graph import JobGraph, format_report
+from sample_data_tooling.sample_data_jobs.job_steps import prepare_ingest_args, needs_compiling, compile_ingest_args, day_seed, dated_index_name, build_day_index, verify_day_indices, install_retention, delete_old_indices
+from sample_data_tooling.sample_data_jobs.retention import retention_index_body
 
 
 # Various arguments to configure where config files are and what credentials to use for OS
@@ -27,6 +30,10 @@ parser.add_argument("-username", help = "The username of OS with CRUD permission
 parser.add_argument("-password", help = "The password of OS with CRUD permissions", default = SAMPLE_DATA_PASSWORD)
 parser.add_argument("-port", help = "The port number in which OS will listen to", type = int, default = PORT)
 parser.add_argument("-config_path", help = "The directory where plugin configurations are found", default = DIR_PATH)
+parser.add_argument("-use_async", help = "Run the job on one asyncio event loop so indices are created and ingested concurrently", action = "store_true")
+parser.add_argument("-max_in_flight", help = "With -use_async, how many requests can be made to OS at once", type = int, default = 8)
+parser.add_argument("-parallelism", help = "How many steps write to OS at once (e.g. build a day's index), across every config", type = int, default = 4)
+parser.add_argument("-cpu_parallelism", help = "How many data templates are compiled at once", type = int, default = cpu_count() or 1)
 args = parser.parse_args()
 
 
@@ -42,22 +49,111 @@ CLIENT = OpenSearch(
 )
 
 
-def refresh_job(config_path:str = args.config_path, client:OpenSearch = CLIENT):
+def add_config_steps(graph:JobGraph, config:dict, client:OpenSearch, parallelism:int, cluster_state:ClusterState) -> list:
     """
-    Given various arguments, delete old indices, and create and ingest new indices
+    Adds the steps of one plugin config to the job graph: compiling its data template for every new day ("cpu") while the
+    indices of the config are loaded into the cluster state ("cluster"), deleting its old indices (or, with "ism"
+    retention, installing the policy that deletes them, "plugin") and building every new day's index ("cluster", and at
+    most the config's "parallelism" days at once), which overlap, then verifying every day it keeps ("cluster")
+
+    Returns:
+        - The names of the steps that were added
+
+    Raises:
+        - KeyError: One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after
+        - ValueError: parallelism should be a positive integer
+        - ValueError: retention should be "delete" or "ism"
+        - ValueError: seed should be a non-negative integer
+    """
+    try:
+        index_name = config["ingest_args"]["index_name"]
+        ingest_args = prepare_ingest_args(config["ingest_args"])
+        index_body = config["index_body"]
+        days_before = int(config["days_before"])
+        days_after = int(config["days_after"])
+    except:
+        raise KeyError("One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after")
+    graph.limit("config " + index_name, read_parallelism(config, parallelism))
+    retention = read_retention(config)
+    seed = read_seed(config)
+
+    # Only configs with a date range are refreshed
+    if not (days_after or days_before):
+        return []
+
+    # One call finds which of the config's indices exist, for both the deletions and the new days
+    load = graph.add("load state " + index_name, partial(cluster_state.load, index_name + "*"), resources = ("cluster",))
+
+    # With ISM retention, the cluster deletes old days by itself once the policy is installed (the new days are added
+    # to it once they are created, so they are built after it)
+    if retention == "ism":
+        delete = graph.add("install retention " + index_name, partial(install_retention, client, index_name, days_before, "Refresh job failed to install the retention policy: check client configurations or config file configurations"), resources = ("plugin",))
+    else:
+        delete = graph.add("delete old " + index_name, partial(delete_old_indices, client, index_name, days_before, cluster_state, "Refresh job failed to delete indices: check client configurations or config file configurations"), resources = ("cluster",), after = [load])
+
+    # Creates and ingests data for each day after today until days_after variable
+    compiles = []
+    builds = []
+    for day in range(days_after + 1):
+        new_index_date = datetime.now() + timedelta(days = day)
+        new_index_date = datetime(new_index_date.year, new_index_date.month, new_index_date.day)
+        new_index_name = dated_index_name(index_name, new_index_date)
+
+        # With ISM retention, every day is created with its own date as its creation date, which ISM counts its age from
+        day_body = retention_index_body(index_body, new_index_date) if retention == "ism" else index_body
+
+        # Every day compiles the data template into field generators of its own, so the days built at once never share
+        # random state
+        day_args = dict(ingest_args)
+        compile_step = []
+        if needs_compiling(ingest_args):
+            compile_step = [graph.add("compile " + new_index_name, partial(compile_ingest_args, day_args, day_seed(seed, new_index_date)), resources = ("cpu",))]
+        compiles += compile_step
+        # With a bulk-load profile, the index is loaded without refreshes or replicas
+        build = partial(build_day_index, client, new_index_name, day_body, day_args, new_index_date, "Refresh job failed to ingest indices: check client configurations or config file configurations", read_bulk_load_profile(config), cluster_state = cluster_state, seed = day_seed(seed, new_index_date), retention_of = index_name if retention == "ism" else None)
+        builds.append(graph.add("build " + new_index_name, build, resources = ("cluster", "config " + index_name), after = compile_step + [load] + ([delete] if retention == "ism" else [])))
+
+    # Verifies the document count of every day that is kept, and ingests only what an index is missing
+    day_indices = {}
+    for day in range(-days_before, days_after + 1):
+        index_date = date.today() + timedelta(days = day)
+        index_date = datetime(index_date.year, index_date.month, index_date.day)
+        day_indices[dated_index_name(index_name, index_date)] = index_date
+    verify = partial(verify_day_indices, client, index_name, day_indices, ingest_args, "Refresh job failed to verify indices: check client configurations or config file configurations")
+    return compiles + [load, delete] + builds + [graph.add("verify " + index_name, verify, resources = ("cluster",), after = [delete] + builds)]
+
+
+def refresh_job(config_path:str = args.config_path, client:OpenSearch = CLIENT, parallelism:int = args.parallelism, cpu_parallelism:int = args.cpu_parallelism) -> dict:
+    """
+    Given various arguments, delete old indices, and create and ingest new indices. The steps of every config run as one
+    dependency graph (see job_graph.py), with at most parallelism steps writing to the cluster and cpu_parallelism
+    template compilations at once; a timing report with the critical path of the run is printed at the end. Which indices
+    exist is read once per config into a ClusterState rather than checked index by index.
 
     Arguments:
         - config_path: The directory path in which the plugin config json files are located
         - client: The OpenSearch Python client object used to create and ingest indices
+        - parallelism: How many steps can write to the cluster at once, across every config (default is the "-parallelism"
+          argument)
+        - cpu_parallelism: How many data templates can be compiled at once (default is the "-cpu_parallelism" argument)
+
+    Returns:
+        - The report of the run (see JobGraph.run())
 
     Raises:
+        - ValueError: parallelism should be a positive integer
         - KeyError: One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after
         - ConnectionError: Refresh job failed to delete indices: check client configurations or config file configurations
         - ConnectionError: Refresh job failed to ingest indices: check client configurations or config file configurations
+        - ConnectionError: Refresh job failed to verify indices: check client configurations or config file configurations
     """
 
     # First validate input
     validate_job_args(config_path = config_path, client = client)
+    if any(type(limit) is not int or limit < 1 for limit in (parallelism, cpu_parallelism)):
+        raise ValueError("parallelism should be a positive integer")
+    graph = JobGraph({"cluster": parallelism, "cpu": cpu_parallelism}, workers = parallelism + cpu_parallelism)
+    cluster_state = ClusterState(client)
 
     # Array in which unzipped files will be removed
     file_removal_array = []
@@ -67,82 +163,45 @@ def refresh_job(config_path:str = args.config_path, client:OpenSearch = CLIENT):
         # Extracts any tar files (and adds the filenames to a filename removal array)
         file_removal_array.extend(untar_file(path.join(config_path, file), config_path))
 
-    # Opening each config file for each plugin
-    for file in listdir(config_path):
-        # Unzip file and get filename
-        filename = unzip_file(file)
+    try:
+        # Opening each config file for each plugin, and adding its steps to the graph before any step runs
+        for file in listdir(config_path):
+            # Unzip file and get filename
+            filename = unzip_file(file)
 
-        # If the file is a JSON file
-        if filename:
-            # Remove copied unzipped file, if necessary
-            if filename != file:
-                file_removal_array.append(filename)
+            # If the file is a JSON file
+            if filename:
+                # Remove copied unzipped file, if necessary
+                if filename != file:
+                    file_removal_array.append(filename)
 
-            # Open the file
-            with open(path.join(config_path, filename), 'r') as f:
-                config = load(f)
+                # Open the file
+                with open(path.join(config_path, filename), 'r') as f:
+                    config = load(f)
 
                 # If the config file is indeed a config file and not a datafile, continue
                 if "plugin" in config:
-                    # Arguments
-                    try:
-                        ingest_args = config["ingest_args"]
-                        index_name = ingest_args["index_name"]
-                        index_body = config["index_body"]
-                        days_before = int(config["days_before"])
-                        days_after = int(config["days_after"])
-                    except:
-                        raise KeyError("One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after")
-
-                    response = client.indices.get(index = (index_name + "*"))
-
-                    # If user specifies a date range, index names with dates are appended
-                    if days_after or days_before:
-                        for key in response:
-                            year = int(key.split("_")[3])
-                            day = int(key.split("_")[2])
-                            month = int(key.split("_")[1])
-
-                            # Deletes indices > the amount of days before
-                            if (datetime.today() - datetime(year, month, day)).days > days_before:
-                                index_to_delete = index_name + "_" + str(month) + "_" + str(day) + "_" + str(year)
-                                try:
-                                    client.indices.delete(index = index_to_delete)
-                                except Exception as e:
-                                    print(e)
-                                    raise ConnectionError("Refresh job failed to delete indices: check client configurations or config file configurations")
-                                print("Deleted index %s" % (index_to_delete))
-
-                        # If user specifies minute intervals, number variable will be updated
-                        if "minutes" in ingest_args:
-                            ingest_args["number"] = ceil(MINUTES_PER_DAY/ingest_args["minutes"])
-
-                        # Creates and ingests data for each day after today until days_after variable
-                        for day in range(days_after + 1):
-                            # Creates a new index class with the new date
-                            new_index_date = datetime.now() + timedelta(days = day)
-                            new_index_name = index_name + "_" + str(new_index_date.month) + "_" + str(new_index_date.day) + "_" + str(new_index_date.year)
-                            new_index_date = datetime(new_index_date.year, new_index_date.month, new_index_date.day)
-                            new_index = SampleDataIndex(new_index_name, index_body, client)
-
-                            # Adds modified fields to argument dict
-                            ingest_args["index_name"] = new_index_name
-                            ingest_args["current_date"] = new_index_date
-
-                            # If the index doesn't already exist, create it and ingest data into it
-                            if not client.indices.exists(index = new_index_name):
-                                try:
-                                    new_index.create_index()
-                                    new_index.ingest_more(**ingest_args)
-                                except Exception as e:
-                                    print(e)
-                                    raise ConnectionError("Refresh job failed to ingest indices: check client configurations or config file configurations")
-
-    # Deletes all unzipped config files at the end
-    for file in file_removal_array:
-        remove(file)
+                    add_config_steps(graph, config, client, parallelism, cluster_state)
+
+        report = graph.run()
+    finally:
+        # Deletes all unzipped config files at the end
+        for file in file_removal_array:
+            remove(file)
+
+    # The steps that failed stopped only the steps of their own config; the first one raises its error
+    print(format_report(report))
+    for step in report["steps"].values():
+        if step["status"] == "failed":
+            raise step["error"]
+    return report
 
 
 # Starts job upon execution of script
 if __name__ == "__main__":
-    refresh_job()
+    if args.use_async:
+        # The async jobs need aiohttp, so they are only imported when asked for
+        from sample_data_tooling.sample_data_jobs.async_jobs import build_async_client, run_refresh_job
+        run_refresh_job(args.config_path, build_async_client(args.host, args.port, args.username, args.password), args.max_in_flight)
+    else:
+        refresh_job()
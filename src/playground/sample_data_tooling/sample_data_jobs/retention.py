@@ -0,0 +1,233 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+
+retention.py decides which day indices of a config are too old and deletes them. The date of a day is read from the
+structured suffix dated_index_name() appends ("_<month>_<day>_<year>", anchored at the end of the name), so index names
+that contain underscores themselves are parsed correctly, and names that are not days of the config are left alone. All
+the expired days of a config are deleted with one comma-joined delete request (split only if the request line would get
+too long).
+
+Instead of the refresh job deleting days, a config can have an index state management (ISM) policy delete them in the
+cluster: the policy is installed once and deletes a day once it is more than days_before days old. ISM counts the age of
+an index from its creation date, so the days of such a config are created with their own date as their creation date
+(see retention_index_body()). OpenSearch only applies an ISM template to indices created after the template was last
+updated, which these days never are, so every day is added to the policy once it is created (see
+attach_retention_policy()), and every run of a job adds the days that are still missing it.
+
+Functions:
+    - index_date(): Returns the date of a config's day index from its name
+    - expired_indices(): Returns the day indices of a config that are more than days_before days old
+    - delete_batches(): Joins index names into as few delete requests as the request line allows
+    - delete_indices(): Deletes indices with as few requests as possible
+    - retention_policy_id(): Returns the ID of the ISM policy of a config
+    - retention_policy(): Returns the ISM policy that deletes the days of a config
+    - retention_index_body(): Returns the index body of a day whose age ISM counts from its date
+    - install_retention_policy(): Installs the ISM policy of a config, unless it is installed already
+    - async_install_retention_policy(): The asyncio counterpart of install_retention_policy()
+    - attach_retention_policy(): Adds a day index to the ISM policy of its config
+    - async_attach_retention_policy(): The asyncio counterpart of attach_retention_policy()
+"""
+
+from opensearchpy import OpenSearch, AsyncOpenSearch
+from opensearchpy.exceptions import NotFoundError
+
+# Standard libraries
+from datetime import date, datetime
+import re
+
+
+# Constants
+MAX_DELETE_LENGTH = 4000
+RETENTION_POLICY_PREFIX = "sample-data-retention-"
+
+
+def index_date(index_name:str, name:str) -> date:
+    """
+    Returns the date of a day index of the config index_name (e.g. 6/8/2022 for "cpu_usage_6_8_2022" of "cpu_usage"), or
+    None if name is not a day index of the config
+    """
+    match = re.fullmatch(re.escape(index_name) + r"_(\d{1,2})_(\d{1,2})_(\d{4})", name)
+    if match is None:
+        return None
+    try:
+        return date(int(match.group(3)), int(match.group(1)), int(match.group(2)))
+    except ValueError:
+        return None
+
+
+def expired_indices(index_name:str, names, days_before:int, today:date = None) -> list:
+    """
+    Returns the day indices of a config that are more than days_before days old
+
+    Arguments:
+        - index_name: The index_name of the config
+        - names: The names of the indices to look at (e.g. every index matching index_name + "*"); names that are not day
+          indices of the config are ignored
+        - days_before: How many days before today are kept
+        - today: The date the age of the days is counted from (default is today)
+
+    Returns:
+        - The sorted names of the expired day indices
+    """
+    today = date.today() if today is None else today
+    expired = []
+    for name in names:
+        day = index_date(index_name, name)
+        if day is not None and (today - day).days > days_before:
+            expired.append(name)
+    return sorted(expired)
+
+
+def delete_batches(names:list, max_length:int = MAX_DELETE_LENGTH) -> list:
+    """
+    Joins index names with commas into as few strings as possible, each at most max_length characters long (a name
+    longer than max_length gets a string of its own), so every string can be deleted with one request
+    """
+    batches = []
+    for name in names:
+        if batches and len(batches[-1]) + 1 + len(name) <= max_length:
+            batches[-1] += "," + name
+        else:
+            batches.append(name)
+    return batches
+
+
+def delete_indices(client:OpenSearch, names:list) -> list:
+    """
+    Deletes indices with one comma-joined delete request (or one per batch, see delete_batches()). Indices that do not
+    exist (e.g. deleted by someone else in the meantime) are ignored.
+
+    Arguments:
+        - client: an OpenSearch Python client object
+        - names: The names of the indices to delete
+
+    Returns:
+        - The names of the deleted indices
+    """
+    for batch in delete_batches(names):
+        client.indices.delete(index = batch, ignore_unavailable = True)
+    return list(names)
+
+
+def retention_policy_id(index_name:str) -> str:
+    return RETENTION_POLICY_PREFIX + index_name
+
+
+def retention_policy(index_name:str, days_before:int) -> dict:
+    """
+    Returns the ISM policy that deletes the day indices of a config once they are more than days_before days old. Its
+    description names the pattern and age, so install_retention_policy() can tell whether an installed policy is current.
+    """
+    return {"policy": {
+        "description": "Deletes the %s_* indices of the sample data tooling once they are more than %d days old" % (index_name, days_before),
+        "default_state": "keep",
+        "states": [
+            {"name": "keep", "actions": [], "transitions": [{"state_name": "delete", "conditions": {"min_index_age": "%dd" % (days_before + 1)}}]},
+            {"name": "delete", "actions": [{"delete": {}}], "transitions": []}
+        ],
+        "ism_template": [{"index_patterns": [index_name + "_*"], "priority": 100}]
+    }}
+
+
+def retention_index_body(index_body:dict, current_date:datetime) -> dict:
+    """
+    Returns a copy of index_body whose creation date is the start of current_date, so ISM counts the age of a day from
+    its date rather than from when the job created it (e.g. past days created by the startup job)
+    """
+    settings = dict(index_body.get("settings") or {})
+    settings["index.creation_date"] = str(int(datetime(current_date.year, current_date.month, current_date.day).timestamp() * 1000))
+    return dict(index_body, settings = settings)
+
+
+def _is_current(current:dict, policy:dict) -> bool:
+    return bool(current) and current.get("policy", {}).get("description") == policy["policy"]["description"]
+
+
+def install_retention_policy(client:OpenSearch, index_name:str, days_before:int) -> str:
+    """
+    Installs the ISM policy of a config: creates it if it is missing, updates it if days_before changed, and leaves it
+    alone otherwise. Either way, the day indices that already exist and have no policy are added to it (an update also
+    switches the days it manages to the new version), since its ISM template does not apply to days created with their
+    own date (see attach_retention_policy()).
+
+    Arguments:
+        - client: an OpenSearch Python client object
+        - index_name: The index_name of the config
+        - days_before: How many days before today are kept
+
+    Returns:
+        - "installed", "updated" or "unchanged"
+    """
+    policy_id = retention_policy_id(index_name)
+    policy = retention_policy(index_name, days_before)
+    try:
+        current = client.plugins.index_management.get_policy(policy = policy_id)
+    except NotFoundError:
+        current = None
+
+    if _is_current(current, policy):
+        result = "unchanged"
+    elif current:
+        # Indices already managed by the policy keep its old version until they are switched to the new one
+        client.plugins.index_management.put_policy(policy = policy_id, body = policy, params = {"if_seq_no": current["_seq_no"], "if_primary_term": current["_primary_term"]})
+        client.plugins.index_management.change_policy(index = index_name + "_*", body = {"policy_id": policy_id})
+        result = "updated"
+    else:
+        client.plugins.index_management.put_policy(policy = policy_id, body = policy)
+        result = "installed"
+    client.plugins.index_management.add_policy(index = index_name + "_*", body = {"policy_id": policy_id})
+    return result
+
+
+async def async_install_retention_policy(client:AsyncOpenSearch, index_name:str, days_before:int) -> str:
+    """
+    Installs the ISM policy of a config with an AsyncOpenSearch client, unless it is installed already (see
+    install_retention_policy())
+
+    Returns:
+        - "installed", "updated" or "unchanged"
+    """
+    policy_id = retention_policy_id(index_name)
+    policy = retention_policy(index_name, days_before)
+    try:
+        current = await client.plugins.index_management.get_policy(policy = policy_id)
+    except NotFoundError:
+        current = None
+
+    if _is_current(current, policy):
+        result = "unchanged"
+    elif current:
+        await client.plugins.index_management.put_policy(policy = policy_id, body = policy, params = {"if_seq_no": current["_seq_no"], "if_primary_term": current["_primary_term"]})
+        await client.plugins.index_management.change_policy(index = index_name + "_*", body = {"policy_id": policy_id})
+        result = "updated"
+    else:
+        await client.plugins.index_management.put_policy(policy = policy_id, body = policy)
+        result = "installed"
+    await client.plugins.index_management.add_policy(index = index_name + "_*", body = {"policy_id": policy_id})
+    return result
+
+
+def attach_retention_policy(client:OpenSearch, index_name:str, day_index_name:str) -> bool:
+    """
+    Adds a day index to the ISM policy of its config, unless it has a policy already. A day is created with its own date
+    as its creation date, which is before the policy was last updated, so the policy's ISM template never applies to it.
+
+    Arguments:
+        - client: an OpenSearch Python client object
+        - index_name: The index_name of the config
+        - day_index_name: The name of the day index
+
+    Returns:
+        - Whether the day was added to the policy
+    """
+    response = client.plugins.index_management.add_policy(index = day_index_name, body = {"policy_id": retention_policy_id(index_name)})
+    return bool(response.get("updated_indices"))
+
+
+async def async_attach_retention_policy(client:AsyncOpenSearch, index_name:str, day_index_name:str) -> bool:
+    """
+    Adds a day index to the ISM policy of its config with an AsyncOpenSearch client (see attach_retention_policy())
+    """
+    response = await client.plugins.index_management.add_policy(index = day_index_name, body = {"policy_id": retention_policy_id(index_name)})
+    return bool(response.get("updated_indices"))
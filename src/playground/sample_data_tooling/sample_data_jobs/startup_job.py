@@ -7,21 +7,25 @@ from opensearchpy import OpenSearch
 
 # Standard libraries
 from datetime import date, timedelta, datetime
-from os import remove, listdir, path
+from functools import partial
+from os import remove, listdir, path, cpu_count
 from argparse import ArgumentParser
 from time import sleep
-from math import ceil
 from json import load
 import sys
 
 # Adds parent directory "/sample_data_tooling" to sys.path
 sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
-from sample_data_tooling.constants import MINUTES_PER_DAY, HOST, SAMPLE_DATA_PASSWORD, SAMPLE_DATA_USERNAME, PORT, DIR_PATH, SCHEME
+from sample_data_tooling.constants import HOST, SAMPLE_DATA_PASSWORD, SAMPLE_DATA_USERNAME, PORT, DIR_PATH, SCHEME
 from sample_data_tooling.sample_data_authentication.sample_data_basic_authentication import BasicAuthentication
 from sample_data_tooling.sample_data_authentication.sample_data_authentication import Authentication
-from sample_data_tooling.sample_data_commons.utils import unzip_file, validate_job_args, untar_file
-from sample_data_tooling.sample_data_indices.sample_data_indices import SampleDataIndex
+from sample_data_tooling.sample_data_commons.utils import unzip_file, validate_job_args, untar_file, read_bulk_load_profile, read_parallelism, read_retention, read_seed
 from sample_data_tooling.sample_data_plugins.ad_plugin_class import AnomalyDetection
+from sample_data_tooling.sample_data_ingestor.checkpoint_journal import CheckpointJournal
+from sample_data_tooling.sample_data_indices.cluster_state import ClusterState
+from sample_data_tooling.sample_data_jobs.job_graph import JobGraph, format_report
+from sample_data_tooling.sample_data_jobs.job_steps import prepare_ingest_args, needs_compiling, compile_ingest_args, day_seed, dated_index_name, build_day_index, verify_day_indices, install_retention
+from sample_data_tooling.sample_data_jobs.retention import retention_index_body
 
 
 # Various arguments to configure where config files are and what credentials to use for OS
@@ -32,6 +36,12 @@ parser.add_argument("-password", help = "The password of OS with CRUD permission
 parser.add_argument("-port", help = "The port number in which OS will listen to", type = int, default = PORT)
 parser.add_argument("-config_path", help = "The directory where plugin configurations are found", default = DIR_PATH)
 parser.add_argument("-scheme", help = "The scheme used to construct the url", default = SCHEME)
+parser.add_argument("-use_async", help = "Run the job on one asyncio event loop so indices are created and ingested concurrently", action = "store_true")
+parser.add_argument("-max_in_flight", help = "With -use_async, how many requests can be made to OS at once", type = int, default = 8)
+parser.add_argument("-journal", help = "A checkpoint journal file; indices whose ingestion was cut short are resumed from it", default = None)
+parser.add_argument("-parallelism", help = "How many steps write to OS at once (e.g. build a day's index), across every config", type = int, default = 4)
+parser.add_argument("-plugin_parallelism", help = "How many plugin API calls are made at once", type = int, default = 2)
+parser.add_argument("-cpu_parallelism", help = "How many data templates are compiled at once", type = int, default = cpu_count() or 1)
 args = parser.parse_args()
 
 
@@ -49,29 +59,159 @@ CLIENT = OpenSearch(
 )
 
 
+def _start_detector(call, *args):
+    """
+    Makes one anomaly detector API call as a step of the job
+
+    Raises:
+        - ConnectionError: Startup anomaly detector failed; Check host, username, and password, and/or any connection settings
+    """
+    try:
+        call(*args)
+    except Exception as e:
+        print(e)
+        raise ConnectionError("Startup anomaly detector failed; Check host, username, and password, and/or any connection settings")
+
+
+def add_config_steps(graph:JobGraph, config:dict, url:str, header:Authentication, client:OpenSearch, parallelism:int, checkpoint:CheckpointJournal = None, cluster_state:ClusterState = None) -> list:
+    """
+    Adds the steps of one plugin config to the job graph: compiling its data template for every day ("cpu") while the
+    indices of the config are loaded into the cluster state ("cluster") and, with "ism" retention, the policy that
+    deletes its old days is installed ("plugin"), building every day's index ("cluster", and at most the config's
+    "parallelism" at once), verifying its indices ("cluster"), waiting for them to settle, then creating its anomaly
+    detector and starting its real-time and historical jobs ("plugin"), which overlap
+
+    Returns:
+        - The names of the steps that were added
+
+    Raises:
+        - KeyError: One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after, create_payload, plugin
+        - ValueError: parallelism should be a positive integer
+        - ValueError: retention should be "delete" or "ism"
+        - ValueError: seed should be a non-negative integer
+    """
+    try:
+        index_name = config["ingest_args"]["index_name"]
+        ingest_args = prepare_ingest_args(config["ingest_args"])
+        index_body = config["index_body"]
+        days_before = int(config["days_before"])
+        days_after = int(config["days_after"])
+        create_payload = config["create_payload"]
+        plugin = config["plugin"]
+    except:
+        raise KeyError("One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after, create_payload, plugin")
+    graph.limit("config " + index_name, read_parallelism(config, parallelism))
+    retention = read_retention(config) if days_after or days_before else "delete"
+    seed = read_seed(config)
+    steps = []
+
+    # One call finds which of the config's indices exist, instead of one exists() call per day
+    if cluster_state is not None:
+        steps.append(graph.add("load state " + index_name, partial(cluster_state.load, index_name + "*"), resources = ("cluster",)))
+
+    # With ISM retention, the policy is installed before the days are built, and every day is added to it once it is
+    # created (its ISM template does not apply to days dated in the past, see retention.py)
+    if retention == "ism":
+        steps.append(graph.add("install retention " + index_name, partial(install_retention, client, index_name, days_before, "Startup retention policy failed to install; check the config file or connection settings"), resources = ("plugin",)))
+    prerequisites = list(steps)
+
+    # Generate date range of indices (or just 1 if days_after and days_before is 0)
+    day_indices = {}
+    compiles = []
+    builds = []
+    for day in range(days_after + days_before + 1):
+        index_name_to_create = index_name
+        current_date = datetime.now()
+
+        # If user specifies a date range, index names with dates are appended
+        if days_after or days_before:
+            calculated_date = date.today() - timedelta(days = (days_before - day))
+            current_date = datetime(calculated_date.year, calculated_date.month, calculated_date.day)
+            index_name_to_create = dated_index_name(index_name, current_date)
+        day_indices[index_name_to_create] = current_date
+
+        # With a bulk-load profile, the index is loaded without refreshes or replicas (past days are also force-merged)
+        profile = read_bulk_load_profile(config, closed = current_date.date() < date.today())
+        # With ISM retention, every day is created with its own date as its creation date, which ISM counts its age from
+        day_body = retention_index_body(index_body, current_date) if retention == "ism" else index_body
+
+        # Every day compiles the data template into field generators of its own, so the days built at once never share
+        # random state (with checkpoints, every index compiles it with the seed of its own checkpoint instead)
+        day_args = dict(ingest_args)
+        compile_step = []
+        if checkpoint is None and needs_compiling(ingest_args):
+            compile_step = [graph.add("compile " + index_name_to_create, partial(compile_ingest_args, day_args, day_seed(seed, current_date)), resources = ("cpu",))]
+        compiles += compile_step
+        build = partial(build_day_index, client, index_name_to_create, day_body, day_args, current_date, "Startup index ingestion failed to start; check the config file or connection settings", profile, checkpoint, cluster_state, day_seed(seed, current_date), index_name if retention == "ism" else None)
+        builds.append(graph.add("build " + index_name_to_create, build, resources = ("cluster", "config " + index_name), after = prerequisites + compile_step))
+    steps = prerequisites + compiles + builds
+
+    # An existing index is not proof that its day is complete, so the document count of every day is verified
+    # and only the documents an index is missing are ingested
+    verify = partial(verify_day_indices, client, index_name, day_indices, ingest_args, "Startup index verification failed; check the config file or connection settings", checkpoint)
+    steps.append(graph.add("verify " + index_name, verify, resources = ("cluster",), after = builds))
+
+    # # Sleep is needed here for the indices to be added and ingested
+    # # If it isn't added, then the anomaly detector cannot be created
+    steps.append(graph.add("settle " + index_name, partial(sleep, 1), after = steps[-1:]))
+
+    # If the desired plugin was anomaly detection, the plugin is created and jobs ran
+    if plugin == "anomaly_detection":
+        new_detector = AnomalyDetection(index_name = index_name + "*", target_index = "opensearch-ad-plugin-result-index", payload = create_payload, base_url = url, days_ago = days_before, auth = header)
+        steps.append(graph.add("create detector " + index_name, partial(_start_detector, new_detector.create_detector), resources = ("plugin",), after = steps[-1:]))
+        steps.append(graph.add("start real-time detector " + index_name, partial(_start_detector, new_detector.start_detector), resources = ("plugin",), after = steps[-1:]))
+        steps.append(graph.add("start historical detector " + index_name, partial(_start_detector, new_detector.start_detector, True), resources = ("plugin",), after = steps[-2:-1]))
+    return steps
+
+
 def startup_job(config_path:str = args.config_path,
     url:str = URL,
     header:Authentication = HEADER,
-    client:OpenSearch = CLIENT
-):
+    client:OpenSearch = CLIENT,
+    journal:str = args.journal,
+    parallelism:int = args.parallelism,
+    plugin_parallelism:int = args.plugin_parallelism,
+    cpu_parallelism:int = args.cpu_parallelism
+) -> dict:
     """
-    Given various arguments, create indices, ingest data into them, and initialize/startup plugins
+    Given various arguments, create indices, ingest data into them, and initialize/startup plugins. The steps of every
+    config run as one dependency graph (see job_graph.py), so independent configs and steps overlap, with at most
+    parallelism steps writing to the cluster, plugin_parallelism plugin API calls, and cpu_parallelism template compilations
+    at once; a config's "parallelism" key caps how many of its own days are built at once. A timing report with the
+    critical path of the run is printed at the end. Which indices exist is read once per config into a ClusterState
+    rather than checked index by index.
 
     Arguments:
         - config_path: The directory path in which the plugin config json files are located
         - url: The base url in which the API can be called
         - header: The Authentication object used to create and return request headers
         - client: The OpenSearch Python client object used to create and ingest indices
+        - journal: The path of a checkpoint journal (see checkpoint_journal.py); an index whose ingestion was cut short is
+          resumed from its checkpoint instead of being skipped because it exists (default is the "-journal" argument)
+        - parallelism: How many steps can write to the cluster at once (e.g. build a day's index), across every config
+          (default is the "-parallelism" argument)
+        - plugin_parallelism: How many plugin API calls can be made at once (default is the "-plugin_parallelism" argument)
+        - cpu_parallelism: How many data templates can be compiled at once (default is the "-cpu_parallelism" argument)
+
+    Returns:
+        - The report of the run (see JobGraph.run())
 
     Raises:
+        - TypeError: filename should be a string
+        - ValueError: parallelism should be a positive integer
         - KeyError: One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after, create_payload, plugin
-        - KeyError: index_name not found; index_name is a required argument in \"ingest_args\"
         - ConnectionError: Startup index ingestion failed to start; check the config file or connection settings
+        - ConnectionError: Startup index verification failed; check the config file or connection settings
         - ConnectionError: Startup anomaly detector failed; Check host, username, and password, and/or any connection settings
     """
 
     # First validate input
     validate_job_args(config_path, url, header, client)
+    if any(type(limit) is not int or limit < 1 for limit in (parallelism, plugin_parallelism, cpu_parallelism)):
+        raise ValueError("parallelism should be a positive integer")
+    checkpoint = CheckpointJournal(journal) if journal is not None else None
+    graph = JobGraph({"cluster": parallelism, "plugin": plugin_parallelism, "cpu": cpu_parallelism}, workers = parallelism + plugin_parallelism + cpu_parallelism)
+    cluster_state = ClusterState(client)
 
     # Array in which unzipped files will be removed
     file_removal_array = []
@@ -81,91 +221,45 @@ def startup_job(config_path:str = args.config_path,
         # Extracts any tar files (and adds the filenames to a filename removal array)
         file_removal_array.extend(untar_file(path.join(config_path, file), config_path))
 
-    # Opening each config file for each plugin
-    for file in listdir(config_path):
-        # Unzip file and get filename
-        filename = unzip_file(file)
+    try:
+        # Opening each config file for each plugin, and adding its steps to the graph before any step runs
+        for file in listdir(config_path):
+            # Unzip file and get filename
+            filename = unzip_file(file)
 
-        # If the file is a JSON file
-        if filename:
-            # Add to files to be removed
-            if file != filename:
-                file_removal_array.append(filename)
+            # If the file is a JSON file
+            if filename:
+                # Add to files to be removed
+                if file != filename:
+                    file_removal_array.append(filename)
 
-            # Open the file
-            with open(path.join(config_path, filename), 'r') as f:
-                config = load(f)
+                # Open the file
+                with open(path.join(config_path, filename), 'r') as f:
+                    config = load(f)
 
                 # If the config file is indeed a config file and not a datafile, continue
                 if "plugin" in config:
-                    # Arguments
-                    try:
-                        ingest_args = config["ingest_args"]
-                        index_name = ingest_args["index_name"]
-                        index_body = config["index_body"]
-                        days_before = int(config["days_before"])
-                        days_after = int(config["days_after"])
-                        create_payload = config["create_payload"]
-                        plugin = config["plugin"]
-                    except:
-                        raise KeyError("One or more of the following required keys are missing: ingest_args, index_name, index_body, days_before, days_after, create_payload, plugin")
-
-                    # Generate date range of indices (or just 1 if days_after and days_before is 0)
-                    for day in range(days_after + days_before + 1):
-                        ingest_args["current_date"] = datetime.now()
-                        ingest_args.pop("index_name")
-
-                        try:
-                            index_name_to_create = index_name
-                        except:
-                            raise KeyError("index_name not found; index_name is a required argument in \"ingest_args\"")
-
-                        # If user specifies minute intervals, number variable will be updated
-                        if "minutes" in ingest_args:
-                            ingest_args["number"] = ceil(MINUTES_PER_DAY/ingest_args["minutes"])
-
-                        # If user specifies a date range, index names with dates are appended
-                        if days_after or days_before:
-                            calculated_date = date.today() - timedelta(days = (days_before - day))
-                            calculated_date = datetime(calculated_date.year, calculated_date.month, calculated_date.day)
-                            index_name_to_create = index_name + "_" + str(calculated_date.month) + "_" + str(calculated_date.day) + "_" + str(calculated_date.year)
-                            ingest_args["current_date"] = calculated_date
-
-                        # Whether the index exists or not, a new index object is created
-                        new_index = SampleDataIndex(index_name_to_create, index_body, client)
-
-                        # Update the index_name in ingest_args
-                        ingest_args["index_name"] = index_name_to_create
-
-                        # If an index exists, we do not ingest more data as it is assumed that the data is already ingested
-                        if not client.indices.exists(index = index_name_to_create):
-                            try:
-                                new_index.create_index()
-                                new_index.ingest_more(**ingest_args)
-                            except Exception as e:
-                                print(e)
-                                raise ConnectionError("Startup index ingestion failed to start; check the config file or connection settings")
-
-                    # # Sleep is needed here for the indices to be added and ingested
-                    # # If it isn't added, then the anomaly detector cannot be created
-                    sleep(1)
-
-                    # If the desired plugin was anomaly detection, the plugin is created and jobs ran
-                    if plugin == "anomaly_detection":
-                        new_detector = AnomalyDetection(index_name = index_name + "*", target_index = "opensearch-ad-plugin-result-index", payload = create_payload, base_url = url, days_ago = days_before, auth = header)
-                        try:
-                            new_detector.create_detector()
-                            new_detector.start_detector()
-                            new_detector.start_detector(True)
-                        except Exception as e:
-                            print(e)
-                            raise ConnectionError("Startup anomaly detector failed; Check host, username, and password, and/or any connection settings")
-
-    # Deletes all unzipped config files at the end
-    for file in file_removal_array:
-        remove(file)
+                    add_config_steps(graph, config, url, header, client, parallelism, checkpoint, cluster_state)
+
+        report = graph.run()
+    finally:
+        # Deletes all unzipped config files at the end
+        for file in file_removal_array:
+            remove(file)
+
+    # The steps that failed stopped only the steps of their own config; the first one raises its error
+    print(format_report(report))
+    for step in report["steps"].values():
+        if step["status"] == "failed":
+            raise step["error"]
+    return report
 
 
 # Starts job upon execution of script
 if __name__ == "__main__":
-    startup_job()
+    if args.use_async:
+        # The async jobs need aiohttp, so they are only imported when asked for
+        from sample_data_tooling.sample_data_jobs.async_jobs import build_async_client, run_startup_job
+        run_startup_job(args.config_path, URL, HEADER, build_async_client(args.host, args.port, args.username, args.password), args.max_in_flight, args.journal)
+    else:
+        startup_job()
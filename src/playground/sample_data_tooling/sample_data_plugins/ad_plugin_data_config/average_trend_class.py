@@ -3,16 +3,21 @@ Copyright OpenSearch Contributors
 SPDX-License-Identifier: Apache-2.0
 """
 
+from faker import Faker
+
+# Standard libraries
 from datetime import datetime, timedelta
+from random import Random
 from json import loads, dumps
-from random import randint
+from math import floor, log
 import sys
 import os
 
 # Adds the folder sample_data_tooling to the sys path
 sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
 from sample_data_tooling.sample_data_plugins.ad_plugin_data_config.data_trend_interface import DataTrend
-from sample_data_tooling.sample_data_generator.sample_data_generator import choose_field
+from sample_data_tooling.sample_data_generator.sample_data_generator import compile_template
+from sample_data_tooling.sample_data_commons.document_batch import DocumentBatch
 
 
 class AverageTrend(DataTrend):
@@ -38,7 +43,10 @@ class AverageTrend(DataTrend):
             - abs_max: The highest possible value, which can be an anomaly
             - anomaly_percentage: How often an anomaly occurs (minimum non-zero percentage: 0.001, maximum: 1)
             - other_args: Any other arguments required for the field with anomalies
-        - entry: The document to have one of its field values potentially change
+        - entry: The document to have one of its field values potentially change (optional; documents can
+          also be passed to generate_data_trend() so one AverageTrend can be reused across documents)
+        - rng: The Random instance which anomalies are drawn from, e.g. seeded with the seed of a day or a checkpoint so
+          the same anomalies are drawn again (optional; by default, an unseeded one)
 
     Raises:
         - ValueError: Invalid values for number ranges
@@ -52,8 +60,9 @@ class AverageTrend(DataTrend):
     def __init__(self,
         timestamp,
         feature_trend,
-        entry,
-        current_date = (datetime.today() - timedelta(days = 7))
+        entry = None,
+        current_date = (datetime.today() - timedelta(days = 7)),
+        rng:Random = None
     ):
         super().__init__(
             feature_trend["feature"],
@@ -70,6 +79,10 @@ class AverageTrend(DataTrend):
         if "other_args" in feature_trend:
             self.other_args = feature_trend["other_args"]
         self.entry = entry
+        self.rng = rng if rng is not None else Random()
+
+        # Compiled anomaly generators, keyed by (field type, whether the anomaly is above or below the average)
+        self.noise_plans = {}
 
          # Input validation
         if type(self.other_args) is not dict:
@@ -80,18 +93,20 @@ class AverageTrend(DataTrend):
             raise ValueError("Invalid anomaly percentage: it should be between 0 and 1, inclusive")
         if not feature_trend or (type(feature_trend) is not dict):
             raise TypeError("Invalid anomaly_detection_trend: anomaly_detection_trend should be a dict, not a list")
-        if entry:
-            if type(entry) is str:
-                try:
-                    test = loads(entry)
-                except:
-                    raise ValueError("Invalid entry: if entry is a string, entry should only be a JSON string")
-            elif type(entry) is dict or type(entry) is list:
-                pass
+        # entry may be left out and passed to generate_data_trend() instead
+        if entry is not None:
+            if entry:
+                if type(entry) is str:
+                    try:
+                        test = loads(entry)
+                    except:
+                        raise ValueError("Invalid entry: if entry is a string, entry should only be a JSON string")
+                elif type(entry) is dict or type(entry) is list:
+                    pass
+                else:
+                    raise TypeError("Invalid entry: entry should only be a string, list, or dict")
             else:
-                raise TypeError("Invalid entry: entry should only be a string, list, or dict")
-        else:
-            raise ValueError("Invalid entry: entry is empty")
+                raise ValueError("Invalid entry: entry is empty")
 
     def generate_noise(self, initial_value):
         """
@@ -111,50 +126,77 @@ class AverageTrend(DataTrend):
         if type(initial_value) is not int and type(initial_value) is not float:
             raise TypeError("initial_value should be a numeric value")
 
-        new_value = initial_value
-
         # noise: this variable "flips" a weighted "coin" to determine whether to throw an anomaly
-        noise = randint(1, 1000) / 1000
+        noise = self.rng.randint(1, 1000) / 1000
 
         # If an anomaly chance is enabled, change the value and return it
         # If noise is greater than the anomaly percentage, do not change the intial value
         if noise <= self.anomaly_percentage:
-            min_or_max = randint(0,1)
-            kind = None
-            if type(initial_value) is int:
-                kind = "integer"
+            return self.generate_anomaly(initial_value)
+        return initial_value
+
+    def generate_anomaly(self, initial_value):
+        """
+        Function that replaces a value with an anomaly, above or below the average range
+
+        Arguments:
+            - initial_value: The numeric value (int, float, etc.) being replaced; its type decides the anomaly's type
+
+        Returns:
+            - A numeric value outside of the average range
+        """
+        min_or_max = self.rng.randint(0,1)
+        kind = None
+        if type(initial_value) is int:
+            kind = "integer"
+        else:
+            kind = str(type(initial_value)).split("\'")[1]
+
+        # The anomaly template only depends on the field type and the side of the average, so it is compiled once, bound to
+        # a Faker instance seeded from rng so its values follow rng too
+        if (kind, min_or_max) not in self.noise_plans:
+            if kind == "integer":
                 if not min_or_max:
-                    new_value = choose_field(kind, [self.avg_max, self.abs_max])
+                    template = {self.feature: [kind, self.avg_max, self.abs_max]}
                 else:
-                    new_value = choose_field(kind, [self.abs_min, self.avg_min])
+                    template = {self.feature: [kind, self.abs_min, self.avg_min]}
             else:
-                kind = str(type(initial_value)).split("\'")[1]
                 if not min_or_max:
                     self.other_args.update({"min_value": self.avg_max, "max_value": self.abs_max})
-                    new_value = choose_field(kind, [self.other_args])
                 else:
                     self.other_args.update({"min_value": self.abs_min, "max_value": self.avg_min})
-                    new_value = choose_field(kind, [self.other_args])
-        return new_value
+                template = {self.feature: [kind, dict(self.other_args)]}
+            fake = Faker()
+            fake.seed_instance(self.rng.getrandbits(64))
+            self.noise_plans[(kind, min_or_max)] = compile_template(template, False, fake)
+        return self.noise_plans[(kind, min_or_max)].generate()[self.feature]
 
-    def generate_data_trend(self):
+    def generate_data_trend(self, entry = None, current_date:datetime = None):
         """
         Function that generates data that simulates a trend with or without anomalies
 
+        Arguments:
+            - entry: The document to modify (default is the entry given at initialization)
+            - current_date: The date of the document (default is the current_date given at initialization)
+
         Returns:
             - An array of generated data (if the entry was a list) or an individual entry as a JSON string
         """
         data_entry = None
 
-        entry = self.entry
-        milliseconds = int(self.current_date.strftime("%s")) * 1000
+        if entry is None:
+            entry = self.entry
+        if current_date is None:
+            current_date = self.current_date
+        milliseconds = int(current_date.strftime("%s")) * 1000
 
         # If entry came from an input file, load data to the dataset list
         if type(entry) is list:
             data_entry = []
             for element in entry:
-                element = loads(element)
-                element[self.feature] = self.generate_noise(self, element[self.feature])
+                if type(element) is str:
+                    element = loads(element)
+                element[self.feature] = self.generate_noise(element[self.feature])
                 element[self.timestamp] = milliseconds
                 element = dumps(element)
                 data_entry.append(element)
@@ -168,3 +210,40 @@ class AverageTrend(DataTrend):
             data_entry = dumps(entry)
 
         return data_entry
+
+    def generate_column_trend(self, batch:DocumentBatch, timestamps = None) -> DocumentBatch:
+        """
+        Function that applies the trend to a whole column of a DocumentBatch at once
+
+        Arguments:
+            - batch: The DocumentBatch whose feature column is modified (in place)
+            - timestamps: The timestamp column to set on the batch, e.g. from timestamp_column() (default leaves timestamps as is)
+
+        Returns:
+            - The same DocumentBatch
+
+        Raises:
+            - TypeError: batch should be a DocumentBatch
+            - KeyError: If the batch has no column for the feature
+        """
+        if not isinstance(batch, DocumentBatch):
+            raise TypeError("batch should be a DocumentBatch")
+
+        values = list(batch.column(self.feature))
+
+        # generate_noise() throws an anomaly when randint(1, 1000) / 1000 <= anomaly_percentage; instead of one draw per value, the
+        # gaps between anomalies are drawn from the matching geometric distribution so only anomalous values cost a draw
+        chance = floor(self.anomaly_percentage * 1000) / 1000
+        if chance >= 1:
+            values = [self.generate_anomaly(value) for value in values]
+        elif chance > 0:
+            log_miss = log(1 - chance)
+            index = int(log(1 - self.rng.random()) / log_miss)
+            while index < len(values):
+                values[index] = self.generate_anomaly(values[index])
+                index += 1 + int(log(1 - self.rng.random()) / log_miss)
+        batch.set_column(self.feature, values)
+
+        if timestamps is not None:
+            batch.set_column(self.timestamp, timestamps)
+        return batch
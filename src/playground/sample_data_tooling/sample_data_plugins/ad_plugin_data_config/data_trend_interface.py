@@ -24,6 +24,7 @@ class DataTrend():
     Methods:
         - generate_noise(): Generates anomalies in the trend data
         - generate_data_trend(): Generates a user-defined data trend
+        - generate_column_trend(): Generates a user-defined data trend on a whole column of a DocumentBatch
 
     Arguments;
         - feature: The field that will be used to test anomalies
@@ -67,3 +68,11 @@ class DataTrend():
         modify the specified field value to fit a data trend (which the user defines in a child class of DataTrend).
         """
         pass
+
+    def generate_column_trend(self):
+        """
+        This function should be used to generate trends in columnar data. Given a DocumentBatch (see
+        sample_data_commons/document_batch.py), this function should replace the specified field's column with one that fits
+        the data trend, operating on the column as a whole rather than one document at a time.
+        """
+        pass
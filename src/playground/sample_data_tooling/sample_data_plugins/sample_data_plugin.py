@@ -8,6 +8,7 @@ from shutil import copyfileobj
 from os import path, remove
 import gzip
 import sys
+import re
 
 # Adds parent directory "/sample_data_tooling" to sys.path
 sys.path.append(path.abspath(__file__).split("sample_data_tooling")[0])
@@ -22,7 +23,7 @@ class Plugin:
     Arguments:
         - index_name: The name of the source index
         - payload: The JSON body of which to call create API requests
-        - base_url: The IP address/url where the OpenSearch backend lies
+        - base_url: The IP address/url where the OpenSearch backend lies; port 9200 is used unless the url has a port
         - auth: The Authentication object needed to get headers from
 
     Raises:
@@ -63,7 +64,10 @@ class Plugin:
         self.base_url = base_url
         if self.base_url.endswith("/"):
           self.base_url = self.base_url[:-1]
-        self.url = self.base_url + ":9200/"
+        if re.search(r":\d+$", self.base_url):
+            self.url = self.base_url + "/"
+        else:
+            self.url = self.base_url + ":9200/"
 
     def unzip(self) -> str:
         """
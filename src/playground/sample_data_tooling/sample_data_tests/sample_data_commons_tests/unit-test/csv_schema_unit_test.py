@@ -0,0 +1,53 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+# Standard libraries
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_commons.csv_schema import validate_schema, infer_column_type, infer_csv_schema, coerce_column, coerce_rows
+
+
+# Tests that column types are inferred from their values
+def test_infer_column_type():
+    assert infer_column_type(["1", "-20", ""]) == "integer"
+    assert infer_column_type(["1", "2.5", "-1e3"]) == "float"
+    assert infer_column_type(["True", "no", None]) == "boolean"
+    assert infer_column_type(["2024-01-02", "2024-01-02T03:04:05.123Z"]) == "date"
+    # Leading zeros (e.g. zip codes) are not numbers
+    assert infer_column_type(["02134", "10001"]) == "string"
+    assert infer_column_type(["", None]) == "string"
+    rows = [{"id": "1", "price": "9.99", "name": "a"}, {"id": "2", "price": "10", "name": "b"}]
+    assert infer_csv_schema(rows) == {"id": "integer", "price": "float", "name": "string"}
+
+
+# Tests that whole columns are converted, with missing values kept as None
+def test_coerce_column():
+    assert coerce_column(["1", "", "3"], "integer") == [1, None, 3]
+    assert coerce_column(["1.5", "2"], "float") == [1.5, 2.0]
+    assert coerce_column(["Yes", "f"], "boolean") == [True, False]
+    assert coerce_column(["2024-01-02T03:04:05+02:00", "2024-01-02T01:04:05Z", "2024-01-02T01:04:05"], "date") == [1704157445000] * 3
+    assert coerce_column(["1.5", "2"], "epoch_second") == [1500, 2000]
+    assert coerce_column(["1704157445000"], "epoch_millis") == [1704157445000]
+    assert coerce_column(["name", '["integer", 1, 5]', "['array', 'email', 'integer', [6, 9]]"], "args") == ["name", ["integer", 1, 5], ["array", "email", "integer", [6, 9]]]
+    # A cell holding several values keeps them together
+    assert coerce_column(['"a", 1', "x", '"b", 2'], "args") == [("a", 1), "x", ("b", 2)]
+    assert coerce_rows([{"a": "1", "b": "x"}], {"a": "integer"}) == [{"a": 1, "b": "x"}]
+
+
+def test_invalid_schema():
+    with pytest.raises(TypeError):
+        validate_schema(["integer"])
+    with pytest.raises(ValueError):
+        validate_schema({"a": "number"})
+    with pytest.raises(ValueError):
+        coerce_column(["1"], "number")
+    with pytest.raises(ValueError):
+        coerce_column(["maybe"], "boolean")
+    with pytest.raises(ValueError):
+        coerce_rows([{"a": "x"}], {"a": "integer"})
@@ -0,0 +1,73 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+# Standard libraries
+from datetime import datetime
+from json import loads
+import pytest
+import sys
+import os
+
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_commons.document_batch import DocumentBatch, timestamp_column, timestamp_sequence
+
+
+# Tests that rows are materialized from columns in field order
+def test_valid_DocumentBatch():
+    batch = DocumentBatch({"name": ["a", "b", "c"], "price": [1, 2, 3]})
+    assert len(batch) == 3
+    assert batch[1] == {"name": "b", "price": 2}
+    assert batch[-1] == {"name": "c", "price": 3}
+    assert list(batch) == [{"name": "a", "price": 1}, {"name": "b", "price": 2}, {"name": "c", "price": 3}]
+    assert list(batch.rows(1, 10)) == [{"name": "b", "price": 2}, {"name": "c", "price": 3}]
+    assert [loads(row) for row in batch.to_list()] == list(batch)
+
+    # Replaced columns keep their position
+    batch.set_column("name", range(3))
+    assert batch[2] == {"name": 2, "price": 3}
+    assert DocumentBatch({}, 0).to_list() == []
+
+
+# Tests that timestamps are spaced minutes apart
+def test_timestamp_column():
+    test_date = datetime(2022, 6, 8)
+    unix_time = int(test_date.strftime("%s")) * 1000
+    timestamps = timestamp_column(test_date, 480, 3)
+    assert len(timestamps) == 480
+    assert timestamps[0] == unix_time
+    assert timestamps[-1] == unix_time + 479 * 3 * 60 * 1000
+    assert timestamp_column(test_date, 2, 0) == [unix_time, unix_time]
+    assert timestamp_column(test_date, 2, 3, unit = "s")[1] == unix_time // 1000 + 180
+
+
+# Tests that a sequence of timestamps goes on from where a column would stop
+def test_timestamp_sequence():
+    test_date = datetime(2022, 6, 8)
+    sequence = timestamp_sequence(test_date, 3)
+    assert [next(sequence) for i in range(480)] == list(timestamp_column(test_date, 480, 3))
+    assert next(sequence) == timestamp_column(test_date, 481, 3)[-1]
+    assert next(timestamp_sequence(test_date, 3, unit = "s")) == int(test_date.strftime("%s"))
+
+
+# Tests of bad input
+def test_invalid_DocumentBatch():
+    with pytest.raises(TypeError):
+        DocumentBatch([["a"]])
+    with pytest.raises(ValueError):
+        DocumentBatch({"name": ["a", "b"], "price": [1]})
+    with pytest.raises(ValueError):
+        DocumentBatch({"name": ["a"]}).set_column("price", [1, 2])
+    with pytest.raises(IndexError):
+        DocumentBatch({"name": ["a"]})[1]
+    with pytest.raises(TypeError):
+        timestamp_column("2022-06-08", 1, 1)
+    with pytest.raises(ValueError):
+        timestamp_column(datetime.now(), -1, 1)
+    with pytest.raises(ValueError):
+        timestamp_column(datetime.now(), 1, 1, unit = "us")
+    with pytest.raises(ValueError):
+        timestamp_sequence(datetime.now(), -1)
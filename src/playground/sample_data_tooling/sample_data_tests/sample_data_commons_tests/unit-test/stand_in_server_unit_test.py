@@ -0,0 +1,177 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy.exceptions import NotFoundError, TransportError
+
+# Standard libraries
+from datetime import date, timedelta
+from json import load, dumps
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_commons.stand_in_server import StandInServer
+from sample_data_tooling.sample_data_indices.sample_data_indices import SampleDataIndex
+from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import ingest
+from sample_data_tooling.sample_data_ingestor.bulk_sender import BulkSender
+from sample_data_tooling.sample_data_ingestor.bulk_body_builder import BulkBodyBuilder
+from sample_data_tooling.sample_data_plugins.ad_plugin_class import AnomalyDetection
+from sample_data_tooling.sample_data_authentication.sample_data_basic_authentication import BasicAuthentication
+from sample_data_tooling.sample_data_jobs.startup_job import startup_job
+from sample_data_tooling.sample_data_jobs.refresh_job import refresh_job
+from sample_data_tooling.sample_data_jobs.async_jobs import run_startup_job
+
+# Constants
+TESTS_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+INDEX_NAME = "stand-in-test"
+HEADER = BasicAuthentication("admin", "admin")
+
+with open(os.path.join(TESTS_PATH, "sample_data_ingestor_tests/test-files/valid-template-inputs.json"), "r") as f:
+    valid_json_shorthand = load(f)["valid_json_shorthand"]
+
+
+def bodies(number:int, chunk:int) -> list:
+    builder = BulkBodyBuilder(INDEX_NAME, chunk, 1000000)
+    result = []
+    for i in range(number):
+        builder.add({"value": i})
+        if builder.count == chunk:
+            result.append(builder.take())
+    return result + ([builder.take()] if builder.count else [])
+
+
+# Tests the index APIs SampleDataIndex calls, and that documents sent by ingest() are counted
+def test_index_apis():
+    with StandInServer() as server:
+        client = server.client()
+        index = SampleDataIndex(INDEX_NAME, {"settings": {"index": {"number_of_shards": 2}}, "mappings": {"properties": {"date": {"type": "date"}}}}, client)
+        index.create_index()
+        assert client.indices.exists(index = INDEX_NAME) and not client.indices.exists(index = "missing")
+        assert client.indices.get(index = INDEX_NAME)[INDEX_NAME]["mappings"] == {"properties": {"date": {"type": "date"}}}
+        assert client.indices.get_settings(index = INDEX_NAME, flat_settings = True)[INDEX_NAME]["settings"]["index.number_of_shards"] == "2"
+
+        with index.bulk_load(replicas = 0, force_merge = True):
+            assert server.indices[INDEX_NAME]["settings"]["index.refresh_interval"] == "-1"
+            assert server.indices[INDEX_NAME]["settings"]["index.number_of_replicas"] == "0"
+            index.ingest_more(data_template = valid_json_shorthand, index_name = INDEX_NAME, mapping = False, number = 250, chunk = 20, workers = 4)
+        assert "index.refresh_interval" not in server.indices[INDEX_NAME]["settings"]
+        assert server.indices[INDEX_NAME]["settings"]["index.number_of_replicas"] == "1"
+
+        assert client.count(index = INDEX_NAME)["count"] == 250
+        assert client.cat.indices(index = INDEX_NAME + "*", format = "json", h = "index,docs.count") == [{"index": INDEX_NAME, "docs.count": "250"}]
+        assert client.cat.indices(index = INDEX_NAME, h = "index,docs.count") == INDEX_NAME + " 250\n"
+        assert server.stats["documents"] == 250 and server.stats["bulk_requests"] == 13
+
+        index.delete_index()
+        assert server.indices == {}
+        with pytest.raises(NotFoundError):
+            client.indices.delete(index = INDEX_NAME)
+
+
+# Tests that documents sent again with deterministic IDs conflict instead of being duplicated
+def test_document_ids():
+    with StandInServer(keep_documents = True) as server:
+        client = server.client()
+        for run in range(2):
+            summary = ingest(client, valid_json_shorthand, INDEX_NAME, mapping = False, number = 40, chunk = 7, streaming = True, document_ids = True)
+            assert summary["conflicts"] == 40 * run
+        assert client.count(index = INDEX_NAME)["count"] == 40 and server.stats["conflicts"] == 40
+        assert sorted(server.indices[INDEX_NAME]["ids"]) == sorted(INDEX_NAME + "-" + str(i) for i in range(40))
+        assert len(server.documents(INDEX_NAME)) == 40
+
+        # Searches count the kept documents with terms aggregations
+        response = client.search(index = INDEX_NAME, body = {"size": 0, "aggs": {"years": {"terms": {"field": "year", "size": 1000}}}})
+        assert sum(bucket["doc_count"] for bucket in response["aggregations"]["years"]["buckets"]) == 40
+
+
+# Tests that rejected requests and documents are resent until every document is indexed, and failures are reported
+def test_rejections():
+    with StandInServer(rejection_rate = 0.2, item_rejection_rate = 0.3, seed = 7) as server:
+        client = server.client()
+        with BulkSender(client, workers = 4, max_retries = 30, initial_backoff = 0.001, max_backoff = 0.01) as sender:
+            for body, count in bodies(300, 10):
+                sender.submit(body, count)
+        assert sender.summary["errors"] == 0 and sender.summary["retries"] == server.stats["rejected_items"] > 0
+        assert server.stats["rejected_requests"] > 0
+        assert client.count(index = INDEX_NAME)["count"] == 300
+        assert client.nodes.stats(metric = "thread_pool")["nodes"]["stand-in"]["thread_pool"]["write"]["rejected"] > 0
+
+    with StandInServer(item_failure_rate = 0.5, seed = 7) as server:
+        with BulkSender(server.client(), max_retries = 1, initial_backoff = 0.001) as sender:
+            for body, count in bodies(100, 25):
+                sender.submit(body, count)
+        assert sender.summary["errors"] == server.stats["failed_items"] > 0
+        assert server.stats["documents"] == 100 - sender.summary["errors"]
+        assert all(failure["status"] == 400 for failure in sender.summary["failures"])
+
+    with StandInServer(latency = 0.01, latency_per_document = 0.001) as server:
+        with pytest.raises(TransportError):
+            server.client().bulk(body = b'{"index":{}}\n{"a":1}\n')
+
+
+# Tests the detector APIs AnomalyDetection calls
+def test_anomaly_detection():
+    with StandInServer() as server:
+        detector = AnomalyDetection(index_name = INDEX_NAME + "*", target_index = "opensearch-ad-plugin-result-index", payload = {"name": "detector"}, base_url = server.url, days_ago = 2, auth = HEADER)
+        detector.create_detector()
+        assert server.detectors[detector.id]["detector"]["name"] == "detector"
+        detector.start_detector()
+        detector.start_detector(True)
+        assert server.detectors[detector.id]["state"] == server.detectors[detector.id]["historical_state"] == "RUNNING"
+        detector.stop_detector(True)
+        detector.stop_detector()
+        assert server.detectors[detector.id]["state"] == server.detectors[detector.id]["historical_state"] == "DISABLED"
+        detector.delete_detector()
+        assert server.detectors == {}
+
+
+# Tests that the startup, refresh and async startup jobs run end to end
+def test_jobs(tmp_path):
+    config = {
+        "plugin": "anomaly_detection",
+        "ingest_args": {"index_name": "stand-in-logs", "data_template": valid_json_shorthand, "mapping": False, "timestamp": "date", "minutes": 60, "chunk": 10},
+        "days_before": 2,
+        "days_after": 1,
+        "index_body": {"settings": {"index": {"number_of_shards": 1}}},
+        "bulk_load": {"replicas": 0},
+        "create_payload": {"name": "stand-in-detector", "time_field": "date"}
+    }
+    with open(tmp_path / "config.json", "w") as f:
+        f.write(dumps(config))
+    days = [date.today() + timedelta(days = day) for day in range(-2, 2)]
+    expected = {"stand-in-logs_%d_%d_%d" % (day.month, day.day, day.year): 24 for day in days}
+
+    with StandInServer() as server:
+        client = server.client()
+        startup_job(str(tmp_path), server.url, HEADER, client, None)
+        assert {name: index["count"] for name, index in server.indices.items()} == expected
+        assert [detector["state"] for detector in server.detectors.values()] == ["RUNNING"]
+
+        # A second run finds every day complete, and the refresh job keeps the same days
+        server.detectors.clear()
+        startup_job(str(tmp_path), server.url, HEADER, client, None)
+        refresh_job(str(tmp_path), client)
+        assert {name: index["count"] for name, index in server.indices.items()} == expected
+
+    with StandInServer() as server:
+        run_startup_job(str(tmp_path), server.url, HEADER, server.async_client(), max_in_flight = 4)
+        assert {name: index["count"] for name, index in server.indices.items()} == expected
+
+
+def test_invalid_StandInServer():
+    with pytest.raises(TypeError):
+        StandInServer(host = 1)
+    with pytest.raises(ValueError):
+        StandInServer(port = -1)
+    with pytest.raises(ValueError):
+        StandInServer(latency = -1)
+    with pytest.raises(ValueError):
+        StandInServer(item_rejection_rate = 2)
+    with pytest.raises(TypeError):
+        StandInServer(keep_documents = "yes")
+    with pytest.raises(ValueError):
+        StandInServer().documents(INDEX_NAME)
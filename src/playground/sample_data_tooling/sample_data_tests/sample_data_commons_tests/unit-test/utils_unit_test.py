@@ -13,7 +13,7 @@ import os
 
 # Adds the directory "/sample_data_tooling" to sys.path
 sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
-from sample_data_tooling.sample_data_commons.utils import validate_filename, unzip_file, validate_job_args, untar_file
+from sample_data_tooling.sample_data_commons.utils import validate_filename, unzip_file, validate_job_args, untar_file, read_bulk_load_profile, read_parallelism, read_retention, read_seed
 from sample_data_tooling.sample_data_authentication.sample_data_basic_authentication import BasicAuthentication
 
 
@@ -79,3 +79,39 @@ def test_untar_file():
     assert untar_file(DIR_PATH + "/test-files/example_tarfile.tar.gz", os.path.join(DIR_PATH, "test-files")) == [os.path.join(DIR_PATH, "test-files", "tarfile.txt"), os.path.join(DIR_PATH, "test-files", "tarfile_two.txt")]
     os.remove(os.path.join(DIR_PATH, "test-files", "tarfile.txt"))
     os.remove(os.path.join(DIR_PATH, "test-files", "tarfile_two.txt"))
+
+
+# Tests that the bulk-load profile is opt-in and only force-merges closed indices
+def test_read_bulk_load_profile():
+    assert read_bulk_load_profile({}) is None
+    assert read_bulk_load_profile({"bulk_load": False}) is None
+    assert read_bulk_load_profile({"bulk_load": True}) == {"replicas": 0, "force_merge": False}
+    assert read_bulk_load_profile({"bulk_load": {"replicas": 1, "force_merge": True}}) == {"replicas": 1, "force_merge": False}
+    assert read_bulk_load_profile({"bulk_load": {"force_merge": True}}, closed = True) == {"replicas": 0, "force_merge": True}
+    with pytest.raises(TypeError):
+        read_bulk_load_profile({"bulk_load": "yes"})
+
+
+def test_read_parallelism():
+    assert read_parallelism({}, 4) == 4
+    assert read_parallelism({"parallelism": 2}, 4) == 2
+    with pytest.raises(ValueError):
+        read_parallelism({"parallelism": 0}, 4)
+    with pytest.raises(ValueError):
+        read_parallelism({"parallelism": "2"}, 4)
+
+
+def test_read_retention():
+    assert read_retention({}) == "delete"
+    assert read_retention({"retention": "ism"}) == "ism"
+    with pytest.raises(ValueError):
+        read_retention({"retention": True})
+
+
+def test_read_seed():
+    assert read_seed({}) is None
+    assert read_seed({"seed": 0}) == 0
+    with pytest.raises(ValueError):
+        read_seed({"seed": -1})
+    with pytest.raises(ValueError):
+        read_seed({"seed": "7"})
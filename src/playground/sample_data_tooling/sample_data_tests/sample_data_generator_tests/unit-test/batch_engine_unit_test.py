@@ -0,0 +1,94 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+# Test functions
+from statistics import mean
+from time import time
+import sys
+import os
+
+# Adds parent directory sample_data_tooling to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_generator.batch_engine import compile_column, new_generator
+import sample_data_tooling.sample_data_generator.sample_data_generator as generator
+
+
+def test_valid_compile_column():
+        rng = new_generator(7)
+
+        # Integers are inclusive of both ends and honor step
+        values = compile_column("random_int", [20, 30], rng)(5000)
+        assert all(type(val) is int and 20 <= val <= 30 for val in values)
+        assert set(values) == set(range(20, 31))
+        values = compile_column("random_int", [{"min": 0, "max": 10, "step": 5}], rng)(500)
+        assert set(values) == {0, 5, 10}
+
+        # Floats stay within range and keep right_digits, in both modes
+        for faker_compatible in (False, True):
+                values = compile_column("pyfloat", [{"right_digits": 2, "min_value": 20000, "max_value": 40000}], rng, faker_compatible)(5000)
+                assert all(type(val) is float and 20000 <= val <= 40000 for val in values)
+                assert all(round(val, 2) == val for val in values)
+
+        values = compile_column("boolean", [{"chance_of_getting_true": 100}], rng)(100)
+        assert values == [True] * 100
+        values = compile_column("unix_time", None, rng)(100)
+        assert all(0 <= val <= time() for val in values)
+        values = compile_column("random_element", [["a", "b"]], rng)(100)
+        assert set(values) == {"a", "b"}
+        values = compile_column("random_element", [{"elements": {"a": 1, "b": 0}}], rng)(100)
+        assert values == ["a"] * 100
+
+        # Seeded generators are reproducible
+        assert compile_column("random_int", None, new_generator(1))(10) == compile_column("random_int", None, new_generator(1))(10)
+
+
+def test_faker_compatible_floats():
+        # Faker appends a random number of decimals to a random integer part; the compatible mode draws the same way
+        fake = generator.get_faker(seed = 3)
+        faker_values = [fake.pyfloat(right_digits = 2, min_value = 0, max_value = 1000) for i in range(20000)]
+        values = compile_column("pyfloat", [{"right_digits": 2, "min_value": 0, "max_value": 1000}], new_generator(3), True)(20000)
+        assert abs(mean(faker_values) - mean(values)) < 10
+        assert abs(mean(val % 1 for val in faker_values) - mean(val % 1 for val in values)) < 0.02
+
+
+def test_unsupported_compile_column():
+        # Unsupported attributes and arguments are left to Faker
+        assert compile_column("email") == None
+        assert compile_column("random_int", [5, 4]) == None
+        assert compile_column("random_int", [1, 2, 3, 4]) == None
+        assert compile_column("pyfloat", [4, 2, True]) == None
+        assert compile_column("pyfloat", [{"min_value": 5, "max_value": 5}]) == None
+        assert compile_column("unix_time", ["-30d"]) == None
+        assert compile_column("random_element", [[]]) == None
+
+
+def test_vectorized_template():
+        template = {
+                "date": "unix_time",
+                "average_cpu_usage": ["integer", 20, 30],
+                "bid": ["float", {"right_digits": 2, "min_value": 20000, "max_value": 40000}],
+                "name": "name"
+        }
+        plan = generator.compile_template(template, False, vectorized = True, seed = 11)
+        assert set(plan.columns) == {"date", "average_cpu_usage", "bid"}
+        documents = plan.generate_many(14000)
+        assert len(documents) == 14000
+        for entry in documents[:100]:
+                assert list(entry) == ["date", "average_cpu_usage", "bid", "name"]
+                assert 20 <= entry["average_cpu_usage"] <= 30 and type(entry["name"]) is str
+        # generate() still draws one document through Faker
+        assert list(plan.generate()) == list(template)
+
+
+def test_seeded_file_plans(tmp_path):
+        # Each plan of a file draws its own columns, and the file draws the same ones again with the same seed
+        with open(tmp_path / "template.csv", "w") as f:
+                f.write("count,level\ninteger,integer\ninteger,integer\n")
+        draws = []
+        for i in range(2):
+                plans = generator.compile_template(str(tmp_path / "template.csv"), False, vectorized = True, seed = 5)
+                draws.append([plan.columns["count"](20) for plan in plans])
+        assert draws[0][0] != draws[0][1]
+        assert draws[0] == draws[1]
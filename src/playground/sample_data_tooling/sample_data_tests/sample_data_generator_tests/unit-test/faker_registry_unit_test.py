@@ -0,0 +1,60 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+# Test functions
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import sys
+import os
+
+# Adds parent directory sample_data_tooling to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_generator.faker_registry import FakerRegistry
+import sample_data_tooling.sample_data_generator.sample_data_generator as generator
+
+
+def test_valid_FakerRegistry():
+        registry = FakerRegistry()
+
+        # One instance per locale and seed, shared across threads
+        with ThreadPoolExecutor(max_workers = 8) as executor:
+                instances = list(executor.map(lambda i: registry.get_faker(seed = 5), range(32)))
+        assert all(fake is instances[0] for fake in instances)
+        assert registry.get_faker(seed = 6) is not instances[0]
+        assert registry.get_faker("fr_FR") is not registry.get_faker()
+
+        # Seeded instances are reproducible
+        first = FakerRegistry().get_faker(seed = 42)
+        second = FakerRegistry().get_faker(seed = 42)
+        assert [first.random_int() for i in range(10)] == [second.random_int() for i in range(10)]
+
+        # Standard Provider attributes do not load any Community Provider
+        fake = registry.get_faker()
+        provider_count = len(fake.get_providers())
+        assert registry.get_field_type(fake, "random_int")
+        assert len(fake.get_providers()) == provider_count
+
+        # Community Providers are only added the first time one of their attributes is used
+        assert type(registry.get_field_type(fake, "vehicle_make")()) is str
+        assert len(fake.get_providers()) == provider_count + 1
+        registry.get_field_type(fake, "vehicle_model")
+        assert len(fake.get_providers()) == provider_count + 1
+        assert "faker_vehicle" in sys.modules
+
+
+def test_lazy_community_providers():
+        # Importing the generator and compiling a numeric template imports no Community Provider
+        generator.compile_template({"number": ["integer", 1, 5]}, False).generate()
+        assert "faker_music" not in sys.modules
+        assert type(generator.choose_field("music_genre")) is str
+        assert "faker_music" in sys.modules
+
+
+def test_invalid_FakerRegistry():
+        with pytest.raises(TypeError):
+                FakerRegistry(5)
+        registry = FakerRegistry()
+        with pytest.raises(AttributeError):
+                registry.get_field_type(registry.get_faker(), "not_a_faker_attribute")
@@ -8,6 +8,7 @@ import os
 import sys
 import json
 import pytest
+import subprocess
 from datetime import date
 from types import NoneType
 
@@ -245,4 +246,48 @@ def test_invalid_generate_data():
         with pytest.raises(FileNotFoundError):
                 generator.generate_data("aaaa.json")
         with pytest.raises(TypeError):
-                assert generator.generate_data("gsf.pdf") == 1
\ No newline at end of file
+                assert generator.generate_data("gsf.pdf") == 1
+
+def test_compile_template():
+        # A compiled template generates the same documents as generate_data() without re-parsing the template
+        plan = generator.compile_template(valid_json_shorthand, False)
+        test_1 = plan.generate()
+        assert len(test_1) == 3
+        assert type(test_1["random number"]) is int and "@" in test_1["email"]
+        test_2 = plan.generate_many(25)
+        assert len(test_2) == 25
+        for entry in test_2:
+                assert list(entry) == ["year", "random number", "email"]
+        assert plan.generate_many(0) == []
+
+        plan = generator.compile_template(valid_json_string_mapping_two)
+        for entry in plan.generate_many(10):
+                assert 1 <= len(entry["integers"]) <= 3
+                for val in entry["integers"]:
+                        assert 5 <= val <= 10
+
+        # Files compile to one plan per template
+        plans = generator.compile_template(os.path.join(FILE_PATH, "test-files/csv-format-test.csv"))
+        assert type(plans) is list and len(plans) == 2
+        for template_plan in plans:
+                assert len(template_plan.generate()) == 3
+
+        # Invalid fields compile to a field that generates None
+        test_3 = generator.compile_template(invalid_json_field_type, False).generate()
+        for val in test_3:
+                assert test_3[val] == None
+
+        # Tests for invalid parameters
+        with pytest.raises(TypeError):
+                generator.compile_template(invalid_empty_json)
+        with pytest.raises(ValueError):
+                plan.generate_many(-1)
+        with pytest.raises(TypeError):
+                generator.TemplatePlan({})
+
+
+# Tests that importing the generator does not import NumPy, which only vectorized templates and CSV templates need
+def test_lazy_numpy():
+        code = "import sys; sys.path.append(%r); import sample_data_tooling.sample_data_generator.sample_data_generator; print('numpy' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code % os.path.abspath(__file__).split("sample_data_tooling")[0]], capture_output = True, text = True)
+        assert result.stdout.strip() == "False"
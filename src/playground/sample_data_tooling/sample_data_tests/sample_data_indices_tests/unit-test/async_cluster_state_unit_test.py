@@ -0,0 +1,57 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import AsyncOpenSearch, OpenSearch
+
+# Standard libraries
+import asyncio
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_commons.stand_in_server import StandInServer
+from sample_data_tooling.sample_data_indices.async_cluster_state import AsyncClusterState
+from sample_data_tooling.sample_data_indices.async_sample_data_indices import AsyncSampleDataIndex
+
+
+# Tests that a loaded pattern answers exists() without calls, and that creates and deletes are kept
+def test_AsyncClusterState():
+    async def check(server:StandInServer):
+        client = server.async_client()
+        try:
+            state = AsyncClusterState(client)
+            assert await state.load("day*") == ["day-a", "day-b"]
+            assert await state.load("day*") == ["day-a", "day-b"] and state.calls == 1
+            requests = server.stats["requests"]
+            assert await state.exists("day-a") and not await state.exists("day-c")
+            assert server.stats["requests"] == requests
+
+            # An index no loaded pattern covers is checked once
+            assert await state.exists("other") and await state.exists("other")
+            assert state.calls == 2
+
+            # AsyncSampleDataIndex records what it creates and deletes
+            await AsyncSampleDataIndex("day-c", {}, client, cluster_state = state).create_index()
+            await AsyncSampleDataIndex("day-a", {}, client, cluster_state = state).delete_index()
+            assert await state.load("day*") == ["day-b", "day-c"]
+        finally:
+            await client.close()
+
+    with StandInServer() as server:
+        for name in ["day-a", "day-b", "other"]:
+            server.client().indices.create(index = name)
+        asyncio.run(check(server))
+        assert sorted(server.indices) == ["day-b", "day-c", "other"]
+
+
+def test_invalid_AsyncClusterState():
+    with pytest.raises(TypeError):
+        AsyncClusterState(OpenSearch())
+    with pytest.raises(TypeError):
+        asyncio.run(AsyncClusterState(AsyncOpenSearch()).load(1))
+    with pytest.raises(TypeError):
+        AsyncSampleDataIndex("index", {}, AsyncOpenSearch(), cluster_state = "state")
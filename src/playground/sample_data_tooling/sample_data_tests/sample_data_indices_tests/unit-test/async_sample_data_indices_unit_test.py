@@ -0,0 +1,117 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import AsyncOpenSearch, OpenSearch
+from json import load
+import asyncio
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_indices.async_sample_data_indices import AsyncSampleDataIndex
+
+
+# Constants
+INDEX_NAME = "ingest-test"
+DIR_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+INDEX_BODY = {
+  'settings': {
+    'index': {
+      'number_of_shards': 1
+    }
+  }
+}
+
+# Sample inputs (valid)
+valid_test_inputs = {}
+with open(DIR_PATH + "/test-files/valid-template-inputs.json", "r") as f:
+    valid_test_inputs = load(f)
+
+valid_json_shorthand = valid_test_inputs["valid_json_shorthand"]
+
+# Async transport class that makes a mock API call
+class DummyAsyncTransport(object):
+    def __init__(self, hosts, responses=None, **kwargs):
+        self.serializer = None
+    async def perform_request(self, method, url, params=None, headers=None, body=None):
+        return None
+    async def close(self):
+        pass
+
+# Async transport class that records the endpoints it is sent and reports the settings of an index; with fail_restore, the
+# settings cannot be restored
+class SettingsAsyncTransport(DummyAsyncTransport):
+    calls = []
+    fail_restore = False
+    async def perform_request(self, method, url, params=None, headers=None, body=None):
+        endpoint = [part for part in url.split("/") if part.startswith("_")][0]
+        SettingsAsyncTransport.calls.append((endpoint, body))
+        if method == "GET" and endpoint == "_settings":
+            return {INDEX_NAME: {"settings": {"index.refresh_interval": "5s", "index.number_of_replicas": "1"}}}
+        if SettingsAsyncTransport.fail_restore and method == "PUT" and body.get("index.refresh_interval") != "-1":
+            raise TimeoutError("The settings request timed out")
+        return None
+
+
+# Test that all functions operate properly without exceptions
+def test_valid_AsyncIndex():
+    async def index_operations():
+        client = AsyncOpenSearch(transport_class = DummyAsyncTransport)
+        new_index = AsyncSampleDataIndex(INDEX_NAME, INDEX_BODY, client, asyncio.Semaphore(2))
+        await new_index.create_index()
+        await new_index.delete_index()
+        summary = await new_index.ingest_more(data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, columnar = True)
+        await client.close()
+        return summary
+    assert asyncio.run(index_operations())["documents"] == 6
+
+
+# Test that input validation works as intended
+def test_invalid_AsyncIndex():
+    client = AsyncOpenSearch(transport_class = DummyAsyncTransport)
+    with pytest.raises(TypeError):
+        AsyncSampleDataIndex(5, {}, client)
+    with pytest.raises(TypeError):
+        AsyncSampleDataIndex("name", "body", client)
+    with pytest.raises(TypeError):
+        AsyncSampleDataIndex("name", {}, OpenSearch())
+    with pytest.raises(TypeError):
+        asyncio.run(AsyncSampleDataIndex(INDEX_NAME, INDEX_BODY, client).ingest_more())
+
+
+# Test that bulk loading restores the original settings, also when loading fails
+def test_AsyncIndex_bulk_load():
+    async def bulk_load(fail:bool):
+        client = AsyncOpenSearch(transport_class = SettingsAsyncTransport)
+        new_index = AsyncSampleDataIndex(INDEX_NAME, INDEX_BODY, client, asyncio.Semaphore(2))
+        try:
+            async with new_index.bulk_load(force_merge = True):
+                if fail:
+                    raise ConnectionError("The cluster went away")
+        finally:
+            await client.close()
+
+    SettingsAsyncTransport.calls = []
+    asyncio.run(bulk_load(False))
+    assert [endpoint for endpoint, _ in SettingsAsyncTransport.calls] == ["_settings", "_settings", "_refresh", "_forcemerge", "_settings"]
+    assert SettingsAsyncTransport.calls[1][1] == {"index.refresh_interval": "-1", "index.number_of_replicas": 0}
+    assert SettingsAsyncTransport.calls[4][1] == {"index.refresh_interval": "5s", "index.number_of_replicas": "1"}
+
+    SettingsAsyncTransport.calls = []
+    with pytest.raises(ConnectionError):
+        asyncio.run(bulk_load(True))
+    assert [endpoint for endpoint, _ in SettingsAsyncTransport.calls] == ["_settings", "_settings", "_settings"]
+
+    # When the settings cannot be restored either, the error of loading is the one raised
+    SettingsAsyncTransport.fail_restore = True
+    try:
+        with pytest.raises(ConnectionError, match = "went away"):
+            asyncio.run(bulk_load(True))
+        with pytest.raises(ConnectionError, match = "Index settings"):
+            asyncio.run(bulk_load(False))
+    finally:
+        SettingsAsyncTransport.fail_restore = False
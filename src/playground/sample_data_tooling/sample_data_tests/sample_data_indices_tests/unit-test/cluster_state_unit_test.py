@@ -0,0 +1,94 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from datetime import date, timedelta
+from json import dumps
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_commons.stand_in_server import StandInServer
+from sample_data_tooling.sample_data_indices.cluster_state import ClusterState
+from sample_data_tooling.sample_data_indices.sample_data_indices import SampleDataIndex
+from sample_data_tooling.sample_data_authentication.sample_data_basic_authentication import BasicAuthentication
+from sample_data_tooling.sample_data_jobs.startup_job import startup_job
+from sample_data_tooling.sample_data_jobs.refresh_job import refresh_job
+
+
+# Constants
+HEADER = BasicAuthentication("admin", "admin")
+TEMPLATE = {"year": "year", "random number": "integer"}
+
+
+# Tests that a loaded pattern answers exists() without calls, and that creates and deletes are kept
+def test_ClusterState():
+    with StandInServer() as server:
+        client = server.client()
+        for name in ["day-a", "day-b", "other"]:
+            client.indices.create(index = name)
+        state = ClusterState(client)
+
+        assert state.load("day*") == ["day-a", "day-b"]
+        assert state.load("day*") == ["day-a", "day-b"] and state.calls == 1
+        requests = server.stats["requests"]
+        assert state.exists("day-a") and not state.exists("day-c")
+        assert server.stats["requests"] == requests
+
+        # An index no loaded pattern covers is checked once
+        assert state.exists("other") and state.exists("other")
+        assert not state.exists("missing")
+        assert state.calls == 3
+
+        # SampleDataIndex records what it creates and deletes
+        index = SampleDataIndex("day-c", {}, client, state)
+        index.create_index()
+        SampleDataIndex("day-a", {}, client, state).delete_index()
+        assert state.load("day*") == ["day-b", "day-c"]
+        assert sorted(server.indices) == ["day-b", "day-c", "other"]
+
+
+# Tests that the startup and refresh jobs check which days exist with one call per config
+def test_job_round_trips(tmp_path):
+    config = {
+        "plugin": "none",
+        "ingest_args": {"index_name": "state-logs", "data_template": TEMPLATE, "mapping": False, "timestamp": "date", "minutes": 240, "chunk": 10},
+        "days_before": 5,
+        "days_after": 2,
+        "index_body": {},
+        "create_payload": {}
+    }
+    with open(tmp_path / "config.json", "w") as f:
+        f.write(dumps(config))
+    days = [date.today() + timedelta(days = day) for day in range(-5, 3)]
+
+    with StandInServer() as server:
+        client = server.client()
+        startup_job(str(tmp_path), server.url, HEADER, client, None)
+        assert len(server.indices) == len(days)
+
+        # A second run only loads the state and verifies the days (a refresh and a count): no call per day
+        requests = server.stats["requests"]
+        report = startup_job(str(tmp_path), server.url, HEADER, client, None)
+        assert server.stats["requests"] - requests == 3
+        assert [step["result"] for name, step in report["steps"].items() if name.startswith("build ")] == ["skipped"] * len(days)
+
+        requests = server.stats["requests"]
+        report = refresh_job(str(tmp_path), client)
+        assert server.stats["requests"] - requests == 3
+        assert report["steps"]["delete old state-logs"]["result"] == []
+
+
+def test_invalid_ClusterState():
+    with pytest.raises(TypeError):
+        ClusterState("client")
+    with pytest.raises(TypeError):
+        ClusterState(OpenSearch()).load(1)
+    with pytest.raises(TypeError):
+        SampleDataIndex("index", {}, OpenSearch(), "state")
@@ -0,0 +1,149 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from datetime import datetime
+from json import loads
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_indices.index_reconciliation import reconcile_indices, expected_doc_count, parse_doc_counts, missing_positions, repair_positions, repair_bodies, day_documents
+from sample_data_tooling.sample_data_ingestor.checkpoint_journal import CheckpointJournal
+from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import ingest
+
+
+# Constants
+TEMPLATE = {"year": "year", "random number": "integer", "email": "email"}
+CURRENT_DATE = datetime(2022, 6, 8)
+INGEST_ARGS = {"data_template": TEMPLATE, "mapping": False, "number": 20, "chunk": 5, "timestamp": "date", "minutes": 3}
+
+
+# Transport class that reports the document counts of doc_counts, records the documents sent to each index, and counts the
+# documents held at each timestamp
+class CountingTransport(object):
+    doc_counts = {}
+    sent = {}
+    held = {}
+    def __init__(self, hosts, responses=None, **kwargs):
+        self.serializer = None
+    def perform_request(self, method, url, params=None, headers=None, body=None):
+        if "_cat/indices" in url:
+            return [{"index": index, "docs.count": str(count)} for index, count in CountingTransport.doc_counts.items()]
+        if url.endswith("_search"):
+            field = body["aggs"]["slots"]["terms"]["field"]
+            slots = {}
+            for document in CountingTransport.held.get(url.split("/")[1], []):
+                slots[document[field]] = slots.get(document[field], 0) + 1
+            return {"aggregations": {"slots": {"buckets": [{"key": key, "doc_count": count} for key, count in slots.items()]}}}
+        if url.endswith("_bulk"):
+            lines = body.split(b"\n")
+            for action, source in zip(lines[0::2], lines[1::2]):
+                operation = loads(action)
+                index = list(operation.values())[0]["_index"]
+                CountingTransport.sent.setdefault(index, []).append(loads(source))
+                CountingTransport.held.setdefault(index, []).append(loads(source))
+        return None
+
+
+def setup_function():
+    CountingTransport.doc_counts = {}
+    CountingTransport.sent = {}
+    CountingTransport.held = {}
+
+
+def drop(index:str, start:int, end:int) -> list:
+    """
+    Removes the documents at positions start to end from what an index holds, as if their BULK request had failed
+    """
+    documents = CountingTransport.held[index]
+    CountingTransport.held[index] = documents[:start] + documents[end:]
+    CountingTransport.doc_counts[index] = len(CountingTransport.held[index])
+    CountingTransport.sent = {}
+    return documents[start:end]
+
+
+def test_refill():
+    client = OpenSearch(transport_class = CountingTransport)
+    for index in ["day-a", "day-b"]:
+        ingest(client, index_name = index, current_date = CURRENT_DATE, **INGEST_ARGS)
+    drop("day-b", 5, 10)
+    CountingTransport.doc_counts.update({"day-a": 20, "day-c": 25, "other": 0})
+
+    # Only the index that is short gets documents, and only the ones missing in the middle of the day; nothing is deleted
+    repairs = reconcile_indices(client, "day*", {"day-a": CURRENT_DATE, "day-b": CURRENT_DATE, "day-c": CURRENT_DATE, "day-d": CURRENT_DATE}, INGEST_ARGS)
+    assert [(repair["index"], repair["found"], repair["expected"], repair["seed"], repair["missing"]) for repair in repairs] == [("day-b", 15, 20, None, 5)]
+    assert list(CountingTransport.sent) == ["day-b"]
+    start = int(CURRENT_DATE.strftime("%s")) * 1000
+    assert [document["date"] for document in CountingTransport.sent["day-b"]] == [start + i * 180000 for i in range(5, 10)]
+    assert sorted(document["date"] for document in CountingTransport.held["day-b"]) == [start + i * 180000 for i in range(20)]
+
+    # Without counts (e.g. no index exists yet), nothing is done
+    CountingTransport.doc_counts = {}
+    assert reconcile_indices(client, "day*", {"day-a": CURRENT_DATE}, INGEST_ARGS) == []
+
+
+def test_regenerate(tmp_path):
+    client = OpenSearch(transport_class = CountingTransport)
+
+    # A complete ingestion with a seed
+    journal = CheckpointJournal(str(tmp_path / "journal"))
+    journal.start("day-b", seed = 5)
+    ingest(client, index_name = "day-b", current_date = CURRENT_DATE, checkpoint = journal, **INGEST_ARGS)
+
+    # The index lost a batch in the middle and its last one; they are generated again exactly as they were
+    lost = drop("day-b", 15, 20)
+    lost = drop("day-b", 5, 10) + lost
+    repairs = reconcile_indices(client, "day*", {"day-b": CURRENT_DATE}, dict(INGEST_ARGS, index_name = "day-b"), journal)
+    assert repairs[0]["seed"] == 5 and repairs[0]["missing"] == 10
+    assert CountingTransport.sent["day-b"] == lost
+    assert journal.get("day-b")["complete"] and journal.get("day-b")["offset"] == 20
+
+
+def test_missing_positions():
+    # With two templates, a gap that starts and ends in the middle of a timestamp
+    slots = [0, 1, 2, 3]
+    assert missing_positions(8, slots, {0: 2, 1: 1, 3: 1}) == [3, 4, 5, 6]
+    assert missing_positions(4, slots, {0: 1, 1: 1, 2: 1, 3: 1}) == []
+
+    # Documents without timestamps are sent again whole with document IDs, otherwise only the tail is refilled
+    repair = {"index": "day-a", "current_date": CURRENT_DATE, "found": 12, "expected": 20, "seed": None}
+    assert repair_positions(repair, {"number": 20}) == list(range(12, 20))
+    assert repair_positions(repair, {"number": 20, "document_ids": True}) == list(range(20))
+
+
+def test_document_ids_repair():
+    client = OpenSearch(transport_class = CountingTransport)
+    args = dict(INGEST_ARGS, document_ids = True)
+    ingest(client, index_name = "day-a", current_date = CURRENT_DATE, **args)
+    drop("day-a", 10, 15)
+
+    # The documents sent again keep the IDs of their sequence numbers
+    bodies = list(repair_bodies(day_documents(args, CURRENT_DATE), [10, 11, 14], "day-a", args))
+    assert [loads(line)["create"]["_id"] for line in bodies[0][0].split(b"\n")[0::2] if line] == ["day-a-10", "day-a-11", "day-a-14"]
+    reconcile_indices(client, "day*", {"day-a": CURRENT_DATE}, args)
+    assert len(CountingTransport.sent["day-a"]) == 5
+
+
+def test_expected_doc_count():
+    assert expected_doc_count(INGEST_ARGS) == 20
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))), "sample_data_ingestor_tests", "test-files", "ecommerce.ndjson")
+    assert expected_doc_count({"data_template": path, "file_provided": True}) == 50
+    assert parse_doc_counts(None) == {}
+    assert parse_doc_counts([{"index": "a", "docs.count": "3"}, {"index": "closed", "docs.count": None}]) == {"a": 3}
+
+
+def test_invalid_reconcile_indices():
+    client = OpenSearch(transport_class = CountingTransport)
+    with pytest.raises(TypeError):
+        reconcile_indices(None, "day*", {}, INGEST_ARGS)
+    with pytest.raises(TypeError):
+        reconcile_indices(client, "day*", {"day-a": "2022-06-08"}, INGEST_ARGS)
+    with pytest.raises(TypeError):
+        reconcile_indices(client, "day*", {}, INGEST_ARGS, "journal")
@@ -44,6 +44,22 @@ class DummyTransport(object):
     def perform_request(self, method, url, params=None, headers=None, body=None):
         return None
 
+# Transport class that records the calls it is sent and reports the settings of an index; with fail_restore, the settings
+# cannot be restored
+class SettingsTransport(object):
+    calls = []
+    fail_restore = False
+    def __init__(self, hosts, responses=None, **kwargs):
+        self.serializer = DummySerializer
+    def perform_request(self, method, url, params=None, headers=None, body=None):
+        endpoint = [part for part in url.split("/") if part.startswith("_")][0]
+        SettingsTransport.calls.append((method, endpoint, body))
+        if method == "GET" and endpoint == "_settings":
+            return {INDEX_NAME: {"settings": {"index.refresh_interval": "5s"}}}
+        if SettingsTransport.fail_restore and method == "PUT" and body.get("index.refresh_interval") != "-1":
+            raise TimeoutError("The settings request timed out")
+        return None
+
 # OpenSearch client object that will mock API calls
 client = OpenSearch(transport_class = DummyTransport)
 
@@ -77,3 +93,48 @@ def test_invalid_Index():
     with pytest.raises(TypeError):
         bad_index = SampleDataIndex(INDEX_NAME, INDEX_BODY, client)
         bad_index.ingest_more()
+
+
+# Test that bulk loading turns refreshes and replicas off, and restores the original settings afterwards
+def test_bulk_load():
+    SettingsTransport.calls = []
+    new_index = SampleDataIndex(INDEX_NAME, INDEX_BODY, OpenSearch(transport_class = SettingsTransport))
+    with new_index.bulk_load(force_merge = True):
+        pass
+    original = {"index.refresh_interval": "5s", "index.number_of_replicas": None}
+
+    # The index is refreshed and merged before its replicas are restored
+    assert [(method, endpoint) for method, endpoint, _ in SettingsTransport.calls] == [("GET", "_settings"), ("PUT", "_settings"), ("POST", "_refresh"), ("POST", "_forcemerge"), ("PUT", "_settings")]
+    assert SettingsTransport.calls[1][2] == {"index.refresh_interval": "-1", "index.number_of_replicas": 0}
+    assert SettingsTransport.calls[4][2] == original
+
+    # Settings are restored when loading fails, and the index is neither refreshed nor merged
+    SettingsTransport.calls = []
+    with pytest.raises(ConnectionError):
+        with new_index.bulk_load(replicas = 1):
+            raise ConnectionError("The cluster went away")
+    assert [endpoint for _, endpoint, _ in SettingsTransport.calls] == ["_settings", "_settings", "_settings"]
+    assert SettingsTransport.calls[1][2]["index.number_of_replicas"] == 1
+    assert SettingsTransport.calls[2][2] == original
+
+    # When the settings cannot be restored either, the error of loading is the one raised
+    SettingsTransport.fail_restore = True
+    try:
+        with pytest.raises(ConnectionError, match = "went away"):
+            with new_index.bulk_load():
+                raise ConnectionError("The cluster went away")
+
+        # Once loading succeeded, failing to restore the settings is an error
+        with pytest.raises(ConnectionError, match = "Index settings"):
+            with new_index.bulk_load():
+                pass
+    finally:
+        SettingsTransport.fail_restore = False
+
+    # Bad bulk_load arguments
+    with pytest.raises(ValueError):
+        with new_index.bulk_load(replicas = -1):
+            pass
+    with pytest.raises(TypeError):
+        with new_index.bulk_load(force_merge = "yes"):
+            pass
@@ -0,0 +1,139 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import AsyncOpenSearch, OpenSearch
+
+# Standard libraries
+from json import load
+import asyncio
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_ingestor.async_ingestor import async_ingest
+
+# Constants
+INDEX_NAME = "ingest-test"
+DIR_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+# Async transport class that makes a mock API call and records how many calls run at once
+class DummyAsyncTransport(object):
+    running = 0
+    most_running = 0
+    def __init__(self, hosts, responses=None, **kwargs):
+        self.serializer = None
+    async def perform_request(self, method, url, params=None, headers=None, body=None):
+        DummyAsyncTransport.running += 1
+        DummyAsyncTransport.most_running = max(DummyAsyncTransport.most_running, DummyAsyncTransport.running)
+        await asyncio.sleep(0.01)
+        DummyAsyncTransport.running -= 1
+        return None
+    async def close(self):
+        pass
+
+# Async transport class that rejects the documents of the first BULK call with 429
+class RejectingAsyncTransport(DummyAsyncTransport):
+    calls = 0
+    async def perform_request(self, method, url, params=None, headers=None, body=None):
+        RejectingAsyncTransport.calls += 1
+        documents = body.count(b"\n") // 2
+        status = 429 if RejectingAsyncTransport.calls == 1 else 201
+        return {"errors": status == 429, "items": [{"index": {"status": status, "error": {}}}] * documents}
+
+# Async transport class that reports every document of its BULK calls as already indexed
+class ConflictingAsyncTransport(DummyAsyncTransport):
+    async def perform_request(self, method, url, params=None, headers=None, body=None):
+        documents = body.count(b"\n") // 2
+        return {"errors": True, "items": [{"create": {"status": 409, "error": {"type": "version_conflict_engine_exception"}}}] * documents}
+
+# Async transport class whose calls fail
+class FailingAsyncTransport(DummyAsyncTransport):
+    async def perform_request(self, method, url, params=None, headers=None, body=None):
+        raise Exception("Connection refused")
+
+# Async transport class whose first call hangs until it is cancelled and whose other calls fail
+class HangingAsyncTransport(DummyAsyncTransport):
+    calls = 0
+    cancelled = False
+    async def perform_request(self, method, url, params=None, headers=None, body=None):
+        HangingAsyncTransport.calls += 1
+        if HangingAsyncTransport.calls > 1:
+            raise Exception("Connection refused")
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            HangingAsyncTransport.cancelled = True
+            raise
+
+
+# Sample inputs (valid)
+with open(DIR_PATH + "/test-files/valid-template-inputs.json", "r") as f:
+    valid_json_shorthand = load(f)["valid_json_shorthand"]
+
+
+def test_valid_async_ingest():
+    async def ingest_indices():
+        client = AsyncOpenSearch(transport_class = DummyAsyncTransport)
+        semaphore = asyncio.Semaphore(3)
+        summaries = await asyncio.gather(*[async_ingest(client, valid_json_shorthand, INDEX_NAME + str(i), mapping = False, number = 50, chunk = 10, semaphore = semaphore) for i in range(4)])
+        await client.close()
+        return summaries
+
+    # Ingestions of different indices overlap, but never with more requests in flight than the shared semaphore allows
+    DummyAsyncTransport.most_running = 0
+    summaries = asyncio.run(ingest_indices())
+    assert [summary["documents"] for summary in summaries] == [50] * 4
+    assert all(summary["requests"] == 5 for summary in summaries)
+    assert 1 < DummyAsyncTransport.most_running <= 3
+
+    # One ingestion has at most workers requests in flight
+    DummyAsyncTransport.most_running = 0
+    summary = asyncio.run(async_ingest(AsyncOpenSearch(transport_class = DummyAsyncTransport), valid_json_shorthand, INDEX_NAME, mapping = False, number = 50, chunk = 5, workers = 2))
+    assert summary["requests"] == 10 and DummyAsyncTransport.most_running == 2
+
+    # User provided data
+    async def ingest_file():
+        client = AsyncOpenSearch(transport_class = DummyAsyncTransport)
+        summary = await async_ingest(client, DIR_PATH + "/test-files/ecommerce.ndjson", INDEX_NAME, file_provided = True, workers = 4)
+        await client.close()
+        return summary
+    assert asyncio.run(ingest_file())["documents"] == 50
+
+
+def test_retry_async_ingest():
+    summary = asyncio.run(async_ingest(AsyncOpenSearch(transport_class = RejectingAsyncTransport), valid_json_shorthand, INDEX_NAME, mapping = False, number = 4, chunk = 2))
+    assert summary["retries"] == 2 and summary["errors"] == 0 and summary["requests"] == 3
+
+    # Without retries, the rejected documents are reported
+    RejectingAsyncTransport.calls = 0
+    summary = asyncio.run(async_ingest(AsyncOpenSearch(transport_class = RejectingAsyncTransport), valid_json_shorthand, INDEX_NAME, mapping = False, number = 4, chunk = 2, max_retries = 0))
+    assert summary["errors"] == 2 and summary["failures"][0]["status"] == 429
+
+
+def test_document_ids_async_ingest():
+    # Documents the index already holds are counted as already indexed, not as failures
+    summary = asyncio.run(async_ingest(AsyncOpenSearch(transport_class = ConflictingAsyncTransport), valid_json_shorthand, INDEX_NAME, mapping = False, number = 4, chunk = 2, document_ids = True))
+    assert summary["conflicts"] == 4 and summary["errors"] == 0 and summary["retries"] == 0
+
+    # Without document IDs, conflicts are failures
+    summary = asyncio.run(async_ingest(AsyncOpenSearch(transport_class = ConflictingAsyncTransport), valid_json_shorthand, INDEX_NAME, mapping = False, number = 4, chunk = 2))
+    assert summary["conflicts"] == 0 and summary["errors"] == 4
+
+
+def test_invalid_async_ingest():
+    with pytest.raises(TypeError):
+        asyncio.run(async_ingest(OpenSearch(), valid_json_shorthand, INDEX_NAME, mapping = False))
+    with pytest.raises(ValueError):
+        asyncio.run(async_ingest(AsyncOpenSearch(transport_class = DummyAsyncTransport), valid_json_shorthand, INDEX_NAME, mapping = False, workers = 0))
+    with pytest.raises(ConnectionError):
+        asyncio.run(async_ingest(AsyncOpenSearch(transport_class = FailingAsyncTransport), valid_json_shorthand, INDEX_NAME, mapping = False))
+
+    # A failure is raised as is, once the requests still in flight are cancelled
+    with pytest.raises(ConnectionError):
+        asyncio.run(async_ingest(AsyncOpenSearch(transport_class = HangingAsyncTransport), valid_json_shorthand, INDEX_NAME, mapping = False, number = 4, chunk = 1, workers = 2, max_retries = 0))
+    assert HangingAsyncTransport.cancelled
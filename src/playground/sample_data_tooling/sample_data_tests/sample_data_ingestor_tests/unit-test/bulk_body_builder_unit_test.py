@@ -0,0 +1,73 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+# Standard libraries
+from json import loads
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_ingestor.bulk_body_builder import BulkBodyBuilder
+
+
+# Tests that bodies are valid NDJSON and that their size is exact
+def test_valid_BulkBodyBuilder():
+    builder = BulkBodyBuilder("test", 3, 100000)
+    assert builder.add({"name": "café", "price": 1})
+    assert builder.add('{"name": "tea", "price": 2}\n')
+    assert builder.add(b'{"name": "milk", "price": 3}')
+    assert not builder.add({"name": "water", "price": 4})
+    assert builder.count == 3
+    size = builder.size()
+    body, count = builder.take()
+    assert type(body) is bytes and count == 3 and len(body) == size
+    lines = body.decode().splitlines()
+    assert len(lines) == 6
+    assert loads(lines[0]) == {"index": {"_index": "test"}}
+    assert loads(lines[1]) == {"name": "café", "price": 1}
+    assert builder.count == 0 and builder.size() == 0
+
+
+# Tests that bodies are cut at max_bulk_size
+def test_max_bulk_size_BulkBodyBuilder():
+    document = {"price": 1}
+    line_size = len(BulkBodyBuilder("test", 1, 1).action) + len(BulkBodyBuilder("test", 1, 1).encode(document))
+    builder = BulkBodyBuilder("test", 100, line_size * 2)
+    assert builder.add(document) and builder.add(document)
+    assert not builder.add(document)
+    assert builder.size() == line_size * 2
+
+    # An empty body takes a document that is larger than max_bulk_size
+    builder = BulkBodyBuilder("test", 100, 1)
+    assert builder.add(document)
+    assert not builder.add(document)
+
+
+# Tests that documents get "create" actions with deterministic IDs that follow the sequence across bodies
+def test_document_ids_BulkBodyBuilder():
+    builder = BulkBodyBuilder("test", 2, 100000, id_prefix = "config_6_8_2022", sequence = 10)
+    for price in range(3):
+        if not builder.add({"price": price}):
+            builder.take()
+            assert builder.add({"price": price})
+    lines = builder.take()[0].decode().splitlines()
+    assert loads(lines[0]) == {"create": {"_index": "test", "_id": "config_6_8_2022-12"}}
+    assert builder.sequence == 13
+
+
+# Tests of bad input
+def test_invalid_BulkBodyBuilder():
+    with pytest.raises(TypeError):
+        BulkBodyBuilder(1, 1, 1)
+    with pytest.raises(ValueError):
+        BulkBodyBuilder("test", 0, 1)
+    with pytest.raises(ValueError):
+        BulkBodyBuilder("test", 1, "1")
+    with pytest.raises(TypeError):
+        BulkBodyBuilder("test", 1, 1, id_prefix = 1)
+    with pytest.raises(ValueError):
+        BulkBodyBuilder("test", 1, 1, sequence = -1)
@@ -0,0 +1,111 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from threading import Lock
+from time import sleep
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_ingestor.bulk_controller import AdaptiveBulkController
+from sample_data_tooling.sample_data_ingestor.bulk_sender import BulkSender
+
+
+# Transport class that makes a mock API call
+class DummyTransport(object):
+    def __init__(self, hosts, responses=None, **kwargs):
+        self.serializer = None
+    def perform_request(self, method, url, params=None, headers=None, body=None):
+        return None
+
+# Transport class whose nodes report a write queue from a list of queue lengths, one per call
+class QueuedTransport(DummyTransport):
+    queues = []
+    def perform_request(self, method, url, params=None, headers=None, body=None):
+        queue = QueuedTransport.queues.pop(0) if QueuedTransport.queues else 0
+        return {"nodes": {"a": {"thread_pool": {"write": {"queue": queue, "rejected": 0}}}, "b": {"thread_pool": {}}}}
+
+# OpenSearch client object that records how many BULK calls run at once
+class CountingClient(OpenSearch):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = Lock()
+        self.running = 0
+        self.most_running = 0
+    def bulk(self, body, **kwargs):
+        with self.lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        return {"errors": False, "items": []}
+
+
+# Tests that the controller grows additively and shrinks multiplicatively
+def test_valid_AdaptiveBulkController():
+    controller = AdaptiveBulkController(10, 1000, max_chunk = 35, max_workers = 3)
+    for i in range(5):
+        controller.record(0.1, controller.chunk)
+    assert (controller.chunk, controller.max_bulk_size, controller.workers) == (35, 6000, 3)
+
+    # Latency between the target and twice the target holds, rejections and spikes halve
+    controller.record(1.5, 35)
+    assert controller.chunk == 35
+    controller.record(0.1, 35, rejected = 1)
+    assert (controller.chunk, controller.max_bulk_size, controller.workers) == (17, 3000, 1)
+    controller.record(5, 17)
+    assert (controller.chunk, controller.max_bulk_size, controller.workers) == (8, 1500, 1)
+    for i in range(10):
+        controller.decrease()
+    assert (controller.chunk, controller.max_bulk_size, controller.workers) == (1, 62, 1)
+
+    # Small requests do not grow the controller
+    controller = AdaptiveBulkController(10, 1000)
+    controller.record(0.1, 2)
+    assert controller.report() == {"chunk": 10, "max_bulk_size": 1000, "workers": 1, "increases": 0, "decreases": 0, "pauses": 0}
+
+
+# Tests that sending pauses while a node's write queue is over the threshold
+def test_queue_pressure():
+    controller = AdaptiveBulkController(10, 1000, workers = 4, queue_threshold = 50, poll_interval = 60)
+    client = OpenSearch(transport_class = QueuedTransport)
+    QueuedTransport.queues = [80, 60, 10]
+    controller.wait_for_cluster(client, pause = 0.01)
+    assert QueuedTransport.queues == [] and controller.pauses == 1 and controller.workers == 2
+
+    # Stats are read at most once per poll_interval, and missing stats are not pressure
+    QueuedTransport.queues = [80]
+    controller.wait_for_cluster(client, pause = 0.01)
+    assert QueuedTransport.queues == [80]
+    assert not controller.queue_pressure(OpenSearch(transport_class = DummyTransport))
+
+
+# Tests that a BulkSender with a controller lets more requests in flight as they succeed
+def test_BulkSender_controller():
+    client = CountingClient(transport_class = DummyTransport)
+    controller = AdaptiveBulkController(1, 1000, max_workers = 4)
+    with BulkSender(client, 4, controller = controller) as sender:
+        for i in range(40):
+            sender.submit(b"", controller.chunk)
+    assert controller.workers == 4
+    assert 1 < client.most_running <= 4
+    assert sender.summary["tuned"]["workers"] == 4
+
+
+def test_invalid_AdaptiveBulkController():
+    with pytest.raises(ValueError):
+        AdaptiveBulkController(0, 1000)
+    with pytest.raises(ValueError):
+        AdaptiveBulkController(10, 1000, target_latency = 0)
+    with pytest.raises(ValueError):
+        AdaptiveBulkController(10, 1000, queue_threshold = -1)
+    with pytest.raises(TypeError):
+        BulkSender(OpenSearch(transport_class = DummyTransport), controller = "controller")
@@ -0,0 +1,143 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from datetime import datetime
+from json import loads, load
+import asyncio
+import pytest
+import gzip
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_ingestor.bulk_file_sink import BulkFileSink, BulkFileWriter
+from sample_data_tooling.sample_data_ingestor.bulk_replay import replay, find_part_files, read_bulk_lines, pack_bodies
+from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import ingest
+from sample_data_tooling.sample_data_ingestor.async_ingestor import async_ingest
+from sample_data_tooling.sample_data_ingestor.checkpoint_journal import CheckpointJournal
+
+# Constants
+INDEX_NAME = "sink-test"
+DIR_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+CURRENT_DATE = datetime(2022, 6, 8)
+
+with open(DIR_PATH + "/test-files/valid-template-inputs.json", "r") as f:
+    valid_json_shorthand = load(f)["valid_json_shorthand"]
+
+
+# Transport class that makes a mock API call
+class DummyTransport(object):
+    def __init__(self, hosts, responses=None, **kwargs):
+        self.serializer = None
+    def perform_request(self, method, url, params=None, headers=None, body=None):
+        return None
+
+# OpenSearch client object that records the BULK bodies it is sent
+class RecordingClient(OpenSearch):
+    def __init__(self):
+        super().__init__(transport_class = DummyTransport)
+        self.bodies = []
+    def bulk(self, body, **kwargs):
+        self.bodies.append(body)
+        return None
+
+
+def read_parts(files:list) -> bytes:
+    data = b""
+    for filename in files:
+        with (gzip.open if filename.endswith(".gz") else open)(filename, "rb") as f:
+            data += f.read()
+    return data
+
+
+# Tests that bodies are written as they would have been sent, rotating part files at part_bytes
+def test_ingest_to_sink(tmp_path):
+    sent = RecordingClient()
+    ingest(sent, valid_json_shorthand, INDEX_NAME, mapping = False, number = 100, chunk = 10, timestamp = "date", current_date = CURRENT_DATE)
+
+    for streaming in (False, True):
+        with BulkFileSink(str(tmp_path), part_bytes = 2000, workers = 2) as sink:
+            ingest(None, valid_json_shorthand, INDEX_NAME, mapping = False, number = 100, chunk = 10, timestamp = "date", current_date = CURRENT_DATE, streaming = streaming, sink = sink)
+        summary = sink.summaries[INDEX_NAME]
+        assert summary["documents"] == 100 and summary["parts"] > 1
+        assert find_part_files(str(tmp_path)) == summary["files"]
+        assert all(os.path.getsize(filename) > 0 for filename in summary["files"])
+        assert [loads(line)["date"] for line in read_parts(summary["files"]).split(b"\n")[1::2] if line] == [loads(line)["date"] for body in sent.bodies for line in body.split(b"\n")[1::2] if line]
+
+    # A later run replaces the part files of the index instead of adding to them
+    with BulkFileSink(str(tmp_path), compress = False) as sink:
+        ingest(None, valid_json_shorthand, INDEX_NAME, mapping = False, number = 10, sink = sink)
+        ingest(None, valid_json_shorthand, INDEX_NAME, mapping = False, number = 10, sink = sink)
+    assert [os.path.basename(filename) for filename in find_part_files(str(tmp_path))] == ["part-00000.ndjson", "part-00001.ndjson"]
+
+    # Without a directory, bodies are only counted
+    with BulkFileSink(None) as sink:
+        summary = ingest(None, valid_json_shorthand, INDEX_NAME, mapping = False, number = 50, streaming = True, sink = sink)
+    assert summary["documents"] == 50 and summary["files"] == [] and summary["bytes"] > 0
+
+
+def test_async_ingest_to_sink(tmp_path):
+    async def ingest_indices(sink):
+        return await asyncio.gather(*[async_ingest(None, valid_json_shorthand, INDEX_NAME + str(i), mapping = False, number = 30, chunk = 7, sink = sink) for i in range(3)])
+    with BulkFileSink(str(tmp_path)) as sink:
+        summaries = asyncio.run(ingest_indices(sink))
+    assert [summary["documents"] for summary in summaries] == [30] * 3
+    assert sorted(sink.summaries) == [INDEX_NAME + str(i) for i in range(3)]
+
+
+# Tests that replayed files are sent in size-capped bodies holding every document once
+def test_replay(tmp_path):
+    with BulkFileSink(str(tmp_path), part_bytes = 1500) as sink:
+        ingest(None, valid_json_shorthand, INDEX_NAME, mapping = False, number = 60, chunk = 4, document_ids = True, sink = sink)
+        ingest(None, DIR_PATH + "/test-files/ecommerce.ndjson", INDEX_NAME + "-file", file_provided = True, chunk = 4, sink = sink)
+
+    client = RecordingClient()
+    summary = replay(client, str(tmp_path), chunk = 25, max_bulk_size = 20000, workers = 2)
+    assert summary["documents"] == 110 and summary["files"] == len(find_part_files(str(tmp_path)))
+    assert all(body.count(b"\n") // 2 <= 25 and len(body) <= 20000 for body in client.bodies)
+    actions = [loads(line) for body in client.bodies for line in body.split(b"\n")[0::2] if line]
+    assert sorted(action["create"]["_id"] for action in actions if "create" in action) == sorted(INDEX_NAME + "-" + str(i) for i in range(60))
+    assert len([action for action in actions if "index" in action]) == 50
+
+    # One part file can be replayed on its own
+    assert replay(RecordingClient(), find_part_files(str(tmp_path))[0])["files"] == 1
+
+
+def test_bulk_helpers(tmp_path):
+    pairs = [(b'{"index":{}}\n', b'{"a":%d}\n' % i) for i in range(10)]
+    assert [count for body, count in pack_bodies(pairs, 4, 100000)] == [4, 4, 2]
+    assert [count for body, count in pack_bodies(pairs, 100, 1)] == [1] * 10
+
+    filename = str(tmp_path / "part-00000.ndjson")
+    with open(filename, "wb") as f:
+        f.write(b'{"index":{}}\n{"a":1}\n\n{"index":{}}\n{"a":2}')
+    assert list(read_bulk_lines(filename)) == [(b'{"index":{}}\n', b'{"a":1}\n'), (b'{"index":{}}\n', b'{"a":2}\n')]
+    with open(filename, "ab") as f:
+        f.write(b'\n{"index":{}}\n')
+    with pytest.raises(ValueError):
+        list(read_bulk_lines(filename))
+
+
+def test_invalid_sink(tmp_path):
+    with pytest.raises(TypeError):
+        BulkFileSink(1)
+    with pytest.raises(ValueError):
+        BulkFileSink(str(tmp_path), part_bytes = 0)
+    with pytest.raises(ValueError):
+        BulkFileSink(str(tmp_path), workers = 0)
+    with pytest.raises(TypeError):
+        BulkFileWriter(str(tmp_path), compress = "yes")
+    with pytest.raises(TypeError):
+        ingest(None, valid_json_shorthand, INDEX_NAME, mapping = False, sink = str(tmp_path))
+    with pytest.raises(ValueError):
+        ingest(None, valid_json_shorthand, INDEX_NAME, mapping = False, sink = BulkFileSink(None), checkpoint = CheckpointJournal(str(tmp_path / "journal")))
+    with pytest.raises(ValueError):
+        replay(RecordingClient(), str(tmp_path / "missing"))
+    with pytest.raises(TypeError):
+        replay(None, str(tmp_path))
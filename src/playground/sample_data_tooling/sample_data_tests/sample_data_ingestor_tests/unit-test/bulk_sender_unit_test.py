@@ -0,0 +1,146 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from threading import Lock
+from time import sleep
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_ingestor.bulk_controller import AdaptiveBulkController
+from sample_data_tooling.sample_data_ingestor.bulk_sender import BulkSender, parse_bulk_response, split_conflicts, backoff_delay, is_retryable_error
+from opensearchpy.exceptions import TransportError, ConnectionTimeout
+
+
+# Transport class that makes a mock API call
+class DummyTransport(object):
+    def __init__(self, hosts, responses=None, **kwargs):
+        self.serializer = None
+    def perform_request(self, method, url, params=None, headers=None, body=None):
+        return None
+
+# OpenSearch client object that records how many BULK calls run at once
+class SlowBulkClient(OpenSearch):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = Lock()
+        self.running = 0
+        self.most_running = 0
+    def bulk(self, body, **kwargs):
+        with self.lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        return {"errors": True, "items": [{"index": {"status": 201}}, {"index": {"status": 400, "error": {"type": "mapper_parsing_exception"}}}]}
+
+# OpenSearch client object that rejects every document with 429 the first "rejections" times it is called, and fails the
+# connection once beforehand
+class RejectingClient(OpenSearch):
+    def __init__(self, rejections, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rejections = rejections
+        self.bodies = []
+    def bulk(self, body, **kwargs):
+        self.bodies.append(body)
+        if len(self.bodies) == 1:
+            raise ConnectionTimeout("TIMEOUT", "Read timed out", None)
+        documents = body.count(b"\n") // 2
+        if len(self.bodies) <= self.rejections + 1:
+            return {"errors": True, "items": [{"index": {"status": 201}}] + [{"index": {"status": 429, "error": {"type": "es_rejected_execution_exception"}}}] * (documents - 1)}
+        return {"errors": False, "items": [{"index": {"status": 201}}] * documents}
+
+# OpenSearch client object whose BULK calls fail
+class FailingClient(OpenSearch):
+    def bulk(self, body, **kwargs):
+        raise Exception("Connection refused")
+
+
+# Tests that results are aggregated and that at most "workers" requests are in flight
+def test_valid_BulkSender():
+    client = SlowBulkClient(transport_class = DummyTransport)
+    body = b'{"index":{}}\n{"a":1}\n{"index":{}}\n{"a":2}\n'
+    with BulkSender(client, 4) as sender:
+        for i in range(12):
+            sender.submit(body, 2)
+    summary = sender.summary
+    assert (summary["documents"], summary["requests"], summary["bytes"], summary["errors"], summary["retries"]) == (24, 12, 12 * len(body), 12, 0)
+    assert summary["failures"][0] == {"status": 400, "error": {"type": "mapper_parsing_exception"}, "document": '{"a":2}'}
+    assert 1 < client.most_running <= 4
+
+    # One worker sends requests one at a time
+    client = SlowBulkClient(transport_class = DummyTransport)
+    sender = BulkSender(client)
+    for i in range(3):
+        sender.submit(b"", 0)
+    assert sender.close()["requests"] == 3
+    assert client.most_running == 1
+
+    # With a controller, workers is where requests in flight start, and they grow up to the controller's max_workers
+    client = SlowBulkClient(transport_class = DummyTransport)
+    sender = BulkSender(client, 1, controller = AdaptiveBulkController(2, 100000, 1, max_workers = 3))
+    assert sender.executor._max_workers == 3
+    for i in range(12):
+        sender.submit(body, 2)
+    sender.close()
+    assert 1 < client.most_running <= 3
+
+
+# Tests of bad input and failed requests
+def test_invalid_BulkSender():
+    with pytest.raises(TypeError):
+        BulkSender("client")
+    with pytest.raises(ValueError):
+        BulkSender(OpenSearch(transport_class = DummyTransport), 0)
+    with pytest.raises(ValueError):
+        BulkSender(OpenSearch(transport_class = DummyTransport), max_retries = -1)
+    with pytest.raises(ValueError):
+        BulkSender(OpenSearch(transport_class = DummyTransport), initial_backoff = "1")
+    with pytest.raises(ConnectionError):
+        BulkSender(FailingClient(transport_class = DummyTransport)).submit(b"", 0)
+    with pytest.raises(ConnectionError):
+        with BulkSender(FailingClient(transport_class = DummyTransport), 2) as sender:
+            sender.submit(b"", 0)
+
+
+# Tests that only the rejected documents are sent again, and that they are reported once the retry budget is spent
+def test_retry_BulkSender():
+    body = b''.join(b'{"index":{}}\n{"a":%d}\n' % (i) for i in range(3))
+
+    client = RejectingClient(1, transport_class = DummyTransport)
+    with BulkSender(client, initial_backoff = 0, max_backoff = 0) as sender:
+        sender.submit(body, 3)
+    assert client.bodies[1] == body
+    assert client.bodies[2] == b'{"index":{}}\n{"a":1}\n{"index":{}}\n{"a":2}\n'
+    assert sender.summary["retries"] == 2 and sender.summary["errors"] == 0 and sender.summary["requests"] == 2
+
+    client = RejectingClient(5, transport_class = DummyTransport)
+    with BulkSender(client, 2, max_retries = 2, initial_backoff = 0) as sender:
+        sender.submit(body, 3)
+    assert len(client.bodies) == 3
+    assert sender.summary["errors"] == 1
+    assert sender.summary["failures"][0]["status"] == 429
+
+
+def test_bulk_helpers():
+    body = b'{"index":{}}\n{"a":1}\n{"index":{}}\n{"a":2}\n'
+    assert parse_bulk_response(body, None) == (b"", 0, [])
+    response = {"errors": True, "items": [{"index": {"status": 503, "error": {}}}, {"create": {"status": 409, "error": {}}}]}
+    assert parse_bulk_response(body, response) == (b'{"index":{}}\n{"a":1}\n', 1, [{"status": 409, "error": {}, "document": '{"a":2}'}])
+    assert parse_bulk_response(body, response, retry = False)[1:] == (0, [{"status": 503, "error": {}, "document": '{"a":1}'}, {"status": 409, "error": {}, "document": '{"a":2}'}])
+    assert split_conflicts(parse_bulk_response(body, response, retry = False)[2]) == ([{"status": 503, "error": {}, "document": '{"a":1}'}], 1)
+
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt, 0.5, 4) <= min(4, 0.5 * 2 ** attempt)
+    assert is_retryable_error(ConnectionTimeout("TIMEOUT", "", None))
+    assert is_retryable_error(TransportError(429, "", None))
+    assert not is_retryable_error(TransportError(400, "", None))
+    assert not is_retryable_error(Exception())
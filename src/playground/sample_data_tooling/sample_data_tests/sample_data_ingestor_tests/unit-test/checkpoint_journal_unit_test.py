@@ -0,0 +1,136 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from datetime import datetime
+from json import loads
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_ingestor.checkpoint_journal import CheckpointJournal, CheckpointTracker
+from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import ingest
+
+# Constants
+INDEX_NAME = "checkpoint-test"
+TEMPLATE = {"year": "year", "random number": "integer", "email": "email"}
+CURRENT_DATE = datetime(2022, 6, 8)
+
+
+# Transport class that makes a mock API call
+class DummyTransport(object):
+    def __init__(self, hosts, responses=None, **kwargs):
+        self.serializer = None
+    def perform_request(self, method, url, params=None, headers=None, body=None):
+        return None
+
+# OpenSearch client object that records the BULK bodies it is sent, and fails for good once fail_after bodies were sent
+class RecordingClient(OpenSearch):
+    def __init__(self, fail_after:int = None):
+        super().__init__(transport_class = DummyTransport)
+        self.bodies = []
+        self.fail_after = fail_after
+    def bulk(self, body, **kwargs):
+        if self.fail_after is not None and len(self.bodies) >= self.fail_after:
+            raise Exception("The cluster went away")
+        self.bodies.append(body)
+        return None
+
+
+def sources(bodies:list) -> list:
+    return [line for body in bodies for line in body.split(b"\n")[1::2] if line]
+
+
+def test_journal(tmp_path):
+    filename = str(tmp_path / "journal")
+    journal = CheckpointJournal(filename)
+    assert journal.get(INDEX_NAME) is None
+    checkpoint = journal.start(INDEX_NAME, seed = 7)
+    assert checkpoint == {"index": INDEX_NAME, "seed": 7, "offset": 0, "batches": 0, "complete": False}
+    journal.record(INDEX_NAME, 7, 10, 2)
+    journal.record("other", 3, 5, 1, complete = True)
+
+    # The last line of an index wins, and a line cut short by a crash is ignored
+    with open(filename, "a") as f:
+        f.write('{"index": "checkpoint-te')
+    journal = CheckpointJournal(filename)
+    assert journal.get(INDEX_NAME)["offset"] == 10
+    assert journal.is_incomplete(INDEX_NAME) and not journal.is_incomplete("other")
+    assert journal.resume(INDEX_NAME)["offset"] == 10
+    assert journal.resume("other")["offset"] == 0
+    with open(filename, "r") as f:
+        assert len(f.readlines()) == 3
+
+    journal.discard(INDEX_NAME)
+    assert CheckpointJournal(filename).get(INDEX_NAME) is None
+    with pytest.raises(TypeError):
+        CheckpointJournal(None)
+
+
+def test_tracker(tmp_path):
+    journal = CheckpointJournal(str(tmp_path / "journal"))
+    tracker = CheckpointTracker(journal, journal.start(INDEX_NAME, seed = 1))
+    tickets = [tracker.submit(count) for count in (5, 5, 3)]
+
+    # Requests acknowledged out of order only count once every request before them is acknowledged
+    tracker.acknowledge(tickets[1])
+    assert journal.get(INDEX_NAME)["offset"] == 0
+    tracker.acknowledge(tickets[0])
+    assert journal.get(INDEX_NAME)["offset"] == 10 and journal.get(INDEX_NAME)["batches"] == 2
+    assert not tracker.finish()["complete"]
+    tracker.acknowledge(tickets[2])
+    assert tracker.finish() == {"index": INDEX_NAME, "seed": 1, "offset": 13, "batches": 3, "complete": True}
+    with pytest.raises(TypeError):
+        CheckpointTracker({}, journal.get(INDEX_NAME))
+
+
+def test_resumed_ingest(tmp_path):
+    journal = CheckpointJournal(str(tmp_path / "journal"))
+
+    # The first ingestion dies after two requests
+    failing = RecordingClient(fail_after = 2)
+    with pytest.raises(ConnectionError):
+        ingest(failing, TEMPLATE, INDEX_NAME, mapping = False, number = 20, chunk = 5, timestamp = "date", current_date = CURRENT_DATE, checkpoint = journal)
+    checkpoint = journal.get(INDEX_NAME)
+    assert checkpoint["offset"] == 10 and checkpoint["batches"] == 2 and not checkpoint["complete"]
+
+    # The next one only sends the documents that were not acknowledged
+    resumed = RecordingClient()
+    ingest(resumed, TEMPLATE, INDEX_NAME, mapping = False, number = 20, chunk = 5, timestamp = "date", current_date = CURRENT_DATE, checkpoint = journal)
+    assert len(sources(resumed.bodies)) == 10
+    assert journal.get(INDEX_NAME) == dict(checkpoint, offset = 20, batches = 4, complete = True)
+
+    # Documents are generated with the seed of the checkpoint, so the two ingestions sent what one would have
+    complete = RecordingClient()
+    other_journal = CheckpointJournal(str(tmp_path / "other-journal"))
+    other_journal.start(INDEX_NAME, seed = checkpoint["seed"])
+    ingest(complete, TEMPLATE, INDEX_NAME, mapping = False, number = 20, chunk = 5, timestamp = "date", current_date = CURRENT_DATE, checkpoint = other_journal)
+    assert sources(failing.bodies) + sources(resumed.bodies) == sources(complete.bodies)
+
+    # A completed checkpoint starts over
+    again = RecordingClient()
+    ingest(again, TEMPLATE, INDEX_NAME, mapping = False, number = 20, chunk = 5, streaming = True, checkpoint = journal)
+    assert len(sources(again.bodies)) == 20
+    journal.record(INDEX_NAME, checkpoint["seed"], 15, 3)
+    assert ingest(again, TEMPLATE, INDEX_NAME, mapping = False, number = 20, chunk = 5, streaming = True, checkpoint = journal)["documents"] == 5
+    assert journal.get(INDEX_NAME)["complete"]
+    with pytest.raises(TypeError):
+        ingest(again, TEMPLATE, INDEX_NAME, mapping = False, checkpoint = "journal")
+
+
+def test_resumed_document_ids(tmp_path):
+    # A resumed ingestion numbers its documents from the checkpoint, so the documents it sends keep the IDs they had
+    journal = CheckpointJournal(str(tmp_path / "journal"))
+    journal.record(INDEX_NAME, 3, 10, 2)
+    for streaming in (False, True):
+        resumed = RecordingClient()
+        ingest(resumed, TEMPLATE, INDEX_NAME, mapping = False, number = 20, chunk = 5, streaming = streaming, checkpoint = journal, document_ids = True)
+        actions = [line for body in resumed.bodies for line in body.split(b"\n")[0::2] if line]
+        assert [loads(action)["create"]["_id"] for action in actions] == [INDEX_NAME + "-" + str(i) for i in range(10, 20)]
+        journal.record(INDEX_NAME, 3, 10, 2)
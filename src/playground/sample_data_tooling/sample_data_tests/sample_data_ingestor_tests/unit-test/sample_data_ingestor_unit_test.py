@@ -7,13 +7,14 @@ from opensearchpy import OpenSearch
 
 # Standard libraries
 from json import loads, load
+from datetime import datetime
 import pytest
 import sys
 import os
 
 # Adds the directory "/sample_data_tooling" to sys.path
 sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
-from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import ingest, build_request_body
+from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import ingest, build_request_body, build_bulk_bodies, assign_timestamps
 
 # Constants
 INDEX_NAME = "ingest-test"
@@ -43,6 +44,32 @@ class DummyTransport(object):
 client = OpenSearch(transport_class = DummyTransport)
 
 
+# OpenSearch client object whose BULK calls report every document as failed
+class FailingBulkClient(OpenSearch):
+    def bulk(self, body, **kwargs):
+        count = body.count(b"\n") // 2
+        return {"errors": True, "items": [{"index": {"status": 429, "error": {"type": "es_rejected_execution_exception"}}}] * count}
+
+# OpenSearch client object that keeps the documents it is sent by _id, and rejects "create" actions for IDs it already holds
+class IndexingClient(OpenSearch):
+    def __init__(self):
+        super().__init__(transport_class = DummyTransport)
+        self.documents = {}
+        self.bodies = []
+    def bulk(self, body, **kwargs):
+        self.bodies.append(body)
+        lines = body.split(b"\n")
+        items = []
+        for action, source in zip(lines[0::2], lines[1::2]):
+            action = loads(action)["create"]
+            if action["_id"] in self.documents:
+                items.append({"create": {"status": 409, "error": {"type": "version_conflict_engine_exception"}}})
+            else:
+                self.documents[action["_id"]] = loads(source)
+                items.append({"create": {"status": 201}})
+        return {"errors": any("error" in item["create"] for item in items), "items": items}
+
+
 # Sample inputs (valid)
 valid_test_inputs = {}
 with open(DIR_PATH + "/test-files/valid-template-inputs.json", "r") as f:
@@ -97,13 +124,185 @@ def test_valid_ingest():
              count += 1
     assert (count/len(trend_test)) < 0.5
 
+def test_vectorized_ingest():
+    # Numeric fields are drawn as columns by the batch engine
+    vectorized_test = ingest(client = client, data_template = valid_json_shorthand_data_trend, mapping = False, index_name = INDEX_NAME, number = 480, chunk = 100, vectorized = True, faker_compatible = True)
+    assert len(vectorized_test) == 480
+    for entry in vectorized_test:
+        assert 20 <= loads(entry)["average cpu usage"] <= 30
+    with pytest.raises(TypeError):
+        ingest(client = client, data_template = valid_json_shorthand_data_trend, mapping = False, index_name = INDEX_NAME, vectorized = "yes")
+
+
+def test_columnar_ingest():
+    anomaly_detection_trend =  [{
+            "data_trend": "AverageTrend",
+            "feature" : "average cpu usage",
+            "anomaly_percentage" : 0.001,
+            "avg_min" : 20,
+            "avg_max" : 30,
+            "abs_min" : 0,
+            "abs_max" : 100
+        }]
+    columnar_test = ingest(client = client, data_template = valid_json_shorthand_data_trend, mapping = False, index_name = INDEX_NAME, number = 120, chunk = 10, timestamp = "date", anomaly_detection_trend = anomaly_detection_trend, columnar = True)
+    assert len(columnar_test) == 1 and len(columnar_test[0]) == 120
+    dates = columnar_test[0].column("date")
+    assert dates[1] - dates[0] == 2 * 60 * 1000
+    path = str(DIR_PATH + "/test-files/csv-format-test-zipped.csv.gz")
+    assert sum(len(batch) for batch in ingest(client, data_template = path, index_name = INDEX_NAME, columnar = True)) == 12
+    with pytest.raises(TypeError):
+        ingest(client = client, data_template = valid_json_shorthand_data_trend, mapping = False, index_name = INDEX_NAME, columnar = 1)
+
+
+def test_streaming_ingest():
+    anomaly_detection_trend =  [{
+            "data_trend": "AverageTrend",
+            "feature" : "average cpu usage",
+            "anomaly_percentage" : 0.001,
+            "avg_min" : 20,
+            "avg_max" : 30,
+            "abs_min" : 0,
+            "abs_max" : 100
+        }]
+    summary = ingest(client = client, data_template = valid_json_shorthand_data_trend, mapping = False, index_name = INDEX_NAME, number = 2500, chunk = 100, timestamp = "date", anomaly_detection_trend = anomaly_detection_trend, streaming = True)
+    assert summary["documents"] == 2500 and summary["requests"] == 25 and summary["errors"] == 0
+    assert summary["bytes"] > 0
+    path = str(DIR_PATH + "/test-files/ecommerce.ndjson")
+    assert ingest(client, file_provided = True, data_template = path, index_name = INDEX_NAME, streaming = True)["documents"] == 50
+
+    # Documents the cluster rejects are counted as errors once the retry budget is spent
+    failing_client = FailingBulkClient(transport_class = DummyTransport)
+    summary = ingest(client = failing_client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, number = 12, streaming = True, max_retries = 0)
+    assert summary["errors"] == 12 and summary["requests"] == 3
+    with pytest.raises(TypeError):
+        ingest(client = client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, streaming = "yes")
+
+
+def test_parallel_ingest():
+    # Requests are sent from a pool of workers
+    assert len(ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, number = 100, workers = 4)) == 100
+    assert ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, number = 100, workers = 4, streaming = True)["documents"] == 100
+    with pytest.raises(ValueError):
+        ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, workers = 0)
+    with pytest.raises(ValueError):
+        ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, max_retries = -1)
+
+
+def test_parallel_parse_ingest():
+    path = str(DIR_PATH + "/test-files/ecommerce.ndjson")
+    assert len(ingest(client, file_provided = True, data_template = path, index_name = INDEX_NAME, parse_processes = 2)) == 50
+    assert ingest(client, file_provided = True, data_template = path, index_name = INDEX_NAME, streaming = True, parse_processes = 2, parse_ordered = False)["documents"] == 50
+    with pytest.raises(ValueError):
+        ingest(client, file_provided = True, data_template = path, index_name = INDEX_NAME, parse_processes = 0)
+
+
+def test_user_data_timestamps():
+    # Timestamps keep increasing across requests instead of starting over in every request
+    path = str(DIR_PATH + "/test-files/ecommerce.ndjson")
+    anchor = datetime(2022, 6, 8)
+    dataset = ingest(client, file_provided = True, data_template = path, index_name = INDEX_NAME, chunk = 5, timestamp = "order_date", minutes = 2, timestamp_anchor = anchor)
+    timestamps = [document["order_date"] for document in dataset]
+    start = int(anchor.strftime("%s")) * 1000
+    assert timestamps == list(range(start, start + 50 * 120000, 120000))
+    dataset = ingest(client, file_provided = True, data_template = path, index_name = INDEX_NAME, timestamp = "order_date", timestamp_unit = "s", timestamp_anchor = anchor, parse_processes = 2)
+    assert dataset[1]["order_date"] - dataset[0]["order_date"] == 120
+
+    # Streamed documents get the same sequence, a document at a time
+    documents = assign_timestamps(iter([{}, {}, {}]), "date", 1, anchor, "s")
+    assert [document["date"] for document in documents] == [start // 1000, start // 1000 + 60, start // 1000 + 120]
+    assert ingest(client, file_provided = True, data_template = path, index_name = INDEX_NAME, timestamp = "order_date", streaming = True, parse_processes = 2)["documents"] == 50
+    with pytest.raises(ValueError):
+        ingest(client, file_provided = True, data_template = path, index_name = INDEX_NAME, timestamp = "order_date", timestamp_unit = "ns")
+    with pytest.raises(ValueError):
+        ingest(client, file_provided = True, data_template = path, index_name = INDEX_NAME, timestamp = "order_date", timestamp_anchor = "2022-06-08")
+
+
+def test_adaptive_ingest():
+    # Requests grow from the initial chunk as they succeed
+    summary = ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, number = 200, chunk = 5, adaptive = True, streaming = True)
+    assert summary["documents"] == 200 and summary["requests"] < 40
+    assert summary["tuned"]["chunk"] > 5
+    assert len(ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, number = 200, chunk = 5, adaptive = True)) == 200
+
+    # Concurrency grows from workers up to max_workers
+    summary = ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, number = 200, chunk = 5, adaptive = True, max_workers = 3, streaming = True)
+    assert 1 < summary["tuned"]["workers"] <= 3
+    with pytest.raises(TypeError):
+        ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, adaptive = "yes")
+    with pytest.raises(ValueError):
+        ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, adaptive = True, max_workers = 0)
+
+
+def test_document_ids_ingest():
+    # Sending the same documents again does not duplicate them: the conflicts count as already indexed
+    indexing = IndexingClient()
+    ingest(indexing, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, number = 12, chunk = 5, timestamp = "date", document_ids = True)
+    assert sorted(indexing.documents) == sorted(INDEX_NAME + "-" + str(i) for i in range(12))
+    summary = ingest(indexing, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, number = 12, chunk = 5, streaming = True, document_ids = True)
+    assert summary["conflicts"] == 12 and summary["errors"] == 0 and len(indexing.documents) == 12
+
+    # Columnar documents and user provided data get the same IDs
+    for kwargs in ({"data_template": valid_json_shorthand, "mapping": False, "number": 12, "columnar": True}, {"data_template": DIR_PATH + "/test-files/ecommerce.ndjson", "file_provided": True, "streaming": True}):
+        indexing = IndexingClient()
+        ingest(indexing, index_name = INDEX_NAME, chunk = 5, document_ids = True, **kwargs)
+        assert loads(indexing.bodies[-1].split(b"\n")[-3])["create"]["_id"] == INDEX_NAME + "-" + str(len(indexing.documents) - 1)
+
+    # A batch that continues an index numbers its documents from sequence
+    for streaming in (False, True):
+        indexing = IndexingClient()
+        ingest(indexing, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, number = 4, chunk = 5, streaming = streaming, document_ids = True, sequence = 8)
+        assert sorted(indexing.documents) == sorted(INDEX_NAME + "-" + str(i) for i in range(8, 12))
+
+    with pytest.raises(TypeError):
+        ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, document_ids = "yes")
+    with pytest.raises(ValueError):
+        ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, document_ids = True, sequence = -1)
+    with pytest.raises(ValueError):
+        ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, document_ids = True, parse_ordered = False)
+
+
+def test_seeded_ingest():
+    # With the same seed, the same documents are generated again, anomalies included
+    anomaly_detection_trend =  [{
+            "data_trend": "AverageTrend",
+            "feature" : "average cpu usage",
+            "anomaly_percentage" : 0.5,
+            "avg_min" : 20,
+            "avg_max" : 30,
+            "abs_min" : 0,
+            "abs_max" : 100
+        }]
+    current_date = datetime(2022, 6, 8)
+    datasets = [ingest(client, data_template = valid_json_shorthand_data_trend, mapping = False, index_name = INDEX_NAME, number = 120, timestamp = "date", current_date = current_date, anomaly_detection_trend = anomaly_detection_trend, seed = 7) for _ in range(2)]
+    assert datasets[0] == datasets[1]
+    assert ingest(client, data_template = valid_json_shorthand_data_trend, mapping = False, index_name = INDEX_NAME, number = 120, timestamp = "date", current_date = current_date, anomaly_detection_trend = anomaly_detection_trend, seed = 8) != datasets[0]
+    with pytest.raises(ValueError):
+        ingest(client, data_template = valid_json_shorthand, mapping = False, index_name = INDEX_NAME, seed = -1)
+
+
+def test_build_bulk_bodies():
+    documents = [{"a": i} for i in range(10)]
+    bodies = list(build_bulk_bodies(documents, "test", 4, 100000))
+    assert [count for body, count in bodies] == [4, 4, 2]
+    assert bodies[0][0].count(b"\n") == 8
+    # Bodies stay under max_bulk_size, but a document is always sent even if it is larger on its own
+    bodies = list(build_bulk_bodies(documents, "test", 10, 100))
+    assert all(len(body) <= 100 for body, count in bodies) and sum(count for body, count in bodies) == 10
+    assert [count for body, count in build_bulk_bodies(documents, "test", 10, 1)] == [1] * 10
+
+
 def test_build_request_body():
     dataset = []
     with open(DIR_PATH + "/test-files/ecommerce.ndjson", "r") as f:
         for line in f:
             dataset.append(line)
-    assert len(build_request_body(index_name = "test", file_provided = False, timestamp = None, minutes = 0, chunk = 5, current_index = 0, dataset = dataset, max_bulk_size = 100)[0]) < 10
-    assert len(build_request_body(index_name = "test", file_provided = False, timestamp = None, minutes = 0, chunk = 5, current_index = 0, dataset = dataset, max_bulk_size = 100000000)[0]) == 10
+    assert build_request_body(index_name = "test", file_provided = False, timestamp = None, minutes = 0, chunk = 5, current_index = 0, dataset = dataset, max_bulk_size = 100)[0].count < 5
+    builder, current_index = build_request_body(index_name = "test", file_provided = False, timestamp = None, minutes = 0, chunk = 5, current_index = 0, dataset = dataset, max_bulk_size = 100000000)
+    body, count = builder.take()
+    assert current_index == count == 5 and body.count(b"\n") == 10
+
+    # A document larger than max_bulk_size is still sent on its own, so ingestion always moves forward
+    assert build_request_body(index_name = "test", file_provided = False, timestamp = None, minutes = 0, chunk = 5, current_index = 0, dataset = dataset, max_bulk_size = 100)[1] == 1
 
 
 def test_invalid_ingest():
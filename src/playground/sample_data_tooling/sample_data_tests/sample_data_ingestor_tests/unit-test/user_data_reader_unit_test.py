@@ -0,0 +1,115 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+# Standard libraries
+from json import dumps, loads
+import gzip
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_ingestor.user_data_reader import read_user_data, iter_user_data, split_byte_ranges, ParallelUserDataReader
+from sample_data_tooling.sample_data_ingestor.sample_data_ingestor import ingest_from_user_data
+
+# Constants
+DIR_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+FILES_PATH = DIR_PATH + "/test-files"
+
+
+# Tests that plain and gzipped files are read in batches without writing to disk
+def test_valid_read_user_data(tmp_path):
+    files = sorted(os.listdir(FILES_PATH))
+    batches = list(read_user_data(FILES_PATH + "/ecommerce.ndjson", batch_size = 20))
+    assert [len(batch) for batch in batches] == [20, 20, 10]
+    assert batches[0][0]["order_id"] == 1
+
+    # Gzipped CSV rows become dicts keyed by the header row, with quoted fields kept whole
+    rows = list(iter_user_data(FILES_PATH + "/csv-format-test-zipped.csv.gz"))
+    assert len(rows) == 2
+    assert rows[0] == {"year": "year", "addresses": '["array", "address", "integer", [1, 3]]', "name": "name"}
+    assert ingest_from_user_data(FILES_PATH + "/csv-format-test-zipped.csv.gz") == rows
+    assert sorted(os.listdir(FILES_PATH)) == files
+
+    # Gzipped NDJSON is decompressed as it is read, and blank lines are skipped
+    filename = str(tmp_path / "documents.ndjson.gz")
+    with gzip.open(filename, "wt") as f:
+        for i in range(2500):
+            f.write(dumps({"id": i}) + "\n")
+        f.write("\n")
+    documents = iter_user_data(filename, batch_size = 1000)
+    assert next(documents) == {"id": 0}
+    assert sum(1 for document in documents) == 2499
+    assert os.listdir(tmp_path) == ["documents.ndjson.gz"]
+
+
+# Tests that byte ranges end on newlines and that every document is parsed exactly once
+def test_parallel_read_user_data(tmp_path):
+    filename = FILES_PATH + "/ecommerce.ndjson"
+    ranges = split_byte_ranges(filename, range_bytes = 1000)
+    assert ranges[0][0] == 0 and ranges[-1][1] == os.path.getsize(filename)
+    with open(filename, "rb") as f:
+        data = f.read()
+    for start, end in ranges[:-1]:
+        assert data[end - 1:end] == b"\n"
+
+    documents = [loads(line) for batch in ParallelUserDataReader(filename, 2, range_bytes = 1000) for line in batch]
+    assert documents == list(iter_user_data(filename))
+    reader = ParallelUserDataReader(filename, 2, ordered = False, range_bytes = 1000, encoded = False)
+    documents = [document for batch in reader for document in batch]
+    assert sorted(document["order_id"] for document in documents) == list(range(1, 51))
+    rates = reader.rates()
+    assert sum(rate["documents"] for rate in rates.values()) == 50
+    assert sum(rate["ranges"] for rate in rates.values()) == len(ranges)
+
+    # The header row of a CSV file is left out of the ranges
+    filename = str(tmp_path / "documents.csv")
+    with open(filename, "w") as f:
+        f.write("id,name\n" + "".join("%d,name %d\n" % (i, i) for i in range(300)))
+    rows = [row for batch in ParallelUserDataReader(filename, 2, range_bytes = 500, encoded = False) for row in batch]
+    assert rows == list(iter_user_data(filename))
+
+    # Gzipped files are read serially
+    rows = [row for batch in ParallelUserDataReader(FILES_PATH + "/csv-format-test-zipped.csv.gz", 2) for row in batch]
+    assert len(rows) == 2
+
+
+# Tests that CSV columns are sent typed, with a schema for the columns that cannot be inferred
+def test_typed_read_user_data(tmp_path):
+    filename = str(tmp_path / "documents.csv.gz")
+    with gzip.open(filename, "wt") as f:
+        f.write("id,price,in_stock,zip,sold_at,updated\n")
+        for i in range(1500):
+            f.write("%d,%d.5,%s,0%d,2024-01-0%dT00:00:00Z,%d\n" % (i, i, "true" if i % 2 else "false", 2134 + i, 1 + i % 9, 1700000000 + i))
+    batches = list(read_user_data(filename, csv_schema = {"updated": "epoch_second"}))
+    assert batches[0][1] == {"id": 1, "price": 1.5, "in_stock": True, "zip": "02135", "sold_at": 1704153600000, "updated": 1700000001000}
+    assert batches[1][0]["id"] == 1000
+    assert list(iter_user_data(filename, infer_types = False))[0]["id"] == "0"
+
+    rows = [row for batch in ParallelUserDataReader(FILES_PATH + "/csv-format-test-zipped.csv.gz", 2) for row in batch]
+    assert rows == list(iter_user_data(FILES_PATH + "/csv-format-test-zipped.csv.gz"))
+    filename = str(tmp_path / "documents.csv")
+    with open(filename, "w") as f:
+        f.write("id,price\n" + "".join("%d,%d.25\n" % (i, i) for i in range(300)))
+    rows = [loads(row) for batch in ParallelUserDataReader(filename, 2, range_bytes = 500) for row in batch]
+    assert rows[3] == {"id": 3, "price": 3.25} and len(rows) == 300
+
+
+def test_invalid_read_user_data():
+    with pytest.raises(TypeError):
+        read_user_data(5)
+    with pytest.raises(ValueError):
+        read_user_data("documents.txt")
+    with pytest.raises(ValueError):
+        read_user_data(FILES_PATH + "/ecommerce.ndjson", batch_size = 0)
+    with pytest.raises(ValueError):
+        ParallelUserDataReader(FILES_PATH + "/ecommerce.ndjson", 0)
+    with pytest.raises(TypeError):
+        ParallelUserDataReader(FILES_PATH + "/ecommerce.ndjson", ordered = "yes")
+    with pytest.raises(ValueError):
+        split_byte_ranges(FILES_PATH + "/ecommerce.ndjson", 0)
+    with pytest.raises(ValueError):
+        read_user_data(FILES_PATH + "/ecommerce.ndjson", csv_schema = {"a": "number"})
@@ -0,0 +1,135 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import AsyncOpenSearch, OpenSearch
+
+# Standard libraries
+from datetime import date, datetime, timedelta
+from time import time
+from json import loads, dumps
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_authentication.sample_data_basic_authentication import BasicAuthentication
+from sample_data_tooling.sample_data_commons.stand_in_server import StandInServer
+from sample_data_tooling.sample_data_jobs.async_jobs import run_startup_job, run_refresh_job
+from sample_data_tooling.sample_data_jobs.job_steps import dated_index_name
+from sample_data_tooling.sample_data_jobs.retention import retention_policy_id, retention_index_body
+
+
+# Async transport class that makes a mock API call and records the indices that were ingested
+class DummyAsyncTransport(object):
+    indices = set()
+    def __init__(self, hosts, responses=None, **kwargs):
+        self.serializer = None
+    async def perform_request(self, method, url, params=None, headers=None, body=None):
+        if url.endswith("_bulk"):
+            DummyAsyncTransport.indices.add(loads(body.split(b"\n")[0])["index"]["_index"])
+        return None
+    async def close(self):
+        pass
+
+
+# Directory of current unit test file
+DIR_PATH = os.path.dirname(os.path.realpath(__file__))
+
+
+header = BasicAuthentication("admin", "admin")
+config_path = os.path.join(os.path.dirname(DIR_PATH), "test-files")
+url = "https://localhost"
+
+
+# Testing that the async jobs call and do as expected without errors
+def test_valid_async_jobs(requests_mock):
+    # All sample request calls
+    requests_mock.post("https://localhost:9200/_plugins/_anomaly_detection/detectors", json = {"_id": "111", "response": "detector created"})
+    requests_mock.delete("https://localhost:9200/_plugins/_anomaly_detection/detectors/111", json = {"response": "detector deleted"})
+    requests_mock.post("https://localhost:9200/_plugins/_anomaly_detection/detectors/111/_start", json = {"response": "detector job started"})
+    requests_mock.post("https://localhost:9200/_plugins/_anomaly_detection/detectors/111/_stop", json = {"response": "detector job stopped"})
+    requests_mock.post("https://localhost:9200/_plugins/_anomaly_detection/detectors/111/_stop?historical=true", json = {"response": "historical analysis job started"})
+
+    run_startup_job(config_path, url, header, AsyncOpenSearch(transport_class = DummyAsyncTransport), max_in_flight = 4)
+    assert "cpu-usage-logs" in DummyAsyncTransport.indices
+    run_refresh_job(config_path, AsyncOpenSearch(transport_class = DummyAsyncTransport))
+
+
+# Tests that a day that lost documents in the middle gets only those documents again
+def test_async_repair(tmp_path):
+    config = {
+        "plugin": "none",
+        "ingest_args": {"index_name": "async-logs", "data_template": {"year": "year"}, "mapping": False, "timestamp": "date", "minutes": 60, "chunk": 6},
+        "days_before": 1,
+        "days_after": 0,
+        "index_body": {},
+        "create_payload": {}
+    }
+    with open(tmp_path / "config.json", "w") as f:
+        f.write(dumps(config))
+
+    with StandInServer(keep_documents = True) as server:
+        run_startup_job(str(tmp_path), server.url, header, server.async_client())
+        index = server.indices[dated_index_name("async-logs", date.today())]
+        lost = list(index["documents"])[6:12]
+        for document_id in lost:
+            del index["documents"][document_id]
+            index["ids"].remove(document_id)
+        index["count"] -= len(lost)
+
+        documents = server.stats["documents"]
+        run_startup_job(str(tmp_path), server.url, header, server.async_client())
+        assert server.stats["documents"] - documents == 6
+        start = int(datetime.combine(date.today(), datetime.min.time()).timestamp() * 1000)
+        assert sorted(document["date"] for document in index["documents"].values()) == [start + hour * 3600000 for hour in range(24)]
+
+
+# Tests that with ISM retention the async jobs install the policy, date every day, and the refresh job deletes nothing itself
+def test_async_ism_jobs(tmp_path):
+    config = {
+        "plugin": "none",
+        "ingest_args": {"index_name": "async_ism", "data_template": {"year": "year"}, "mapping": False, "timestamp": "date", "minutes": 480, "chunk": 10},
+        "days_before": 2,
+        "days_after": 1,
+        "parallelism": 1,
+        "index_body": {},
+        "create_payload": {},
+        "retention": "ism"
+    }
+    with open(tmp_path / "config.json", "w") as f:
+        f.write(dumps(config))
+    def day(days_ago:int) -> str:
+        return dated_index_name("async_ism", date.today() - timedelta(days = days_ago))
+
+    with StandInServer() as server:
+        run_startup_job(str(tmp_path), server.url, header, server.async_client())
+        assert sorted(server.indices) == sorted(day(days_ago) for days_ago in range(-1, 3))
+        assert all(index["policy_id"] == retention_policy_id("async_ism") and index["count"] == 3 for index in server.indices.values())
+        assert server.indices[day(2)]["settings"]["index.creation_date"] == str(int(datetime.combine(date.today() - timedelta(days = 2), datetime.min.time()).timestamp() * 1000))
+
+        # An expired day is left to the policy, which deletes it by its date
+        server.client().indices.create(index = day(5), body = retention_index_body({}, date.today() - timedelta(days = 5)))
+        run_refresh_job(str(tmp_path), server.async_client())
+        assert day(5) in server.indices
+        assert server.run_policies() == [day(5)]
+        assert server.run_policies(time() + 86400) == [day(2)]
+
+        # Without ISM retention, the refresh job deletes the expired days it finds in the cluster state
+        server.client().indices.create(index = day(5))
+        with open(tmp_path / "config.json", "w") as f:
+            f.write(dumps(dict(config, retention = "delete")))
+        run_refresh_job(str(tmp_path), server.async_client())
+        assert sorted(server.indices) == sorted(day(days_ago) for days_ago in range(-1, 2))
+
+
+# Testing invalid inputs
+def test_invalid_async_jobs():
+    with pytest.raises(TypeError):
+        run_startup_job(config_path, url, header, OpenSearch())
+    with pytest.raises(TypeError):
+        run_refresh_job(123, AsyncOpenSearch(transport_class = DummyAsyncTransport))
+    with pytest.raises(ValueError):
+        run_refresh_job(config_path, AsyncOpenSearch(transport_class = DummyAsyncTransport), max_in_flight = 0)
@@ -0,0 +1,131 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+from opensearchpy import OpenSearch
+
+# Standard libraries
+from datetime import datetime, timedelta
+from json import dumps
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_commons.stand_in_server import StandInServer
+from sample_data_tooling.sample_data_jobs.daemon_job import DaemonJob, daemon_job
+from sample_data_tooling.sample_data_jobs.job_steps import dated_index_name
+from sample_data_tooling.sample_data_jobs.retention import retention_policy_id
+
+
+# Constants
+INDEX_NAME = "daemon_logs"
+TODAY = datetime.combine(datetime.today(), datetime.min.time())
+CONFIG = {
+    "plugin": "none",
+    "ingest_args": {"index_name": INDEX_NAME, "data_template": {"year": "year"}, "mapping": False, "timestamp": "date", "minutes": 60, "chunk": 10},
+    "days_before": 1,
+    "days_after": 1,
+    "index_body": {}
+}
+
+
+def day(days:int) -> str:
+    return dated_index_name(INDEX_NAME, TODAY + timedelta(days = days))
+
+
+def milliseconds(moment:datetime) -> int:
+    return int(moment.timestamp() * 1000)
+
+
+# Clock whose time the test sets
+class Clock:
+    def __init__(self, now:datetime):
+        self.now = now
+    def __call__(self) -> datetime:
+        return self.now
+
+
+# Tests that documents are sent as they come due, never ahead of time, and that days roll over
+def test_trickle():
+    with StandInServer(keep_documents = True) as server:
+        client = server.client()
+        clock = Clock(TODAY + timedelta(hours = 10, minutes = 30))
+        daemon = DaemonJob([CONFIG], client, clock = clock)
+
+        # The past day is built whole, and today is caught up to now
+        assert daemon.tick() == {INDEX_NAME: 11}
+        assert {name: index["count"] for name, index in server.indices.items()} == {day(-1): 24, day(0): 11}
+        assert max(document["date"] for document in server.documents(day(0))) == milliseconds(TODAY + timedelta(hours = 10))
+        assert daemon.next_wait() == 60
+        clock.now = TODAY + timedelta(hours = 10, minutes = 59, seconds = 30)
+        assert daemon.next_wait() == 30
+
+        # A round sends what is due with one BULK request and no other call
+        requests = server.stats["requests"]
+        clock.now = TODAY + timedelta(hours = 12, minutes = 5)
+        assert daemon.tick() == {INDEX_NAME: 2}
+        assert server.stats["requests"] - requests == 1
+        assert daemon.tick() == {INDEX_NAME: 0}
+
+        # The next day, today is finished, tomorrow is started, and the day that is too old is deleted
+        clock.now = TODAY + timedelta(days = 1, minutes = 30)
+        assert daemon.tick() == {INDEX_NAME: 12}
+        assert {name: index["count"] for name, index in server.indices.items()} == {day(0): 24, day(1): 1}
+        timestamps = [document["date"] for document in server.documents(day(0))]
+        assert timestamps == [milliseconds(TODAY + timedelta(hours = hour)) for hour in range(24)]
+
+
+# Tests that a daemon started again resumes after the documents already sent
+def test_resume(tmp_path):
+    with StandInServer() as server:
+        client = server.client()
+        DaemonJob([CONFIG], client, clock = Clock(TODAY + timedelta(hours = 10, minutes = 30))).tick()
+        assert DaemonJob([CONFIG], client, clock = Clock(TODAY + timedelta(hours = 12, minutes = 5))).tick() == {INDEX_NAME: 2}
+        assert server.indices[day(0)]["count"] == 13
+
+        # A config without timestamps has its days built whole, once per day
+        config = dict(CONFIG, ingest_args = {"index_name": "daemon_whole", "data_template": {"year": "year"}, "mapping": False, "number": 5})
+        with open(tmp_path / "config.json", "w") as f:
+            f.write(dumps(config))
+        daemon_job(str(tmp_path), client, rounds = 1)
+        assert {name: index["count"] for name, index in server.indices.items() if name.startswith("daemon_whole")} == {
+            dated_index_name("daemon_whole", TODAY + timedelta(days = days)): 5 for days in range(-1, 2)
+        }
+
+
+# Tests that a restart which reads a stale count sends the documents again with the same IDs, so they conflict instead
+# of being duplicated
+def test_stale_resume(monkeypatch):
+    with StandInServer(keep_documents = True) as server:
+        client = server.client()
+        DaemonJob([CONFIG], client, clock = Clock(TODAY + timedelta(hours = 10, minutes = 30))).tick()
+        assert sorted(server.indices[day(0)]["ids"]) == sorted("%s-%d" % (day(0), sequence) for sequence in range(11))
+
+        # The count is read as if the last 3 hours had not been indexed yet
+        stale = lambda client, pattern: {day(-1): 24, day(0): 8}
+        monkeypatch.setattr("sample_data_tooling.sample_data_jobs.daemon_job.fetch_doc_counts", stale)
+        DaemonJob([CONFIG], client, clock = Clock(TODAY + timedelta(hours = 12, minutes = 5))).tick()
+        timestamps = [document["date"] for document in server.documents(day(0))]
+        assert timestamps == [milliseconds(TODAY + timedelta(hours = hour)) for hour in range(13)]
+
+
+# Tests that with ISM retention every day is added to the policy, the days it builds as well as the days it trickles into
+def test_ism_daemon():
+    with StandInServer() as server:
+        DaemonJob([dict(CONFIG, retention = "ism")], server.client(), clock = Clock(TODAY + timedelta(hours = 10, minutes = 30))).tick()
+        assert sorted(server.indices) == sorted([day(-1), day(0)])
+        assert all(index["policy_id"] == retention_policy_id(INDEX_NAME) for index in server.indices.values())
+
+
+def test_invalid_DaemonJob():
+    with pytest.raises(TypeError):
+        DaemonJob([CONFIG], "client")
+    with pytest.raises(ValueError):
+        DaemonJob([CONFIG], OpenSearch(), interval = 0)
+    with pytest.raises(KeyError):
+        DaemonJob([{"days_before": 1}], OpenSearch())
+    with pytest.raises(TypeError):
+        daemon_job(123, OpenSearch())
@@ -0,0 +1,83 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+# Standard libraries
+from threading import Lock
+from time import sleep
+import pytest
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_jobs.job_graph import JobGraph, critical_path, format_report
+
+
+# Tests that steps are capped per resource, and that a config's last steps start as soon as its own steps are done
+def test_JobGraph():
+    lock = Lock()
+    running = {}
+    most = {}
+    events = []
+
+    def step(name:str, resources:tuple, seconds:float, fail:bool = False):
+        def run():
+            with lock:
+                for resource in resources:
+                    running[resource] = running.get(resource, 0) + 1
+                    most[resource] = max(most.get(resource, 0), running[resource])
+            sleep(seconds)
+            with lock:
+                for resource in resources:
+                    running[resource] -= 1
+                events.append(name)
+            if fail:
+                raise ValueError(name + " failed")
+            return name
+        return run
+
+    graph = JobGraph({"cluster": 3, "plugin": 1, "config a": 1, "config b": 2})
+    for config, seconds, fail in (("a", 0.02, False), ("b", 0.1, True)):
+        compile_step = graph.add("compile " + config, step("compile " + config, ("cpu",), 0.01), resources = ("cpu",))
+        builds = [graph.add("build %s%d" % (config, day), step("build", ("cluster", "config " + config), seconds, fail and day == 3), resources = ("cluster", "config " + config), after = [compile_step]) for day in range(4)]
+        create = graph.add("create " + config, step("create " + config, ("plugin",), 0.01), resources = ("plugin",), after = builds)
+        graph.add("start " + config, step("start " + config, ("plugin",), 0.01), resources = ("plugin",), after = [create])
+        graph.add("start historical " + config, step("start historical " + config, ("plugin",), 0.01), resources = ("plugin",), after = [create])
+
+    report = graph.run()
+    steps = report["steps"]
+    assert most["cluster"] <= 3 and most["config a"] == 1 and most["config b"] == 2 and most["plugin"] == 1
+    assert [steps[name]["status"] for name in ("start a", "start historical a")] == ["done", "done"]
+    assert steps["build b3"]["status"] == "failed" and isinstance(steps["build b3"]["error"], ValueError)
+    assert [steps[name]["status"] for name in ("create b", "start b", "start historical b")] == ["skipped"] * 3
+
+    # Config a starts its plugin before config b is built
+    assert events.index("start a") < len(events) - 1
+    assert steps["start a"]["start"] >= steps["create a"]["end"] and steps["build a0"]["waited"] >= 0
+    assert report["busy"]["plugin"] > 0 and report["elapsed"] >= max(step["end"] for step in steps.values() if step["end"] is not None)
+
+    # The critical path ends with the step that ended last and follows its latest-ending dependencies
+    assert report["critical_path"] == critical_path(steps)
+    assert report["critical_path"][0] == "compile b" and report["critical_path"][-1] in ("build b0", "build b1", "build b2", "build b3")
+    text = format_report(report)
+    assert text.startswith("Critical path") and "Step build b3 failed: build failed" in text and "Step create b skipped" in text
+
+
+def test_invalid_JobGraph():
+    with pytest.raises(ValueError):
+        JobGraph({"cluster": 0})
+    with pytest.raises(ValueError):
+        JobGraph(workers = 0)
+    graph = JobGraph()
+    graph.add("first", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("first", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("second", lambda: None, after = ["missing"])
+    with pytest.raises(TypeError):
+        graph.add(1, lambda: None)
+    assert graph.run()["critical_path"] == ["first"]
+    report = JobGraph().run()
+    assert report["steps"] == {} and report["critical_path"] == []
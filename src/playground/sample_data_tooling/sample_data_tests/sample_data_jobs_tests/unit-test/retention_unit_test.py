@@ -0,0 +1,130 @@
+"""
+Copyright OpenSearch Contributors
+SPDX-License-Identifier: Apache-2.0
+"""
+
+# Standard libraries
+from datetime import date, datetime, timedelta
+from json import dumps
+from time import time
+import sys
+import os
+
+# Adds the directory "/sample_data_tooling" to sys.path
+sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
+from sample_data_tooling.sample_data_commons.stand_in_server import StandInServer
+from sample_data_tooling.sample_data_authentication.sample_data_basic_authentication import BasicAuthentication
+from sample_data_tooling.sample_data_indices.cluster_state import ClusterState
+from sample_data_tooling.sample_data_jobs.job_steps import dated_index_name, delete_old_indices
+from sample_data_tooling.sample_data_jobs.retention import index_date, expired_indices, delete_batches, delete_indices, retention_policy_id, retention_index_body, install_retention_policy, attach_retention_policy
+from sample_data_tooling.sample_data_jobs.startup_job import startup_job
+from sample_data_tooling.sample_data_jobs.refresh_job import refresh_job
+
+
+# Constants
+HEADER = BasicAuthentication("admin", "admin")
+INDEX_NAME = "cpu_usage_logs"
+TODAY = date.today()
+
+
+def day(days_ago:int) -> str:
+    return dated_index_name(INDEX_NAME, TODAY - timedelta(days = days_ago))
+
+
+# Tests that days are read from the end of the name, so index names with underscores work
+def test_expired_indices():
+    assert index_date(INDEX_NAME, "cpu_usage_logs_6_8_2022") == date(2022, 6, 8)
+    assert index_date(INDEX_NAME, "cpu_usage_logs_backup_6_8_2022") is None
+    assert index_date(INDEX_NAME, "cpu_usage_logs_13_8_2022") is None
+    assert index_date("cpu.usage", "cpu_usage_6_8_2022") is None
+
+    names = [day(0), day(3), day(4), day(10), "cpu_usage_logs_backup_1_1_2020", "cpu_usage_logs"]
+    assert expired_indices(INDEX_NAME, names, 3) == sorted([day(4), day(10)])
+    assert expired_indices(INDEX_NAME, names, 3, TODAY - timedelta(days = 1)) == [day(10)]
+
+
+def test_delete_batches():
+    assert delete_batches([]) == []
+    assert delete_batches(["a", "b", "c"]) == ["a,b,c"]
+    assert delete_batches(["aaa", "bbb", "cc", "dddd", "eeeeeeeee"], max_length = 7) == ["aaa,bbb", "cc,dddd", "eeeeeeeee"]
+
+
+# Tests that every expired day is deleted with one request, and days someone else deleted are ignored
+def test_delete_old_indices():
+    with StandInServer() as server:
+        client = server.client()
+        for days_ago in range(8):
+            client.indices.create(index = day(days_ago))
+        client.indices.create(index = INDEX_NAME + "_backup_1_1_2020")
+        state = ClusterState(client)
+        state.load(INDEX_NAME + "*")
+
+        requests = server.stats["requests"]
+        assert delete_old_indices(client, INDEX_NAME, 3, state, "failed") == sorted(day(days_ago) for days_ago in range(4, 8))
+        assert server.stats["requests"] - requests == 1
+        assert sorted(server.indices) == sorted([day(days_ago) for days_ago in range(4)] + [INDEX_NAME + "_backup_1_1_2020"])
+        assert not state.exists(day(5))
+
+        assert delete_indices(client, [day(0), day(5)]) == [day(0), day(5)]
+        assert day(0) not in server.indices
+
+
+# Tests that the policy is installed once, updated when days_before changes, and deletes days by their date
+def test_install_retention_policy():
+    with StandInServer() as server:
+        client = server.client()
+        old_day = dated_index_name(INDEX_NAME, TODAY - timedelta(days = 9))
+        client.indices.create(index = old_day)
+
+        assert install_retention_policy(client, INDEX_NAME, 3) == "installed"
+        assert install_retention_policy(client, INDEX_NAME, 3) == "unchanged"
+        assert server.indices[old_day]["policy_id"] == retention_policy_id(INDEX_NAME)
+
+        # Days dated before the policy was installed do not get it through its ISM template, so they are added to it, and
+        # their age is counted from their date
+        for days_ago in range(6):
+            current_date = datetime.combine(TODAY - timedelta(days = days_ago), datetime.min.time())
+            client.indices.create(index = day(days_ago), body = retention_index_body({"settings": {"index": {"number_of_shards": 1}}}, current_date))
+            assert server.indices[day(days_ago)].get("policy_id") is None
+            assert attach_retention_policy(client, INDEX_NAME, day(days_ago))
+        assert not attach_retention_policy(client, INDEX_NAME, day(0))
+        assert server.indices[day(5)]["settings"]["index.creation_date"] == str(int(datetime.combine(TODAY - timedelta(days = 5), datetime.min.time()).timestamp() * 1000))
+        assert server.run_policies() == sorted([day(4), day(5)])
+
+        # A run that leaves the policy alone still adds the days that have none
+        del server.indices[day(1)]["policy_id"]
+        assert install_retention_policy(client, INDEX_NAME, 3) == "unchanged"
+        assert server.indices[day(1)]["policy_id"] == retention_policy_id(INDEX_NAME)
+
+        assert install_retention_policy(client, INDEX_NAME, 1) == "updated"
+        assert server.run_policies() == sorted([day(2), day(3)])
+        assert server.policies[retention_policy_id(INDEX_NAME)]["policy"]["states"][0]["transitions"][0]["conditions"] == {"min_index_age": "2d"}
+
+
+# Tests that with ISM retention the jobs install the policy and the refresh job deletes nothing itself
+def test_ism_jobs(tmp_path):
+    config = {
+        "plugin": "none",
+        "ingest_args": {"index_name": INDEX_NAME, "data_template": {"year": "year"}, "mapping": False, "timestamp": "date", "minutes": 480, "chunk": 10},
+        "days_before": 2,
+        "days_after": 1,
+        "index_body": {},
+        "create_payload": {},
+        "retention": "ism"
+    }
+    with open(tmp_path / "config.json", "w") as f:
+        f.write(dumps(config))
+
+    with StandInServer() as server:
+        client = server.client()
+        startup_job(str(tmp_path), server.url, HEADER, client, None)
+        assert sorted(server.indices) == sorted(day(days_ago) for days_ago in range(-1, 3))
+        assert all(index["policy_id"] == retention_policy_id(INDEX_NAME) for index in server.indices.values())
+
+        # An expired day is left to the policy, which deletes it by its date
+        client.indices.create(index = day(5), body = retention_index_body({}, TODAY - timedelta(days = 5)))
+        report = refresh_job(str(tmp_path), client)
+        assert report["steps"]["install retention " + INDEX_NAME]["result"] == "unchanged"
+        assert day(5) in server.indices
+        assert server.run_policies() == [day(5)]
+        assert server.run_policies(time() + 86400) == [day(2)]
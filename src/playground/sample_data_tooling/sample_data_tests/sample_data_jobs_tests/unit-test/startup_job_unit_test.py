@@ -6,6 +6,7 @@ SPDX-License-Identifier: Apache-2.0
 from opensearchpy import OpenSearch
 
 # Standard libraries
+from json import dumps
 import pytest
 import sys
 import os
@@ -14,6 +15,7 @@ import os
 sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
 from sample_data_tooling.sample_data_authentication.sample_data_basic_authentication import BasicAuthentication
 from sample_data_tooling.sample_data_jobs.startup_job import startup_job
+from sample_data_tooling.sample_data_commons.stand_in_server import StandInServer
 
 
 # Serializer class that returns nothing; used to mock API call
@@ -69,3 +71,68 @@ def test_invalid_startup_job(requests_mock):
         startup_job(config_path, url, client, client)
     with pytest.raises(TypeError):
         startup_job(config_path, url, header, {"client": client})
+    with pytest.raises(ValueError):
+        startup_job(config_path, url, header, client, parallelism = 0)
+
+
+# Tests that the startup job builds the days of several configs in parallel against a stand-in cluster
+def test_parallel_startup_job(tmp_path):
+    for name, parallelism in (("first", 2), ("second", 1)):
+        config = {
+            "plugin": "anomaly_detection",
+            "ingest_args": {"index_name": name, "data_template": {"value": "integer"}, "mapping": False, "number": 30, "chunk": 10},
+            "days_before": 3,
+            "days_after": 1,
+            "parallelism": parallelism,
+            "index_body": {},
+            "create_payload": {"name": name + "-detector"}
+        }
+        with open(tmp_path / (name + ".json"), "w") as f:
+            f.write(dumps(config))
+
+    with StandInServer() as server:
+        report = startup_job(str(tmp_path), server.url, header, server.client(), None, parallelism = 3)
+        assert len(server.indices) == 10 and all(index["count"] == 30 for index in server.indices.values())
+        assert sorted(detector["detector"]["name"] for detector in server.detectors.values()) == ["first-detector", "second-detector"]
+        assert all(step["status"] == "done" for step in report["steps"].values())
+        assert report["critical_path"][-1].startswith("start ") and report["busy"]["cluster"] > 0
+
+        # A config that fails does not stop the others from starting their plugins
+        server.indices.clear()
+        server.detectors.clear()
+        with open(tmp_path / "first.json", "w") as f:
+            f.write(dumps({"plugin": "anomaly_detection", "ingest_args": {"index_name": "first", "data_template": "missing.json", "file_provided": True}, "days_before": 1, "days_after": 0, "index_body": {}, "create_payload": {"name": "first-detector"}}))
+        with pytest.raises(ConnectionError):
+            startup_job(str(tmp_path), server.url, header, server.client(), None, parallelism = 3)
+        assert [detector["detector"]["name"] for detector in server.detectors.values()] == ["second-detector"]
+        assert server.detectors[list(server.detectors)[0]]["state"] == server.detectors[list(server.detectors)[0]]["historical_state"] == "RUNNING"
+
+
+# Tests that every day gets documents of its own, and that a config with a seed gets the same ones in every run
+def test_seeded_startup_job(tmp_path):
+    config = {
+        "plugin": "anomaly_detection",
+        "ingest_args": {"index_name": "seeded", "data_template": {"value": "integer", "email": "email"}, "mapping": False, "number": 30, "chunk": 5},
+        "days_before": 2,
+        "days_after": 1,
+        "seed": 7,
+        "index_body": {},
+        "create_payload": {"name": "seeded-detector"}
+    }
+    with open(tmp_path / "seeded.json", "w") as f:
+        f.write(dumps(config))
+
+    runs = []
+    for _ in range(2):
+        with StandInServer(keep_documents = True) as server:
+            startup_job(str(tmp_path), server.url, header, server.client(), None, parallelism = 4)
+            runs.append({index: server.documents(index) for index in server.indices})
+    assert len(runs[0]) == 4 and runs[0] == runs[1]
+    days = [[document["value"] for document in documents] for documents in runs[0].values()]
+    assert all(days[i] != days[j] for i in range(4) for j in range(i + 1, 4))
+
+    # A seed should be a non-negative integer
+    with open(tmp_path / "seeded.json", "w") as f:
+        f.write(dumps(dict(config, seed = "7")))
+    with pytest.raises(ValueError):
+        startup_job(str(tmp_path), url, header, client, None)
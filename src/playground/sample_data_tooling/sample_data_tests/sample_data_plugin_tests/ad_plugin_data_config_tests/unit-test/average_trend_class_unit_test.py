@@ -4,7 +4,8 @@ SPDX-License-Identifier: Apache-2.0
 """
 
 from datetime import datetime
-from json import dumps
+from json import dumps, loads
+from random import Random
 import pytest
 import sys
 import os
@@ -12,6 +13,7 @@ import os
 # Adds the directory "/sample_data_tooling" to sys.path
 sys.path.append(os.path.abspath(__file__).split("sample_data_tooling")[0])
 from sample_data_tooling.sample_data_plugins.ad_plugin_data_config.average_trend_class import AverageTrend
+from sample_data_tooling.sample_data_commons.document_batch import DocumentBatch, timestamp_column
 
 
 # Test that all functions function properly
@@ -74,4 +76,76 @@ def test_invalid_AverageTrend():
     with pytest.raises(TypeError):
         new_avg = AverageTrend("timestamp", avg_percent_config, test_entry, test_date)
     with pytest.raises(KeyError):
-        new_avg = AverageTrend("timestamp", {}, test_entry, test_date)
\ No newline at end of file
+        new_avg = AverageTrend("timestamp", {}, test_entry, test_date)
+
+# Test that one AverageTrend can be reused across documents
+def test_reused_AverageTrend():
+    test_date = datetime(datetime.today().year, datetime.today().month, datetime.today().day)
+    unix_time = int(test_date.strftime("%s")) * 1000
+    avg_percent_config = {
+        "feature": "average_percent_off",
+        "avg_min": 0,
+        "avg_max": 10,
+        "abs_min": 0,
+        "abs_max": 100,
+        "anomaly_percentage": 1,
+    }
+    new_avg = AverageTrend("timestamp", avg_percent_config, current_date = test_date)
+    for i in range(20):
+        new_entry = loads(new_avg.generate_data_trend({"timestamp": 0, "average_percent_off": 4}, test_date))
+        assert new_entry["timestamp"] == unix_time
+        assert 0 <= new_entry["average_percent_off"] <= 100
+    with pytest.raises(ValueError):
+        AverageTrend("timestamp", avg_percent_config, {}, test_date)
+
+
+# Test that trends can be applied to a whole column
+def test_column_AverageTrend():
+    test_date = datetime(datetime.today().year, datetime.today().month, datetime.today().day)
+    avg_percent_config = {
+        "feature": "average_percent_off",
+        "avg_min": 0,
+        "avg_max": 10,
+        "abs_min": 0,
+        "abs_max": 100,
+        "anomaly_percentage": 0,
+    }
+    batch = DocumentBatch({"timestamp": [0] * 1000, "average_percent_off": [4] * 1000})
+    AverageTrend("timestamp", avg_percent_config, current_date = test_date).generate_column_trend(batch, timestamp_column(test_date, 1000, 1))
+    assert batch.column("average_percent_off") == [4] * 1000
+    assert batch[1]["timestamp"] == int(test_date.strftime("%s")) * 1000 + 60000
+
+    avg_percent_config["anomaly_percentage"] = 1
+    AverageTrend("timestamp", avg_percent_config, current_date = test_date).generate_column_trend(batch)
+    assert all(type(value) is int and (value >= 10 or value <= 0) for value in batch.column("average_percent_off"))
+
+    # About one in ten values become anomalies
+    avg_percent_config["anomaly_percentage"] = 0.1
+    batch = DocumentBatch({"average_percent_off": [4] * 10000})
+    AverageTrend("timestamp", avg_percent_config, current_date = test_date).generate_column_trend(batch)
+    anomalies = len([value for value in batch.column("average_percent_off") if value != 4])
+    assert 700 < anomalies < 1300
+    with pytest.raises(TypeError):
+        AverageTrend("timestamp", avg_percent_config, current_date = test_date).generate_column_trend([{"average_percent_off": 4}])
+
+
+# Test that a trend given a seeded Random draws the same anomalies again
+def test_seeded_AverageTrend():
+    test_date = datetime(datetime.today().year, datetime.today().month, datetime.today().day)
+    avg_percent_config = {
+        "feature": "average_percent_off",
+        "avg_min": 0,
+        "avg_max": 10,
+        "abs_min": 0,
+        "abs_max": 100,
+        "anomaly_percentage": 0.5,
+    }
+    entries = []
+    columns = []
+    for _ in range(2):
+        new_avg = AverageTrend("timestamp", avg_percent_config, current_date = test_date, rng = Random(5))
+        entries.append([new_avg.generate_data_trend({"timestamp": 0, "average_percent_off": 4}, test_date) for i in range(50)])
+        batch = DocumentBatch({"average_percent_off": [4] * 50})
+        columns.append(AverageTrend("timestamp", avg_percent_config, current_date = test_date, rng = Random(5)).generate_column_trend(batch).column("average_percent_off"))
+    assert entries[0] == entries[1]
+    assert columns[0] == columns[1] and columns[0] != [4] * 50
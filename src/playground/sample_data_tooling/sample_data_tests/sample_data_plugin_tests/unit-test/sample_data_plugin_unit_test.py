@@ -23,6 +23,7 @@ def test_valid_Plugin():
     new_auth = BasicAuthentication("admin", "admin")
     new_plugin = Plugin("test_index", sample_file_path, "https://localhost", new_auth)
     assert new_plugin.url == "https://localhost:9200/"
+    assert Plugin("test_index", sample_file_path, "http://127.0.0.1:8080/", new_auth).url == "http://127.0.0.1:8080/"
     assert new_plugin.unzip() == sample_file_path
     assert new_plugin.convert_payload(sample_file_path, sample_file_path) == {"key": "value"}
     assert new_plugin.convert_payload({"key": "value"}, sample_file_path) == {"key": "value"}